@@ -0,0 +1,4 @@
+"""
+Benchmark and evaluation tools for the legal assistant application.
+Run the individual tools as modules, e.g. python -m benchmarks.retrieval
+"""
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the web backend's article index over the real corpus.
+
+Builds ArticleIndex over the corpus articles and checks that it ranks every
+query exactly like the substring scan it replaced, times both, and reports
+the index's memory. The trigram index has to stay linear in the vocabulary
+(at most one entry per term character); the run fails if the rankings
+differ or the index grows past that.
+
+Usage:
+    python -m benchmarks.article_index --replicate 10 --output bench/article_index.json
+    python -m benchmarks.article_index --compare bench/article_index.json
+"""
+
+import sys
+import time
+import random
+import argparse
+from typing import List, Dict, Any
+
+from .common import (
+    PROJECT_ROOT,
+    DEFAULT_CORPUS,
+    DEFAULT_QUERIES,
+    load_corpus,
+    latency_stats,
+    write_results,
+    compare_results
+)
+
+# The index lives with the web backend
+sys.path.insert(0, str(PROJECT_ROOT / "frontend" / "backend"))
+
+from article_index import ArticleIndex  # noqa: E402
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Article index benchmark')
+
+    parser.add_argument('--data', type=str, default=str(DEFAULT_CORPUS),
+                        help='JSON file with the scraped laws')
+    parser.add_argument('--replicate', type=int, default=1,
+                        help='Replicate the corpus N times (e.g., 10, 100)')
+    parser.add_argument('--random-queries', type=int, default=500,
+                        help='Number of extra queries made of corpus words and word pieces')
+    parser.add_argument('--limit', type=int, default=5,
+                        help='Number of ranked articles per query')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for the random queries')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Compare against a previous result file')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Relative change that counts as a regression')
+
+    return parser.parse_args()
+
+
+def flatten_articles(laws: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Turn the scraped laws into the backend's article dicts"""
+    return [
+        {"number": article.get("number", ""), "title": law.get("title", ""), "content": article.get("content", "")}
+        for law in laws if "error" not in law
+        for article in law.get("articles", [])
+    ]
+
+
+def query_words(query: str) -> List[str]:
+    """The words a search uses (as DBManager: lowercased, longer than 3 characters)"""
+    return [word for word in query.lower().split() if len(word) > 3]
+
+
+def scan_rank(texts: List[str], words: List[str], limit: int) -> List[int]:
+    """The substring scan the index replaced"""
+    counts = [(position, sum(1 for word in words if word in text)) for position, text in enumerate(texts)]
+    counts = [(position, count) for position, count in counts if count > 0]
+    counts.sort(key=lambda x: x[1], reverse=True)
+    return [position for position, _ in counts[:limit]]
+
+
+def random_queries(index: ArticleIndex, count: int, seed: int) -> List[str]:
+    """Queries of whole terms and pieces of terms (prefixes and infixes) from the corpus"""
+    rng = random.Random(seed)
+    terms = [term for term in index.terms if len(term) > 5]
+    queries = []
+    for _ in range(count):
+        words = []
+        for term in rng.sample(terms, min(len(terms), rng.randint(1, 4))):
+            start = rng.randint(0, len(term) - 4)
+            words.append(term[start:rng.randint(start + 4, len(term))])
+        queries.append(" ".join(words))
+    return queries
+
+
+def measure(rank, queries: List[str]) -> Dict[str, Any]:
+    """Time one ranking per query"""
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        rank(query)
+        samples.append(time.perf_counter() - start)
+    return latency_stats(samples)
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    """Run all measurements and return the report"""
+    articles = flatten_articles(load_corpus(args.data, replicate=args.replicate))
+    print(f"Indexing {len(articles)} articles (replicate={args.replicate})...")
+
+    start = time.perf_counter()
+    index = ArticleIndex(articles)
+    build_seconds = time.perf_counter() - start
+
+    texts = [f"{article['title']} {article['content']}".lower() for article in articles]
+    queries = list(DEFAULT_QUERIES) + random_queries(index, args.random_queries, args.seed)
+
+    mismatches = [
+        query for query in queries
+        if index.rank(query_words(query), args.limit) != scan_rank(texts, query_words(query), args.limit)
+    ]
+    print(f"  {len(queries) - len(mismatches)}/{len(queries)} queries ranked like the substring scan")
+
+    term_chars = sum(len(term) for term in index.terms)
+    gram_entries = len(index._gram_terms)
+    memory = index.memory_usage()
+    print(f"  {len(index.terms)} terms ({term_chars} characters), {gram_entries} trigram entries, "
+          f"{memory['total'] / 1e6:.1f} MB")
+
+    results = {
+        "build": {"seconds": round(build_seconds, 3)},
+        "index": measure(lambda query: index.rank(query_words(query), args.limit), queries),
+        "scan": measure(lambda query: scan_rank(texts, query_words(query), args.limit), queries),
+        "size": {
+            "terms": len(index.terms),
+            "term_chars": term_chars,
+            "gram_entries": gram_entries,
+            "memory_bytes": memory,
+        },
+        "mismatches": len(mismatches),
+    }
+    for name in ("index", "scan"):
+        print(f"  {name}: p50={results[name]['p50_ms']:.3f}ms p95={results[name]['p95_ms']:.3f}ms")
+
+    config = {
+        "data": args.data,
+        "replicate": args.replicate,
+        "queries": len(queries),
+        "limit": args.limit,
+        "seed": args.seed,
+    }
+    return write_results(args.output, "article_index", config, results)
+
+
+def main():
+    """Main benchmark function"""
+    args = parse_args()
+    report = run_benchmark(args)
+    results = report["results"]
+
+    failed = False
+    if results["mismatches"]:
+        print(f"\n{results['mismatches']} query(s) ranked differently from the substring scan")
+        failed = True
+    if results["size"]["gram_entries"] > results["size"]["term_chars"]:
+        print("\nThe trigram index has more entries than the vocabulary has characters")
+        failed = True
+
+    if args.compare:
+        regressions = compare_results(report, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Generation throughput with and without dynamic batching.
+
+Runs concurrent generation requests through a BatchScheduler for every
+combination of max batch size and concurrency, and reports generated
+tokens/sec and per-request latency. A max batch size of 1 is the
+one-request-at-a-time baseline.
+
+Usage:
+    python -m benchmarks.batching --model ./gemma-3-model --batch-sizes 1,4,8 --concurrency 1,4,8
+"""
+
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
+
+from model.batching import BatchScheduler
+
+from .common import PROJECT_ROOT, DEFAULT_QUERIES, latency_stats, write_results, compare_results
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Generation throughput with dynamic batching')
+
+    parser.add_argument('--model', type=str, default=str(PROJECT_ROOT / "gemma-3-model"),
+                        help='Local path or Hugging Face ID of a causal language model')
+    parser.add_argument('--device', type=str, default='cpu',
+                        help='Device to run the model on')
+    parser.add_argument('--batch-sizes', type=str, default='1,4,8',
+                        help='Comma-separated max batch sizes (1 = no batching)')
+    parser.add_argument('--concurrency', type=str, default='1,4,8',
+                        help='Comma-separated numbers of concurrent clients')
+    parser.add_argument('--batch-window-ms', type=float, default=20.0,
+                        help='Batching window in milliseconds')
+    parser.add_argument('--requests', type=int, default=16,
+                        help='Requests per measurement')
+    parser.add_argument('--max-new-tokens', type=int, default=64,
+                        help='Tokens generated per request')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Compare against a previous result file')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Relative change that counts as a regression')
+
+    return parser.parse_args()
+
+
+def load_model(model_path: str, device: str):
+    """Load a causal language model and a left-padding tokenizer"""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    model = AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=torch.float32).to(device).eval()
+    return model, tokenizer
+
+
+def make_run_batch(model, tokenizer, max_new_tokens: int):
+    """Batch function generating a fixed number of tokens per prompt"""
+    import torch
+
+    def run_batch(key, prompts: List[str]) -> List[int]:
+        inputs = tokenizer(prompts, padding=True, return_tensors="pt").to(model.device)
+        with torch.inference_mode():
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                min_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id
+            )
+        new_tokens = outputs[:, inputs["input_ids"].shape[-1]:]
+        return [int((row != tokenizer.pad_token_id).sum()) for row in new_tokens]
+
+    return run_batch
+
+
+def measure(run_batch, batch_size: int, concurrency: int, args) -> Dict[str, Any]:
+    """Send requests from concurrent clients through a scheduler"""
+    scheduler = BatchScheduler(
+        run_batch,
+        max_batch_size=batch_size,
+        batch_window_ms=args.batch_window_ms if batch_size > 1 else 0,
+        name=f"bench-{batch_size}"
+    )
+
+    def request(i):
+        start = time.perf_counter()
+        tokens = scheduler.run(DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)])
+        return tokens, time.perf_counter() - start
+
+    try:
+        # Warm up outside the measurement
+        request(0)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            start = time.perf_counter()
+            results = list(executor.map(request, range(args.requests)))
+            elapsed = time.perf_counter() - start
+    finally:
+        scheduler.close()
+
+    tokens = sum(tokens for tokens, _ in results)
+    stats = latency_stats([latency for _, latency in results])
+    stats["tokens_per_sec"] = round(tokens / elapsed, 3) if elapsed else 0.0
+    stats["mean_batch_size"] = scheduler.stats()["mean_batch_size"]
+    return stats
+
+
+def main():
+    """Main benchmark function"""
+    args = parse_args()
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',') if b.strip()]
+    concurrency_levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+
+    print(f"Loading {args.model} on {args.device}...")
+    model, tokenizer = load_model(args.model, args.device)
+    run_batch = make_run_batch(model, tokenizer, args.max_new_tokens)
+
+    results = {}
+    for concurrency in concurrency_levels:
+        for batch_size in batch_sizes:
+            print(f"Measuring {concurrency} client(s), max batch size {batch_size}...")
+            stats = measure(run_batch, batch_size, concurrency, args)
+            results.setdefault(f"concurrency_{concurrency}", {})[f"batch_{batch_size}"] = stats
+            print(f"  {stats['tokens_per_sec']:.1f} tokens/sec, p50={stats['p50_ms']:.0f}ms, "
+                  f"mean batch {stats['mean_batch_size']:.2f}")
+
+    config = {
+        "model": args.model,
+        "device": args.device,
+        "batch_sizes": batch_sizes,
+        "concurrency": concurrency_levels,
+        "batch_window_ms": args.batch_window_ms,
+        "requests": args.requests,
+        "max_new_tokens": args.max_new_tokens,
+    }
+    report = write_results(args.output, "batching", config, results)
+
+    if args.compare:
+        regressions = compare_results(report, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
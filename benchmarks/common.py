@@ -0,0 +1,211 @@
+"""
+Shared helpers for the benchmark tools.
+Corpus loading, statistics and machine-readable result files.
+"""
+
+import os
+import sys
+import json
+import copy
+import platform
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = PROJECT_ROOT / "data" / "labor_laws_full.json"
+
+# Representative questions in both languages (same topics as the test scripts)
+DEFAULT_QUERIES = [
+    "Колко дни е изпитателния срок?",
+    "Какъв е максималният изпитателен срок според Кодекса на труда?",
+    "трудов договор прекратяване",
+    "платен годишен отпуск",
+    "прекратяване от работодателя с предизвестие",
+    "трудово възнаграждение изплащане",
+    "How many days of annual leave am I entitled to?",
+    "What are the requirements for terminating a labor contract?",
+    "What happens if my employer doesn't pay my salary on time?",
+    "What is the maximum probation period according to Bulgarian law?",
+]
+
+
+def load_corpus(json_file_path: str = str(DEFAULT_CORPUS), replicate: int = 1) -> List[Dict[str, Any]]:
+    """
+    Load the scraped laws, optionally replicated to a larger synthetic corpus
+
+    Args:
+        json_file_path: Path to the JSON file produced by the scraper
+        replicate: How many copies of every article to produce
+
+    Returns:
+        List of law dictionaries in the scraper format
+    """
+    with open(json_file_path, 'r', encoding='utf-8') as f:
+        laws = json.load(f)
+
+    if replicate <= 1:
+        return laws
+
+    replicated = []
+    for law in laws:
+        law_copy = copy.copy(law)
+        articles = []
+        for copy_index in range(replicate):
+            for article in law.get("articles", []):
+                if copy_index == 0:
+                    articles.append(article)
+                    continue
+                # Suffix the copies so every article gets a distinct embedding
+                articles.append({
+                    "number": f"{article['number']} (копие {copy_index})",
+                    "content": f"{article['content']}\n[копие {copy_index}]"
+                })
+        law_copy["articles"] = articles
+        replicated.append(law_copy)
+
+    return replicated
+
+
+def count_articles(laws: List[Dict[str, Any]]) -> int:
+    """Count the articles in a list of laws"""
+    return sum(len(law.get("articles", [])) for law in laws if "error" not in law)
+
+
+def latency_stats(samples_s: List[float]) -> Dict[str, float]:
+    """
+    Summarize latency samples
+
+    Args:
+        samples_s: Latencies in seconds
+
+    Returns:
+        Dictionary with count, mean and percentiles in milliseconds
+    """
+    if not samples_s:
+        return {"count": 0}
+
+    samples_ms = np.asarray(samples_s, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {
+        "count": int(samples_ms.size),
+        "mean_ms": round(float(samples_ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(samples_ms.max()), 3),
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    """Collect information about the machine and code version of a run"""
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        commit = None
+
+    packages = {}
+    for package in ("chromadb", "numpy", "torch", "transformers"):
+        module = sys.modules.get(package)
+        if module is not None:
+            packages[package] = getattr(module, "__version__", "unknown")
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": packages,
+    }
+
+
+def write_results(output_path: Optional[str], benchmark: str, config: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Write a benchmark run as JSON
+
+    Args:
+        output_path: File to write (nothing is written if None)
+        benchmark: Name of the benchmark
+        config: Parameters of the run
+        results: Measured results
+
+    Returns:
+        The full report dictionary
+    """
+    report = {
+        "benchmark": benchmark,
+        "environment": environment_info(),
+        "config": config,
+        "results": results,
+    }
+
+    if output_path:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {output_path}")
+
+    return report
+
+
+def _flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested result dictionaries to dotted metric names"""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare_results(current: Dict[str, Any], baseline_path: str, tolerance: float = 0.10) -> List[str]:
+    """
+    Compare a run against a previous result file and print the differences.
+    Metrics ending in _ms regress when they grow, metrics ending in
+    _per_sec or qps regress when they shrink. Maximums are too noisy
+    to compare and are skipped.
+
+    Args:
+        current: Report returned by write_results()
+        baseline_path: Path to the baseline result file
+        tolerance: Allowed relative change before a metric counts as a regression
+
+    Returns:
+        Names of the regressed metrics
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    current_metrics = _flatten(current["results"])
+    baseline_metrics = _flatten(baseline["results"])
+
+    regressions = []
+    print(f"\nComparison with {baseline_path} (tolerance {tolerance:.0%}):")
+    print(f"{'metric':<50} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name in sorted(set(current_metrics) & set(baseline_metrics)):
+        higher_is_better = name.endswith("_per_sec") or name.endswith("qps")
+        lower_is_better = name.endswith("_ms") and not name.endswith("max_ms")
+        if not (higher_is_better or lower_is_better):
+            continue
+
+        old, new = baseline_metrics[name], current_metrics[name]
+        change = (new - old) / old if old else 0.0
+        regressed = (lower_is_better and change > tolerance) or (higher_is_better and change < -tolerance)
+        if regressed:
+            regressions.append(name)
+
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{name:<50} {old:>12.3f} {new:>12.3f} {change:>+8.1%}{marker}")
+
+    return regressions
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Generation latency and throughput of the CPU backend, float32 vs int8.
+
+Loads the same small local causal language model twice with CPUInt8Backend,
+once keeping float32 weights (the baseline) and once with int8 dynamic
+quantization, and measures end-to-end latency, tokens per second and the
+size of the weights for the same prompts. With --draft-model, int8 with
+speculative decoding is measured as well (plus its acceptance rate).
+
+Usage:
+    python -m benchmarks.generation --model ./small-model --requests 16 --max-new-tokens 32
+    python -m benchmarks.generation --model ./small-model --draft-model ./tiny-model
+"""
+
+import sys
+import time
+import argparse
+from typing import Dict, Any
+
+from model.backends import CPUInt8Backend
+
+from .common import DEFAULT_QUERIES, latency_stats, write_results, compare_results
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='CPU generation latency, float32 vs int8')
+
+    parser.add_argument('--model', type=str, required=True,
+                        help='Local path or Hugging Face ID of a causal language model')
+    parser.add_argument('--requests', type=int, default=16,
+                        help='Requests per measurement')
+    parser.add_argument('--max-new-tokens', type=int, default=32,
+                        help='Tokens generated per request')
+    parser.add_argument('--draft-model', type=str, default=None,
+                        help='Also measure speculative decoding with this draft model (same tokenizer)')
+    parser.add_argument('--draft-tokens', type=int, default=5,
+                        help='Tokens the draft model proposes per step')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='PyTorch intra-op threads (default: PyTorch\'s choice)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Compare against a previous result file')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Relative change that counts as a regression')
+
+    return parser.parse_args()
+
+
+def measure(backend: CPUInt8Backend, requests: int, max_new_tokens: int) -> Dict[str, Any]:
+    """Latency and tokens per second of greedy generation, one request at a time"""
+    tokenizer = getattr(backend.processor, "tokenizer", backend.processor)
+
+    # Warm up outside the measurement
+    backend.warmup()
+
+    latencies, tokens = [], 0
+    for i in range(requests):
+        prompt = f"Question: {DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)]}\nAnswer:"
+        start = time.perf_counter()
+        text = backend.generate(prompt, max_new_tokens=max_new_tokens, do_sample=False)
+        latencies.append(time.perf_counter() - start)
+        tokens += len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    return {
+        "latency": latency_stats(latencies),
+        "tokens_per_second": round(tokens / sum(latencies), 2) if latencies else 0.0,
+        **backend.describe(),
+    }
+
+
+def main():
+    """Main benchmark function"""
+    args = parse_args()
+
+    runs = [("fp32", "fp32", None), ("int8", "int8", None)]
+    if args.draft_model:
+        runs.append(("int8_speculative", "int8", args.draft_model))
+
+    results = {}
+    for label, quantize, draft_model in runs:
+        print(f"Loading {args.model} ({label})...")
+        backend = CPUInt8Backend.load(
+            args.model,
+            quantize=quantize,
+            batch_window_ms=0,
+            prefix_cache=False,
+            draft_model=draft_model,
+            draft_tokens=args.draft_tokens,
+            num_threads=args.threads
+        )
+        try:
+            results[label] = measure(backend, args.requests, args.max_new_tokens)
+        finally:
+            backend.scheduler.close()
+
+        stats = results[label]
+        print(f"  p50 {stats['latency']['p50_ms']:.1f}ms, {stats['tokens_per_second']:.1f} tokens/s, "
+              f"{stats['parameters_mb']:.1f} MB of weights")
+
+    before = results["fp32"]["latency"]["p50_ms"]
+    for label in results:
+        after = results[label]["latency"]["p50_ms"]
+        if label != "fp32" and after:
+            print(f"{label} speedup: {before / after:.2f}x (p50)")
+    if "int8_speculative" in results:
+        print(f"Draft tokens accepted: {results['int8_speculative']['speculative']['acceptance_rate']:.0%}")
+
+    config = {
+        "model": args.model,
+        "requests": args.requests,
+        "max_new_tokens": args.max_new_tokens,
+        "threads": args.threads,
+        "draft_model": args.draft_model,
+        "draft_tokens": args.draft_tokens,
+    }
+    report = write_results(args.output, "generation", config, results)
+
+    if args.compare:
+        regressions = compare_results(report, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Overload behavior of the ASGI backend.
+
+Sends questions to /api/query at fixed arrival rates (open loop: arrivals
+don't wait for earlier answers) and reports, per rate, how many were
+answered or refused with 429/503, the answer latency, how fast refusals
+came back and the Retry-After they carried. Above capacity the answered
+rate should stay at capacity, answer latency should stay bounded by the
+queue timeout and refusals should be immediate.
+
+By default the app runs in-process with a simulated answer time, so the
+admission limits can be measured without a model. Pass --service-ms 0 to
+answer with the real backend pipeline in-process, or --url to load a
+running server (uvicorn asgi_app:app).
+
+Usage:
+    python -m benchmarks.load_test --rates 5,20,50 --duration 10 --service-ms 500 --max-in-flight 8
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import http.client
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from .common import PROJECT_ROOT, DEFAULT_QUERIES, latency_stats, write_results, compare_results
+
+# asgi_app and the backend modules live in frontend/backend
+sys.path.insert(0, str(PROJECT_ROOT / "frontend" / "backend"))
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Overload behavior of the ASGI backend')
+
+    parser.add_argument('--rates', type=str, default='5,20,50',
+                        help='Comma-separated arrival rates (requests/sec)')
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='Seconds of arrivals per rate')
+    parser.add_argument('--url', type=str, default=None,
+                        help='Load a running server instead of the in-process app')
+    parser.add_argument('--service-ms', type=float, default=500.0,
+                        help='Simulated answer time of the in-process app (0 = real backend pipeline)')
+    parser.add_argument('--max-in-flight', type=int, default=8,
+                        help='Answers computed at once by the in-process app')
+    parser.add_argument('--max-queued', type=int, default=16,
+                        help='Requests waiting for a slot in the in-process app')
+    parser.add_argument('--queue-timeout', type=float, default=2.0,
+                        help='Longest wait for a slot in the in-process app (seconds)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Compare against a previous result file')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Relative change that counts as a regression')
+
+    return parser.parse_args()
+
+
+def simulated_answer(service_s: float):
+    """Answer function taking a fixed time, standing in for retrieval and generation"""
+    def answer(query: str, conversation_id: Optional[str] = None) -> Dict[str, Any]:
+        time.sleep(service_s)
+        return {"answer": f"Simulated answer to: {query}", "articles": [], "served_by": "simulated"}
+    return answer
+
+
+async def asgi_request(app, query: str) -> Tuple[int, Optional[str]]:
+    """Send one POST /api/query to an ASGI app; returns the status and Retry-After"""
+    body = json.dumps({"query": query}, ensure_ascii=False).encode("utf-8")
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/query",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+    }
+    received = False
+    start = {}
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+
+    await app(scope, receive, send)
+    headers = dict(start.get("headers", []))
+    retry_after = headers.get(b"retry-after")
+    return start["status"], retry_after.decode() if retry_after else None
+
+
+def http_request(url: str, query: str) -> Tuple[int, Optional[str]]:
+    """Send one POST /api/query to a running server"""
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+    try:
+        body = json.dumps({"query": query}, ensure_ascii=False).encode("utf-8")
+        connection.request("POST", "/api/query", body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        return response.status, response.getheader("Retry-After")
+    finally:
+        connection.close()
+
+
+async def run_rate(send_request, rate: float, duration: float, sample=None) -> Dict[str, Any]:
+    """
+    Send requests at a fixed rate and collect their outcomes
+
+    Args:
+        send_request: Coroutine function taking a question, returning (status, Retry-After)
+        rate: Arrivals per second
+        duration: Seconds of arrivals
+        sample: Called every 50ms while requests are outstanding (e.g., to record the queue length)
+
+    Returns:
+        Outcome counts, latencies and throughput
+    """
+    outcomes: List[Tuple[int, float, Optional[str]]] = []
+
+    async def one(i):
+        start = time.perf_counter()
+        try:
+            status, retry_after = await send_request(DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)])
+        except Exception:
+            status, retry_after = 0, None  # connection error
+        outcomes.append((status, time.perf_counter() - start, retry_after))
+
+    count = max(1, int(rate * duration))
+    tasks = []
+    started = time.perf_counter()
+    for i in range(count):
+        delay = started + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(i)))
+
+    while not all(task.done() for task in tasks):
+        if sample is not None:
+            sample()
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+
+    answered = [latency for status, latency, _ in outcomes if status == 200]
+    refused = [latency for status, latency, _ in outcomes if status in (429, 503)]
+    retry_after = [float(value) for status, _, value in outcomes if status in (429, 503) and value]
+    statuses: Dict[str, int] = {}
+    for status, _, _ in outcomes:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    return {
+        "offered_qps": round(count / duration, 3),
+        "completed_qps": round(len(answered) / elapsed, 3) if elapsed else 0.0,
+        "statuses": statuses,
+        "answered": latency_stats(answered),
+        "refused": latency_stats(refused),
+        "mean_retry_after_s": round(sum(retry_after) / len(retry_after), 3) if retry_after else None,
+    }
+
+
+def main():
+    """Main benchmark function"""
+    args = parse_args()
+    rates = [float(r) for r in args.rates.split(',') if r.strip()]
+
+    if args.url:
+        pool = ThreadPoolExecutor(max_workers=256)
+
+        async def send_request(query):
+            return await asyncio.get_running_loop().run_in_executor(pool, http_request, args.url, query)
+
+        app, target = None, args.url
+    else:
+        from asgi_app import LegalASGIApp
+        answer = simulated_answer(args.service_ms / 1000.0) if args.service_ms > 0 else None
+        app = LegalASGIApp(
+            answer=answer,
+            max_in_flight=args.max_in_flight,
+            max_queued=args.max_queued,
+            queue_timeout_s=args.queue_timeout,
+            name="load-test"
+        )
+
+        async def send_request(query):
+            return await asgi_request(app, query)
+
+        target = "in-process" + (f" ({args.service_ms:.0f}ms per answer)" if answer else " (backend pipeline)")
+
+    results = {}
+    for rate in rates:
+        peaks = {"in_flight": 0, "queued": 0}
+
+        def sample():
+            if app is not None:
+                peaks["in_flight"] = max(peaks["in_flight"], app.admission.in_flight)
+                peaks["queued"] = max(peaks["queued"], len(app.admission._waiters))
+
+        print(f"Offering {rate:g} requests/sec for {args.duration:g}s to {target}...")
+        stats = asyncio.run(run_rate(send_request, rate, args.duration, sample))
+        if app is not None:
+            stats["peak_in_flight"] = peaks["in_flight"]
+            stats["peak_queued"] = peaks["queued"]
+        results[f"rate_{rate:g}"] = stats
+
+        answered, refused = stats["answered"], stats["refused"]
+        print(f"  statuses {stats['statuses']}, answered {stats['completed_qps']:.1f}/sec"
+              + (f", answer p50={answered['p50_ms']:.0f}ms p95={answered['p95_ms']:.0f}ms" if answered["count"] else "")
+              + (f", refusal p95={refused['p95_ms']:.1f}ms, Retry-After ~{stats['mean_retry_after_s']}s"
+                 if refused["count"] else ""))
+
+    config = {
+        "target": args.url or "in-process",
+        "rates": rates,
+        "duration": args.duration,
+        "service_ms": args.service_ms if not args.url else None,
+        "max_in_flight": args.max_in_flight if not args.url else None,
+        "max_queued": args.max_queued if not args.url else None,
+        "queue_timeout": args.queue_timeout if not args.url else None,
+    }
+    report = write_results(args.output, "load_test", config, results)
+
+    if args.compare:
+        regressions = compare_results(report, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
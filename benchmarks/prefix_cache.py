@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Prefill time with and without reuse of the system prompt's key/value cache.
+
+Builds prompts the way LegalAssistant does (system prompt, article context,
+question) and measures time to first token and full generation latency,
+once prefilling every prompt in full and once starting from a PrefixCache.
+Meant for the CPU path with a small local causal language model.
+
+Usage:
+    python -m benchmarks.prefix_cache --model ./small-model --requests 16 --max-new-tokens 32
+"""
+
+import sys
+import time
+import argparse
+from typing import List, Dict, Any, Tuple
+
+from model.prompts import SYSTEM_PROMPTS, user_prompt, chat_prompt
+from model.prefix_cache import PrefixCache
+
+from .common import DEFAULT_QUERIES, load_corpus, latency_stats, write_results, compare_results
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Prefill time with and without prefix cache reuse')
+
+    parser.add_argument('--model', type=str, required=True,
+                        help='Local path or Hugging Face ID of a causal language model')
+    parser.add_argument('--device', type=str, default='cpu',
+                        help='Device to run the model on')
+    parser.add_argument('--requests', type=int, default=16,
+                        help='Requests per measurement')
+    parser.add_argument('--max-new-tokens', type=int, default=32,
+                        help='Tokens generated per request for the full latency')
+    parser.add_argument('--context-chars', type=int, default=800,
+                        help='Characters of article text in each prompt')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Compare against a previous result file')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Relative change that counts as a regression')
+
+    return parser.parse_args()
+
+
+def load_model(model_path: str, device: str):
+    """Load a causal language model and its tokenizer"""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=torch.float32).to(device).eval()
+    return model, tokenizer
+
+
+def build_prompts(tokenizer, requests: int, context_chars: int) -> List[Tuple[str, str]]:
+    """Prompts as (prefix, rest) tuples, with article text from the corpus as context"""
+    articles = [
+        article for law in load_corpus() if "error" not in law
+        for article in law.get("articles", [])
+    ]
+
+    prompts = []
+    for i in range(requests):
+        article = articles[i % len(articles)]
+        context = f"Article: {article['number']}\nContent: {article['content'][:context_chars]}\n\n"
+        question = DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)]
+        language = "bg" if any("\u0400" <= c <= "\u04ff" for c in question) else "en"
+        prompts.append(chat_prompt(
+            tokenizer, SYSTEM_PROMPTS[language], user_prompt(question, context, "", language)
+        ))
+    return prompts
+
+
+def measure(model, tokenizer, prompts, max_new_tokens: int, prefix_cache=None) -> Dict[str, Any]:
+    """Time to first token and full latency over all prompts"""
+    import torch
+
+    def generate(prefix, rest, new_tokens):
+        if prefix_cache is not None:
+            inputs = prefix_cache.prepare(prefix, rest)
+        else:
+            inputs = tokenizer(prefix + rest, return_tensors="pt").to(model.device)
+        with torch.inference_mode():
+            model.generate(
+                **inputs,
+                max_new_tokens=new_tokens,
+                min_new_tokens=new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id or tokenizer.eos_token_id
+            )
+
+    # Warm up (and fill the prefix cache) outside the measurement
+    generate(*prompts[0], 1)
+
+    first_token, full = [], []
+    for prefix, rest in prompts:
+        start = time.perf_counter()
+        generate(prefix, rest, 1)
+        first_token.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        generate(prefix, rest, max_new_tokens)
+        full.append(time.perf_counter() - start)
+
+    return {
+        "first_token": latency_stats(first_token),
+        "full": latency_stats(full),
+    }
+
+
+def main():
+    """Main benchmark function"""
+    args = parse_args()
+
+    print(f"Loading {args.model} on {args.device}...")
+    model, tokenizer = load_model(args.model, args.device)
+    prompts = build_prompts(tokenizer, args.requests, args.context_chars)
+
+    prefix_tokens = len(tokenizer(prompts[0][0])["input_ids"])
+    prompt_tokens = sum(len(tokenizer(prefix + rest)["input_ids"]) for prefix, rest in prompts) / len(prompts)
+    print(f"System prompt: {prefix_tokens} tokens of {prompt_tokens:.0f} per prompt on average")
+
+    print("Measuring full prefill...")
+    baseline = measure(model, tokenizer, prompts, args.max_new_tokens)
+
+    print("Measuring prefix cache reuse...")
+    cache = PrefixCache(model, tokenizer, name="bench")
+    cached = measure(model, tokenizer, prompts, args.max_new_tokens, prefix_cache=cache)
+
+    results = {"full_prefill": baseline, "prefix_cache": cached, "prefix_cache_stats": cache.stats()}
+    for name in ("first_token", "full"):
+        before, after = baseline[name]["p50_ms"], cached[name]["p50_ms"]
+        saved = (1 - after / before) * 100 if before else 0.0
+        print(f"  {name}: p50 {before:.1f}ms -> {after:.1f}ms ({saved:.0f}% less)")
+
+    config = {
+        "model": args.model,
+        "device": args.device,
+        "requests": args.requests,
+        "max_new_tokens": args.max_new_tokens,
+        "context_chars": args.context_chars,
+        "prefix_tokens": prefix_tokens,
+        "mean_prompt_tokens": round(prompt_tokens, 1),
+    }
+    report = write_results(args.output, "prefix_cache", config, results)
+
+    if args.compare:
+        regressions = compare_results(report, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Retrieval latency and throughput benchmark over the real corpus.
+
+Measures ingest throughput, search_similar latency (plain, columnar and
+filtered) and queries/sec under concurrent threads, and writes the results
+as JSON so runs can be compared.
+
+Usage:
+    python -m benchmarks.retrieval --replicate 10 --output bench/retrieval.json
+    python -m benchmarks.retrieval --compare bench/retrieval.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
+
+from database import HybridDatabaseManager
+
+from .common import (
+    DEFAULT_CORPUS,
+    DEFAULT_QUERIES,
+    load_corpus,
+    count_articles,
+    latency_stats,
+    write_results,
+    compare_results
+)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Retrieval latency and throughput benchmark')
+
+    parser.add_argument('--data', type=str, default=str(DEFAULT_CORPUS),
+                        help='JSON file with the scraped laws')
+    parser.add_argument('--replicate', type=int, default=1,
+                        help='Replicate the corpus N times (e.g., 10, 100, 1000)')
+    parser.add_argument('--db-dir', type=str, default=None,
+                        help='Directory for the benchmark databases (temporary if not set)')
+    parser.add_argument('--queries', type=str, default=None,
+                        help='Text file with one query per line (built-in set if not set)')
+    parser.add_argument('--iterations', type=int, default=200,
+                        help='Number of timed searches per measurement')
+    parser.add_argument('--n-results', type=int, default=5,
+                        help='Number of results per search')
+    parser.add_argument('--threads', type=str, default='1,4,8',
+                        help='Comma-separated thread counts for the throughput test')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Compare against a previous result file')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Relative change that counts as a regression')
+
+    return parser.parse_args()
+
+
+def measure_ingest(db_manager: HybridDatabaseManager, laws: List[Dict[str, Any]], work_dir: str) -> Dict[str, Any]:
+    """Import the corpus through import_from_json and time it"""
+    json_path = os.path.join(work_dir, "corpus.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(laws, f, ensure_ascii=False)
+
+    articles = count_articles(laws)
+    start = time.perf_counter()
+    db_manager.import_from_json(json_path)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "articles": articles,
+        "seconds": round(elapsed, 3),
+        "articles_per_sec": round(articles / elapsed, 3) if elapsed else 0.0,
+    }
+
+
+def measure_latency(search, queries: List[str], iterations: int) -> Dict[str, Any]:
+    """Time sequential searches cycling through the queries"""
+    # Warm up caches and lazy initialization outside the measurement
+    for query in queries:
+        search(query)
+
+    samples = []
+    for i in range(iterations):
+        query = queries[i % len(queries)]
+        start = time.perf_counter()
+        search(query)
+        samples.append(time.perf_counter() - start)
+
+    return latency_stats(samples)
+
+
+def measure_throughput(search, queries: List[str], iterations: int, threads: int) -> Dict[str, Any]:
+    """Run searches from several threads and report queries/sec"""
+    def timed(i):
+        start = time.perf_counter()
+        search(queries[i % len(queries)])
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.perf_counter()
+        samples = list(executor.map(timed, range(iterations)))
+        elapsed = time.perf_counter() - start
+
+    stats = latency_stats(samples)
+    stats["qps"] = round(iterations / elapsed, 3) if elapsed else 0.0
+    return stats
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    """Run all measurements and return the report"""
+    if args.queries:
+        with open(args.queries, 'r', encoding='utf-8') as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = DEFAULT_QUERIES
+
+    thread_counts = [int(t) for t in args.threads.split(',') if t.strip()]
+    laws = load_corpus(args.data, replicate=args.replicate)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = args.db_dir or tmp_dir
+        os.makedirs(work_dir, exist_ok=True)
+
+        db_manager = HybridDatabaseManager(
+            db_path=os.path.join(work_dir, "legal_db.sqlite"),
+            vector_db_path=os.path.join(work_dir, "vector_db")
+        )
+        db_manager.clear_databases()
+
+        print(f"Ingesting {count_articles(laws)} articles (replicate={args.replicate})...")
+        results = {"ingest": measure_ingest(db_manager, laws, tmp_dir)}
+        print(f"  {results['ingest']['articles_per_sec']:.1f} articles/sec")
+
+        n = args.n_results
+        searches = {
+            "search": lambda q: db_manager.search_similar(q, n_results=n),
+            "search_columnar": lambda q: db_manager.search_similar(q, n_results=n, columnar=True),
+            "filtered_search": lambda q: db_manager.search_similar(
+                q, n_results=n, filters={"category": "labor"}
+            ),
+            "filtered_search_columnar": lambda q: db_manager.search_similar(
+                q, n_results=n, filters={"category": "labor"}, columnar=True
+            ),
+        }
+
+        for name, search in searches.items():
+            print(f"Measuring {name} latency...")
+            results[name] = measure_latency(search, queries, args.iterations)
+            print(f"  p50={results[name]['p50_ms']:.2f}ms p95={results[name]['p95_ms']:.2f}ms "
+                  f"p99={results[name]['p99_ms']:.2f}ms")
+
+        results["throughput"] = {}
+        for threads in thread_counts:
+            print(f"Measuring throughput with {threads} thread(s)...")
+            stats = measure_throughput(searches["search"], queries, args.iterations, threads)
+            results["throughput"][f"threads_{threads}"] = stats
+            print(f"  {stats['qps']:.1f} queries/sec")
+
+    config = {
+        "data": args.data,
+        "replicate": args.replicate,
+        "iterations": args.iterations,
+        "n_results": args.n_results,
+        "threads": thread_counts,
+        "queries": len(queries),
+    }
+    return write_results(args.output, "retrieval", config, results)
+
+
+def main():
+    """Main benchmark function"""
+    args = parse_args()
+    report = run_benchmark(args)
+
+    if args.compare:
+        regressions = compare_results(report, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality vs. latency evaluation over a gold question set.
+
+Every retrieval configuration (embedder, index parameters, n_results) is
+scored with recall@k, MRR and hit rate against data/gold_questions.json,
+together with its search latency and the amount of context text it would
+put in the prompt. The Pareto table shows which configurations are worth
+considering, and --target-recall picks the cheapest one that is good enough.
+
+Usage:
+    python -m benchmarks.retrieval_quality --k 3,5,10 --search-ef default,50,200
+    python -m benchmarks.retrieval_quality --configs my_configs.json --target-recall 0.8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from typing import List, Dict, Any, Optional
+
+from database import HybridDatabaseManager, VectorDBConfig, load_embeddings
+
+from .common import (
+    PROJECT_ROOT,
+    DEFAULT_CORPUS,
+    latency_stats,
+    write_results
+)
+
+
+DEFAULT_GOLD = PROJECT_ROOT / "data" / "gold_questions.json"
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Retrieval quality vs. latency evaluation')
+
+    parser.add_argument('--data', type=str, default=str(DEFAULT_CORPUS),
+                        help='JSON file with the scraped laws')
+    parser.add_argument('--gold', type=str, default=str(DEFAULT_GOLD),
+                        help='JSON file with questions and expected article numbers')
+    parser.add_argument('--configs', type=str, default=None,
+                        help='JSON file with a list of configurations (overrides the grid options)')
+    parser.add_argument('--embedders', type=str, default='hash',
+                        help='Comma-separated embedders: "hash" or "hf:<model name>"')
+    parser.add_argument('--k', type=str, default='1,3,5,10',
+                        help='Comma-separated n_results values')
+    parser.add_argument('--search-ef', type=str, default='default',
+                        help='Comma-separated HNSW search_ef values ("default" for Chroma\'s)')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='How many times every question is searched for the latency numbers')
+    parser.add_argument('--target-recall', type=float, default=None,
+                        help='Report the cheapest configuration reaching this recall@k')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the results to this JSON file')
+
+    return parser.parse_args()
+
+
+def build_configs(args) -> List[Dict[str, Any]]:
+    """Expand the grid options (or load the configuration file)"""
+    if args.configs:
+        with open(args.configs, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    configs = []
+    for embedder in [e.strip() for e in args.embedders.split(',') if e.strip()]:
+        for search_ef in [s.strip() for s in args.search_ef.split(',') if s.strip()]:
+            for k in [int(k) for k in args.k.split(',') if k.strip()]:
+                configs.append({
+                    "embedder": embedder,
+                    "hnsw_search_ef": None if search_ef == "default" else int(search_ef),
+                    "n_results": k,
+                })
+    return configs
+
+
+def config_name(config: Dict[str, Any]) -> str:
+    """Short human-readable name of a configuration"""
+    if config.get("name"):
+        return config["name"]
+    ef = config.get("hnsw_search_ef") or "default"
+    return f"{config.get('embedder', 'hash')} ef={ef} k={config['n_results']}"
+
+
+def build_index(work_dir: str, data_path: str, config: Dict[str, Any]) -> HybridDatabaseManager:
+    """Import the corpus into a fresh database with the configuration's index settings"""
+    db_manager = HybridDatabaseManager(
+        db_path=os.path.join(work_dir, "legal_db.sqlite"),
+        vector_db_path=os.path.join(work_dir, "vector_db"),
+        vector_config=VectorDBConfig(
+            hnsw_construction_ef=config.get("hnsw_construction_ef"),
+            hnsw_search_ef=config.get("hnsw_search_ef"),
+            hnsw_m=config.get("hnsw_m")
+        ),
+        embeddings=load_embeddings(config.get("embedder", "hash"))
+    )
+    db_manager.import_from_json(data_path)
+    return db_manager
+
+
+def evaluate(db_manager: HybridDatabaseManager, gold: List[Dict[str, Any]], k: int, repeats: int) -> Dict[str, Any]:
+    """
+    Score one n_results setting against the gold questions
+
+    Args:
+        db_manager: Database to search
+        gold: Gold questions with expected article numbers
+        k: Number of results to retrieve
+        repeats: Searches per question for the latency measurement
+
+    Returns:
+        Dictionary with recall@k, MRR, hit rate, latency and context size
+    """
+    recalls, reciprocal_ranks, hits, context_chars, samples = [], [], [], [], []
+
+    for item in gold:
+        expected = set(item["expected"])
+
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results = db_manager.search_similar(item["question"], n_results=k, columnar=True)
+            results.load_contents()
+            samples.append(time.perf_counter() - start)
+
+        retrieved = results.article_numbers
+        found = expected.intersection(retrieved)
+        recalls.append(len(found) / len(expected))
+        hits.append(1.0 if found else 0.0)
+
+        rank = next((i + 1 for i, number in enumerate(retrieved) if number in expected), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        context_chars.append(sum(len(results.content(i)) for i in range(len(results))))
+
+    n = len(gold)
+    scores = {
+        "recall_at_k": round(sum(recalls) / n, 4),
+        "mrr": round(sum(reciprocal_ranks) / n, 4),
+        "hit_rate": round(sum(hits) / n, 4),
+        "context_chars": round(sum(context_chars) / n, 1),
+    }
+    scores.update(latency_stats(samples))
+    return scores
+
+
+def mark_pareto(rows: List[Dict[str, Any]]):
+    """
+    Flag the configurations on the Pareto front of recall vs. cost.
+    A row is dominated when another row has at least its recall, no higher
+    p50 latency and no more context, and is strictly better in one of them.
+    """
+    for row in rows:
+        row["pareto"] = not any(
+            other is not row
+            and other["recall_at_k"] >= row["recall_at_k"]
+            and other["p50_ms"] <= row["p50_ms"]
+            and other["context_chars"] <= row["context_chars"]
+            and (
+                other["recall_at_k"] > row["recall_at_k"]
+                or other["p50_ms"] < row["p50_ms"]
+                or other["context_chars"] < row["context_chars"]
+            )
+            for other in rows
+        )
+
+
+def cheapest_meeting(rows: List[Dict[str, Any]], target: float) -> Optional[Dict[str, Any]]:
+    """Pick the configuration with the least context (then latency) reaching the target recall"""
+    candidates = [row for row in rows if row["recall_at_k"] >= target]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda row: (row["context_chars"], row["p50_ms"]))
+
+
+def print_table(rows: List[Dict[str, Any]]):
+    """Print the results sorted by recall, Pareto-optimal rows marked with *"""
+    print(f"\n{'':1} {'configuration':<32} {'recall@k':>9} {'MRR':>7} {'hit':>6} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'ctx chars':>10}")
+    for row in sorted(rows, key=lambda r: (-r["recall_at_k"], r["p50_ms"])):
+        marker = "*" if row["pareto"] else " "
+        print(f"{marker:1} {row['name']:<32} {row['recall_at_k']:>9.3f} {row['mrr']:>7.3f} "
+              f"{row['hit_rate']:>6.2f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+              f"{row['context_chars']:>10.0f}")
+    print("\n* = on the Pareto front (recall vs. latency and context size)")
+
+
+def main():
+    """Main evaluation function"""
+    args = parse_args()
+
+    with open(args.gold, 'r', encoding='utf-8') as f:
+        gold = json.load(f)
+
+    configs = build_configs(args)
+    print(f"Evaluating {len(configs)} configuration(s) on {len(gold)} gold questions...")
+
+    # Configurations that differ only in n_results share one index
+    index_groups: Dict[str, List[Dict[str, Any]]] = {}
+    for config in configs:
+        index_key = json.dumps(
+            {key: value for key, value in config.items() if key not in ("n_results", "name")},
+            sort_keys=True
+        )
+        index_groups.setdefault(index_key, []).append(config)
+
+    rows = []
+    for group in index_groups.values():
+        with tempfile.TemporaryDirectory() as work_dir:
+            print(f"Building index for {config_name(group[0]).rsplit(' k=', 1)[0]}...")
+            db_manager = build_index(work_dir, args.data, group[0])
+
+            for config in group:
+                row = {"name": config_name(config), "config": config}
+                row.update(evaluate(db_manager, gold, config["n_results"], args.repeats))
+                rows.append(row)
+
+    mark_pareto(rows)
+    print_table(rows)
+
+    results = {"configurations": rows}
+    if args.target_recall is not None:
+        best = cheapest_meeting(rows, args.target_recall)
+        results["target_recall"] = args.target_recall
+        results["recommended"] = best["name"] if best else None
+        if best:
+            print(f"\nCheapest configuration with recall@k >= {args.target_recall}: {best['name']}")
+        else:
+            print(f"\nNo configuration reaches recall@k >= {args.target_recall}")
+
+    write_results(args.output, "retrieval_quality", {"data": args.data, "gold": args.gold}, results)
+
+    if args.target_recall is not None and results["recommended"] is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@
 Database module for the legal assistant application.
 """
 
-from .db_manager import HybridDatabaseManager
+from .db_manager import HybridDatabaseManager, load_embeddings
+from .results import SearchResults, SearchHit
+from .text_store import ArticleTextStore
+from .corpus import CorpusStore, CorpusBuilder, ArticleView
 from .schema import (
     LegalDocument,
     LegalArticle,
@@ -12,6 +15,13 @@ from .schema import (
 
 __all__ = [
     'HybridDatabaseManager',
+    'load_embeddings',
+    'SearchResults',
+    'SearchHit',
+    'ArticleTextStore',
+    'CorpusStore',
+    'CorpusBuilder',
+    'ArticleView',
     'LegalDocument',
     'LegalArticle',
     'LegalAmendment',
@@ -0,0 +1,324 @@
+"""
+Compact in-memory corpus store for the legal assistant application.
+Keeps all article texts in one UTF-8 buffer for serving and batch jobs.
+"""
+
+import sys
+import json
+import sqlite3
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+import numpy as np
+
+from .schema import LegalArticle
+
+
+class ArticleView:
+    """
+    Read-only view of one article in a CorpusStore.
+    Holds only the store and a row index; text is decoded on access.
+    """
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "CorpusStore", index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def number(self) -> str:
+        return self._store.number_table[self._store.number_index[self._index]]
+
+    @property
+    def law_id(self) -> str:
+        return self._store.law_table[self._store.law_index[self._index]][0]
+
+    @property
+    def law_title(self) -> str:
+        return self._store.law_table[self._store.law_index[self._index]][1]
+
+    @property
+    def article_id(self) -> Optional[str]:
+        return self._store.article_id(self._index)
+
+    @property
+    def content_bytes(self) -> memoryview:
+        return self._store.content_bytes(self._index)
+
+    @property
+    def content(self) -> str:
+        return self._store.content(self._index)
+
+    def to_article(self) -> LegalArticle:
+        """Materialize the view as a LegalArticle dataclass"""
+        return LegalArticle(
+            id=self.article_id or "",
+            law_id=self.law_id,
+            number=self.number,
+            content=self.content
+        )
+
+    def __repr__(self) -> str:
+        return f"ArticleView({self.index}, {self.number!r})"
+
+
+class CorpusBuilder:
+    """Accumulates articles and packs them into a CorpusStore"""
+
+    def __init__(self):
+        self._text = bytearray()
+        self._offsets = [0]
+        self._laws: Dict[Tuple[str, str], int] = {}
+        self._numbers: Dict[str, int] = {}
+        self._law_index: List[int] = []
+        self._number_index: List[int] = []
+        self._article_ids: List[str] = []
+
+    def add(
+        self,
+        law_id: str,
+        law_title: str,
+        number: str,
+        content: str,
+        article_id: Optional[str] = None
+    ) -> int:
+        """
+        Append an article
+
+        Args:
+            law_id: ID of the parent law
+            law_title: Title of the parent law
+            number: Article number (e.g., "Чл. 70")
+            content: Full text of the article
+            article_id: ID of the article in the SQL database (optional)
+
+        Returns:
+            Row index of the article in the store
+        """
+        self._text += content.encode("utf-8")
+        self._offsets.append(len(self._text))
+        self._law_index.append(self._laws.setdefault((law_id, law_title), len(self._laws)))
+        self._number_index.append(self._numbers.setdefault(number, len(self._numbers)))
+        if article_id is not None:
+            self._article_ids.append(article_id)
+        return len(self._offsets) - 2
+
+    @property
+    def count(self) -> int:
+        """Number of articles added so far"""
+        return len(self._law_index)
+
+    def build(self) -> "CorpusStore":
+        """Pack the accumulated articles into a CorpusStore"""
+        if self._article_ids and len(self._article_ids) != len(self._law_index):
+            raise ValueError("article_id must be given for all articles or for none")
+
+        return CorpusStore(
+            text=bytes(self._text),
+            offsets=np.asarray(self._offsets, dtype=np.int64),
+            law_table=list(self._laws),
+            law_index=np.asarray(self._law_index, dtype=np.int32),
+            number_table=list(self._numbers),
+            number_index=np.asarray(self._number_index, dtype=np.int32),
+            article_ids=np.asarray(self._article_ids, dtype="S") if self._article_ids else None
+        )
+
+
+class CorpusStore:
+    """
+    Array-backed corpus of legal articles.
+
+    All contents live in a single UTF-8 buffer addressed by an offsets array.
+    Law and article-number strings are interned in small tables and referenced
+    by integer columns. Articles are exposed through ArticleView objects that
+    decode their text only when it is read.
+    """
+
+    def __init__(
+        self,
+        text: bytes,
+        offsets: np.ndarray,
+        law_table: List[Tuple[str, str]],
+        law_index: np.ndarray,
+        number_table: List[str],
+        number_index: np.ndarray,
+        article_ids: Optional[np.ndarray] = None
+    ):
+        """
+        Initialize the store from already packed columns
+
+        Args:
+            text: Concatenated UTF-8 encoded article contents
+            offsets: Start offset of every article plus the final end offset
+            law_table: Unique (law_id, law_title) pairs
+            law_index: Index into law_table for every article
+            number_table: Unique article numbers
+            number_index: Index into number_table for every article
+            article_ids: Fixed-width byte strings with the SQL article IDs (optional)
+        """
+        self.text = text
+        self.offsets = offsets
+        self.law_table = law_table
+        self.law_index = law_index
+        self.number_table = number_table
+        self.number_index = number_index
+        self.article_ids = article_ids
+        self._view = memoryview(text)
+        self._by_number: Optional[Dict[str, np.ndarray]] = None
+
+    @classmethod
+    def from_json(cls, json_file_path: str) -> "CorpusStore":
+        """
+        Build a store from a JSON file (as produced by the scraper)
+
+        Args:
+            json_file_path: Path to the JSON file
+
+        Returns:
+            CorpusStore instance
+        """
+        with open(json_file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        builder = CorpusBuilder()
+        for law_data in data:
+            # Skip laws with errors
+            if "error" in law_data:
+                continue
+
+            law_id = law_data.get("url", "")
+            law_title = law_data.get("title", "Unknown")
+            for article_data in law_data.get("articles", []):
+                builder.add(
+                    law_id,
+                    law_title,
+                    article_data.get("number", "Unknown"),
+                    article_data.get("content", "")
+                )
+
+        return builder.build()
+
+    @classmethod
+    def from_sqlite(cls, db_path: str) -> "CorpusStore":
+        """
+        Build a store from the SQL database
+
+        Args:
+            db_path: Path to the SQLite database file
+
+        Returns:
+            CorpusStore instance
+        """
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                """
+                SELECT la.id, la.number, la.content, ld.id, ld.title
+                FROM legal_articles la
+                JOIN legal_documents ld ON la.law_id = ld.id
+                ORDER BY la.rowid
+                """
+            )
+
+            builder = CorpusBuilder()
+            for article_id, number, content, law_id, law_title in cursor:
+                builder.add(law_id, law_title, number, content, article_id=article_id)
+
+            return builder.build()
+
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> ArticleView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("corpus index out of range")
+        return ArticleView(self, index)
+
+    def __iter__(self) -> Iterator[ArticleView]:
+        for i in range(len(self)):
+            yield ArticleView(self, i)
+
+    def scan(self, start: int = 0, end: Optional[int] = None) -> Iterator[ArticleView]:
+        """
+        Iterate over the corpus with a single reused view.
+        The yielded view is moved to the next article on every step,
+        so it must not be kept after the loop body.
+
+        Args:
+            start: First row to visit
+            end: Row to stop before (defaults to the end of the corpus)
+        """
+        view = ArticleView(self, start)
+        for i in range(start, len(self) if end is None else end):
+            view._index = i
+            yield view
+
+    def content_bytes(self, index: int) -> memoryview:
+        """Get the UTF-8 encoded content of an article without copying"""
+        return self._view[self.offsets[index]:self.offsets[index + 1]]
+
+    def content(self, index: int) -> str:
+        """Decode the content of an article"""
+        return str(self.content_bytes(index), "utf-8")
+
+    def article_id(self, index: int) -> Optional[str]:
+        """Get the SQL ID of an article (None if the store has no IDs)"""
+        if self.article_ids is None:
+            return None
+        return self.article_ids[index].decode("ascii")
+
+    def find(self, number: str) -> List[ArticleView]:
+        """
+        Find articles by number
+
+        Args:
+            number: Article number (e.g., "Чл. 70")
+
+        Returns:
+            Matching articles (several laws may share a number)
+        """
+        if self._by_number is None:
+            # Group row indices by interned number once
+            order = np.argsort(self.number_index, kind="stable")
+            bounds = np.searchsorted(
+                self.number_index[order],
+                np.arange(len(self.number_table) + 1)
+            )
+            self._by_number = {
+                number_value: order[bounds[i]:bounds[i + 1]]
+                for i, number_value in enumerate(self.number_table)
+            }
+
+        return [ArticleView(self, int(i)) for i in self._by_number.get(number, ())]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Estimate the memory used by the store
+
+        Returns:
+            Dictionary with byte counts per component and the total
+        """
+        usage = {
+            "text": len(self.text),
+            "offsets": self.offsets.nbytes,
+            "law_index": self.law_index.nbytes,
+            "number_index": self.number_index.nbytes,
+            "article_ids": self.article_ids.nbytes if self.article_ids is not None else 0,
+            "tables": sum(sys.getsizeof(n) for n in self.number_table) + sum(
+                sys.getsizeof(law_id) + sys.getsizeof(title)
+                for law_id, title in self.law_table
+            )
+        }
+        usage["total"] = sum(usage.values())
+        return usage
@@ -6,23 +6,53 @@ Handles interactions with both the vector database and SQL database.
 import os
 import uuid
 import sqlite3
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 import json
 
 import chromadb
 from chromadb.config import Settings
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
 
 from .schema import (
     LegalDocument,
     LegalArticle,
     LegalAmendment,
     VectorDBConfig,
-    SQL_SCHEMA
+    SQL_SCHEMA,
+    SQL_INDEXES
+)
+from .results import SearchResults
+from .corpus import CorpusBuilder
+from .text_store import ArticleTextStore
+from monitoring import REGISTRY, current_timer, span, traced
+
+SEARCH_LATENCY = REGISTRY.histogram(
+    "legal_vector_search_seconds",
+    "Time spent in HybridDatabaseManager.search_similar, SQL filtering included",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
 )
 
 
+def load_embeddings(spec: Optional[str]) -> Optional[Embeddings]:
+    """
+    Create the sentence embedding model for an embedder spec
+    
+    Args:
+        spec: "hf:<model name>" for a Hugging Face sentence embedding model;
+            None, "" or "hash" for the built-in hash embeddings
+        
+    Returns:
+        The embedding model, or None for the built-in hash embeddings
+    """
+    if not spec or spec == "hash":
+        return None
+    if spec.startswith("hf:"):
+        return HuggingFaceEmbeddings(model_name=spec[3:])
+    raise ValueError(f"Unknown embedder: {spec}")
+
+
 class HybridDatabaseManager:
     """
     Manages interactions with both vector database and SQL database.
@@ -33,7 +63,9 @@ class HybridDatabaseManager:
         self,
         db_path: str = "../data/legal_db.sqlite",
         vector_db_path: str = "../data/vector_db",
-        vector_config: VectorDBConfig = None
+        vector_config: VectorDBConfig = None,
+        text_store_path: Optional[str] = None,
+        embeddings: Optional[Embeddings] = None
     ):
         """
         Initialize the database manager
@@ -42,10 +74,19 @@ class HybridDatabaseManager:
             db_path: Path to the SQLite database file
             vector_db_path: Path to the ChromaDB directory
             vector_config: Configuration for the vector database
+            text_store_path: Directory of the memory-mapped article text store
+                (defaults to "article_text" next to the SQLite file)
+            embeddings: Embedding model (defaults to the built-in hash embeddings)
         """
         self.db_path = db_path
         self.vector_db_path = vector_db_path
         self.vector_config = vector_config or VectorDBConfig()
+        self.text_store_path = text_store_path or os.path.join(
+            os.path.dirname(db_path), "article_text"
+        )
+        self.embeddings = embeddings
+        # The built-in hash embeddings don't capture meaning
+        self.semantic_embeddings = embeddings is not None
         
         # Ensure directories exist
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -54,6 +95,10 @@ class HybridDatabaseManager:
         # Initialize databases
         self._init_sql_db()
         self._init_vector_db()
+        self.text_store = ArticleTextStore(self.text_store_path)
+        
+        # (database file stat, generation) of the last corpus_generation() read
+        self._generation: Optional[Tuple[Tuple[int, int], Optional[str]]] = None
     
     def _init_sql_db(self):
         """Initialize the SQL database with the schema"""
@@ -63,6 +108,8 @@ class HybridDatabaseManager:
         # Create tables from schema
         for table_name, create_statement in SQL_SCHEMA.items():
             cursor.execute(create_statement)
+        for index_name, create_statement in SQL_INDEXES.items():
+            cursor.execute(create_statement)
         
         conn.commit()
         conn.close()
@@ -88,12 +135,14 @@ class HybridDatabaseManager:
             # Collection doesn't exist, create it
             self.collection = self.chroma_client.create_collection(
                 name=self.vector_config.collection_name,
-                metadata={"hnsw:space": self.vector_config.distance_metric}
+                metadata=self.vector_config.collection_metadata()
             )
         
-        # Initialize a simple embedding model
-        from langchain_core.embeddings import Embeddings
+        # Keep a custom embedding model (e.g., after clear_databases)
+        if self.embeddings is not None:
+            return
         
+        # Initialize a simple embedding model
         class SimpleEmbeddings(Embeddings):
             """A simple embedding model that returns random vectors."""
             
@@ -175,7 +224,8 @@ class HybridDatabaseManager:
                         article.id = str(uuid.uuid4())
                     
                     article.law_id = document.id
-                    
+                
+                for article in document.articles:
                     # Generate embedding and add to vector database
                     embedding = self.embeddings.embed_query(article.content)
                     
@@ -184,12 +234,7 @@ class HybridDatabaseManager:
                     self.collection.add(
                         ids=[article.embedding_id],
                         embeddings=[embedding],
-                        metadatas=[{
-                            "article_id": article.id,
-                            "law_id": document.id,
-                            "article_number": article.number,
-                            "law_title": document.title
-                        }],
+                        metadatas=[self._article_metadata(article, document)],
                         documents=[article.content]
                     )
                     
@@ -209,8 +254,9 @@ class HybridDatabaseManager:
                         )
                     )
             
+            self._bump_generation(cursor)
             conn.commit()
-            return document.id
+            self._generation = None
             
         except Exception as e:
             conn.rollback()
@@ -218,6 +264,48 @@ class HybridDatabaseManager:
         
         finally:
             conn.close()
+        
+        if document.articles:
+            self._store_texts(document)
+        return document.id
+    
+    def _article_metadata(
+        self,
+        article: LegalArticle,
+        document: LegalDocument,
+        text_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Vector database metadata of an article"""
+        metadata = {
+            "article_id": article.id,
+            "law_id": document.id,
+            "article_number": article.number,
+            "law_title": document.title
+        }
+        if text_id is not None:
+            metadata["text_id"] = text_id
+        return metadata
+    
+    def _store_texts(self, document: LegalDocument):
+        """
+        Store the texts of a committed document in the memory-mapped store
+        and record their text IDs with the vectors. Only called after the
+        SQL commit, so a rolled back document leaves nothing in the store.
+        
+        Args:
+            document: The committed document
+        """
+        text_ids = self.text_store.append_many(
+            (article.id, article.content) for article in document.articles
+        )
+        # Without a text ID in the metadata, contents are looked up by article ID
+        self.collection.update(
+            ids=[article.embedding_id for article in document.articles],
+            metadatas=[
+                self._article_metadata(article, document, text_id)
+                for article, text_id in zip(document.articles, text_ids)
+            ]
+        )
     
     def add_amendment(self, amendment: LegalAmendment) -> str:
         """
@@ -267,7 +355,9 @@ class HybridDatabaseManager:
                     affected_values
                 )
             
+            self._bump_generation(cursor)
             conn.commit()
+            self._generation = None
             return amendment.id
             
         except Exception as e:
@@ -277,12 +367,60 @@ class HybridDatabaseManager:
         finally:
             conn.close()
     
+    def question_embedder(self):
+        """
+        Get the sentence embedding function for questions
+        
+        Returns:
+            The embedding model's embed_query, or None with the built-in
+            hash embeddings (their similarity says nothing about meaning)
+        """
+        return self.embeddings.embed_query if self.semantic_embeddings else None
+    
+    def corpus_generation(self) -> Optional[str]:
+        """
+        Get a token that changes whenever the corpus changes (documents or
+        amendments added, databases cleared), also across processes.
+        Used to invalidate cached answers.
+        
+        Returns:
+            The current generation token (None before anything was imported)
+        """
+        # A commit from any process rewrites the database file, so the token
+        # is only read again after the file changed (or after our own commit)
+        stat = os.stat(self.db_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._generation
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute(
+                "SELECT value FROM corpus_metadata WHERE key = 'generation'"
+            ).fetchone()
+        finally:
+            conn.close()
+        
+        generation = row[0] if row else None
+        self._generation = (version, generation)
+        return generation
+    
+    def _bump_generation(self, cursor):
+        """Record a new corpus generation as part of the caller's transaction"""
+        cursor.execute(
+            "INSERT OR REPLACE INTO corpus_metadata (key, value) VALUES ('generation', ?)",
+            (uuid.uuid4().hex,)
+        )
+    
+    @traced("HybridDatabaseManager.search_similar")
     def search_similar(
         self, 
         query: str, 
         n_results: int = 5,
-        filters: Dict[str, Any] = None
-    ) -> List[Dict[str, Any]]:
+        filters: Dict[str, Any] = None,
+        columnar: bool = False
+    ) -> Union[List[Dict[str, Any]], SearchResults]:
         """
         Search for articles similar to the query
         
@@ -290,25 +428,75 @@ class HybridDatabaseManager:
             query: The search query
             n_results: Number of results to return
             filters: Metadata filters to apply
+            columnar: Return a SearchResults object with lazily loaded
+                contents instead of a list of dictionaries
             
         Returns:
-            List of article dictionaries
+            List of article dictionaries, or SearchResults if columnar is True
         """
+        with SEARCH_LATENCY.time():
+            return self._search_similar(query, n_results, filters, columnar)
+    
+    def _search_similar(
+        self,
+        query: str,
+        n_results: int,
+        filters: Optional[Dict[str, Any]],
+        columnar: bool
+    ) -> Union[List[Dict[str, Any]], SearchResults]:
+        """Search for articles similar to the query (see search_similar)"""
+        timer = current_timer()
+        
         # Generate embedding for the query
-        query_embedding = self.embeddings.embed_query(query)
+        with timer.stage("search.embed_query"):
+            query_embedding = self.embeddings.embed_query(query)
+        
+        if columnar:
+            # Leave the documents out, they are fetched on demand
+            with timer.stage("search.vector_query"), span("chroma.query", n_results=n_results):
+                search_results = self.collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=n_results,
+                    include=["metadatas", "distances"]
+                )
+            results = SearchResults.from_chroma(
+                search_results,
+                content_loader=self._load_contents
+            )
+            
+            if filters:
+                with timer.stage("search.sql_filter"):
+                    return self._apply_sql_filters_columnar(results, filters)
+            
+            return results
+        
+        # Texts come from the mmap store when it has been populated
+        use_text_store = len(self.text_store) > 0
+        include = ["metadatas", "distances"]
+        if not use_text_store:
+            include.append("documents")
         
         # Search vector database
-        search_results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            include=["metadatas", "documents", "distances"]
-        )
+        with timer.stage("search.vector_query"), span("chroma.query", n_results=n_results):
+            search_results = self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                include=include
+            )
+        
+        if use_text_store:
+            contents = self._load_contents(
+                SearchResults.from_chroma(search_results),
+                list(range(len(search_results["ids"][0])))
+            )
+        else:
+            contents = search_results["documents"][0]
         
         # Format results
         results = []
         for i in range(len(search_results["ids"][0])):
             result = {
-                "content": search_results["documents"][0][i],
+                "content": contents[i],
                 "metadata": search_results["metadatas"][0][i],
                 "similarity": 1 - search_results["distances"][0][i] 
                 # Convert distance to similarity score
@@ -317,11 +505,136 @@ class HybridDatabaseManager:
         
         # If filters are provided, apply SQL filtering
         if filters:
-            filtered_results = self._apply_sql_filters(results, filters)
+            with timer.stage("search.sql_filter"):
+                filtered_results = self._apply_sql_filters(results, filters)
             return filtered_results
         
         return results
     
+    @traced("HybridDatabaseManager.load_contents")
+    def _load_contents(
+        self,
+        results: SearchResults,
+        rows: List[int]
+    ) -> List[Optional[str]]:
+        """
+        Load article contents for rows of a search result.
+        Texts are sliced from the memory-mapped store; anything missing
+        there is fetched from the vector database in one call.
+        
+        Args:
+            results: Search results holding the rows
+            rows: Row indices to load
+            
+        Returns:
+            Contents in the same order as the rows (None if missing)
+        """
+        timer = current_timer()
+        
+        with timer.stage("search.content_fetch"):
+            contents = []
+            for i in rows:
+                text_id = int(results.text_ids[i])
+                if text_id < 0:
+                    text_id = self.text_store.id_for(results.article_ids[i])
+                contents.append(None if text_id is None else self.text_store.get(text_id))
+        
+        missing = [j for j, content in enumerate(contents) if content is None]
+        if missing:
+            with timer.stage("search.content_fetch_vector_db"):
+                embedding_ids = [results.ids[rows[j]] for j in missing]
+                fetched = self.collection.get(ids=embedding_ids, include=["documents"])
+                documents = dict(zip(fetched["ids"], fetched["documents"]))
+                for j, embedding_id in zip(missing, embedding_ids):
+                    contents[j] = documents.get(embedding_id)
+        
+        return contents
+    
+    def build_text_store(self) -> int:
+        """
+        Copy articles that are missing from the text store out of SQL.
+        Used to populate the store for databases imported before it existed.
+        
+        Returns:
+            Number of articles added to the store
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT id, content FROM legal_articles ORDER BY rowid")
+            missing = [
+                (article_id, content) for article_id, content in cursor
+                if article_id not in self.text_store
+            ]
+        finally:
+            conn.close()
+        
+        self.text_store.append_many(missing)
+        return len(missing)
+    
+    def _build_filter_query(
+        self,
+        select: str,
+        article_ids: List[str],
+        filters: Dict[str, Any]
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the SQL query used to filter vector search results
+        
+        Args:
+            select: Columns to select
+            article_ids: IDs of the candidate articles
+            filters: Filters to apply
+            
+        Returns:
+            Tuple of the SQL query and its parameters
+        """
+        placeholders = ",".join(["?"] * len(article_ids))
+        
+        query = f"""
+            SELECT {select}
+            FROM legal_articles la
+            JOIN legal_documents ld ON la.law_id = ld.id
+            LEFT JOIN document_tags dt ON ld.id = dt.document_id
+            WHERE la.id IN ({placeholders})
+        """
+        
+        params = list(article_ids)
+        where_clauses = []
+        
+        # Add filter conditions
+        if "document_type" in filters:
+            where_clauses.append("ld.document_type = ?")
+            params.append(filters["document_type"])
+        
+        if "category" in filters:
+            where_clauses.append("ld.category = ?")
+            params.append(filters["category"])
+        
+        if "tags" in filters:
+            placeholders = ",".join(["?"] * len(filters["tags"]))
+            where_clauses.append(f"dt.tag IN ({placeholders})")
+            params.extend(filters["tags"])
+        
+        if "date_after" in filters:
+            where_clauses.append("ld.date_published >= ?")
+            params.append(filters["date_after"])
+        
+        if "date_before" in filters:
+            where_clauses.append("ld.date_published <= ?")
+            params.append(filters["date_before"])
+        
+        # Add WHERE clauses if any
+        if where_clauses:
+            query += " AND " + " AND ".join(where_clauses)
+        
+        # Group to handle multiple tags
+        query += " GROUP BY la.id"
+        
+        return query, params
+    
+    @traced("HybridDatabaseManager.sql_filter")
     def _apply_sql_filters(
         self, 
         vector_results: List[Dict[str, Any]], 
@@ -342,7 +655,6 @@ class HybridDatabaseManager:
         
         # Extract article IDs for SQL filtering
         article_ids = [r["metadata"]["article_id"] for r in vector_results]
-        placeholders = ",".join(["?"] * len(article_ids))
         
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
@@ -350,47 +662,13 @@ class HybridDatabaseManager:
         
         try:
             # Build SQL query based on filters
-            query = f"""
-                SELECT la.id as article_id, la.content, la.number, 
-                       ld.id as law_id, ld.title, ld.document_type,
-                       ld.date_published, ld.category, ld.subcategory
-                FROM legal_articles la
-                JOIN legal_documents ld ON la.law_id = ld.id
-                LEFT JOIN document_tags dt ON ld.id = dt.document_id
-                WHERE la.id IN ({placeholders})
-            """
-            
-            params = list(article_ids)
-            where_clauses = []
-            
-            # Add filter conditions
-            if "document_type" in filters:
-                where_clauses.append("ld.document_type = ?")
-                params.append(filters["document_type"])
-            
-            if "category" in filters:
-                where_clauses.append("ld.category = ?")
-                params.append(filters["category"])
-            
-            if "tags" in filters:
-                placeholders = ",".join(["?"] * len(filters["tags"]))
-                where_clauses.append(f"dt.tag IN ({placeholders})")
-                params.extend(filters["tags"])
-            
-            if "date_after" in filters:
-                where_clauses.append("ld.date_published >= ?")
-                params.append(filters["date_after"])
-            
-            if "date_before" in filters:
-                where_clauses.append("ld.date_published <= ?")
-                params.append(filters["date_before"])
-            
-            # Add WHERE clauses if any
-            if where_clauses:
-                query += " AND " + " AND ".join(where_clauses)
-            
-            # Group to handle multiple tags
-            query += " GROUP BY la.id"
+            query, params = self._build_filter_query(
+                """la.id as article_id, la.content, la.number, 
+                   ld.id as law_id, ld.title, ld.document_type,
+                   ld.date_published, ld.category, ld.subcategory""",
+                article_ids,
+                filters
+            )
             
             # Execute query
             cursor.execute(query, params)
@@ -413,6 +691,47 @@ class HybridDatabaseManager:
         finally:
             conn.close()
     
+    @traced("HybridDatabaseManager.sql_filter")
+    def _apply_sql_filters_columnar(
+        self,
+        vector_results: SearchResults,
+        filters: Dict[str, Any]
+    ) -> SearchResults:
+        """
+        Apply SQL filters to columnar vector search results.
+        Only the matching article IDs are read back from SQL.
+        
+        Args:
+            vector_results: Results from vector search
+            filters: Filters to apply
+            
+        Returns:
+            Filtered results
+        """
+        if not filters or not vector_results:
+            return vector_results
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            query, params = self._build_filter_query(
+                "la.id",
+                vector_results.article_ids,
+                filters
+            )
+            cursor.execute(query, params)
+            matching_ids = {row[0] for row in cursor.fetchall()}
+            
+            keep = [
+                i for i, article_id in enumerate(vector_results.article_ids)
+                if article_id in matching_ids
+            ]
+            return vector_results.take(keep)
+            
+        finally:
+            conn.close()
+    
     def get_document_by_id(self, document_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a document by its ID
@@ -505,6 +824,46 @@ class HybridDatabaseManager:
         finally:
             conn.close()
     
+    def get_articles_by_number(self, numbers: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get articles by their numbers (uses the index on legal_articles.number)
+        
+        Args:
+            numbers: Article numbers, with or without the "Чл." prefix ("Чл. 70" or "70")
+            
+        Returns:
+            Article data (as get_article_by_id), in the order of the numbers;
+            several laws may share a number, unknown numbers are skipped
+        """
+        numbers = [number if number.startswith("Чл.") else f"Чл. {number}" for number in numbers]
+        if not numbers:
+            return []
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            placeholders = ", ".join("?" for _ in numbers)
+            cursor.execute(
+                f"""
+                SELECT la.*, ld.title as law_title, ld.document_type, 
+                       ld.date_published, ld.category, ld.subcategory
+                FROM legal_articles la
+                JOIN legal_documents ld ON la.law_id = ld.id
+                WHERE la.number IN ({placeholders})
+                """,
+                numbers
+            )
+            articles = [dict(row) for row in cursor.fetchall()]
+            
+            order = {number: i for i, number in enumerate(numbers)}
+            articles.sort(key=lambda article: order[article["number"]])
+            return articles
+            
+        finally:
+            conn.close()
+    
     def import_from_json(self, json_file_path: str):
         """
         Import data from a JSON file (as produced by the scraper)
@@ -515,6 +874,10 @@ class HybridDatabaseManager:
         with open(json_file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
+        # Pack the article texts into one buffer and keep only the law
+        # headers, so the parsed JSON can be dropped before the import
+        builder = CorpusBuilder()
+        documents = []
         for law_data in data:
             # Skip laws with errors
             if "error" in law_data:
@@ -542,18 +905,34 @@ class HybridDatabaseManager:
                 articles=[]
             )
             
-            # Create LegalArticles
+            start = builder.count
             for article_data in law_data.get("articles", []):
-                article = LegalArticle(
+                builder.add(
+                    document.id,
+                    document.title,
+                    article_data.get("number", "Unknown"),
+                    article_data.get("content", "")
+                )
+            documents.append((document, start, builder.count))
+        
+        del data
+        store = builder.build()
+        
+        for document, start, end in documents:
+            # Create LegalArticles for one law at a time
+            document.articles = [
+                LegalArticle(
                     id=str(uuid.uuid4()),
                     law_id=document.id,  # Will be filled in by add_document
-                    number=article_data.get("number", "Unknown"),
-                    content=article_data.get("content", "")
+                    number=view.number,
+                    content=view.content
                 )
-                document.articles.append(article)
+                for view in store.scan(start, end)
+            ]
             
             # Add to database
             self.add_document(document)
+            document.articles = []  # Release the law's articles before the next one
             
     def clear_databases(self):
         """Clear both databases (for testing purposes)"""
@@ -564,6 +943,9 @@ class HybridDatabaseManager:
         except Exception as e:
             print(f"Error clearing vector database: {e}")
         
+        # Clear the article text store
+        self.text_store.clear()
+        
         # Clear SQL database
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -582,6 +964,9 @@ class HybridDatabaseManager:
             
             # Recreate tables
             self._init_sql_db()
+            self._bump_generation(cursor)
+            conn.commit()
+            self._generation = None
             
         except Exception as e:
             conn.rollback()
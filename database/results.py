@@ -0,0 +1,298 @@
+"""
+Compact search result containers for the legal assistant application.
+Holds vector search hits as columns instead of one dictionary per hit.
+"""
+
+from typing import List, Dict, Any, Optional, Callable, Iterator, Sequence, Union
+
+import numpy as np
+
+
+# Loads article contents for the given rows of a result set (in the same order)
+ContentLoader = Callable[["SearchResults", List[int]], List[Optional[str]]]
+
+
+class SearchHit:
+    """
+    Lightweight view of a single row in a SearchResults object.
+    Nothing is copied: every attribute is read from the parent columns.
+    """
+
+    __slots__ = ("_results", "_index")
+
+    def __init__(self, results: "SearchResults", index: int):
+        self._results = results
+        self._index = index
+
+    @property
+    def id(self) -> str:
+        return self._results.ids[self._index]
+
+    @property
+    def article_id(self) -> str:
+        return self._results.article_ids[self._index]
+
+    @property
+    def law_id(self) -> str:
+        return self._results.law_ids[self._index]
+
+    @property
+    def article_number(self) -> str:
+        return self._results.article_numbers[self._index]
+
+    @property
+    def law_title(self) -> str:
+        return self._results.law_titles[self._index]
+
+    @property
+    def text_id(self) -> int:
+        return int(self._results.text_ids[self._index])
+
+    @property
+    def similarity(self) -> float:
+        return float(self._results.similarities[self._index])
+
+    @property
+    def content(self) -> str:
+        return self._results.content(self._index)
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self._results.metadata(self._index)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the hit to the legacy result dictionary"""
+        return self._results.to_dict(self._index)
+
+    def __repr__(self) -> str:
+        return f"SearchHit({self.article_number!r}, similarity={self.similarity:.3f})"
+
+
+class SearchResults:
+    """
+    Column-oriented vector search results.
+
+    IDs and metadata are kept in parallel sequences, similarity scores and
+    text store IDs in NumPy arrays. Article contents are fetched lazily (and
+    in batches) through the content loader, so callers that only need
+    metadata never pay for the text. Use to_dicts() to get the legacy
+    list-of-dicts format.
+    """
+
+    __slots__ = (
+        "ids",
+        "article_ids",
+        "law_ids",
+        "article_numbers",
+        "law_titles",
+        "similarities",
+        "text_ids",
+        "_contents",
+        "_content_loader"
+    )
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        article_ids: Sequence[str],
+        law_ids: Sequence[str],
+        article_numbers: Sequence[str],
+        law_titles: Sequence[str],
+        similarities: Union[Sequence[float], np.ndarray],
+        text_ids: Optional[Union[Sequence[int], np.ndarray]] = None,
+        contents: Optional[List[Optional[str]]] = None,
+        content_loader: Optional[ContentLoader] = None
+    ):
+        """
+        Initialize the result columns
+
+        Args:
+            ids: IDs of the hits in the vector store
+            article_ids: IDs of the articles in the SQL database
+            law_ids: IDs of the parent laws
+            article_numbers: Article numbers (e.g., "Чл. 70")
+            law_titles: Titles of the parent laws
+            similarities: Similarity scores (1 - distance)
+            text_ids: IDs in the article text store (-1 if not stored there)
+            contents: Already known article contents (None for unknown entries)
+            content_loader: Callable used to fetch missing contents by row
+        """
+        self.ids = list(ids)
+        self.article_ids = list(article_ids)
+        self.law_ids = list(law_ids)
+        self.article_numbers = list(article_numbers)
+        self.law_titles = list(law_titles)
+        self.similarities = np.asarray(similarities, dtype=np.float64)
+        self.text_ids = (
+            np.asarray(text_ids, dtype=np.int64) if text_ids is not None
+            else np.full(len(self.ids), -1, dtype=np.int64)
+        )
+        self._contents = contents if contents is not None else [None] * len(self.ids)
+        self._content_loader = content_loader
+
+    @classmethod
+    def empty(cls) -> "SearchResults":
+        """Create an empty result set"""
+        return cls([], [], [], [], [], [])
+
+    @classmethod
+    def from_chroma(
+        cls,
+        query_result: Dict[str, Any],
+        content_loader: Optional[ContentLoader] = None
+    ) -> "SearchResults":
+        """
+        Build results from the output of a single-query ChromaDB query
+
+        Args:
+            query_result: Dictionary returned by collection.query()
+            content_loader: Callable used to fetch contents that were not included
+
+        Returns:
+            SearchResults instance
+        """
+        ids = query_result["ids"][0]
+        metadatas = query_result["metadatas"][0]
+        distances = query_result["distances"][0]
+        documents = query_result.get("documents")
+
+        contents = list(documents[0]) if documents else None
+
+        return cls(
+            ids=ids,
+            article_ids=[m["article_id"] for m in metadatas],
+            law_ids=[m["law_id"] for m in metadatas],
+            article_numbers=[m["article_number"] for m in metadatas],
+            law_titles=[m["law_title"] for m in metadatas],
+            similarities=1.0 - np.asarray(distances, dtype=np.float64),
+            text_ids=[m.get("text_id", -1) for m in metadatas],
+            contents=contents,
+            content_loader=content_loader
+        )
+
+    @classmethod
+    def from_dicts(cls, results: List[Dict[str, Any]]) -> "SearchResults":
+        """
+        Build results from the legacy list-of-dicts format
+
+        Args:
+            results: Results as returned by search_similar(columnar=False)
+
+        Returns:
+            SearchResults instance
+        """
+        return cls(
+            ids=[r["metadata"].get("article_id", "") + "_embedding" for r in results],
+            article_ids=[r["metadata"].get("article_id", "") for r in results],
+            law_ids=[r["metadata"].get("law_id", "") for r in results],
+            article_numbers=[r["metadata"]["article_number"] for r in results],
+            law_titles=[r["metadata"]["law_title"] for r in results],
+            similarities=[r["similarity"] for r in results],
+            text_ids=[r["metadata"].get("text_id", -1) for r in results],
+            contents=[r["content"] for r in results]
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __bool__(self) -> bool:
+        return len(self.ids) > 0
+
+    def __iter__(self) -> Iterator[SearchHit]:
+        for i in range(len(self.ids)):
+            yield SearchHit(self, i)
+
+    def __getitem__(self, index: int) -> SearchHit:
+        if index < 0:
+            index += len(self.ids)
+        if not 0 <= index < len(self.ids):
+            raise IndexError("search result index out of range")
+        return SearchHit(self, index)
+
+    def take(self, indices: Union[Sequence[int], np.ndarray]) -> "SearchResults":
+        """
+        Select a subset of rows (e.g., after filtering or reranking)
+
+        Args:
+            indices: Row indices to keep, in the desired order
+
+        Returns:
+            New SearchResults sharing the content loader
+        """
+        indices = [int(i) for i in indices]
+        return SearchResults(
+            ids=[self.ids[i] for i in indices],
+            article_ids=[self.article_ids[i] for i in indices],
+            law_ids=[self.law_ids[i] for i in indices],
+            article_numbers=[self.article_numbers[i] for i in indices],
+            law_titles=[self.law_titles[i] for i in indices],
+            similarities=self.similarities[indices] if indices else [],
+            text_ids=self.text_ids[indices] if indices else [],
+            contents=[self._contents[i] for i in indices],
+            content_loader=self._content_loader
+        )
+
+    def load_contents(self, indices: Optional[Sequence[int]] = None):
+        """
+        Fetch missing contents in a single batch
+
+        Args:
+            indices: Rows to load (all rows if None)
+        """
+        if indices is None:
+            indices = range(len(self.ids))
+
+        missing = [i for i in indices if self._contents[i] is None]
+        if not missing or self._content_loader is None:
+            return
+
+        loaded = self._content_loader(self, missing)
+        for i, content in zip(missing, loaded):
+            self._contents[i] = content
+
+    def content(self, index: int) -> str:
+        """
+        Get the content of a row, fetching it if needed
+
+        Args:
+            index: Row index
+
+        Returns:
+            Article content (empty string if it cannot be loaded)
+        """
+        if self._contents[index] is None:
+            self.load_contents([index])
+        return self._contents[index] or ""
+
+    def metadata(self, index: int) -> Dict[str, Any]:
+        """Build the legacy metadata dictionary for a row"""
+        metadata = {
+            "article_id": self.article_ids[index],
+            "law_id": self.law_ids[index],
+            "article_number": self.article_numbers[index],
+            "law_title": self.law_titles[index]
+        }
+        if self.text_ids[index] >= 0:
+            metadata["text_id"] = int(self.text_ids[index])
+        return metadata
+
+    def to_dict(self, index: int) -> Dict[str, Any]:
+        """Build the legacy result dictionary for a row"""
+        return {
+            "content": self.content(index),
+            "metadata": self.metadata(index),
+            "similarity": float(self.similarities[index])
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Convert to the legacy list-of-dicts format
+
+        Returns:
+            List of result dictionaries with content, metadata and similarity
+        """
+        self.load_contents()
+        return [self.to_dict(i) for i in range(len(self.ids))]
+
+    def __repr__(self) -> str:
+        return f"SearchResults({len(self.ids)} hits)"
@@ -55,6 +55,20 @@ class VectorDBConfig:
     collection_name: str = "legal_articles"
     embedding_dimension: int = 768  # For default embeddings
     distance_metric: str = "cosine"
+    hnsw_construction_ef: Optional[int] = None  # Index build quality (None = Chroma default)
+    hnsw_search_ef: Optional[int] = None  # Search breadth (None = Chroma default)
+    hnsw_m: Optional[int] = None  # Graph connectivity (None = Chroma default)
+    
+    def collection_metadata(self) -> Dict[str, Any]:
+        """Collection metadata with the distance metric and index parameters"""
+        metadata = {"hnsw:space": self.distance_metric}
+        if self.hnsw_construction_ef is not None:
+            metadata["hnsw:construction_ef"] = self.hnsw_construction_ef
+        if self.hnsw_search_ef is not None:
+            metadata["hnsw:search_ef"] = self.hnsw_search_ef
+        if self.hnsw_m is not None:
+            metadata["hnsw:M"] = self.hnsw_m
+        return metadata
     
 
 # Schema for SQL tables
@@ -114,5 +128,20 @@ SQL_SCHEMA = {
             FOREIGN KEY (amendment_id) REFERENCES legal_amendments (id),
             FOREIGN KEY (article_id) REFERENCES legal_articles (id)
         )
+    """,
+    
+    "corpus_metadata": """
+        CREATE TABLE IF NOT EXISTS corpus_metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """
+}
+
+# Indexes for lookups that don't go by primary key
+SQL_INDEXES = {
+    "idx_legal_articles_number": """
+        CREATE INDEX IF NOT EXISTS idx_legal_articles_number
+        ON legal_articles (number)
     """
-}
\ No newline at end of file
+}
@@ -0,0 +1,227 @@
+"""
+Memory-mapped article text store for the legal assistant application.
+Serves article contents straight from an append-only file.
+"""
+
+import os
+import mmap
+import shutil
+import threading
+from typing import List, Dict, Optional, Tuple, Iterable
+
+import numpy as np
+
+
+# One index record per article: byte offset and byte length in the data file
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4")])
+
+
+class ArticleTextStore:
+    """
+    Append-only article content store addressed by compact integer IDs.
+
+    The directory holds three files:
+        articles.bin  - concatenated UTF-8 article contents
+        articles.idx  - fixed-size (offset, length) records, one per text ID
+        articles.keys - SQL article ID of every text ID, one per line
+
+    Both data and index are memory-mapped read-only, so reading a text is a
+    slice of mapped memory without any system call, and the pages are shared
+    by every process that maps the same files.
+    """
+
+    DATA_FILE = "articles.bin"
+    INDEX_FILE = "articles.idx"
+    KEYS_FILE = "articles.keys"
+
+    def __init__(self, path: str):
+        """
+        Open (or prepare) a store
+
+        Args:
+            path: Directory holding the store files (created on first append)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        # Snapshot of the current mappings, replaced as a whole on refresh
+        self._maps: Tuple[Optional[mmap.mmap], np.ndarray, np.ndarray] = (
+            None,
+            np.empty(0, dtype="<u8"),
+            np.empty(0, dtype="<u4")
+        )
+        self._keys: Dict[str, int] = {}
+        self._keys_read = 0
+        self._keys_count = 0
+
+        self.refresh()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def refresh(self):
+        """Re-map the files to pick up texts appended since the last call"""
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self):
+        index_path = self._file(self.INDEX_FILE)
+        data_path = self._file(self.DATA_FILE)
+
+        if not os.path.exists(index_path) or os.path.getsize(index_path) == 0:
+            return
+
+        # Only complete records are visible, a concurrent writer may be mid-record
+        count = os.path.getsize(index_path) // INDEX_DTYPE.itemsize
+        if count == len(self._maps[1]):
+            return
+        index = np.memmap(index_path, dtype=INDEX_DTYPE, mode="r", shape=(count,))
+
+        data_map = None
+        if os.path.getsize(data_path) > 0:
+            with open(data_path, "rb") as f:
+                data_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._maps = (data_map, index["offset"], index["length"])
+
+        # Read only the keys appended since the last refresh. Line i belongs to
+        # record i; an article appended again maps to its newest record
+        with open(self._file(self.KEYS_FILE), "r", encoding="utf-8") as f:
+            f.seek(self._keys_read)
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                self._keys[line[:-1]] = self._keys_count
+                self._keys_count += 1
+                self._keys_read += len(line.encode("utf-8"))
+
+    def __len__(self) -> int:
+        return len(self._maps[1])
+
+    def __contains__(self, article_id: str) -> bool:
+        return article_id in self._keys
+
+    def append(self, article_id: str, content: str) -> int:
+        """
+        Append a single article text
+
+        Args:
+            article_id: SQL ID of the article
+            content: Full text of the article
+
+        Returns:
+            Integer text ID of the stored content
+        """
+        return self.append_many([(article_id, content)])[0]
+
+    def append_many(self, items: Iterable[Tuple[str, str]]) -> List[int]:
+        """
+        Append several article texts and re-map the files once.
+        An article that is already stored gets a new text ID; the old text
+        stays readable under its old ID.
+
+        Args:
+            items: (article_id, content) pairs
+
+        Returns:
+            Integer text IDs in the same order
+        """
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            data_path = self._file(self.DATA_FILE)
+
+            index_path = self._file(self.INDEX_FILE)
+            offset = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+            # Text IDs are record positions in the index file
+            next_id = (os.path.getsize(index_path) if os.path.exists(index_path) else 0) // INDEX_DTYPE.itemsize
+
+            records = []
+            keys = []
+            chunks = []
+            for article_id, content in items:
+                encoded = content.encode("utf-8")
+                records.append((offset, len(encoded)))
+                chunks.append(encoded)
+                keys.append(article_id)
+                offset += len(encoded)
+
+            if not records:
+                return []
+
+            # Data first, then the index: readers never see a record without its bytes
+            with open(data_path, "ab") as f:
+                f.write(b"".join(chunks))
+            with open(index_path, "ab") as f:
+                f.write(np.array(records, dtype=INDEX_DTYPE).tobytes())
+            with open(self._file(self.KEYS_FILE), "a", encoding="utf-8") as f:
+                f.write("".join(f"{key}\n" for key in keys))
+
+            self._refresh_locked()
+            return list(range(next_id, next_id + len(records)))
+
+    def get_bytes(self, text_id: int) -> Optional[memoryview]:
+        """
+        Get the UTF-8 encoded content of a text without copying.
+        An ID past the mapped records re-maps the files once, since another
+        process may have appended it.
+
+        Args:
+            text_id: Integer text ID
+
+        Returns:
+            Memoryview of the mapped bytes, or None if the ID is unknown
+        """
+        data_map, offsets, lengths = self._maps
+        if text_id >= len(offsets):
+            self.refresh()
+            data_map, offsets, lengths = self._maps
+        if not 0 <= text_id < len(offsets):
+            return None
+        if data_map is None:
+            return memoryview(b"")
+
+        start = int(offsets[text_id])
+        return memoryview(data_map)[start:start + int(lengths[text_id])]
+
+    def get(self, text_id: int) -> Optional[str]:
+        """
+        Get the content of a text
+
+        Args:
+            text_id: Integer text ID
+
+        Returns:
+            Decoded content, or None if the ID is unknown
+        """
+        data = self.get_bytes(text_id)
+        return None if data is None else str(data, "utf-8")
+
+    def id_for(self, article_id: str) -> Optional[int]:
+        """Get the text ID stored for an SQL article ID"""
+        return self._keys.get(article_id)
+
+    def get_by_article_id(self, article_id: str) -> Optional[str]:
+        """
+        Get the content of an article by its SQL ID
+
+        Args:
+            article_id: SQL ID of the article
+
+        Returns:
+            Decoded content, or None if the article is not in the store
+        """
+        text_id = self._keys.get(article_id)
+        return None if text_id is None else self.get(text_id)
+
+    def clear(self):
+        """Delete all stored texts"""
+        with self._lock:
+            self._maps = (
+                None,
+                np.empty(0, dtype="<u8"),
+                np.empty(0, dtype="<u4")
+            )
+            self._keys = {}
+            self._keys_read = 0
+            self._keys_count = 0
+            shutil.rmtree(self.path, ignore_errors=True)
@@ -1,19 +1,112 @@
-from flask import Flask, request, jsonify
+import json
+import time
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from legal_query import answer_legal_query
+
+import paths  # noqa: F401  (makes the monitoring package importable)
+from monitoring import REGISTRY, CONTENT_TYPE, span
+from legal_query import (
+    answer_legal_query, stream_legal_query, preload_gemma, model_status, cache_stats, fast_path_stats,
+    end_conversation
+)
 
 app = Flask(__name__)
 CORS(app)  # Enable cross-origin requests
 
+# Load the model at startup in the background; requests never wait for a load
+preload_gemma(background=True)
+
+REQUESTS = REGISTRY.counter(
+    "legal_http_requests_total",
+    "HTTP requests handled by the backend",
+    ("method", "route", "status")
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    "legal_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route")
+)
+
+@app.before_request
+def start_timer():
+    """Remember when the request started."""
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """Count the request and record its latency under the matched route."""
+    start = g.get("request_start")
+    if start is not None:
+        # Label by the route pattern, not the raw path, to keep the label set bounded
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_LATENCY.labels(request.method, route).observe(time.perf_counter() - start)
+        REQUESTS.labels(request.method, route, response.status_code).inc()
+    return response
+
 @app.route('/api/query', methods=['POST'])
 def query():
     """API endpoint for processing labor law queries."""
     data = request.json
     if not data or 'query' not in data:
         return jsonify({"error": "No query provided"}), 400
-    
-    result = answer_legal_query(data['query'])
+
+    with span("POST /api/query"):
+        result = answer_legal_query(data['query'], data.get('conversation_id'))
     return jsonify(result)
 
+@app.route('/api/query/stream', methods=['GET', 'POST'])
+def query_stream():
+    """
+    Server-sent events variant of /api/query.
+    Sends an "articles" event right after retrieval, then "token" events while
+    the answer is generated and a final "done" event with the full answer.
+    Accepts a JSON body or ?query=... (for EventSource clients), with an
+    optional conversation_id to continue a conversation.
+    """
+    data = request.get_json(silent=True) or {}
+    user_query = data.get('query') or request.args.get('query')
+    conversation_id = data.get('conversation_id') or request.args.get('conversation_id')
+    if not user_query:
+        return jsonify({"error": "No query provided"}), 400
+
+    def events():
+        for event in stream_legal_query(user_query, conversation_id):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    # The request latency metric for this route measures the time to the first byte
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness check: 200 once the model is loaded and warmed up, 503 before."""
+    status = model_status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+@app.route('/api/cache', methods=['GET'])
+def cache():
+    """Answer cache hit rate and size."""
+    return jsonify(cache_stats())
+
+@app.route('/api/conversation/<conversation_id>', methods=['DELETE'])
+def delete_conversation(conversation_id):
+    """Forget a conversation (its turns and articles)."""
+    if not end_conversation(conversation_id):
+        return jsonify({"error": "Unknown conversation"}), 404
+    return jsonify({"deleted": conversation_id})
+
+@app.route('/api/fast-path', methods=['GET'])
+def fast_path():
+    """Share of questions answered by direct article lookup."""
+    return jsonify(fast_path_stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5001)
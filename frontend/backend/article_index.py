@@ -0,0 +1,176 @@
+"""
+Inverted index over the articles of the backend's JSON database.
+
+Built once when the articles are loaded, so a search no longer rescans and
+lowercases every article. Terms are the lowercased whitespace-separated
+words of an article's title and content, each with a posting list of the
+articles containing it and how often. A query word matches every term that
+contains it (the search has always matched substrings, so "изпитателн"
+finds "изпитателният"). Those terms are found through a trigram index over
+the vocabulary: the terms containing all of the word's trigrams are
+candidates, checked with a substring test. It holds each distinct trigram
+of a term once, so it grows linearly with the vocabulary.
+"""
+
+import sys
+
+import numpy as np
+
+# Length of the substrings in the term index; shorter words scan the vocabulary
+_GRAM = 3
+
+
+class ArticleIndex:
+    """Term postings and article numbers of a list of articles (dicts with number, title, content)"""
+
+    def __init__(self, articles):
+        """
+        Build the index.
+
+        Args:
+            articles: The articles; they are referred to by their position in this list.
+        """
+        self.size = len(articles)
+
+        # Article positions by number, in list order
+        self.numbers = {}
+        postings = {}
+        for position, article in enumerate(articles):
+            self.numbers.setdefault(article["number"], []).append(position)
+            for term in f"{article['title']} {article['content']}".lower().split():
+                counts = postings.setdefault(term, {})
+                counts[position] = counts.get(position, 0) + 1
+
+        # Postings of all terms in two flat arrays, term i at offsets[i]:offsets[i + 1]
+        self.terms = list(postings)
+        lengths = [len(counts) for counts in postings.values()]
+        self.offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.posting_articles = np.fromiter(
+            (position for counts in postings.values() for position in counts),
+            dtype=np.int64, count=int(self.offsets[-1])
+        )
+        self.posting_frequencies = np.fromiter(
+            (tf for counts in postings.values() for tf in counts.values()),
+            dtype=np.int64, count=int(self.offsets[-1])
+        )
+
+        # Terms by trigram, in the same flat layout: gram i at gram_offsets[i]:gram_offsets[i + 1]
+        grams = {}
+        for term_id, term in enumerate(self.terms):
+            for gram in {term[start:start + _GRAM] for start in range(len(term) - _GRAM + 1)}:
+                grams.setdefault(gram, []).append(term_id)
+        self._gram_ids = {gram: gram_id for gram_id, gram in enumerate(grams)}
+        self._gram_offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        np.cumsum([len(term_ids) for term_ids in grams.values()], out=self._gram_offsets[1:])
+        self._gram_terms = np.fromiter(
+            (term_id for term_ids in grams.values() for term_id in term_ids),
+            dtype=np.int64, count=int(self._gram_offsets[-1])
+        )
+
+    def matching_terms(self, word):
+        """
+        Find the terms containing a word.
+
+        Args:
+            word: Lowercased word without whitespace.
+
+        Returns:
+            IDs of the matching terms (array).
+        """
+        if len(word) < _GRAM:
+            return np.array([term_id for term_id, term in enumerate(self.terms) if word in term], dtype=np.int64)
+
+        # Intersect the term lists of the word's trigrams, rarest first
+        lists = []
+        for gram in {word[start:start + _GRAM] for start in range(len(word) - _GRAM + 1)}:
+            gram_id = self._gram_ids.get(gram)
+            if gram_id is None:
+                return np.zeros(0, dtype=np.int64)
+            lists.append(self._gram_terms[self._gram_offsets[gram_id]:self._gram_offsets[gram_id + 1]])
+        lists.sort(key=len)
+        candidates = lists[0]
+        for term_ids in lists[1:]:
+            candidates = np.intersect1d(candidates, term_ids, assume_unique=True)
+
+        # Sharing all the trigrams doesn't make the word a substring of the term
+        return np.array([term_id for term_id in candidates if word in self.terms[term_id]], dtype=np.int64)
+
+    def term_frequencies(self, word):
+        """
+        Count the occurrences of terms containing a word in every article.
+
+        Args:
+            word: Lowercased word without whitespace.
+
+        Returns:
+            Occurrences per article position (array of length size).
+        """
+        frequencies = np.zeros(self.size, dtype=np.int64)
+        term_ids = self.matching_terms(word)
+        if len(term_ids):
+            rows = np.concatenate([
+                np.arange(self.offsets[term_id], self.offsets[term_id + 1]) for term_id in term_ids
+            ])
+            np.add.at(frequencies, self.posting_articles[rows], self.posting_frequencies[rows])
+        return frequencies
+
+    def count_matches(self, words):
+        """
+        Count how many of the words occur in every article.
+
+        Args:
+            words: Lowercased words without whitespace (repeated words count again).
+
+        Returns:
+            Matched words per article position (array of length size).
+        """
+        matches = np.zeros(self.size, dtype=np.int64)
+        for word in words:
+            matches += self.term_frequencies(word) > 0
+        return matches
+
+    def rank(self, words, limit):
+        """
+        Rank the articles by the number of words they contain.
+
+        Args:
+            words: Lowercased words without whitespace.
+            limit: Most positions returned.
+
+        Returns:
+            Positions of the articles containing any of the words, best first
+            (ties in list order).
+        """
+        matches = self.count_matches(words)
+        order = np.argsort(-matches, kind="stable")[:limit]
+        return [int(position) for position in order if matches[position] > 0]
+
+    def memory_usage(self):
+        """
+        Estimate the memory used by the index.
+
+        Returns:
+            Byte counts per component and the total.
+        """
+        usage = {
+            "terms": sum(sys.getsizeof(term) for term in self.terms),
+            "postings": self.offsets.nbytes + self.posting_articles.nbytes + self.posting_frequencies.nbytes,
+            "grams": self._gram_offsets.nbytes + self._gram_terms.nbytes + sum(
+                sys.getsizeof(gram) for gram in self._gram_ids
+            ),
+        }
+        usage["total"] = sum(usage.values())
+        return usage
+
+    def positions(self, numbers):
+        """
+        Get the positions of the articles with any of the given numbers.
+
+        Args:
+            numbers: Article numbers.
+
+        Returns:
+            The positions, in list order.
+        """
+        return sorted(position for number in set(numbers) for position in self.numbers.get(number, ()))
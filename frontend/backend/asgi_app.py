@@ -0,0 +1,504 @@
+"""
+ASGI serving mode for the backend, with concurrency limits and backpressure.
+
+app.py runs on Flask's development server: every request holds a worker
+thread for its whole generation and, under overload, requests pile up until
+clients give up. This app serves the same API with async handlers. Answers
+(retrieval and generation) run on a bounded thread pool, at most
+ASGI_MAX_IN_FLIGHT at a time. Up to ASGI_MAX_QUEUED further requests wait
+for a slot, each for at most ASGI_QUEUE_TIMEOUT_S. Anything beyond that is
+refused at once: 429 when the wait queue is full, 503 when a request waited
+too long. Both carry a Retry-After estimated from recent answer times.
+
+The backend (legal_query, which opens the corpus and sets up the model when
+it is imported) is created on a worker thread during lifespan startup, and
+the status routes call it on worker threads too, so the event loop never
+blocks on it.
+
+Run it with an ASGI server. Use one worker process, because the limits are
+per process:
+
+    uvicorn asgi_app:app --port 5001
+"""
+
+import os
+import re
+import json
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import paths  # noqa: F401  (makes the monitoring package importable)
+from monitoring import REGISTRY, CONTENT_TYPE, span, wrap_context
+
+REQUESTS = REGISTRY.counter(
+    "legal_http_requests_total",
+    "HTTP requests handled by the backend",
+    ("method", "route", "status")
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    "legal_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route")
+)
+ANSWERS_IN_FLIGHT = REGISTRY.gauge(
+    "legal_answers_in_flight",
+    "Answers being computed (retrieval and generation)",
+    ("app",)
+)
+ANSWERS_QUEUED = REGISTRY.gauge(
+    "legal_answers_queued",
+    "Requests waiting for an answer slot",
+    ("app",)
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    "legal_answer_queue_wait_seconds",
+    "Time a request waited for an answer slot",
+    ("app",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+REJECTED = REGISTRY.counter(
+    "legal_requests_rejected_total",
+    "Requests refused because of overload (queue_full: 429, queue_timeout: 503)",
+    ("app", "reason")
+)
+
+# Answers computed at once (defaults to the generation batch size)
+MAX_IN_FLIGHT = int(os.environ.get("ASGI_MAX_IN_FLIGHT", os.environ.get("GEMMA_MAX_BATCH_SIZE", "8")))
+MAX_QUEUED = int(os.environ.get("ASGI_MAX_QUEUED", "16"))  # requests waiting for a slot
+QUEUE_TIMEOUT_S = float(os.environ.get("ASGI_QUEUE_TIMEOUT_S", "10"))  # longest wait for a slot
+MAX_BODY_BYTES = 64 * 1024
+
+CORS_HEADERS = [(b"access-control-allow-origin", b"*")]
+
+
+class Overloaded(Exception):
+    """A request refused because the answer slots and the wait queue are taken."""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionControl:
+    """
+    Limits the answers in flight and the requests waiting for one.
+    Waiting requests get a slot in arrival order. Use it from the event loop
+    thread only.
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, max_queued=MAX_QUEUED, queue_timeout_s=QUEUE_TIMEOUT_S, name="asgi"):
+        """
+        Initialize the limits.
+
+        Args:
+            max_in_flight: Answers computed at once.
+            max_queued: Requests waiting for a slot (more are refused with 429).
+            queue_timeout_s: Longest wait for a slot (longer waits are refused with 503).
+            name: Name used for metrics.
+        """
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_queued = max(0, int(max_queued))
+        self.queue_timeout_s = queue_timeout_s
+        self.name = name
+
+        self.in_flight = 0
+        self.mean_answer_s = 1.0  # moving average, for Retry-After
+        self._waiters = deque()
+
+        ANSWERS_IN_FLIGHT.labels(name).set_function(lambda: self.in_flight)
+        ANSWERS_QUEUED.labels(name).set_function(lambda: len(self._waiters))
+
+    async def acquire(self):
+        """
+        Take an answer slot, waiting in line if all are taken.
+
+        Raises:
+            Overloaded: With status 429 if the wait queue is full, 503 if no
+                slot was free within queue_timeout_s.
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queued:
+            REJECTED.labels(self.name, "queue_full").inc()
+            raise Overloaded(429, "Too many requests waiting", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        queued = time.monotonic()
+        try:
+            # release() hands the slot over by resolving the waiter
+            await asyncio.wait_for(waiter, self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # got the slot as the wait timed out; pass it on
+            REJECTED.labels(self.name, "queue_timeout").inc()
+            raise Overloaded(503, "Timed out waiting for an answer slot", self.retry_after())
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # got the slot while giving up; pass it on
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            QUEUE_WAIT.labels(self.name).observe(time.monotonic() - queued)
+
+    def release(self, answer_seconds=None):
+        """
+        Free a slot, handing it to the longest waiting request.
+
+        Args:
+            answer_seconds: How long the answer took (updates the Retry-After estimate).
+        """
+        if answer_seconds is not None:
+            self.mean_answer_s = 0.8 * self.mean_answer_s + 0.2 * answer_seconds
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    async def submit(self, executor, func, *args):
+        """
+        Wait for a slot, then run a function in the executor. The slot is
+        freed when the function returns, even if the caller stops waiting.
+
+        Returns:
+            Task with the function's result (await it through asyncio.shield).
+        """
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(executor, wrap_context(func), *args)
+        except BaseException:
+            self.release()
+            raise
+
+        async def run():
+            try:
+                return await future
+            finally:
+                # Before the result is delivered, so a finished answer never still holds its slot
+                self.release(time.monotonic() - started)
+
+        return asyncio.ensure_future(run())
+
+    def retry_after(self):
+        """Seconds until a slot is likely free for a new request (at least 1)."""
+        waiting = len(self._waiters) + 1
+        return max(1, math.ceil(self.mean_answer_s * waiting / self.max_in_flight))
+
+    def stats(self):
+        """Get the slots in use, the requests waiting and the limits."""
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "queue_timeout_s": self.queue_timeout_s,
+            "mean_answer_s": round(self.mean_answer_s, 3),
+            "retry_after_s": self.retry_after(),
+        }
+
+
+class _HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def _send_json(send, status, data, headers=()):
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *CORS_HEADERS,
+            *headers
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _read_json(receive):
+    """Read a JSON request body (None if it is empty or not JSON)."""
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise _HTTPError(400, "Client disconnected")
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise _HTTPError(413, "Request body too large")
+        if not message.get("more_body"):
+            break
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class LegalASGIApp:
+    """The backend API as an ASGI application."""
+
+    def __init__(
+        self,
+        answer=None,
+        stream=None,
+        max_in_flight=MAX_IN_FLIGHT,
+        max_queued=MAX_QUEUED,
+        queue_timeout_s=QUEUE_TIMEOUT_S,
+        name="asgi"
+    ):
+        """
+        Initialize the app (the backend is imported at lifespan startup, or
+        on first use).
+
+        Args:
+            answer: Answers a question, as legal_query.answer_legal_query (the default).
+            stream: Streams an answer, as legal_query.stream_legal_query (the default).
+            max_in_flight: Answers computed at once (also the size of the answer pool).
+            max_queued: Requests waiting for a slot.
+            queue_timeout_s: Longest wait for a slot.
+            name: Name used for metrics.
+        """
+        self.admission = AdmissionControl(max_in_flight, max_queued, queue_timeout_s, name)
+        # No more threads than slots, so nothing queues unseen inside the pool
+        self.pool = ThreadPoolExecutor(max_workers=self.admission.max_in_flight, thread_name_prefix="answer")
+        self._answer = answer
+        self._stream = stream
+        self._backend = None
+        self._routes = [
+            ("POST", re.compile(r"/api/query"), "/api/query", self._query),
+            ("GET", re.compile(r"/api/query/stream"), "/api/query/stream", self._query_stream),
+            ("POST", re.compile(r"/api/query/stream"), "/api/query/stream", self._query_stream),
+            ("GET", re.compile(r"/api/ready"), "/api/ready", self._ready),
+            ("GET", re.compile(r"/api/cache"), "/api/cache", self._cache),
+            ("GET", re.compile(r"/api/fast-path"), "/api/fast-path", self._fast_path),
+            ("GET", re.compile(r"/api/load"), "/api/load", self._load),
+            ("DELETE", re.compile(r"/api/conversation/(?P<conversation_id>[^/]+)"),
+             "/api/conversation/<conversation_id>", self._delete_conversation),
+            ("GET", re.compile(r"/metrics"), "/metrics", self._metrics),
+        ]
+
+    @property
+    def backend(self):
+        """The legal_query module, imported when first needed (blocks: use it off the event loop)."""
+        if self._backend is None:
+            import legal_query
+            self._backend = legal_query
+        return self._backend
+
+    async def _backend_call(self, name, *args, **kwargs):
+        """
+        Call a legal_query function on a worker thread (the default executor,
+        not the answer pool), importing the backend first if needed.
+        """
+        def call():
+            return getattr(self.backend, name)(*args, **kwargs)
+
+        return await asyncio.get_running_loop().run_in_executor(None, wrap_context(call))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        start = time.perf_counter()
+        method, path = scope["method"], scope["path"]
+        route, status = "unmatched", 404
+        started = False
+
+        async def send_tracked(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            if method == "OPTIONS":
+                route, status = "preflight", 204
+                await send({"type": "http.response.start", "status": 204, "headers": [
+                    *CORS_HEADERS,
+                    (b"access-control-allow-methods", b"GET, POST, DELETE, OPTIONS"),
+                    (b"access-control-allow-headers", b"Content-Type"),
+                ]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            for route_method, pattern, name, handler in self._routes:
+                match = pattern.fullmatch(path)
+                if match and route_method == method:
+                    route = name
+                    status = await handler(scope, receive, send_tracked, **match.groupdict())
+                    return
+            await _send_json(send, 404, {"error": "Not found"})
+        except Overloaded as e:
+            status = e.status
+            await _send_json(send, e.status, {"error": e.reason, "retry_after": e.retry_after},
+                             [(b"retry-after", str(e.retry_after).encode())])
+        except _HTTPError as e:
+            status = e.status
+            await _send_json(send, e.status, {"error": e.message})
+        except Exception as e:
+            status = 500
+            print(f"Error handling {method} {path}: {type(e).__name__}: {e}")
+            if not started:
+                await _send_json(send, 500, {"error": "Internal server error"})
+        finally:
+            # Streams are measured to their end
+            REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            REQUESTS.labels(method, route, status).inc()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self._answer is None:
+                    # Create the service off the loop and load the model in the
+                    # background; requests never wait for a load
+                    try:
+                        await self._backend_call("preload_gemma", background=True)
+                    except Exception as e:
+                        await send({"type": "lifespan.startup.failed", "message": str(e)})
+                        return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.pool.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _query(self, scope, receive, send):
+        """Answer a question (JSON body with query and optional conversation_id)."""
+        data = await _read_json(receive)
+        if not data or not data.get("query"):
+            raise _HTTPError(400, "No query provided")
+
+        answer = self._answer or self._backend_answer
+        with span("POST /api/query"):
+            future = await self.admission.submit(self.pool, answer, data["query"], data.get("conversation_id"))
+            result = await asyncio.shield(future)
+        await _send_json(send, 200, result)
+        return 200
+
+    async def _query_stream(self, scope, receive, send):
+        """
+        Server-sent events variant of /api/query (JSON body or ?query=...).
+        The answer slot is held until the generation ends.
+        """
+        data = (await _read_json(receive) if scope["method"] == "POST" else None) or {}
+        args = parse_qs(scope.get("query_string", b"").decode("utf-8"))
+        user_query = data.get("query") or args.get("query", [None])[0]
+        conversation_id = data.get("conversation_id") or args.get("conversation_id", [None])[0]
+        if not user_query:
+            raise _HTTPError(400, "No query provided")
+
+        stream = self._stream or self._backend_stream
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce():
+            try:
+                for event in stream(user_query, conversation_id):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(events.put_nowait, event)
+            except Exception as e:
+                print(f"Error streaming answer: {e}")
+            finally:
+                loop.call_soon_threadsafe(events.put_nowait, None)
+
+        async def watch_disconnect():
+            # A client that goes away stops the generation at its next chunk
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            stop.set()
+            events.put_nowait(None)
+
+        # Refused before any byte is sent, so overload still gets a 429/503
+        future = await self.admission.submit(self.pool, produce)
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+                *CORS_HEADERS,
+            ]})
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                chunk = f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+                await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+            if not stop.is_set():
+                await send({"type": "http.response.body", "body": b""})
+            await asyncio.shield(future)  # the slot is free once the generation thread is done
+        finally:
+            stop.set()
+            watcher.cancel()
+        return 200
+
+    def _backend_answer(self, query, conversation_id=None):
+        """legal_query.answer_legal_query (runs in the answer pool)."""
+        return self.backend.answer_legal_query(query, conversation_id)
+
+    def _backend_stream(self, query, conversation_id=None):
+        """legal_query.stream_legal_query (runs in the answer pool)."""
+        return self.backend.stream_legal_query(query, conversation_id)
+
+    async def _ready(self, scope, receive, send):
+        """Readiness check: 200 once the model is loaded and warmed up, 503 before."""
+        status = await self._backend_call("model_status")
+        code = 200 if status["ready"] else 503
+        await _send_json(send, code, status)
+        return code
+
+    async def _cache(self, scope, receive, send):
+        """Answer cache hit rate and size."""
+        await _send_json(send, 200, await self._backend_call("cache_stats"))
+        return 200
+
+    async def _fast_path(self, scope, receive, send):
+        """Share of questions answered by direct article lookup."""
+        await _send_json(send, 200, await self._backend_call("fast_path_stats"))
+        return 200
+
+    async def _load(self, scope, receive, send):
+        """Answer slots in use, requests waiting and the limits."""
+        await _send_json(send, 200, self.admission.stats())
+        return 200
+
+    async def _delete_conversation(self, scope, receive, send, conversation_id):
+        """Forget a conversation (its turns and articles)."""
+        if not await self._backend_call("end_conversation", conversation_id):
+            raise _HTTPError(404, "Unknown conversation")
+        await _send_json(send, 200, {"deleted": conversation_id})
+        return 200
+
+    async def _metrics(self, scope, receive, send):
+        """Metrics in the Prometheus text format."""
+        body = REGISTRY.render().encode("utf-8")
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", CONTENT_TYPE.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+        return 200
+
+
+app = LegalASGIApp()
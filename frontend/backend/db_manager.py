@@ -1,11 +1,47 @@
 import os
 import json
 
+import paths  # noqa: F401  (makes the monitoring and model packages importable)
+from monitoring import REGISTRY, traced
+from model.intent_router import IntentRouter
+from database.results import SearchResults
+from article_index import ArticleIndex
+
+SEARCH_LATENCY = REGISTRY.histogram(
+    "legal_db_search_duration_seconds",
+    "Time spent in DBManager.search_articles",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+# Topics answered with their candidate articles, in the order they are checked
+ROUTED_TOPICS = ("code_reference", "obligations", "probation", "leave", "salary")
+
 class DBManager:
-    def __init__(self, db_file="labor_law_db.json"):
-        """Initialize the database manager."""
+    def __init__(self, db_file="labor_law_db.json", intents_file=None):
+        """
+        Initialize the database manager.
+        
+        Args:
+            db_file: JSON file with the articles.
+            intents_file: Question topics and their terms (default: data/intents.json).
+        """
         self.db_file = db_file
+        self.intents_file = intents_file
+        self.generation = 0  # Bumped whenever the articles change
         self.articles = self._load_articles()
+        self.index = ArticleIndex(self.articles)
+        self.router = IntentRouter.from_file(intents_file)
+    
+    def reload(self):
+        """Re-read the articles and the question topics from their files."""
+        self.articles = self._load_articles()
+        self.index = ArticleIndex(self.articles)
+        self.router = IntentRouter.from_file(self.intents_file)
+        self.generation += 1
+    
+    def corpus_generation(self):
+        """Get a number that changes whenever the articles change (invalidates cached answers)."""
+        return self.generation
         
     def _load_articles(self):
         """Load articles from the database file."""
@@ -61,16 +97,25 @@ class DBManager:
                 print(f"Error loading articles from database: {e}")
                 return []
     
-    def _get_word_frequency(self, text, query_words):
-        """Count how many query words are in the text."""
-        text_lower = text.lower()
-        count = 0
-        for word in query_words:
-            if word in text_lower:
-                count += 1
-        return count
+    def get_articles_by_number(self, numbers):
+        """
+        Get articles by their numbers.
+        
+        Args:
+            numbers: Article numbers ("70", "155а").
+            
+        Returns:
+            The articles, in the order of the numbers (unknown numbers are skipped).
+        """
+        return [self.articles[position] for number in numbers for position in self.index.numbers.get(number, [])]
     
+    @traced("DBManager.search_articles")
     def search_articles(self, query):
+        """Search for articles related to the query (timed)."""
+        with SEARCH_LATENCY.time():
+            return self._search_articles(query)
+    
+    def _search_articles(self, query):
         """
         Search for articles related to the query.
         
@@ -83,50 +128,123 @@ class DBManager:
         query_lower = query.lower()
         query_words = [word for word in query_lower.split() if len(word) > 3]
         
-        # General queries about articles or code sections
-        if "член" in query_lower or "article" in query_lower or "кодекс" in query_lower or "code" in query_lower:
-            # Return a representative sample of articles
-            article_numbers = ["70", "125", "155", "242"]
-            sample_articles = [article for article in self.articles if article["number"] in article_numbers]
-            if sample_articles:
-                return sample_articles[:2]  # Return just a couple of examples
-        
-        # Special case for "задължения" (obligations)
-        if "задължен" in query_lower or "задължения" in query_lower or "obligations" in query_lower or "duties" in query_lower:
-            return [article for article in self.articles if article["number"] == "125"]
-        
-        # Special case for "изпитателен срок" (probation period)
-        if "изпитателен" in query_lower or "probation" in query_lower or "trial" in query_lower or "срок" in query_lower:
-            return [article for article in self.articles if article["number"] in ["70", "71"]]
-        
-        # Special case for "отпуск" (leave)
-        if "отпуск" in query_lower or "почивка" in query_lower or "leave" in query_lower or "vacation" in query_lower:
-            return [article for article in self.articles if article["number"] in ["155", "156"]]
-        
-        # Special case for "заплата" (salary)
-        if "заплата" in query_lower or "възнаграждение" in query_lower or "salary" in query_lower or "payment" in query_lower or "money" in query_lower:
-            return [article for article in self.articles if article["number"] in ["242", "245"]]
+        # Topics with known articles (obligations, probation period, leave, salary)
+        route = self.router.route(query)
+        for topic in ROUTED_TOPICS:
+            if not route.has(topic):
+                continue
+            article_numbers = self.router.topic(topic).articles
+            topic_articles = [self.articles[position] for position in self.index.positions(article_numbers)]
+            if topic == "code_reference":
+                # General queries about articles or code sections: a representative sample
+                if topic_articles:
+                    return topic_articles[:2]  # Return just a couple of examples
+                continue
+            return topic_articles
         
         # Check for specific article numbers
         for word in query_lower.split():
             if word.isdigit() and 1 <= int(word) <= 500:  # Assuming Labor Code has articles numbered 1-500
                 article_number = word
-                matching_articles = [article for article in self.articles if article["number"] == article_number]
+                matching_articles = self.get_articles_by_number([article_number])
                 if matching_articles:
                     return matching_articles
         
-        # Default: search by word frequency
-        results = []
-        for article in self.articles:
-            combined_text = f"{article['title']} {article['content']}"
-            frequency = self._get_word_frequency(combined_text, query_words)
-            if frequency > 0:
-                results.append((article, frequency))
-        
-        # Sort by relevance and return top results
-        results.sort(key=lambda x: x[1], reverse=True)
-        if results:
-            return [article for article, _ in results[:2]]
+        # Default: rank by the number of query words each article contains
+        positions = self.index.rank(query_words, limit=2)
+        if positions:
+            return [self.articles[position] for position in positions]
         
         # If no specific match, return articles about worker obligations as a default
-        return [article for article in self.articles if article["number"] == "125"]
\ No newline at end of file
+        return self.get_articles_by_number(["125"])
+
+    def keyword_overlap(self, query, articles):
+        """
+        Score articles by the share of the query's words they contain.
+        
+        Args:
+            query: The user's query (words of up to 3 characters are ignored,
+                as in the search).
+            articles: Articles to score (dicts with title and content).
+            
+        Returns:
+            One score from 0.0 to 1.0 per article, in order.
+        """
+        query_words = [word for word in query.lower().split() if len(word) > 3]
+        if not query_words:
+            return [0.0] * len(articles)
+        scores = []
+        for article in articles:
+            text = f"{article['title']} {article['content']}".lower()
+            scores.append(sum(1 for word in query_words if word in text) / len(query_words))
+        return scores
+
+
+def _bare_number(number):
+    """The article number without the "Чл." prefix ("Чл. 70" -> "70")."""
+    return number[len("Чл."):].strip() if number.startswith("Чл.") else number
+
+
+class JSONCorpus:
+    """
+    The JSON articles behind the retrieval interface of
+    database.HybridDatabaseManager, so model.LegalAssistant can answer from
+    them. Articles are numbered "Чл. 70" like the imported corpus; their
+    titles take the place of the law titles. Similarities are keyword
+    overlaps; the search has no metadata filters.
+    """
+
+    def __init__(self, db_manager):
+        """
+        Initialize the corpus.
+        
+        Args:
+            db_manager: DBManager with the articles.
+        """
+        self.db_manager = db_manager
+
+    def corpus_generation(self):
+        """Get a number that changes whenever the articles change."""
+        return self.db_manager.corpus_generation()
+
+    def search_similar(self, query, n_results=5, filters=None, columnar=False):
+        """
+        Search for articles related to the query.
+        
+        Args:
+            query: The search query.
+            n_results: Most articles returned.
+            filters: Ignored (the articles have no metadata).
+            columnar: Return SearchResults instead of a list of dictionaries.
+            
+        Returns:
+            The articles found, best first, with the share of the query's
+            words they contain as their similarity.
+        """
+        articles = self.db_manager.search_articles(query)[:n_results]
+        results = SearchResults(
+            ids=[f"json_{article['number']}" for article in articles],
+            article_ids=[article["number"] for article in articles],
+            law_ids=["" for _ in articles],
+            article_numbers=[f"Чл. {article['number']}" for article in articles],
+            law_titles=[article["title"] for article in articles],
+            similarities=self.db_manager.keyword_overlap(query, articles),
+            contents=[article["content"] for article in articles]
+        )
+        return results if columnar else results.to_dicts()
+
+    def get_articles_by_number(self, numbers):
+        """
+        Get articles by their numbers.
+        
+        Args:
+            numbers: Article numbers, with or without the "Чл." prefix.
+            
+        Returns:
+            Dicts with number ("Чл. 70"), law_title (the article's title) and
+            content, in the order of the numbers.
+        """
+        return [
+            {"number": f"Чл. {article['number']}", "law_title": article["title"], "content": article["content"]}
+            for article in self.db_manager.get_articles_by_number([_bare_number(number) for number in numbers])
+        ]
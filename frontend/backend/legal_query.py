@@ -1,48 +1,64 @@
 import os
-from gemma_interface import GemmaInterface
-from db_manager import DBManager
-
-# Initialize components
-db = DBManager()  # Database manager
-gemma = None  # Will initialize on-demand
-
-def get_gemma():
-    """Lazy load the Gemma model."""
-    global gemma
-    if gemma is None:
-        try:
-            # Use the gemma-3-model folder in the root directory
-            default_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "gemma-3-model")
-            local_model_path = os.environ.get("GEMMA_PATH", default_path)
-            print(f"Loading model from: {local_model_path}")
-            
-            gemma = GemmaInterface(
-                model_name=local_model_path,
-                quantize="4bit"  # Use 8bit for better performance on lower-end machines
-            )
-        except Exception as e:
-            print(f"Error initializing Gemma: {e}")
-    return gemma
-
-def answer_legal_query(query):
+import paths  # noqa: F401  (makes the monitoring and model packages importable)
+from monitoring import span, traced
+from model.deadline import SERVED_BY
+from model.conversation import ConversationStore
+from legal_service import get_service
+
+# Use the gemma-3-model folder in the root directory
+default_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "gemma-3-model")
+local_model_path = os.environ.get("GEMMA_PATH", default_path)
+
+# The imported corpus (or the JSON articles) and the shared model layers
+service = get_service(local_model_path)
+
+# Recent turns of each conversation, for follow-up questions
+conversations = ConversationStore(
+    max_turns=int(os.environ.get("CONVERSATION_TURNS", "3")),
+    ttl_seconds=float(os.environ.get("CONVERSATION_TTL", "3600")),
+    name="backend"
+)
+
+def preload_gemma(background=True):
     """
-    Process a legal query and return answer with relevant articles.
-    
+    Start loading and warming up the model at process start.
+
     Args:
-        query: The user's question about labor law
-        
-    Returns:
-        Dict with answer and relevant articles
+        background: Load in a background thread so the server can start serving
     """
-    # Get language
-    language = "en"  # Default
-    gemma_instance = get_gemma()
-    if gemma_instance:
-        language = gemma_instance.detect_language(query)
-    
-    # Search for relevant articles
-    articles = db.search_articles(query)
-    
+    return service.preload(background=background)
+
+def model_status():
+    """Get the model lifecycle state for readiness checks."""
+    return service.model_status()
+
+def cache_stats():
+    """Get the answer cache hit rate and size."""
+    return service.cache_stats()
+
+def fast_path_stats():
+    """Get the share of questions answered by direct article lookup."""
+    return service.fast_path_stats()
+
+def end_conversation(conversation_id):
+    """Forget a conversation; returns whether it existed."""
+    return conversations.end(conversation_id)
+
+@traced("detect_language")
+def detect_language(text):
+    """Detect if the text is in Bulgarian or English (no model needed)."""
+    # Simple heuristic: if there are Cyrillic characters, assume Bulgarian
+    # Convert to lowercase to handle more characters
+    text_lower = text.lower()
+
+    # Count Cyrillic characters
+    cyrillic_count = sum(1 for c in text_lower if ord(c) > 1024 and ord(c) < 1280)
+
+    # If more than 2 Cyrillic characters, consider it Bulgarian
+    return "bg" if cyrillic_count > 2 else "en"
+
+def _display_articles(articles, language):
+    """Add Bulgarian display numbers to articles if needed."""
     # Convert article representation for Bulgarian responses
     if language == "bg" and articles:
         for article in articles:
@@ -55,41 +71,68 @@ def answer_legal_query(query):
                 article['title_en'] = article['title']
                 # For Bulgarian responses, use original Bulgarian title
                 # No change needed since titles are already in Bulgarian in the database
-            
+
             # Change "number" representation to have "Член" prefix
             if not article.get('display_number'):
                 article['display_number'] = f"Член {article['number']}"
-    
-    if not articles:
-        # No relevant articles found
-        if language == "bg":
-            answer = "Съжалявам, не успях да намеря информация по този въпрос в Кодекса на труда. Моля, консултирайте се с правен експерт."
-        else:
-            answer = "I'm sorry, I couldn't find information on this topic in the Labor Code. Please consult with a legal expert."
-        return {"answer": answer, "articles": []}
-    
-    # Generate response with Gemma 3
-    if gemma_instance:
-        try:
-            answer = gemma_instance.generate_response(query, articles, language)
-        except Exception as e:
-            print(f"Error generating response with Gemma: {e}")
-            # Fallback message
-            if language == "bg":
-                answer = f"Намерих следните членове от Кодекса на труда, които може да са свързани с вашия въпрос."
-            else:
-                answer = f"I found the following articles from the Labor Code that might be relevant to your question."
-    else:
-        # Fallback if Gemma is not available
-        articles_list_bg = ', '.join([f'чл. {a["number"]}' for a in articles])
-        articles_list_en = ', '.join([f'Article {a["number"]}' for a in articles])
-        
-        if language == "bg":
-            answer = f"Намерих следните членове от Кодекса на труда по вашия въпрос: {articles_list_bg}"
-        else:
-            answer = f"I found these relevant articles from the Labor Code: {articles_list_en}"
-    
-    return {
-        "answer": answer,
-        "articles": articles
-    }
\ No newline at end of file
+
+    return articles
+
+@traced("answer_legal_query")
+def answer_legal_query(query, conversation_id=None):
+    """
+    Process a legal query and return answer with relevant articles.
+
+    Args:
+        query: The user's question about labor law
+        conversation_id: Conversation the question continues (None or an
+            unknown ID starts a new one)
+
+    Returns:
+        Dict with answer, sources and relevant articles ("cached" is True
+        when the answer came from the answer cache, "fast_path" when it
+        quotes the articles the question asked for; "served_by" names the
+        tier that produced the answer within the latency budget: fast_path,
+        cache, generated, partial, extractive (also while the model is not
+        ready) or no_results; "conversation_id" identifies the conversation
+        for follow-ups)
+    """
+    conversation_id = conversations.start(conversation_id)
+    language = detect_language(query)
+    result = service.answer(query, conversations.history(conversation_id))
+    result["articles"] = _display_articles(result["articles"], language)
+    SERVED_BY.labels("backend", result["served_by"]).inc()
+    conversations.record(conversation_id, query, result["answer"], result["articles"])
+    result["conversation_id"] = conversation_id
+    return result
+
+def stream_legal_query(query, conversation_id=None):
+    """
+    Process a legal query, yielding the articles first and then the answer
+    while it is being generated.
+
+    Args:
+        query: The user's question about labor law
+        conversation_id: Conversation the question continues (None or an
+            unknown ID starts a new one)
+
+    Yields:
+        {"type": "articles", "articles": [...], "sources": [...],
+        "conversation_id": ...} first, then {"type": "token", "text": ...}
+        for every generated chunk, then {"type": "done", "answer": <full
+        answer>, "served_by": <tier>, "conversation_id": ...} (tiers as in
+        answer_legal_query)
+    """
+    with span("stream_legal_query"):
+        conversation_id = conversations.start(conversation_id)
+        language = detect_language(query)
+        articles = []
+        for event in service.stream(query, conversations.history(conversation_id)):
+            if event["type"] == "articles":
+                articles = event["articles"] = _display_articles(event["articles"], language)
+                event["conversation_id"] = conversation_id
+            elif event["type"] == "done":
+                SERVED_BY.labels("backend_stream", event["served_by"]).inc()
+                conversations.record(conversation_id, query, event["answer"], articles)
+                event["conversation_id"] = conversation_id
+            yield event
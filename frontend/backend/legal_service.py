@@ -0,0 +1,260 @@
+"""
+The shared database and model layers behind the web API.
+
+A LegalService answers with model.LegalAssistant (fast path, answer cache,
+reranking, latency budget, conversations) over one of two corpora:
+database.HybridDatabaseManager (the indexed corpus, vector search, article
+text store), as the CLI does, or the small JSON article file through
+db_manager.JSONCorpus. Only the retrieval differs between them. The service
+is created once per process by get_service(); without the imported corpus
+it answers from the JSON articles.
+"""
+
+import os
+import threading
+
+import paths  # noqa: F401  (makes the database and model packages importable)
+from paths import PROJECT_ROOT
+
+# "auto" uses the corpus when it is available, "hybrid" requires it, "json" never uses it
+LEGAL_BACKEND = os.environ.get("LEGAL_BACKEND", "auto")
+LEGAL_DB_PATH = os.environ.get("LEGAL_DB_PATH", os.path.join(PROJECT_ROOT, "data", "legal_db.sqlite"))
+LEGAL_VECTOR_DB_PATH = os.environ.get("LEGAL_VECTOR_DB_PATH", os.path.join(PROJECT_ROOT, "data", "vector_db"))
+LEGAL_JSON_PATH = os.environ.get(
+    "LEGAL_JSON_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "labor_law_db.json")
+)
+# Sentence embedding model the corpus was imported with ("hf:<model>"; unset: hash embeddings)
+LEGAL_EMBEDDINGS = os.environ.get("LEGAL_EMBEDDINGS") or None
+MAX_RESULTS = int(os.environ.get("LEGAL_MAX_RESULTS", "5"))
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def _assistant_config():
+    """LegalAssistant settings from the backend's environment variables."""
+    return {
+        "backend": os.environ.get("GEMMA_BACKEND", "auto"),
+        "quantize": os.environ.get("GEMMA_QUANTIZE", "4bit"),
+        "max_batch_size": int(os.environ.get("GEMMA_MAX_BATCH_SIZE", "8")),
+        "batch_window_ms": float(os.environ.get("GEMMA_BATCH_WINDOW_MS", "20")),
+        "context_token_budget": int(os.environ.get("GEMMA_CONTEXT_TOKENS", "1500")),
+        "max_prompt_tokens": int(os.environ.get("GEMMA_MAX_PROMPT_TOKENS", "3000")),
+        "prefix_cache": os.environ.get("GEMMA_PREFIX_CACHE", "1") != "0",
+        "draft_model": os.environ.get("GEMMA_DRAFT_MODEL") or None,
+        "latency_budget_s": float(os.environ.get("GEMMA_LATENCY_BUDGET_S", "30")),
+        "answer_cache_threshold": float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.9")),
+        "answer_cache_ttl": float(os.environ.get("ANSWER_CACHE_TTL", "3600")),
+        "answer_cache_size": int(os.environ.get("ANSWER_CACHE_SIZE", "1024")),
+        "rerank": os.environ.get("GEMMA_RERANK", "0") == "1",
+        "source_texts": True,  # the cited articles' texts come with their sources
+        "simulate_unready": False,  # article excerpts, never canned answers, until the model is ready
+        "preload_model": False,  # the app preloads in the background
+    }
+
+
+def _article_number(number):
+    """The bare article number ("Чл. 70" -> "70"), as the web client shows it."""
+    return number[len("Чл."):].strip() if number.startswith("Чл.") else number
+
+
+class LegalService:
+    """Answers web questions with the legal assistant over the corpus or the JSON articles."""
+
+    def __init__(self, db_manager, assistant, max_results=MAX_RESULTS, backend="hybrid"):
+        """
+        Initialize the service.
+
+        Args:
+            db_manager: HybridDatabaseManager with the imported corpus, or a
+                JSONCorpus.
+            assistant: LegalAssistant answering from it.
+            max_results: Articles retrieved per question.
+            backend: Name of the corpus ("hybrid" or "json").
+        """
+        self.db_manager = db_manager
+        self.assistant = assistant
+        self.max_results = max_results
+        self.backend = backend
+
+    @classmethod
+    def create(cls, model_path, db_path=LEGAL_DB_PATH, vector_db_path=LEGAL_VECTOR_DB_PATH, embeddings=None):
+        """
+        Open the corpus and set up the assistant (the model is not loaded yet).
+
+        Args:
+            model_path: Local model directory or model name.
+            db_path: SQLite database file.
+            vector_db_path: ChromaDB directory.
+            embeddings: Sentence embedding model the corpus was imported with
+                (None: the built-in hash embeddings). Retrieval and the answer
+                cache both use it, so rephrased questions hit the cache.
+
+        Returns:
+            The service.
+
+        Raises:
+            ImportError: If the database dependencies are missing.
+            RuntimeError: If the corpus holds no articles.
+        """
+        from database import HybridDatabaseManager
+        from model import LegalAssistant
+
+        db_manager = HybridDatabaseManager(
+            db_path=db_path, vector_db_path=vector_db_path, embeddings=embeddings
+        )
+        if db_manager.collection.count() == 0:
+            raise RuntimeError(f"no articles in {vector_db_path} (run import_to_db.py)")
+        assistant = LegalAssistant(db_manager, model_path=model_path, config=_assistant_config())
+        return cls(db_manager, assistant, backend="hybrid")
+
+    @classmethod
+    def from_json(cls, model_path, json_path=LEGAL_JSON_PATH):
+        """
+        Answer from the JSON article file (created with sample articles if missing).
+
+        Args:
+            model_path: Local model directory or model name.
+            json_path: JSON file with the articles.
+
+        Returns:
+            The service.
+        """
+        from model import LegalAssistant
+        from db_manager import DBManager, JSONCorpus
+
+        corpus = JSONCorpus(DBManager(json_path))
+        assistant = LegalAssistant(corpus, model_path=model_path, config=_assistant_config())
+        return cls(corpus, assistant, backend="json")
+
+    def preload(self, background=True):
+        """Start loading the model (and the reranker) at process start."""
+        self.assistant.preload_model(background=background)
+
+    def model_status(self):
+        """Get the model lifecycle state for readiness checks."""
+        return self.assistant.model_status()
+
+    def cache_stats(self):
+        """Get the answer cache hit rate and size."""
+        return self.assistant.cache_stats()
+
+    def fast_path_stats(self):
+        """Get the share of questions answered by direct article lookup."""
+        return self.assistant.fast_path_stats()
+
+    def corpus_generation(self):
+        """Get the token that changes whenever the corpus changes."""
+        return self.db_manager.corpus_generation()
+
+    def answer(self, query, conversation_history=None, include_articles=True):
+        """
+        Answer a question in the web API's format.
+
+        Args:
+            query: The user's question.
+            conversation_history: Earlier turns (model.conversation.History, optional).
+            include_articles: Add the text of the cited articles ("articles");
+                without it only the citations ("sources") are returned.
+
+        Returns:
+            Dict with answer, sources, articles, cached and served_by (and
+            fast_path for direct lookups).
+        """
+        result = self.assistant.answer_question(
+            query, max_results=self.max_results, conversation_history=conversation_history
+        )
+        result["cached"] = result.get("cached", False)
+        articles = self.articles(result["sources"])
+        result["sources"] = _citations(result["sources"])
+        result["articles"] = articles if include_articles else []
+        return result
+
+    def stream(self, query, conversation_history=None, include_articles=True):
+        """
+        Answer a question, yielding events in the web API's format.
+
+        Args:
+            query: The user's question.
+            conversation_history: Earlier turns (model.conversation.History, optional).
+            include_articles: Add the text of the cited articles to the first event.
+
+        Yields:
+            {"type": "articles", "articles": [...], "sources": [...]} first,
+            then the assistant's "token" events and its "done" event.
+        """
+        for event in self.assistant.stream_answer(
+            query, max_results=self.max_results, conversation_history=conversation_history
+        ):
+            if event["type"] == "sources":
+                articles = self.articles(event["sources"]) if include_articles else []
+                yield {"type": "articles", "articles": articles, "sources": _citations(event["sources"])}
+            else:
+                yield event
+
+    def articles(self, sources):
+        """
+        Get the cited articles from their sources, which carry the texts
+        retrieval already loaded (no second database read).
+
+        Args:
+            sources: The assistant's citations (dicts with the law title,
+                article number and content).
+
+        Returns:
+            Dicts with number, title (the law's title) and content, in the
+            order of the citations, each article once.
+        """
+        articles, seen = [], set()
+        for source in sources:
+            key = (source["article"], source["title"])
+            if key in seen or "content" not in source:
+                continue
+            seen.add(key)
+            articles.append({
+                "number": _article_number(source["article"]),
+                "title": source["title"],
+                "content": source["content"]
+            })
+        return articles
+
+
+def _citations(sources):
+    """The sources without their article texts, as the web API returns them."""
+    return [{name: value for name, value in source.items() if name != "content"} for source in sources]
+
+
+def get_service(model_path):
+    """
+    Get the process-wide service, creating it on first use.
+
+    Args:
+        model_path: Local model directory or model name.
+
+    Returns:
+        The service, over the imported corpus or the JSON articles (see LEGAL_BACKEND).
+
+    Raises:
+        Exception: If LEGAL_BACKEND is "hybrid" and the corpus can't be opened.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = _create_service(model_path)
+        return _service
+
+
+def _create_service(model_path):
+    """Open the corpus LEGAL_BACKEND asks for, falling back to the JSON articles with "auto"."""
+    if LEGAL_BACKEND != "json":
+        try:
+            from database import load_embeddings
+
+            return LegalService.create(
+                model_path, LEGAL_DB_PATH, LEGAL_VECTOR_DB_PATH, load_embeddings(LEGAL_EMBEDDINGS)
+            )
+        except Exception as e:
+            if LEGAL_BACKEND == "hybrid":
+                raise
+            print(f"Legal corpus not available ({e}), answering from the JSON articles")
+    return LegalService.from_json(model_path, LEGAL_JSON_PATH)
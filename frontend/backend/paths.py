@@ -0,0 +1,14 @@
+"""
+Makes the packages in the project root (monitoring, database, model)
+importable from the backend.
+
+The root is appended rather than prepended so the backend's own modules
+(legal_query, db_manager, ...) keep priority over same-named root scripts.
+"""
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
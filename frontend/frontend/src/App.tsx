@@ -80,6 +80,7 @@ interface ConversationEntry {
 function App() {
 	const [loading, setLoading] = useState(false);
 	const [conversation, setConversation] = useState<ConversationEntry[]>([]);
+	const [conversationId, setConversationId] = useState<string | undefined>(undefined);
 
 	const handleSubmit = async (text: string) => {
 		setLoading(true);
@@ -89,7 +90,10 @@ function App() {
 
 		try {
 			// Only use real backend with locally downloaded Gemma 3 model
-			const response = await searchLegalInfo(text);
+			const response = await searchLegalInfo(text, conversationId);
+			if (response.conversation_id) {
+				setConversationId(response.conversation_id);
+			}
 			
 			// Add the response to the conversation
 			setConversation((prev) => [...prev, { type: 'response', content: response }]);
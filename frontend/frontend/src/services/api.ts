@@ -12,11 +12,13 @@ export interface Article {
 export interface LegalResponse {
   answer: string;
   articles: Article[];
+  conversation_id?: string;
 }
 
-export const searchLegalInfo = async (query: string): Promise<LegalResponse> => {
+// Pass the conversation_id of the previous response to ask a follow-up question
+export const searchLegalInfo = async (query: string, conversationId?: string): Promise<LegalResponse> => {
   try {
-    const response = await axios.post(`${API_URL}/query`, { query });
+    const response = await axios.post(`${API_URL}/query`, { query, conversation_id: conversationId });
     return response.data;
   } catch (error) {
     console.error('Error querying legal assistant:', error);
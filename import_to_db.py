@@ -8,7 +8,7 @@ import os
 import sys
 from pathlib import Path
 
-from database import HybridDatabaseManager
+from database import HybridDatabaseManager, load_embeddings
 
 def import_data():
     """Import data from JSON file into the database"""
@@ -27,10 +27,11 @@ def import_data():
     # Print message
     print(f"Importing data from {json_file}...")
     
-    # Initialize the database manager
+    # Initialize the database manager (LEGAL_EMBEDDINGS must match the web backend's)
     db_manager = HybridDatabaseManager(
         db_path=str(data_dir / "legal_db.sqlite"),
-        vector_db_path=str(data_dir / "vector_db")
+        vector_db_path=str(data_dir / "vector_db"),
+        embeddings=load_embeddings(os.environ.get("LEGAL_EMBEDDINGS"))
     )
     
     # Import the data
@@ -43,7 +43,10 @@ def main(args):
         config={
             "quantize": args.quantize,
             "device": args.device,
-            "temperature": args.temperature
+            "temperature": args.temperature,
+            "collect_timings": args.timings,
+            "rerank": args.rerank,
+            "rerank_top_k": args.rerank_top_k
         }
     )
     
@@ -66,15 +69,26 @@ def main(args):
             print("Exiting...")
             break
         
-        # Get answer from the legal assistant
-        result = legal_assistant.answer_question(
-            question=question,
-            max_results=args.results
-        )
-        
-        # Display the answer
-        print("\n=== Answer ===")
-        print(result["answer"])
+        if args.stream:
+            # Print the answer while it is being generated
+            print("\n=== Answer ===")
+            result = {"sources": []}
+            for event in legal_assistant.stream_answer(question=question, max_results=args.results):
+                if event["type"] == "sources":
+                    result["sources"] = event["sources"]
+                elif event["type"] == "token":
+                    print(event["text"], end="", flush=True)
+            print()
+        else:
+            # Get answer from the legal assistant
+            result = legal_assistant.answer_question(
+                question=question,
+                max_results=args.results
+            )
+            
+            # Display the answer
+            print("\n=== Answer ===")
+            print(result["answer"])
         
         # Display sources if available and requested
         if result["sources"] and not args.no_sources:
@@ -82,6 +96,12 @@ def main(args):
             for i, source in enumerate(result["sources"]):
                 print(f"[{i+1}] {source['title']} - {source['article']} (Relevance: {source['relevance']})")
         
+        # Display per-stage timings if requested
+        if args.timings and "timings" in result:
+            print("\n=== Timings (ms) ===")
+            for stage, duration in result["timings"].items():
+                print(f"{stage:<32} {duration:>10.1f}")
+        
         print("\n" + "-" * 80)
 
 if __name__ == "__main__":
@@ -110,6 +130,14 @@ if __name__ == "__main__":
                         help="Temperature for text generation (higher = more creative)")
     assistant_group.add_argument("--no-sources", action="store_true",
                         help="Don't display sources for answers")
+    assistant_group.add_argument("--timings", action="store_true",
+                        help="Display how long each stage of answering took")
+    assistant_group.add_argument("--stream", action="store_true",
+                        help="Print the answer while it is being generated")
+    assistant_group.add_argument("--rerank", action="store_true",
+                        help="Rerank a wider candidate set with a cross-encoder")
+    assistant_group.add_argument("--rerank-top-k", type=int, default=3,
+                        help="Articles kept after reranking")
     
     args = parser.parse_args()
     
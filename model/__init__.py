@@ -3,5 +3,17 @@ Model interface module for the legal assistant application.
 """
 
 from .gemma_interface import LegalAssistant
+from .model_manager import ModelManager
+from .backends import GenerationBackend, TransformersBackend, CPUInt8Backend, RemoteCompletionsBackend, load_backend
+from .answer_cache import SemanticAnswerCache
 
-__all__ = ['LegalAssistant']
\ No newline at end of file
+__all__ = [
+    'LegalAssistant',
+    'ModelManager',
+    'GenerationBackend',
+    'TransformersBackend',
+    'CPUInt8Backend',
+    'RemoteCompletionsBackend',
+    'load_backend',
+    'SemanticAnswerCache'
+]
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""
+Semantic answer cache for near-duplicate questions.
+
+Most questions are rephrasings of a few topics (probation, annual leave,
+termination, salary). The cache keeps recent answers keyed by the question
+embedding and returns a cached answer when a new question is similar enough
+and has the same scope (language, filters and negations), so paraphrases
+don't pay for another generation. Entries expire after a TTL, the least
+recently used ones are evicted when the cache is full and everything is
+dropped when the corpus generation changes.
+
+Similarity has to mean similar meaning: "duties of the employer" and "duties
+of the employee" differ in one word but must never share an answer. Without
+a sentence embedding model the cache therefore only matches the same
+question up to case, punctuation and spacing.
+"""
+
+import re
+import copy
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Hashable, Sequence, Tuple
+
+import numpy as np
+
+from monitoring import REGISTRY
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    "legal_answer_cache_lookups_total",
+    "Answer cache lookups by result (hit or miss)",
+    ("cache", "result")
+)
+CACHE_ENTRIES = REGISTRY.gauge(
+    "legal_answer_cache_entries",
+    "Answers currently held in the answer cache",
+    ("cache",)
+)
+
+# Words that flip the meaning of an otherwise identical question
+# ("... without notice?" vs "... with notice?"). They are part of the cache
+# scope, so such questions never share an answer.
+NEGATIONS = frozenset({
+    "не", "без", "няма", "нямам", "нито", "никога", "освен",
+    "not", "no", "without", "never", "cannot", "except", "nor",
+})
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_question(question: str) -> str:
+    """The words of a question, lowercased and separated by single spaces"""
+    return " ".join(_WORD_RE.findall(question.lower()))
+
+
+def cache_scope(language: str, filters: Optional[Dict[str, Any]] = None, *extra: Hashable) -> Tuple:
+    """
+    Build the scope a cached answer is valid for
+
+    Args:
+        language: Language of the question
+        filters: Search filters used for retrieval
+        extra: Anything else the answer depends on (e.g., the number of sources)
+
+    Returns:
+        Hashable scope key
+    """
+    return (language, json.dumps(filters or {}, sort_keys=True, default=str)) + extra
+
+
+def negations(question: str) -> frozenset:
+    """Get the negation words in a question"""
+    return NEGATIONS.intersection(_WORD_RE.findall(question.lower()))
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by question embedding, with a similarity threshold,
+    TTL, LRU size bound and corpus-generation invalidation. Thread-safe.
+    The same normalized question in the same scope always hits; other
+    questions only with an embedding model.
+    """
+
+    def __init__(
+        self,
+        embed: Optional[Callable[[str], Sequence[float]]] = None,
+        threshold: float = 0.9,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1024,
+        name: str = "answers"
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            embed: Sentence embedding function for questions (None matches
+                only the same normalized question)
+            threshold: Minimum cosine similarity for a hit (with embed)
+            ttl_seconds: How long an answer stays valid (0 disables expiry)
+            max_entries: Largest number of cached answers
+            name: Name used for metrics
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None  # One row per slot, allocated on first put
+        self._scope_ids = np.full(self.max_entries, -1, dtype=np.int64)  # -1 = free slot
+        self._created = np.zeros(self.max_entries, dtype=np.float64)
+        self._payloads: Dict[int, Dict[str, Any]] = {}
+        self._keys: Dict[int, str] = {}  # Normalized question of every used slot
+        self._exact: Dict[Tuple[int, str], int] = {}  # (scope ID, normalized question) -> slot
+        self._lru: "OrderedDict[int, None]" = OrderedDict()  # Slots, least recently used first
+        self._scopes: Dict[Hashable, int] = {}
+        self._generation: Any = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        CACHE_ENTRIES.labels(name).set_function(lambda: len(self._lru))
+
+    def get(
+        self,
+        question: str,
+        scope: Hashable = (),
+        generation: Any = None,
+        threshold: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up the answer to a similar question
+
+        Args:
+            question: The user's question
+            scope: Scope the answer must match (see cache_scope)
+            generation: Current corpus generation; a change empties the cache
+            threshold: Minimum similarity for this lookup (default: the
+                cache's threshold)
+
+        Returns:
+            A copy of the cached payload, or None on a miss
+        """
+        key = normalize_question(question)
+        vector = self._embed(question)
+        scope = (scope, negations(question))
+
+        with self._lock:
+            self._check_generation(generation)
+            slot = self._find(key, vector, scope, threshold)
+            if slot is None:
+                self.misses += 1
+                CACHE_LOOKUPS.labels(self.name, "miss").inc()
+                return None
+
+            self._lru.move_to_end(slot)
+            self.hits += 1
+            CACHE_LOOKUPS.labels(self.name, "hit").inc()
+            return copy.deepcopy(self._payloads[slot])
+
+    def put(
+        self,
+        question: str,
+        payload: Dict[str, Any],
+        scope: Hashable = (),
+        generation: Any = None
+    ):
+        """
+        Cache the answer to a question
+
+        Args:
+            question: The user's question
+            payload: What to return for similar questions (e.g., answer and sources)
+            scope: Scope the answer is valid for (see cache_scope)
+            generation: Corpus generation the answer was produced from
+        """
+        key = normalize_question(question)
+        vector = self._embed(question)
+        scope = (scope, negations(question))
+        payload = copy.deepcopy(payload)
+
+        with self._lock:
+            self._check_generation(generation)
+            if vector is not None and self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+
+            # A near-duplicate replaces the existing entry instead of adding another
+            slot = self._find(key, vector, scope)
+            if slot is None:
+                slot = self._free_slot()
+            else:
+                self._remove(slot)
+
+            scope_id = self._scopes.setdefault(scope, len(self._scopes))
+            if vector is not None:
+                self._vectors[slot] = vector
+            self._scope_ids[slot] = scope_id
+            self._keys[slot] = key
+            self._exact[(scope_id, key)] = slot
+            self._created[slot] = time.monotonic()
+            self._payloads[slot] = payload
+            self._lru[slot] = None
+            self._lru.move_to_end(slot)
+
+    def clear(self):
+        """Drop all cached answers"""
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit rate and entry counts"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "lookups": lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._lru),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        if self.embed is None:
+            return None
+        vector = np.asarray(self.embed(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_generation(self, generation: Any):
+        """Empty the cache if the corpus changed since the answers were cached"""
+        if generation != self._generation:
+            if self._lru:
+                self.invalidations += 1
+            self._clear()
+            self._generation = generation
+
+    def _clear(self):
+        self._scope_ids[:] = -1
+        self._payloads.clear()
+        self._keys.clear()
+        self._exact.clear()
+        self._lru.clear()
+        self._scopes.clear()
+
+    def _find(
+        self,
+        key: str,
+        vector: Optional[np.ndarray],
+        scope: Hashable,
+        threshold: Optional[float] = None
+    ) -> Optional[int]:
+        """Find the same question, or the most similar live entry above the threshold, in the same scope"""
+        scope_id = self._scopes.get(scope)
+        if scope_id is None:
+            return None
+
+        if self.ttl:
+            expired = np.flatnonzero(
+                (self._scope_ids >= 0) & (self._created < time.monotonic() - self.ttl)
+            )
+            for slot in expired:
+                self._remove(int(slot))
+                self.expirations += 1
+
+        slot = self._exact.get((scope_id, key))
+        if slot is not None or vector is None or self._vectors is None:
+            return slot
+
+        candidates = np.flatnonzero(self._scope_ids == scope_id)
+        if not len(candidates):
+            return None
+
+        similarities = self._vectors[candidates] @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < (self.threshold if threshold is None else threshold):
+            return None
+        return int(candidates[best])
+
+    def _free_slot(self) -> int:
+        """Get an unused slot, evicting the least recently used entry if full"""
+        free = np.flatnonzero(self._scope_ids < 0)
+        if len(free):
+            return int(free[0])
+
+        slot, _ = self._lru.popitem(last=False)
+        self._remove(slot)
+        self.evictions += 1
+        return slot
+
+    def _remove(self, slot: int):
+        key = self._keys.pop(slot, None)
+        if key is not None:
+            self._exact.pop((int(self._scope_ids[slot]), key), None)
+        self._scope_ids[slot] = -1
+        self._payloads.pop(slot, None)
+        self._lru.pop(slot, None)
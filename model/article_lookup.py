@@ -0,0 +1,198 @@
+"""
+Extractive fast path for direct article lookups.
+
+Questions such as "какво гласи чл. 70" or "show me Article 155" ask for the
+text of specific articles; the answer is the article itself. They are
+recognized by their explicit article references, the articles are fetched
+by number and a templated answer quoting them is returned, without
+retrieval or generation.
+
+The same templates answer questions whose generation ran out of time, with
+excerpts of the retrieved articles instead.
+"""
+
+import re
+import threading
+from typing import List, Dict, Any, Iterable
+
+from monitoring import REGISTRY
+from .context_packer import ContextPacker
+
+FAST_PATH = REGISTRY.counter(
+    "legal_fast_path_total",
+    "Questions checked for a direct article lookup, by result (hit, miss)",
+    ("path", "result")
+)
+
+# "чл. 70", "член 70а", "членове 70 и 71", "Art. 155", "articles 70, 71 and 72".
+# A letter right after the digits is part of the number ("чл. 107и" is article
+# 107и, not 107), so "и"/"and" only separate numbers as whole words.
+_NUMBER = r"\d+[a-zа-я]?\b"
+_SEPARATOR = r"\s*,\s*|\s+(?:и|and)\s+|\s*&\s*"
+_REFERENCE_RE = re.compile(
+    rf"\b(?:чл|член|членове|art|article|articles)\b\.?\s*({_NUMBER}(?:(?:{_SEPARATOR}){_NUMBER})*)",
+    re.IGNORECASE
+)
+_LIST_SEPARATOR_RE = re.compile(_SEPARATOR, re.IGNORECASE)
+
+# Words that ask for the text of an article rather than about its meaning
+LOOKUP_WORDS = frozenset("""
+    какво гласи гласят покажи покажете ми текст текста текстът на от кодекса кодекс
+    труда моля дай дайте пълния пълен цитирай цитирайте кой е съдържа съдържанието и
+    what does do say says show me the text of full please give quote labor labour code
+    is in read content contents display print
+""".split())
+
+# Cuts excerpts at sentence boundaries
+_EXCERPTS = ContextPacker(budget_tokens=0)
+
+
+def article_references(question: str) -> List[str]:
+    """
+    Find explicit article references in a question
+
+    Args:
+        question: The user's question
+
+    Returns:
+        Referenced article numbers without prefix ("70", "155а"), in order,
+        without duplicates
+    """
+    numbers = []
+    for match in _REFERENCE_RE.finditer(question.lower()):
+        for number in _LIST_SEPARATOR_RE.split(match.group(1)):
+            if number and number not in numbers:
+                numbers.append(number)
+    return numbers
+
+
+def direct_lookup(question: str) -> List[str]:
+    """
+    Get the articles a question asks for, if all it asks for is their text
+
+    Args:
+        question: The user's question
+
+    Returns:
+        Referenced article numbers, or an empty list when the question has no
+        explicit references or asks something beyond the article text
+    """
+    numbers = article_references(question)
+    if not numbers:
+        return []
+
+    rest = _REFERENCE_RE.sub(" ", question.lower())
+    if any(word not in LOOKUP_WORDS for word in re.findall(r"\w+", rest)):
+        return []
+    return numbers
+
+
+def display_number(number: str, language: str = "bg") -> str:
+    """Article number as shown in answers ("Чл. 70" / "Article 70")"""
+    if number[:1].isdigit():
+        return f"Чл. {number}" if language == "bg" else f"Article {number}"
+    return number
+
+
+def extractive_answer(articles: List[Dict[str, Any]], missing: Iterable[str] = (), language: str = "bg") -> str:
+    """
+    Build an answer quoting the requested articles
+
+    Args:
+        articles: Articles to quote (dicts with number and content)
+        missing: Requested article numbers that weren't found
+        language: Language of the answer ("bg" or "en")
+
+    Returns:
+        The answer text
+    """
+    names = [display_number(article["number"], language) for article in articles]
+    missing = [display_number(number, language) for number in missing]
+
+    if language == "bg":
+        parts = [f"Текст на {', '.join(names)} от Кодекса на труда:\n"]
+    else:
+        parts = [f"Text of {', '.join(names)} of the Bulgarian Labor Code (original wording):\n"]
+
+    for name, article in zip(names, articles):
+        parts.append(f"### {name}:\n{article['content'].strip()}\n")
+
+    if missing:
+        if language == "bg":
+            parts.append(f"Не намерих {', '.join(missing)} в базата данни.\n")
+        else:
+            parts.append(f"{', '.join(missing)} could not be found in the database.\n")
+
+    parts.append(_disclaimer(language))
+    return "\n".join(parts)
+
+
+def excerpt_answer(articles: List[Dict[str, Any]], language: str = "bg", max_tokens: int = 120) -> str:
+    """
+    Build an answer from the beginnings of the best matching articles (used
+    when no generated answer is ready in time, or the model isn't loaded)
+
+    Args:
+        articles: Articles in order of relevance (dicts with number and content)
+        language: Language of the answer ("bg" or "en")
+        max_tokens: Approximate length of each excerpt
+
+    Returns:
+        The answer text
+    """
+    if language == "bg":
+        parts = ["Не успях да подготвя пълен отговор. Това са най-близките до въпроса ви членове от Кодекса на труда:\n"]
+    else:
+        parts = ["I couldn't prepare a full answer. These are the articles of the Labor Code closest to your question:\n"]
+
+    for article in articles:
+        content = (article["content"] or "").strip()
+        excerpt, _ = _EXCERPTS.truncate(content, max_tokens)
+        if len(excerpt) < len(content):
+            excerpt = f"{excerpt or content[:max_tokens * 3].rstrip()} [...]"
+        parts.append(f"### {display_number(article['number'], language)}:\n{excerpt}\n")
+
+    parts.append(_disclaimer(language))
+    return "\n".join(parts)
+
+
+def _disclaimer(language: str) -> str:
+    if language == "bg":
+        return (
+            "Моля, имайте предвид, че това е обща информация, а не правен съвет. "
+            "За вашата конкретна ситуация, консултирайте се с квалифициран трудов адвокат."
+        )
+    return (
+        "Please note that this is general information and not legal advice. "
+        "For your specific situation, you should consult with a qualified labor lawyer."
+    )
+
+
+class FastPathStats:
+    """Hit rate of the fast path (questions answered by direct lookup)"""
+
+    def __init__(self, name: str = "fast_path"):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool):
+        """Count a question that was (hit) or wasn't (miss) answered by the fast path"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        FAST_PATH.labels(self.name, "hit" if hit else "miss").inc()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of questions checked and the hit rate"""
+        with self._lock:
+            checked = self.hits + self.misses
+            return {
+                "checked": checked,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / checked, 4) if checked else 0.0,
+            }
@@ -0,0 +1,857 @@
+"""
+Generation backends for the legal assistant application.
+
+A GenerationBackend turns a prompt into a completion. LegalAssistant and the
+Flask backend only talk to this interface, so where and how the model runs
+(GPU with bitsandbytes quantization, CPU with int8 dynamic quantization,
+a separate inference server, ...) is chosen when the model is loaded. With
+backend="auto" the CPU backend is used whenever no GPU is available.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Type
+
+from monitoring import current_timer, wrap_context
+from .batching import BatchScheduler
+from .deadline import RowStopper, stopping_criteria, wait_timeout
+from .http_pool import HTTPConnectionPool, RemoteBackendError
+from .prefix_cache import PrefixCache
+from .speculative import SpeculativeDecoder
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationBackend(ABC):
+    """A loaded model that generates completions for prompts"""
+
+    name = "backend"
+
+    @abstractmethod
+    def generate(
+        self,
+        prompt: str,
+        max_new_tokens: int = 500,
+        do_sample: bool = True,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        prefix: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> str:
+        """
+        Generate a completion for a prompt
+
+        Args:
+            prompt: Full prompt text
+            max_new_tokens: Maximum number of tokens to generate
+            do_sample: Whether to use sampling
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            prefix: Fixed start of the prompt (e.g., the system prompt) that
+                the backend may cache across requests
+            deadline: time.monotonic() value at which generation stops; the
+                text generated until then is returned (None for no limit)
+
+        Returns:
+            The generated text (without the prompt)
+        """
+
+    @abstractmethod
+    def generate_stream(
+        self,
+        prompt: str,
+        max_new_tokens: int = 500,
+        do_sample: bool = True,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        prefix: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Iterator[str]:
+        """Generate a completion, yielding text chunks as they are produced (see generate)"""
+
+    def warmup(self):
+        """Run a short generation so the first request doesn't pay for lazy initialization"""
+        self.generate("Кодекс на труда", max_new_tokens=8, do_sample=False)
+
+    def warm_prefix(self, prefix: str):
+        """Prepare a prompt prefix ahead of the first request that uses it (if the backend caches prefixes)"""
+
+    def describe(self) -> Dict[str, Any]:
+        """Describe the backend for status pages and benchmarks"""
+        return {"backend": self.name}
+
+
+def cuda_available() -> bool:
+    """Check for a usable GPU (False if torch isn't installed)"""
+    try:
+        import torch
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+
+def quantize_int8(model):
+    """
+    Quantize the linear layers of a model to int8 with dynamic activation
+    quantization (CPU inference; weights take a quarter of the fp32 memory)
+
+    Args:
+        model: PyTorch model on the CPU
+
+    Returns:
+        The quantized model
+    """
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class TransformersBackend(GenerationBackend):
+    """
+    A Hugging Face transformers model and processor.
+    Concurrent generate() calls are batched together by a BatchScheduler;
+    a request generated on its own starts from the cached prompt prefix.
+    With a draft model, requests are decoded speculatively one at a time
+    instead (and prefilled in full). Batches, speculative requests and
+    streams take turns on the model: only one generate() runs at a time.
+    """
+
+    name = "transformers"
+
+    def __init__(
+        self,
+        model,
+        processor,
+        max_batch_size: int = 8,
+        batch_window_ms: float = 20.0,
+        prefix_cache: bool = True,
+        draft_model=None,
+        draft_tokens: int = 5
+    ):
+        self.model = model
+        self.processor = processor
+        # Held for every pass over the model (batches, speculative requests, streams)
+        self.model_lock = threading.Lock()
+        self.prefix_cache = PrefixCache(model, processor, name=self.name) if prefix_cache else None
+        self.speculative = SpeculativeDecoder(
+            model,
+            draft_model,
+            draft_tokens=draft_tokens,
+            name=self.name
+        ) if draft_model is not None else None
+        self.scheduler = BatchScheduler(
+            self._generate_batch,
+            max_batch_size=max_batch_size,
+            batch_window_ms=batch_window_ms,
+            name=self.name
+        )
+
+    @classmethod
+    def load(
+        cls,
+        model_path: str,
+        api_key: Optional[str] = None,
+        quantize: str = "none",
+        device: str = "auto",
+        max_batch_size: int = 8,
+        batch_window_ms: float = 20.0,
+        prefix_cache: bool = True,
+        draft_model: Optional[str] = None,
+        draft_tokens: int = 5
+    ) -> "TransformersBackend":
+        """
+        Load the model with the requested quantization
+
+        Args:
+            model_path: Local path or Hugging Face model ID
+            api_key: Hugging Face token
+            quantize: Quantization level (none, 4bit, 8bit; 4bit and 8bit need
+                a GPU and bitsandbytes)
+            device: Device map (auto, cpu, cuda)
+            max_batch_size: Largest number of concurrent requests generated together
+            batch_window_ms: How long to wait for concurrent requests to batch
+            prefix_cache: Reuse the key/value cache of the fixed prompt prefix
+            draft_model: Local path or Hugging Face ID of a small model with the
+                same tokenizer for speculative decoding (None to turn it off)
+            draft_tokens: Tokens the draft model proposes per step
+
+        Returns:
+            Loaded backend
+        """
+        import torch
+
+        # Determine torch data type
+        if torch.cuda.is_available() and device != "cpu":
+            # Use bfloat16 for GPU if available
+            if torch.cuda.is_bf16_supported():
+                torch_dtype = torch.bfloat16
+            else:
+                torch_dtype = torch.float16
+        else:
+            # CPU usually needs float32 (except for quantized models)
+            torch_dtype = torch.float32
+
+        logger.info(f"Using direct model loading with device={device}, dtype={torch_dtype}, quantize={quantize}")
+
+        # Common model loading kwargs
+        model_kwargs = {
+            "device_map": device,
+            "token": api_key,
+            "torch_dtype": torch_dtype,
+        }
+
+        # bitsandbytes is a deployment dependency; it is never installed at runtime
+        if quantize in ("4bit", "8bit"):
+            try:
+                import bitsandbytes  # noqa: F401
+            except ImportError as e:
+                raise ImportError(
+                    f"{quantize} quantization needs bitsandbytes and a GPU "
+                    f"(use the cpu-int8 backend on CPU-only machines): {e}"
+                )
+            logger.info(f"bitsandbytes is installed, using {quantize} quantization")
+
+        if quantize == "4bit":
+            # 4-bit quantization params
+            model_kwargs.update({
+                "load_in_4bit": True,
+                "quantization_config": {
+                    "bnb_4bit_compute_dtype": torch_dtype,
+                }
+            })
+        elif quantize == "8bit":
+            # 8-bit quantization params
+            model_kwargs.update({
+                "load_in_8bit": True
+            })
+
+        model, processor = cls._load_pretrained(model_path, api_key, model_kwargs)
+
+        # The draft model is small enough to run unquantized
+        draft = cls._load_draft(draft_model, {
+            "device_map": device,
+            "token": api_key,
+            "torch_dtype": torch_dtype,
+        }) if draft_model else None
+
+        return cls(
+            model,
+            processor,
+            max_batch_size=max_batch_size,
+            batch_window_ms=batch_window_ms,
+            prefix_cache=prefix_cache,
+            draft_model=draft,
+            draft_tokens=draft_tokens
+        )
+
+    @staticmethod
+    def _load_pretrained(model_path: str, api_key: Optional[str], model_kwargs: Dict[str, Any]) -> Tuple[Any, Any]:
+        """Load the model and processor (Gemma 3 or any causal language model)"""
+        from transformers import AutoConfig, AutoProcessor, AutoModelForCausalLM
+
+        config = AutoConfig.from_pretrained(model_path, token=api_key)
+        if config.model_type == "gemma3":
+            from transformers import Gemma3ForConditionalGeneration as model_class
+        else:
+            model_class = AutoModelForCausalLM
+
+        model = model_class.from_pretrained(model_path, **model_kwargs).eval()
+        processor = AutoProcessor.from_pretrained(model_path, token=api_key)
+
+        # Batched prompts are padded on the left so generation continues every prompt
+        tokenizer = getattr(processor, "tokenizer", processor)
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+
+        return model, processor
+
+    @staticmethod
+    def _load_draft(draft_path: str, model_kwargs: Dict[str, Any]):
+        """Load the draft model for speculative decoding"""
+        from transformers import AutoModelForCausalLM
+
+        logger.info(f"Loading draft model {draft_path} for speculative decoding")
+        return AutoModelForCausalLM.from_pretrained(draft_path, **model_kwargs).eval()
+
+    def describe(self) -> Dict[str, Any]:
+        """Describe the backend, including the model's size"""
+        description = {"backend": self.name}
+        if self.model is not None:
+            description["parameters_mb"] = round(sum(
+                tensor.numel() * tensor.element_size()
+                for tensor in list(self.model.parameters()) + list(self.model.buffers())
+            ) / 2 ** 20, 1)
+        if self.speculative is not None:
+            description["speculative"] = self.speculative.stats()
+        return description
+
+    def generate(
+        self,
+        prompt: str,
+        max_new_tokens: int = 500,
+        do_sample: bool = True,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        prefix: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> str:
+        """
+        Generate a completion for a prompt
+
+        Args:
+            prompt: Full prompt text
+            max_new_tokens: Maximum number of tokens to generate
+            do_sample: Whether to use sampling
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            prefix: Fixed start of the prompt (e.g., the system prompt) whose
+                key/value cache is reused across requests
+            deadline: time.monotonic() value at which generation stops (None
+                for no limit)
+
+        Returns:
+            The generated text (without the prompt)
+
+        Raises:
+            TimeoutError: If the deadline passed before the request's batch
+                returned (e.g., it was still queued)
+        """
+        with current_timer().stage("generate.generate"):
+            if self.speculative is not None:
+                # Assisted generation verifies one sequence at a time, so there is nothing to batch
+                inputs = self._encode([prompt])
+                generate_kwargs = {}
+                if deadline is not None:
+                    generate_kwargs["stopping_criteria"] = stopping_criteria(deadline)
+                with self.model_lock:
+                    outputs, _ = self.speculative.generate(
+                        inputs,
+                        max_new_tokens=max_new_tokens,
+                        do_sample=do_sample,
+                        temperature=temperature,
+                        top_p=top_p,
+                        **generate_kwargs
+                    )
+                new_tokens = outputs[:, inputs["input_ids"].shape[-1]:]
+                return self.processor.batch_decode(new_tokens, skip_special_tokens=True)[0]
+
+            # Waits for the batch this request joined (includes queueing time).
+            # A row hands its text over as soon as it stops, before the rest
+            # of the batch is done.
+            prefix, rest = self._split_prompt(prompt, prefix)
+            stopped = Future()
+            future = self.scheduler.submit(
+                (prefix, rest, max_new_tokens, deadline, stopped),
+                key=(do_sample, temperature, top_p)
+            )
+            done, _ = wait([stopped, future], timeout=wait_timeout(deadline), return_when=FIRST_COMPLETED)
+            if stopped in done:
+                return stopped.result()
+            if future in done:
+                return future.result()
+            future.cancel()
+            raise TimeoutError("The deadline passed before the generation returned")
+
+    def warm_prefix(self, prefix: str):
+        """Prefill a prompt prefix (e.g., a system prompt) so no request pays for it"""
+        # Speculative requests are prefilled in full
+        if self.prefix_cache is None or self.speculative is not None:
+            return
+        with self.model_lock:
+            self.prefix_cache.warm(prefix)
+
+    def _split_prompt(self, prompt: str, prefix: Optional[str]) -> Tuple[str, str]:
+        """Split a prompt into its cacheable prefix ("" if none) and the rest"""
+        if self.prefix_cache is None or not prefix or not prompt.startswith(prefix):
+            return "", prompt
+        return prefix, prompt[len(prefix):]
+
+    def _encode(self, texts: List[str]):
+        """Tokenize prompts, adding special tokens unless a chat template already did"""
+        tokenizer = getattr(self.processor, "tokenizer", self.processor)
+        has_bos = tokenizer.bos_token is not None and all(text.startswith(tokenizer.bos_token) for text in texts)
+        return self.processor(
+            text=texts,
+            padding=True,
+            add_special_tokens=not has_bos,
+            return_tensors="pt"
+        ).to(self.model.device)
+
+    def _generate_batch(self, params: Tuple, prompts: List[Tuple[str, str, int, Optional[float], Future]]) -> List[str]:
+        """
+        Generate completions for a batch of prompts sharing the same sampling
+        parameters. Every row stops on its own (end of sequence, its token
+        budget or its deadline) while the others keep decoding, and its text
+        is set on its future right away.
+
+        Args:
+            params: Tuple of do_sample, temperature and top_p
+            prompts: Prompts as (prefix, rest, max_new_tokens, deadline,
+                stopped) tuples; stopped is the future for the row's text
+
+        Returns:
+            The generated texts (without the prompts), in order
+        """
+        do_sample, temperature, top_p = params
+        generate_kwargs = {
+            "max_new_tokens": max(budget for _, _, budget, _, _ in prompts),
+            "do_sample": do_sample,
+            "temperature": temperature,
+            "top_p": top_p,
+        }
+
+        # A request on its own starts from the cached prefix. Batched requests
+        # are left-padded, which shifts the prefix, so they are prefilled in full.
+        if len(prompts) == 1 and prompts[0][0]:
+            prefix, rest, _, deadline, _ = prompts[0]
+            if deadline is not None:
+                generate_kwargs["stopping_criteria"] = stopping_criteria(deadline)
+            with self.model_lock:
+                return [self.prefix_cache.generate(prefix, rest, **generate_kwargs)]
+
+        def hand_over(row: int, tokens):
+            text = self.processor.batch_decode([tokens[:prompts[row][2]]], skip_special_tokens=True)[0]
+            prompts[row][4].set_result(text)
+
+        inputs = self._encode([prefix + rest for prefix, rest, _, _, _ in prompts])
+        # With left padding every prompt ends at the same position
+        prompt_length = inputs["input_ids"].shape[-1]
+        eos = self.model.generation_config.eos_token_id
+        eos = set(eos) if isinstance(eos, (list, tuple)) else {eos}
+        stopper = RowStopper(
+            prompt_length,
+            [budget for _, _, budget, _, _ in prompts],
+            [deadline for _, _, _, deadline, _ in prompts],
+            eos,
+            hand_over
+        )
+        generate_kwargs["stopping_criteria"] = [stopper]
+        with self.model_lock:
+            outputs = self.model.generate(**inputs, **generate_kwargs)
+
+        # Rows that stopped early are padded up to the longest one
+        new_tokens = [row[:budget] for row, (_, _, budget, _, _) in zip(outputs[:, prompt_length:], prompts)]
+        return self.processor.batch_decode(new_tokens, skip_special_tokens=True)
+
+    def generate_stream(
+        self,
+        prompt: str,
+        max_new_tokens: int = 500,
+        do_sample: bool = True,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        prefix: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Iterator[str]:
+        """
+        Generate a completion, yielding text chunks as tokens are produced.
+        Generation runs in a worker thread that holds the model lock, so it
+        waits for a running batch and batches wait for it; it is stopped
+        early when the caller stops iterating (e.g., the client disconnected).
+
+        Args:
+            prompt: Full prompt text
+            max_new_tokens: Maximum number of tokens to generate
+            do_sample: Whether to use sampling
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            prefix: Fixed start of the prompt whose key/value cache is reused
+            deadline: time.monotonic() value at which generation stops (None
+                for no limit)
+
+        Yields:
+            Decoded text chunks (without the prompt)
+        """
+        from transformers import TextIteratorStreamer
+
+        cancelled = threading.Event()
+        prefix, rest = self._split_prompt(prompt, prefix)
+        streamer = TextIteratorStreamer(
+            getattr(self.processor, "tokenizer", self.processor),
+            skip_prompt=True,
+            skip_special_tokens=True
+        )
+        errors = []
+
+        def run():
+            generate_kwargs = {
+                "max_new_tokens": max_new_tokens,
+                "do_sample": do_sample,
+                "temperature": temperature,
+                "top_p": top_p,
+                "streamer": streamer,
+                "stopping_criteria": stopping_criteria(deadline, cancelled),
+            }
+            try:
+                with self.model_lock:
+                    # Prefilling the prefix runs the model too
+                    if prefix and self.speculative is None:
+                        inputs = self.prefix_cache.prepare(prefix, rest)
+                    else:
+                        inputs = self._encode([prompt])
+                    if self.speculative is not None:
+                        self.speculative.generate(inputs, **generate_kwargs)
+                    else:
+                        self.model.generate(**inputs, **generate_kwargs)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()  # Unblock the consumer
+
+        worker = threading.Thread(target=wrap_context(run), name="generate-stream", daemon=True)
+        worker.start()
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+        finally:
+            cancelled.set()
+
+        worker.join()
+        if errors:
+            raise errors[0]
+
+
+class CPUInt8Backend(TransformersBackend):
+    """
+    CPU inference with int8 dynamic quantization of the linear layers:
+    no GPU or bitsandbytes needed, about a quarter of the fp32 weight memory
+    and faster matrix multiplications on CPUs with int8 instructions.
+    """
+
+    name = "cpu-int8"
+    quantized = True
+
+    @classmethod
+    def load(
+        cls,
+        model_path: str,
+        api_key: Optional[str] = None,
+        quantize: str = "int8",
+        device: str = "cpu",
+        max_batch_size: int = 8,
+        batch_window_ms: float = 20.0,
+        prefix_cache: bool = True,
+        draft_model: Optional[str] = None,
+        draft_tokens: int = 5,
+        num_threads: Optional[int] = None
+    ) -> "CPUInt8Backend":
+        """
+        Load the model in float32 on the CPU and quantize it to int8
+
+        Args:
+            model_path: Local path or Hugging Face model ID
+            api_key: Hugging Face token
+            quantize: "fp32" keeps float32 weights (the baseline); any other
+                level (none, 4bit, 8bit, int8) uses int8
+            device: Ignored (always the CPU)
+            max_batch_size: Largest number of concurrent requests generated together
+            batch_window_ms: How long to wait for concurrent requests to batch
+            prefix_cache: Reuse the key/value cache of the fixed prompt prefix
+            draft_model: Local path or Hugging Face ID of a small model with the
+                same tokenizer for speculative decoding (quantized like the main model)
+            draft_tokens: Tokens the draft model proposes per step
+            num_threads: Intra-op threads for PyTorch (default: PyTorch's choice)
+
+        Returns:
+            Loaded backend
+        """
+        import torch
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        logger.info(f"Loading {model_path} for CPU inference (quantize={quantize})")
+        model_kwargs = {
+            "device_map": "cpu",
+            "token": api_key,
+            "torch_dtype": torch.float32,
+        }
+        model, processor = cls._load_pretrained(model_path, api_key, model_kwargs)
+        draft = cls._load_draft(draft_model, model_kwargs) if draft_model else None
+
+        if quantize != "fp32":
+            model = quantize_int8(model)
+            if draft is not None:
+                draft = quantize_int8(draft)
+
+        backend = cls(
+            model,
+            processor,
+            max_batch_size=max_batch_size,
+            batch_window_ms=batch_window_ms,
+            prefix_cache=prefix_cache,
+            draft_model=draft,
+            draft_tokens=draft_tokens
+        )
+        backend.quantized = quantize != "fp32"
+        return backend
+
+    def describe(self) -> Dict[str, Any]:
+        description = super().describe()
+        description["int8"] = self.quantized
+        return description
+
+
+class RemoteCompletionsBackend(GenerationBackend):
+    """
+    A model served by an OpenAI-compatible completions server (vLLM, TGI,
+    llama.cpp server, model/standin_server.py, ...). No weights are loaded in
+    this process; requests share a pool of keep-alive connections. Only the
+    tokenizer is loaded (when available) for chat templates and token counts.
+    """
+
+    name = "remote"
+
+    def __init__(
+        self,
+        base_url: str,
+        model_name: str,
+        processor=None,
+        api_key: Optional[str] = None,
+        max_connections: int = 8,
+        timeout: float = 120.0,
+        connect_timeout: float = 5.0,
+        retries: int = 2
+    ):
+        self.model = None
+        self.processor = processor
+        self.model_name = model_name
+        self.pool = HTTPConnectionPool(
+            base_url,
+            max_connections=max_connections,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+            retries=retries,
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else None,
+            name=self.name
+        )
+
+    @classmethod
+    def load(
+        cls,
+        model_path: str,
+        api_key: Optional[str] = None,
+        device: str = "auto",
+        base_url: Optional[str] = None,
+        remote_api_key: Optional[str] = None,
+        max_connections: int = 8,
+        timeout: float = 120.0,
+        connect_timeout: float = 5.0,
+        retries: int = 2,
+        load_tokenizer: bool = True,
+        **local_options
+    ) -> "RemoteCompletionsBackend":
+        """
+        Connect to the server (lazily) and load the tokenizer
+
+        Args:
+            model_path: Model name sent to the server (and tokenizer to load)
+            api_key: Hugging Face token for the tokenizer
+            device: Ignored (the server decides)
+            base_url: Server URL (default: GEMMA_REMOTE_URL)
+            remote_api_key: Bearer token for the server (default: GEMMA_REMOTE_API_KEY)
+            max_connections: Maximum number of requests in flight
+            timeout: Seconds to wait for the server to send data
+            connect_timeout: Seconds to wait for a connection
+            retries: How often a request that failed before reaching the server is retried
+            load_tokenizer: Load the model's tokenizer (needs transformers)
+            local_options: Options of the local backends (quantize, ...), ignored
+
+        Returns:
+            The backend
+        """
+        base_url = base_url or os.environ.get("GEMMA_REMOTE_URL")
+        if not base_url:
+            raise ValueError("The remote backend needs a server URL (remote_url or GEMMA_REMOTE_URL)")
+
+        return cls(
+            base_url,
+            model_path,
+            processor=cls._load_tokenizer(model_path, api_key) if load_tokenizer else None,
+            api_key=remote_api_key or os.environ.get("GEMMA_REMOTE_API_KEY"),
+            max_connections=max_connections,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+            retries=retries
+        )
+
+    @staticmethod
+    def _load_tokenizer(model_path: str, api_key: Optional[str]):
+        """Load the tokenizer, or None if transformers or the tokenizer isn't available"""
+        try:
+            from transformers import AutoTokenizer
+            return AutoTokenizer.from_pretrained(model_path, token=api_key)
+        except (ImportError, OSError, ValueError) as e:
+            logger.info(f"No tokenizer for {model_path} ({e}); token counts will be estimated")
+            return None
+
+    def describe(self) -> Dict[str, Any]:
+        """Describe the backend, including the connection pool"""
+        return {"backend": self.name, "url": self.pool.base_url, **self.pool.stats()}
+
+    def _payload(self, prompt, max_new_tokens, do_sample, temperature, top_p, stream) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "max_tokens": max_new_tokens,
+            "temperature": temperature if do_sample else 0.0,
+            "top_p": top_p if do_sample else 1.0,
+            "stream": stream,
+        }
+
+    def generate(
+        self,
+        prompt: str,
+        max_new_tokens: int = 500,
+        do_sample: bool = True,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        prefix: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> str:
+        """
+        Generate a completion on the server
+
+        Args:
+            prompt: Full prompt text
+            max_new_tokens: Maximum number of tokens to generate
+            do_sample: Whether to use sampling (greedy decoding otherwise)
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            prefix: Ignored (prefix caching is up to the server)
+            deadline: time.monotonic() value at which generation stops (None
+                for no limit)
+
+        Returns:
+            The generated text (without the prompt)
+
+        Raises:
+            RemoteBackendError: If the server can't be reached or answers with an error
+        """
+        if deadline is not None:
+            # Streamed, so the text received until the deadline can be kept
+            with current_timer().stage("generate.remote"):
+                return "".join(self.generate_stream(
+                    prompt, max_new_tokens, do_sample, temperature, top_p, deadline=deadline
+                ))
+
+        payload = self._payload(prompt, max_new_tokens, do_sample, temperature, top_p, stream=False)
+        with current_timer().stage("generate.remote"):
+            response = self.pool.request_json("POST", "/v1/completions", payload)
+        try:
+            return response["choices"][0]["text"]
+        except (KeyError, IndexError, TypeError):
+            raise RemoteBackendError(f"Unexpected completion response: {str(response)[:200]}")
+
+    def generate_stream(
+        self,
+        prompt: str,
+        max_new_tokens: int = 500,
+        do_sample: bool = True,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        prefix: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Iterator[str]:
+        """
+        Generate a completion on the server, yielding text chunks as the server
+        sends them (server-sent events). Stopping early closes the connection,
+        which stops the generation on the server.
+
+        Args:
+            prompt: Full prompt text
+            max_new_tokens: Maximum number of tokens to generate
+            do_sample: Whether to use sampling (greedy decoding otherwise)
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            prefix: Ignored (prefix caching is up to the server)
+            deadline: time.monotonic() value at which generation stops (None
+                for no limit)
+
+        Yields:
+            Decoded text chunks (without the prompt)
+        """
+        payload = self._payload(prompt, max_new_tokens, do_sample, temperature, top_p, stream=True)
+        lines = self.pool.stream_lines("POST", "/v1/completions", payload, timeout=wait_timeout(deadline))
+        try:
+            for line in lines:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return
+                text = self._event_text(line)
+                if text:
+                    yield text
+        except RemoteBackendError:
+            # A read that timed out at the deadline ends the answer early
+            if deadline is None or time.monotonic() < deadline:
+                raise
+        finally:
+            lines.close()  # Closing the connection stops the generation on the server
+
+    @staticmethod
+    def _event_text(line: str) -> str:
+        """Text of one server-sent completion event ("" for other lines)"""
+        if not line.startswith("data:"):
+            return ""
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            # Read on to the end of the response so the connection can be reused
+            return ""
+        try:
+            return json.loads(data)["choices"][0].get("text", "")
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise RemoteBackendError(f"Unexpected completion event: {data[:200]}")
+
+    def close(self):
+        """Close the idle connections"""
+        self.pool.close()
+
+
+BACKENDS: Dict[str, Type[GenerationBackend]] = {
+    "transformers": TransformersBackend,
+    "cpu-int8": CPUInt8Backend,
+    "remote": RemoteCompletionsBackend,
+}
+
+
+def select_backend(backend: str = "auto", device: str = "auto") -> str:
+    """
+    Resolve the backend name
+
+    Args:
+        backend: Backend name, or "auto" for the GPU backend when a GPU is
+            available and the CPU backend otherwise (a remote server is only
+            used when asked for)
+        device: Requested device ("cpu" always selects the CPU backend)
+
+    Returns:
+        A key of BACKENDS
+    """
+    if backend != "auto":
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown generation backend {backend!r} (choose from {', '.join(BACKENDS)})")
+        return backend
+    return "transformers" if device != "cpu" and cuda_available() else "cpu-int8"
+
+
+def load_backend(model_path: str, backend: str = "auto", device: str = "auto", **options) -> GenerationBackend:
+    """
+    Load a model with the selected backend
+
+    Args:
+        model_path: Local path or Hugging Face model ID
+        backend: Backend name or "auto" (see select_backend)
+        device: Requested device
+        options: Backend options (api_key, quantize, max_batch_size, ...)
+
+    Returns:
+        The loaded backend
+    """
+    name = select_backend(backend, device)
+    logger.info(f"Loading {model_path} with the {name} backend")
+    return BACKENDS[name].load(model_path, device=device, **options)
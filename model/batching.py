@@ -0,0 +1,195 @@
+"""
+Dynamic batching of concurrent generation requests.
+
+Requests submitted to a BatchScheduler are collected for a short window
+(or until the batch is full) and handed to the model together, so
+concurrent users share one padded forward pass per step instead of
+generating one after another. Each caller gets its own output back
+through a future.
+
+A batch runs in the context of the request that opened it (bound with
+monitoring.wrap_context), so the stages and spans it records belong to
+that request rather than being lost on the worker thread.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import List, Any, Callable, Optional, Hashable
+
+from monitoring import REGISTRY, wrap_context
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = REGISTRY.histogram(
+    "legal_generation_batch_size",
+    "Number of requests generated together in one batch",
+    ("scheduler",),
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 32)
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    "legal_generation_queue_wait_seconds",
+    "Time a generation request waited before its batch started",
+    ("scheduler",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+)
+
+
+class _Request:
+    __slots__ = ("key", "item", "future", "enqueued", "run_batch")
+
+    def __init__(self, key: Hashable, item: Any, run_batch: Callable):
+        self.key = key
+        self.item = item
+        self.future = Future()
+        self.enqueued = time.monotonic()
+        self.run_batch = run_batch  # bound to the submitting caller's context
+
+
+class BatchScheduler:
+    """
+    Collects requests arriving within a short window and runs them as one batch.
+    Only requests with the same key (e.g., the same generation parameters)
+    are batched together.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        batch_window_ms: float = 20.0,
+        name: str = "generation"
+    ):
+        """
+        Initialize the scheduler and start its worker thread
+
+        Args:
+            run_batch: Function taking a key and a list of items and returning
+                one result per item, in order
+            max_batch_size: Largest number of requests in one batch
+            batch_window_ms: How long to wait for more requests after the
+                first one arrives (0 runs whatever is queued immediately)
+            name: Name used for the worker thread and metrics
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.batch_window = max(0.0, batch_window_ms) / 1000.0
+        self.name = name
+
+        self._pending: List[_Request] = []
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.batches = 0
+        self.requests = 0
+
+        self._worker = threading.Thread(target=self._loop, name=f"batch-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, item: Any, key: Hashable = None) -> Future:
+        """
+        Queue an item for the next batch
+
+        Args:
+            item: Input for run_batch (e.g., a prompt)
+            key: Requests are only batched with others of the same key
+
+        Returns:
+            Future resolving to the item's result
+        """
+        request = _Request(key, item, wrap_context(self.run_batch))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Batch scheduler {self.name} is closed")
+            self._pending.append(request)
+            self._cond.notify()
+        return request.future
+
+    def run(self, item: Any, key: Hashable = None, timeout: Optional[float] = None) -> Any:
+        """
+        Submit an item and wait for its result
+
+        Raises:
+            TimeoutError: If the result isn't there within timeout seconds
+                (a request whose batch hasn't started yet is dropped)
+        """
+        future = self.submit(item, key)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def close(self):
+        """Run the queued requests and stop the worker thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+
+    def stats(self) -> dict:
+        """Get the number of batches and requests processed so far"""
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": round(self.requests / self.batches, 3) if self.batches else 0.0,
+        }
+
+    def _next_batch(self) -> List[_Request]:
+        """Wait for requests and take the next batch out of the queue"""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return []
+
+            # The window starts when the oldest request arrived, so requests
+            # that queued up while the previous batch ran start right away
+            key = self._pending[0].key
+            deadline = self._pending[0].enqueued + self.batch_window
+            while not self._closed:
+                same_key = sum(1 for request in self._pending if request.key == key)
+                remaining = deadline - time.monotonic()
+                if same_key >= self.max_batch_size or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch, rest = [], []
+            for request in self._pending:
+                if request.key == key and len(batch) < self.max_batch_size:
+                    batch.append(request)
+                else:
+                    rest.append(request)
+            self._pending = rest
+            return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.monotonic()
+            for request in batch:
+                QUEUE_WAIT.labels(self.name).observe(started - request.enqueued)
+            BATCH_SIZE.labels(self.name).observe(len(batch))
+            self.batches += 1
+            self.requests += len(batch)
+
+            try:
+                results = batch[0].run_batch(batch[0].key, [request.item for request in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch of {len(batch)} returned {len(results)} results")
+            except Exception as e:
+                logger.error(f"Batch of {len(batch)} failed: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
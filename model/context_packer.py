@@ -0,0 +1,262 @@
+"""
+Token-budget-aware packing of retrieved articles into a prompt context.
+
+Retrieved articles vary from one sentence to several pages, so prompt size
+(and prefill time) used to depend on whatever the search returned. The
+ContextPacker counts tokens with the model tokenizer, adds passages by
+score until the budget is used up, truncates the passage that no longer
+fits at a sentence boundary and reports how many tokens it left out.
+"""
+
+import re
+import math
+import logging
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import List, Optional, Callable, Any
+
+from monitoring import REGISTRY, current_span
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_TOKENS = REGISTRY.histogram(
+    "legal_context_tokens",
+    "Tokens of article context in a prompt after packing",
+    ("packer",),
+    buckets=(64, 128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096, 8192)
+)
+CONTEXT_TOKENS_SAVED = REGISTRY.counter(
+    "legal_context_tokens_saved_total",
+    "Tokens of retrieved context left out by the packer",
+    ("packer",)
+)
+
+# Sentence ends, plus line breaks between numbered paragraphs ("(1) ... \n(2) ...")
+_SENTENCE_RE = re.compile(r"[^.!?;\n]*(?:[.!?;]+|\n+|$)\s*")
+
+TokenCounter = Callable[[str], int]
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Estimate the token count without a tokenizer (about 4 characters per
+    subword token, every punctuation mark a token of its own)
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated number of tokens
+    """
+    return sum(
+        math.ceil(len(piece) / 4) if piece[0].isalnum() or piece[0] == "_" else 1
+        for piece in re.findall(r"\w+|[^\w\s]", text)
+    )
+
+
+def tokenizer_counter(tokenizer: Any, cache_size: int = 4096) -> TokenCounter:
+    """
+    Count tokens with a Hugging Face tokenizer. Counts are cached, since the
+    same articles are packed again and again.
+
+    Args:
+        tokenizer: Tokenizer (or processor with a tokenizer attribute)
+        cache_size: Number of texts whose counts are remembered
+
+    Returns:
+        Function returning the number of tokens in a text
+    """
+    tokenizer = getattr(tokenizer, "tokenizer", tokenizer)
+
+    @lru_cache(maxsize=cache_size)
+    def count(text: str) -> int:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    return count
+
+
+@dataclass
+class Passage:
+    """A piece of context: a header (title, article number) and the text to pack"""
+    text: str
+    header: str = ""
+    score: float = 0.0
+    truncated: bool = False
+
+
+@dataclass
+class PackedContext:
+    """Passages chosen by the packer, in score order, with token accounting"""
+    passages: List[Passage] = field(default_factory=list)
+    budget: int = 0
+    tokens: int = 0          # Tokens of the packed passages
+    input_tokens: int = 0    # Tokens of all candidate passages
+    truncated: int = 0
+    dropped: int = 0
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.input_tokens - self.tokens
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.budget - self.tokens)
+
+    def extend(self, other: "PackedContext"):
+        """Append passages packed into this context's remaining budget"""
+        self.passages.extend(other.passages)
+        self.tokens += other.tokens
+        self.input_tokens += other.input_tokens
+        self.truncated += other.truncated
+        self.dropped += other.dropped
+
+    def report(self) -> dict:
+        """Token accounting for logs and traces"""
+        return {
+            "budget": self.budget,
+            "tokens": self.tokens,
+            "input_tokens": self.input_tokens,
+            "saved_tokens": self.saved_tokens,
+            "passages": len(self.passages),
+            "truncated": self.truncated,
+            "dropped": self.dropped,
+        }
+
+
+class ContextPacker:
+    """
+    Greedily packs the highest-scoring passages into a token budget.
+    A passage that doesn't fit is cut at the last sentence that does; a
+    passage that can't keep at least min_passage_tokens is left out.
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int = 2000,
+        count_tokens: Optional[TokenCounter] = None,
+        min_passage_tokens: int = 32,
+        name: str = "context"
+    ):
+        """
+        Initialize the packer
+
+        Args:
+            budget_tokens: Maximum tokens of context (0 packs everything)
+            count_tokens: Token counter (defaults to approximate_tokens)
+            min_passage_tokens: Smallest useful truncated passage
+            name: Name used for metrics
+        """
+        self.budget_tokens = budget_tokens
+        self.count_tokens = count_tokens or approximate_tokens
+        self.min_passage_tokens = min_passage_tokens
+        self.name = name
+
+    def pack(self, passages: List[Passage], budget: Optional[int] = None) -> PackedContext:
+        """
+        Pack passages into the budget
+
+        Args:
+            passages: Candidate passages
+            budget: Token budget for this call (defaults to budget_tokens)
+
+        Returns:
+            The packed passages, highest score first, with token counts
+        """
+        budget = self.budget_tokens if budget is None else budget
+        packed = PackedContext(budget=budget)
+
+        # sorted() is stable, so equal scores keep the retrieval order
+        for passage in sorted(passages, key=lambda p: -p.score):
+            header_tokens = self.count_tokens(passage.header) if passage.header else 0
+            text_tokens = self.count_tokens(passage.text)
+            packed.input_tokens += header_tokens + text_tokens
+
+            available = packed.remaining - header_tokens if budget else text_tokens
+            if text_tokens <= available:
+                packed.passages.append(passage)
+                packed.tokens += header_tokens + text_tokens
+                continue
+
+            text, kept_tokens = self.truncate(passage.text, available)
+            if kept_tokens < self.min_passage_tokens:
+                packed.dropped += 1
+                continue
+
+            packed.passages.append(replace(passage, text=text, truncated=True))
+            packed.tokens += header_tokens + kept_tokens
+            packed.truncated += 1
+
+        return packed
+
+    def has_room(self, packed: PackedContext) -> bool:
+        """Check whether another passage could still be packed"""
+        return not packed.budget or packed.remaining >= self.min_passage_tokens
+
+    def pack_more(self, packed: PackedContext, passages: List[Passage]) -> PackedContext:
+        """
+        Pack lower-priority passages into what is left of a packed context's budget
+
+        Args:
+            packed: Context packed earlier (extended in place)
+            passages: Additional candidate passages
+
+        Returns:
+            The extended context
+        """
+        if not self.has_room(packed):
+            packed.dropped += len(passages)
+            return packed
+        packed.extend(self.pack(passages, budget=packed.remaining if packed.budget else 0))
+        return packed
+
+    def truncate(self, text: str, max_tokens: int) -> tuple:
+        """
+        Cut text after the last whole sentence that fits
+
+        Args:
+            text: Text to cut
+            max_tokens: Token limit
+
+        Returns:
+            Tuple of the cut text and its token count ("" and 0 if not even
+            the first sentence fits)
+        """
+        if max_tokens <= 0:
+            return "", 0
+
+        kept = []
+        used = 0
+        for sentence in _SENTENCE_RE.findall(text):
+            if not sentence:
+                continue
+            tokens = self.count_tokens(sentence)
+            if used + tokens > max_tokens:
+                break
+            kept.append(sentence)
+            used += tokens
+
+        # Subword tokens can merge across sentence boundaries; make sure the
+        # joined text really fits
+        while kept:
+            cut = "".join(kept).rstrip()
+            tokens = self.count_tokens(cut)
+            if tokens <= max_tokens:
+                return cut, tokens
+            kept.pop()
+        return "", 0
+
+    def record(self, packed: PackedContext):
+        """Report a packed context in metrics, the current trace span and the log"""
+        CONTEXT_TOKENS.labels(self.name).observe(packed.tokens)
+        CONTEXT_TOKENS_SAVED.labels(self.name).inc(packed.saved_tokens)
+
+        report = packed.report()
+        span = current_span()
+        for key, value in report.items():
+            span.set_attribute(f"context.{key}", value)
+
+        if packed.saved_tokens:
+            logger.info(
+                f"Packed context into {packed.tokens}/{packed.budget} tokens, "
+                f"saved {packed.saved_tokens} ({packed.truncated} truncated, {packed.dropped} dropped)"
+            )
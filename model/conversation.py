@@ -0,0 +1,305 @@
+"""
+Server-side conversation state for follow-up questions.
+
+A follow-up ("а ако съм на изпитателен срок?") needs the earlier turns, but
+sending the whole history would make every prompt, and its prefill, longer
+than the one before. A conversation keeps its last few turns verbatim and
+folds older turns into a short summary as they drop out, so each turn is
+compressed once instead of on every request. Articles retrieved for earlier
+turns are remembered and offered again to follow-ups. Conversations expire
+after a while and the store holds a bounded number of them.
+"""
+
+import re
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+from monitoring import REGISTRY
+from .context_packer import ContextPacker, TokenCounter, approximate_tokens
+
+logger = logging.getLogger(__name__)
+
+CONVERSATIONS = REGISTRY.gauge(
+    "legal_conversations",
+    "Conversations held by the conversation store",
+    ("store",)
+)
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+
+@dataclass(frozen=True)
+class Turn:
+    """One question and its answer"""
+    question: str
+    answer: str
+    articles: Tuple[str, ...] = ()  # numbers of the articles the answer was based on
+
+
+@dataclass
+class History:
+    """
+    What a prompt gets from a conversation: a summary of older turns, the
+    recent ones and the articles retrieved for them (most recently used first)
+    """
+    summary: str = ""
+    turns: List[Turn] = field(default_factory=list)
+    articles: List[Dict[str, Any]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.summary or self.turns)
+
+    def render(self, max_tokens: int, language: str = "en", count_tokens: Optional[TokenCounter] = None) -> str:
+        """
+        Format the history for a prompt, within a token budget. The newest
+        turns are kept first, then the summary; a turn that doesn't fit
+        whole keeps the start of its answer.
+
+        Args:
+            max_tokens: Token budget for the history
+            language: Language of the labels ("bg" or "en")
+            count_tokens: Token counter (defaults to approximate_tokens)
+
+        Returns:
+            The history text ("" if there is none or no budget)
+        """
+        if not self or max_tokens <= 0:
+            return ""
+
+        count_tokens = count_tokens or approximate_tokens
+        truncate = ContextPacker(count_tokens=count_tokens).truncate
+        if language == "bg":
+            title, summary_title, user, assistant = "Предишен разговор:", "Обобщение на по-ранните въпроси:", "Потребител", "Асистент"
+        else:
+            title, summary_title, user, assistant = "Earlier in this conversation:", "Summary of earlier questions:", "User", "Assistant"
+
+        budget = max_tokens - count_tokens(title)
+        parts = []
+        for turn in reversed(self.turns):
+            question = f"{user}: {turn.question}\n"
+            answer = f"{assistant}: {turn.answer.strip()}\n"
+            tokens = count_tokens(question + answer)
+            if tokens > budget:
+                # Keep the question and as much of the answer as fits, then stop
+                cut, _ = truncate(answer, budget - count_tokens(question) - count_tokens(" ..."))
+                if cut:
+                    parts.append(f"{question}{cut} ...\n")
+                budget = 0
+                break
+            parts.append(question + answer)
+            budget -= tokens
+
+        if self.summary and budget > 0:
+            summary, _ = truncate(f"{summary_title}\n{self.summary}\n", budget)
+            if summary:
+                parts.append(summary + "\n")
+
+        # Token counts of joined text can differ from the sum of the parts
+        while parts:
+            text = f"{title}\n" + "\n".join(reversed(parts))
+            if count_tokens(text) <= max_tokens:
+                return text
+            parts.pop()
+        return ""
+
+
+def summarize_turn(turn: Turn, max_tokens: int = 60) -> str:
+    """
+    Compress a turn into one summary line: the question, the first sentence
+    of the answer and the articles it cited
+
+    Args:
+        turn: The turn to compress
+        max_tokens: Approximate length of the answer part
+
+    Returns:
+        The summary line
+    """
+    answer = " ".join(turn.answer.split())
+    first = _SENTENCE_END_RE.split(answer, maxsplit=1)[0]
+    if approximate_tokens(first) > max_tokens:
+        first = first[:max_tokens * 3].rsplit(" ", 1)[0] + " ..."
+    line = f"- {' '.join(turn.question.split())} -> {first}"
+    if turn.articles:
+        line += f" ({', '.join(turn.articles)})"
+    return line
+
+
+class Conversation:
+    """The state of one conversation"""
+
+    def __init__(self, conversation_id: str):
+        self.id = conversation_id
+        self.turns: deque = deque()
+        self.summary_lines: List[str] = []
+        self.articles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.touched = time.monotonic()
+        self.lock = threading.Lock()
+
+
+class ConversationStore:
+    """
+    Conversations by ID, each with its recent turns, a summary of older
+    turns and the articles retrieved for it
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 3,
+        summary_tokens: int = 200,
+        max_articles: int = 5,
+        max_conversations: int = 1000,
+        ttl_seconds: float = 3600,
+        summarize: Optional[Callable[[Turn], str]] = None,
+        name: str = "conversations"
+    ):
+        """
+        Initialize the store
+
+        Args:
+            max_turns: Turns kept verbatim per conversation
+            summary_tokens: Size of the summary of older turns (the oldest
+                summary lines are dropped beyond it)
+            max_articles: Articles remembered per conversation
+            max_conversations: Conversations kept (least recently used are dropped)
+            ttl_seconds: Idle time after which a conversation is forgotten (0 = never)
+            summarize: Compresses a turn that drops out of the verbatim window
+                into a summary line (default: summarize_turn)
+            name: Name used for metrics
+        """
+        self.max_turns = max(0, int(max_turns))
+        self.summary_tokens = summary_tokens
+        self.max_articles = max_articles
+        self.max_conversations = max_conversations
+        self.ttl = ttl_seconds
+        self.summarize = summarize or summarize_turn
+        self.name = name
+
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        CONVERSATIONS.labels(name).set_function(lambda: len(self._conversations))
+
+    def start(self, conversation_id: Optional[str] = None) -> str:
+        """
+        Continue a conversation, or start a new one if the ID is unknown,
+        expired or missing
+
+        Args:
+            conversation_id: ID sent by the client (None for a new conversation)
+
+        Returns:
+            The ID of the conversation
+        """
+        with self._lock:
+            conversation = self._get(conversation_id)
+            if conversation is None:
+                conversation = Conversation(uuid.uuid4().hex)
+                self._conversations[conversation.id] = conversation
+                while len(self._conversations) > self.max_conversations:
+                    self._conversations.popitem(last=False)
+            return conversation.id
+
+    def history(self, conversation_id: Optional[str]) -> History:
+        """Get the summary, recent turns and remembered articles of a conversation (empty if unknown)"""
+        conversation = self._lookup(conversation_id)
+        if conversation is None:
+            return History()
+        with conversation.lock:
+            return History(
+                "\n".join(conversation.summary_lines),
+                list(conversation.turns),
+                list(reversed(conversation.articles.values()))
+            )
+
+    def articles(self, conversation_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Get the articles retrieved for a conversation, most recently used first"""
+        conversation = self._lookup(conversation_id)
+        if conversation is None:
+            return []
+        with conversation.lock:
+            return list(reversed(conversation.articles.values()))
+
+    def record(
+        self,
+        conversation_id: Optional[str],
+        question: str,
+        answer: str,
+        articles: Optional[List[Dict[str, Any]]] = None
+    ):
+        """
+        Add a turn to a conversation; the oldest verbatim turn beyond
+        max_turns is folded into the summary
+
+        Args:
+            conversation_id: The conversation (unknown IDs are ignored)
+            question: The user's question
+            answer: The answer given
+            articles: Articles the answer was based on (dicts with number)
+        """
+        conversation = self._lookup(conversation_id)
+        if conversation is None:
+            return
+
+        articles = articles or []
+        turn = Turn(question, answer, tuple(str(article["number"]) for article in articles))
+        with conversation.lock:
+            conversation.turns.append(turn)
+            while len(conversation.turns) > self.max_turns:
+                self._fold(conversation, conversation.turns.popleft())
+
+            for article in articles:
+                number = str(article["number"])
+                conversation.articles.pop(number, None)
+                conversation.articles[number] = article
+            while len(conversation.articles) > self.max_articles:
+                conversation.articles.popitem(last=False)
+
+    def end(self, conversation_id: str) -> bool:
+        """Forget a conversation; returns whether it existed"""
+        with self._lock:
+            return self._conversations.pop(conversation_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of conversations held"""
+        with self._lock:
+            return {"conversations": len(self._conversations), "max_conversations": self.max_conversations}
+
+    def _fold(self, conversation: Conversation, turn: Turn):
+        """Compress a turn into the conversation's summary, within summary_tokens"""
+        try:
+            line = self.summarize(turn)
+        except Exception as e:
+            logger.error(f"Summarizing a turn of conversation {conversation.id} failed: {e}")
+            line = summarize_turn(turn)
+        conversation.summary_lines.append(line)
+        while (
+            len(conversation.summary_lines) > 1
+            and approximate_tokens("\n".join(conversation.summary_lines)) > self.summary_tokens
+        ):
+            conversation.summary_lines.pop(0)
+
+    def _lookup(self, conversation_id: Optional[str]) -> Optional[Conversation]:
+        with self._lock:
+            return self._get(conversation_id)
+
+    def _get(self, conversation_id: Optional[str]) -> Optional[Conversation]:
+        """Find a live conversation and mark it as used (call with the lock held)"""
+        if not conversation_id:
+            return None
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            return None
+
+        now = time.monotonic()
+        if self.ttl and now - conversation.touched > self.ttl:
+            del self._conversations[conversation_id]
+            return None
+        conversation.touched = now
+        self._conversations.move_to_end(conversation_id)
+        return conversation
@@ -0,0 +1,172 @@
+"""
+Per-request latency budgets.
+
+A Deadline is started when a request arrives. Retrieval checks it between
+stages and generation is stopped by a stopping criterion once it passes, so
+a slow or stuck generation can't hold a request indefinitely. The pipeline
+then serves the best answer it has within the budget; which tier that was
+(generated, partial, extractive, cache, ...) is counted per path.
+"""
+
+import time
+import threading
+from typing import Any, Callable, List, Optional, Set
+
+from monitoring import REGISTRY
+
+SERVED_BY = REGISTRY.counter(
+    "legal_answers_served_total",
+    "Answers by the tier that served them (generated, partial, extractive, cache, fast_path, ...)",
+    ("path", "tier")
+)
+DEADLINE_EXCEEDED = REGISTRY.counter(
+    "legal_deadline_exceeded_total",
+    "Requests whose latency budget ran out, by the stage that was cut short",
+    ("path", "stage")
+)
+
+# Time allowed after the deadline for the last decoding step and the decode
+STOP_GRACE_S = 0.5
+
+
+class Deadline:
+    """A point in time (time.monotonic) by which a request must be answered"""
+
+    def __init__(self, budget_s: Optional[float]):
+        """
+        Start the clock
+
+        Args:
+            budget_s: Seconds the request may take (None or 0 for no limit)
+        """
+        self.budget_s = budget_s or None
+        self.started = time.monotonic()
+        self.at = self.started + self.budget_s if self.budget_s else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a limit"""
+        if self.at is None:
+            return None
+        return max(0.0, self.at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Whether the budget is used up"""
+        return self.at is not None and time.monotonic() >= self.at
+
+    def elapsed(self) -> float:
+        """Seconds since the request started"""
+        return time.monotonic() - self.started
+
+    def allows(self, seconds: float) -> bool:
+        """Whether at least the given number of seconds are left"""
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+
+
+def wait_timeout(deadline_at: Optional[float]) -> Optional[float]:
+    """
+    How long to wait for a generation that stops at the given deadline
+
+    Args:
+        deadline_at: Deadline as a time.monotonic() value (None for no limit)
+
+    Returns:
+        Seconds to wait (None waits forever)
+    """
+    if deadline_at is None:
+        return None
+    return max(0.0, deadline_at - time.monotonic()) + STOP_GRACE_S
+
+
+def stopping_criteria(deadline_at: Optional[float] = None, cancelled: Optional[threading.Event] = None):
+    """
+    Stopping criteria for model.generate() that end generation at a deadline
+    or when an event is set (what was generated so far is kept)
+
+    Args:
+        deadline_at: Deadline as a time.monotonic() value (None for no limit)
+        cancelled: Event that stops generation when set
+
+    Returns:
+        A StoppingCriteriaList
+    """
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class _Stop(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            if cancelled is not None and cancelled.is_set():
+                return True
+            return deadline_at is not None and time.monotonic() >= deadline_at
+
+    return StoppingCriteriaList([_Stop()])
+
+
+class RowStopper:
+    """
+    Stopping criterion for a batched model.generate() that ends every row on
+    its own: at an end-of-sequence token, at its token budget or at its
+    deadline. generate() pads the rows that stopped and keeps decoding the
+    others on the same key/value cache, and each stopped row is handed to
+    on_stop right away, so its request doesn't wait for the rest of the batch.
+    """
+
+    def __init__(
+        self,
+        prompt_length: int,
+        budgets: List[int],
+        deadlines: List[Optional[float]],
+        eos_token_ids: Set[int],
+        on_stop: Callable[[int, Any], None]
+    ):
+        """
+        Args:
+            prompt_length: Width of the (padded) prompts in tokens
+            budgets: Maximum number of new tokens per row
+            deadlines: time.monotonic() deadline per row (None for no limit)
+            eos_token_ids: Tokens that end a row
+            on_stop: Called once per row that stops, with the row's index and
+                its new tokens
+        """
+        self.prompt_length = prompt_length
+        self.budgets = budgets
+        self.deadlines = deadlines
+        self.eos_token_ids = eos_token_ids
+        self.on_stop = on_stop
+        self.stopped = [False] * len(budgets)
+
+    def __call__(self, input_ids, scores=None, **kwargs):
+        generated = input_ids.shape[-1] - self.prompt_length
+        now = time.monotonic()
+        # One flag per row, of the same array type as input_ids (all False)
+        done = input_ids[:, -1] < 0
+        for row, stopped in enumerate(self.stopped):
+            if not stopped:
+                deadline = self.deadlines[row]
+                stopped = (
+                    generated >= self.budgets[row]
+                    or int(input_ids[row, -1]) in self.eos_token_ids
+                    or (deadline is not None and now >= deadline)
+                )
+                if stopped:
+                    self.stopped[row] = True
+                    self.on_stop(row, input_ids[row, self.prompt_length:])
+            done[row] = stopped
+        return done
+
+
+def partial_answer(text: str, language: str = "en") -> str:
+    """
+    Mark an answer that was cut short at the deadline
+
+    Args:
+        text: The text generated until the deadline
+        language: Language of the answer ("bg" or "en")
+
+    Returns:
+        The text with a note that it is incomplete
+    """
+    if language == "bg":
+        note = "(Отговорът е непълен: времето за отговор изтече. Моля, задайте въпроса отново или се консултирайте с юрист.)"
+    else:
+        note = "(This answer is incomplete: the time available for answering ran out. Please ask again or consult a lawyer.)"
+    return f"{text.rstrip()} ...\n\n{note}"
@@ -4,12 +4,26 @@ This provides a connection between our database and the language model.
 """
 
 import os
-from typing import List, Dict, Any, Optional
+import re
+import time
+from typing import List, Dict, Any, Optional, Union, Iterator, Tuple
 import logging
 
 # This will be imported when Gemma 3 is installed or used via API
 # from gemma import GemmaModel  # Placeholder import
-from database import HybridDatabaseManager
+from database import HybridDatabaseManager, SearchResults
+from monitoring import REGISTRY, StageTimer, NULL_TIMER, current_timer, current_span, span, traced
+from .model_manager import ModelManager
+from .backends import load_backend
+from .answer_cache import SemanticAnswerCache, cache_scope
+from .context_packer import ContextPacker, Passage, tokenizer_counter
+from .speculative import collect_speculation
+from .intent_router import IntentRouter
+from .article_lookup import FastPathStats, direct_lookup, extractive_answer, excerpt_answer
+from .deadline import Deadline, SERVED_BY, DEADLINE_EXCEEDED, partial_answer
+from .reranker import CrossEncoderReranker, DEFAULT_RERANK_MODEL
+from .conversation import History
+from .prompts import SYSTEM_PROMPTS, user_prompt, chat_prompt
 
 # Set up logging
 logging.basicConfig(
@@ -18,6 +32,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+GENERATION_LATENCY = REGISTRY.histogram(
+    "legal_generation_duration_seconds",
+    "Time spent generating an answer with the model",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+)
+GENERATED_TOKENS = REGISTRY.counter(
+    "legal_generated_tokens_total",
+    "Tokens generated by the model"
+)
+TOKENS_PER_SECOND = REGISTRY.histogram(
+    "legal_generation_tokens_per_second",
+    "Generation speed of each answer",
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 200)
+)
+GENERATIONS_IN_FLIGHT = REGISTRY.gauge(
+    "legal_generations_in_flight",
+    "Answers currently being generated"
+)
+GENERATION_ERRORS = REGISTRY.counter(
+    "legal_generation_errors_total",
+    "Failed answer generations"
+)
+
+def _law_number(number: Any) -> str:
+    """An article number as the corpus writes it ("70" -> "Чл. 70")"""
+    number = str(number)
+    return number if number.startswith("Чл.") else f"Чл. {number}"
+
+
+def _question_language(question: str) -> str:
+    """Language of a question ("bg" if it has Cyrillic letters, else "en")"""
+    return "bg" if re.search(r"[\u0400-\u04FF]", question) else "en"
+
+
+NO_INFORMATION_ANSWER = (
+    "I don't have enough information to answer this question based on the laws in my database. "
+    "Please consult a legal professional for advice on this matter."
+)
+
+GENERATION_ERROR_ANSWER = (
+    "I'm sorry, I encountered an issue processing your question. "
+    "Based on the legal information I have, I can tell you that the Bulgarian "
+    "Labor Code does address this topic, but I recommend consulting the specific "
+    "articles in the law or speaking with a legal professional for accurate guidance."
+)
+
 
 class LegalAssistant:
     """
@@ -49,170 +109,186 @@ class LegalAssistant:
         
         # Default configuration
         self.config = {
-            "quantize": "none",  # none, 4bit, 8bit
+            "backend": "auto",   # auto (cpu-int8 without a GPU), transformers, cpu-int8, remote
+            "quantize": "none",  # none, 4bit, 8bit (GPU only; the cpu-int8 backend always uses int8)
             "device": "auto",    # auto, cpu, cuda
             "temperature": 0.7,  # generation temperature
             "max_tokens": 500,   # maximum tokens to generate
             "do_sample": True,   # whether to use sampling
-            "top_p": 0.9         # nucleus sampling parameter
+            "top_p": 0.9,        # nucleus sampling parameter
+            "collect_timings": False,  # add per-stage timings to answers
+            "preload_model": True,     # load the model when the assistant is created
+            "preload_in_background": False,  # don't block while preloading (check is_ready())
+            "max_batch_size": 8,       # concurrent questions generated together
+            "batch_window_ms": 20,     # how long to wait for concurrent questions to batch
+            "answer_cache": True,      # reuse answers to near-duplicate questions
+            "answer_cache_threshold": 0.9,  # minimum question similarity for a cache hit
+            "answer_cache_ttl": 3600,  # seconds a cached answer stays valid
+            "answer_cache_size": 1024, # maximum number of cached answers
+            "context_token_budget": 2000, # maximum tokens of article context (0 = no limit)
+            "prefix_cache": True,      # reuse the system prompt's key/value cache across questions
+            "draft_model": None,       # small model with the same tokenizer for speculative decoding
+            "draft_tokens": 5,         # tokens the draft model proposes per verification step
+            "remote_url": None,        # completions server for the remote backend (default: GEMMA_REMOTE_URL)
+            "remote_timeout": 120,     # seconds to wait for the completions server
+            "remote_max_connections": 8, # requests in flight to the completions server
+            "intents_file": None,      # question topics and their terms (default: data/intents.json)
+            "simulate_unready": True,  # canned answers while the model isn't ready (False: article excerpts)
+            "fast_path": True,         # quote the articles for direct lookups ("какво гласи чл. 70")
+            "source_texts": False,     # add each cited article's text to its source ("content")
+            "latency_budget_s": 30,    # seconds a question may take (0 = no limit); generation stops then
+            "min_generation_s": 1.0,   # don't start generating with less time left
+            "partial_answer_chars": 200, # shortest answer cut at the deadline that is served as is
+            "degraded_cache_threshold": None, # question similarity for a cached answer when time ran out (None: answer_cache_threshold)
+            "extractive_articles": 3,  # articles quoted when no generated answer is ready in time
+            "rerank": False,           # rescore a wider candidate set with a cross-encoder
+            "rerank_model": DEFAULT_RERANK_MODEL, # cross-encoder used for reranking
+            "rerank_candidates": 20,   # candidates fetched and scored per question when reranking
+            "rerank_top_k": 3,         # articles kept after reranking (at most max_results)
+            "rerank_batch_size": 16,   # (question, article) pairs scored per forward pass
+            "history_token_budget": 600, # tokens of conversation history in a follow-up's prompt
+            "max_prompt_tokens": 3000   # cap on history + context + question (0 = no cap); the context gets what is left
         }
         
         # Update with user-provided config
         if config:
             self.config.update(config)
         
-        # Model will be initialized on first use
-        self.model = None
-        self.processor = None
+        # System prompt per answer language (its key/value cache is prefilled when the model is warmed up)
+        self.system_prompts = dict(SYSTEM_PROMPTS)
         
-        # System prompt template
-        self.system_prompt = """
-        You are LexBG Assistant, an AI legal helper for Bulgarian citizens.
-        Your goal is to help people understand Bulgarian laws in simple terms.
-        Always base your answers on the legal information provided.
-        If you're not sure about something, be honest and suggest consulting a lawyer.
+        # One loaded model per process, shared by every assistant using it
+        self.model_manager = self._get_model_manager()
         
-        When answering questions:
-        1. Cite specific laws and articles when possible
-        2. Explain legal concepts in simple, everyday language
-        3. Avoid complex legal jargon
-        4. Provide practical advice when appropriate
-        5. Make it clear that your information is not legal advice
+        # Generated answers, reused for rephrasings of the same question
+        # (keyed on the database's sentence embeddings; exact questions only without them)
+        self.answer_cache = SemanticAnswerCache(
+            embed=self._question_embedder(),
+            threshold=self.config["answer_cache_threshold"],
+            ttl_seconds=self.config["answer_cache_ttl"],
+            max_entries=self.config["answer_cache_size"]
+        ) if self.config["answer_cache"] else None
         
-        IMPORTANT: You can only answer based on the laws in your database.
-        """
-    
-    def initialize_model(self):
-        """Initialize the Gemma 3 model"""
-        logger.info(f"Initializing Gemma 3 model: {self.model_name}")
+        self._packer = None
+        self._packer_processor = None
         
-        try:
-            # Try to import the transformers library with Gemma support
-            import torch
-            from transformers import pipeline, AutoProcessor, Gemma3ForConditionalGeneration
-            
-            # Get configuration parameters
-            device_map = self.config["device"]
-            if device_map == "auto":
-                device_map = "auto"  # Let transformers decide based on available hardware
-            
-            # Determine if we should use quantization
-            quantize = self.config["quantize"]
-            is_quantized = quantize != "none"
-            
-            # Determine torch data type
-            if torch.cuda.is_available() and device_map != "cpu":
-                # Use bfloat16 for GPU if available
-                if torch.cuda.is_bf16_supported():
-                    torch_dtype = torch.bfloat16
-                else:
-                    torch_dtype = torch.float16
-            else:
-                # CPU usually needs float32 (except for quantized models)
-                torch_dtype = torch.float32
-                
-            # Parameter to control whether to use pipeline API or direct model loading
-            # Direct loading is preferred for more control
-            use_pipeline = False
-            
-            # Path to the model
-            if self.model_path:
-                # Load from local path
-                model_path = self.model_path
-                logger.info(f"Using local model at {model_path}")
-            else:
-                # Use HuggingFace model ID
-                model_path = self.model_name
-                logger.info(f"Using HuggingFace model: {model_path}")
-            
-            if use_pipeline:
-                # Pipeline API approach
-                logger.info(f"Using pipeline API with device={device_map} and dtype={torch_dtype}")
-                self.model = pipeline(
-                    "text-generation", 
-                    model=model_path,
-                    device_map=device_map,
-                    torch_dtype=torch_dtype,
-                    token=self.api_key
-                )
-            else:
-                # Direct model loading approach
-                logger.info(f"Using direct model loading with device={device_map}, dtype={torch_dtype}, quantize={quantize}")
-                
-                # Common model loading kwargs
-                model_kwargs = {
-                    "device_map": device_map,
-                    "token": self.api_key,
-                    "torch_dtype": torch_dtype,
-                }
-                
-                # Add quantization parameters if requested
-                if quantize == "4bit":
-                    # Install bitsandbytes if not already installed
-                    try:
-                        import bitsandbytes
-                        logger.info("bitsandbytes is installed, using 4-bit quantization")
-                    except ImportError:
-                        logger.warning("bitsandbytes not installed. Trying to install now...")
-                        import subprocess
-                        subprocess.check_call(["pip", "install", "bitsandbytes"])
-                        
-                    # 4-bit quantization params
-                    model_kwargs.update({
-                        "load_in_4bit": True,
-                        "quantization_config": {
-                            "bnb_4bit_compute_dtype": torch_dtype,
-                        }
-                    })
-                    
-                elif quantize == "8bit":
-                    # 8-bit quantization
-                    try:
-                        import bitsandbytes
-                        logger.info("bitsandbytes is installed, using 8-bit quantization")
-                    except ImportError:
-                        logger.warning("bitsandbytes not installed. Trying to install now...")
-                        import subprocess
-                        subprocess.check_call(["pip", "install", "bitsandbytes"])
-                    
-                    # 8-bit quantization params
-                    model_kwargs.update({
-                        "load_in_8bit": True
-                    })
-                    
-                # Load the model with the specified parameters
-                model = Gemma3ForConditionalGeneration.from_pretrained(
-                    model_path, 
-                    **model_kwargs
-                ).eval()
-                
-                # Load processor (tokenizer)
-                processor = AutoProcessor.from_pretrained(
-                    model_path, 
-                    token=self.api_key
-                )
-                
-                # Store both the model and processor
-                self.model = model
-                self.processor = processor
-            
-            logger.info("Gemma 3 model loaded successfully")
-            
-        except ImportError:
-            logger.warning("Transformers with Gemma3 support not available")
-            logger.warning("To install Gemma3 support, run: pip install git+https://github.com/huggingface/transformers@v4.49.0-Gemma-3")
-            self.model = None
-        except Exception as e:
-            logger.error(f"Error initializing Gemma 3 model: {e}")
-            self.model = None
+        # Question topics for the simulated answers
+        self.intent_router = IntentRouter.from_file(self.config["intents_file"])
         
-        logger.info("Model initialization process completed")
+        # Questions answered by quoting the articles they ask for
+        self.fast_path = FastPathStats("assistant")
+
+        # Optional second retrieval stage (runs on the CPU)
+        self.reranker = CrossEncoderReranker(
+            model_name=self.config["rerank_model"],
+            max_candidates=self.config["rerank_candidates"],
+            batch_size=self.config["rerank_batch_size"]
+        ) if self.config["rerank"] else None
+
+        if self.config["preload_model"]:
+            self.preload_model(background=self.config["preload_in_background"])
+
+    def _question_embedder(self):
+        """The database's sentence embedding function, if it has a real model"""
+        question_embedder = getattr(self.db_manager, "question_embedder", None)
+        return question_embedder() if question_embedder is not None else None
+
+    def _get_model_manager(self) -> ModelManager:
+        """Get the shared manager for this assistant's model and settings"""
+        model_path = self.model_path or self.model_name
+        backend = self.config["backend"]
+        quantize = self.config["quantize"]
+        device = self.config["device"]
+        options = {
+            "api_key": self.api_key,
+            "quantize": quantize,
+            "max_batch_size": self.config["max_batch_size"],
+            "batch_window_ms": self.config["batch_window_ms"],
+            "prefix_cache": self.config["prefix_cache"],
+            "draft_model": self.config["draft_model"],
+            "draft_tokens": self.config["draft_tokens"],
+        }
+        if backend == "remote":
+            options.update({
+                "base_url": self.config["remote_url"],
+                "timeout": self.config["remote_timeout"],
+                "max_connections": self.config["remote_max_connections"],
+            })
+
+        return ModelManager.shared(
+            name=f"{model_path} (backend={backend}, quantize={quantize}, device={device}, "
+                 f"draft={self.config['draft_model']})",
+            loader=lambda: load_backend(model_path, backend=backend, device=device, **options),
+            warmup=self._warm_up
+        )
+    
+    def _warm_up(self, backend):
+        """Run a short generation, then prefill the system prompt of every language"""
+        backend.warmup()
+        processor = getattr(backend, "processor", None)
+        for system_prompt in self.system_prompts.values():
+            backend.warm_prefix(chat_prompt(processor, system_prompt, "")[0])
+    
+    @property
+    def model(self):
+        """The loaded model, or None while it isn't ready (or runs out of process)"""
+        return getattr(self.model_manager.model, "model", None)
+    
+    @property
+    def processor(self):
+        """The loaded processor, or None while the model isn't ready (or runs out of process)"""
+        return getattr(self.model_manager.model, "processor", None)
+    
+    def initialize_model(self) -> bool:
+        """
+        Load and warm up the Gemma 3 model (blocking).
+        Called at startup; answering questions never loads the model.
+
+        Returns:
+            True if the model is ready
+        """
+        logger.info(f"Initializing Gemma 3 model: {self.model_path or self.model_name}")
+        ready = self.model_manager.load()
+        if not ready:
+            logger.warning(f"Model not available ({self.model_manager.error}), answers will be simulated")
+        return ready
+    
+    def preload_model(self, background: bool = False):
+        """
+        Start loading the model at process start
+
+        Args:
+            background: Load in a background thread; check is_ready() for progress
+        """
+        if self.reranker is not None:
+            self.reranker.preload(background=background)
+        if background:
+            self.model_manager.preload(background=True)
+        else:
+            self.initialize_model()
+    
+    def is_ready(self) -> bool:
+        """Check whether the model is loaded and warmed up"""
+        return self.model_manager.is_ready()
+    
+    def model_status(self) -> Dict[str, Any]:
+        """Get the model lifecycle state (unloaded, loading, warming, ready, failed)"""
+        return self.model_manager.status()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get the answer cache hit rate and size (empty if the cache is disabled)"""
+        return self.answer_cache.stats() if self.answer_cache is not None else {}
+    
+    def fast_path_stats(self) -> Dict[str, Any]:
+        """Get the share of questions answered by direct article lookup"""
+        return self.fast_path.stats()
     
     def answer_question(
         self,
         question: str,
         max_results: int = 5,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        conversation_history: Optional[History] = None
     ) -> Dict[str, Any]:
         """
         Answer a legal question based on the database information
@@ -221,106 +297,493 @@ class LegalAssistant:
             question: The user's legal question
             max_results: Maximum number of database results to retrieve
             filters: Optional filters to apply to the search
+            conversation_history: Earlier turns, for a follow-up question
+                (its answer is neither looked up in nor added to the cache)
             
         Returns:
             Dictionary containing the answer and supporting information
+            ("cached" is True when the answer came from the answer cache,
+            "fast_path" is True when it quotes articles the question asked for,
+            "speculative" holds the acceptance rate and speedup when a draft
+            model generated it, "served_by" the tier that produced it within
+            the latency budget (see _answer_question), plus per-stage
+            "timings" in milliseconds if collect_timings is set)
         """
         logger.info(f"Processing question: {question}")
         
-        # Initialize model if not already done
-        if self.model is None:
-            self.initialize_model()
+        collect_timings = self.config["collect_timings"]
+        timer = StageTimer() if collect_timings else NULL_TIMER
+        deadline = Deadline(self.config["latency_budget_s"])
+        
+        with span("LegalAssistant.answer_question", max_results=max_results), timer:
+            result = self._answer_question(question, max_results, filters, timer, deadline, conversation_history)
+            current_span().set_attribute("served_by", result["served_by"])
+        SERVED_BY.labels("assistant", result["served_by"]).inc()
+        
+        if collect_timings:
+            result["timings"] = timer.as_dict()
+        
+        return result
+    
+    def stream_answer(
+        self,
+        question: str,
+        max_results: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        conversation_history: Optional[History] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Answer a legal question, yielding the answer while it is generated.
+        The sources are sent right after retrieval, before generation starts.
+        
+        Args:
+            question: The user's legal question
+            max_results: Maximum number of database results to retrieve
+            filters: Optional filters to apply to the search
+            conversation_history: Earlier turns, for a follow-up question
+            
+        Yields:
+            {"type": "sources", "sources": [...]} first,
+            then {"type": "token", "text": ...} for every generated chunk,
+            then {"type": "done", "answer": <full answer>, "served_by": <tier>}
+            (tiers as in _answer_question)
+        """
+        logger.info(f"Streaming answer to question: {question}")
+        deadline = Deadline(self.config["latency_budget_s"])
+        
+        with span("LegalAssistant.stream_answer", max_results=max_results):
+            for event in self._stream_answer(question, max_results, filters, deadline, conversation_history):
+                if event["type"] == "done":
+                    current_span().set_attribute("served_by", event["served_by"])
+                    SERVED_BY.labels("assistant_stream", event["served_by"]).inc()
+                yield event
+    
+    def _stream_answer(
+        self,
+        question: str,
+        max_results: int,
+        filters: Optional[Dict[str, Any]],
+        deadline: Deadline,
+        conversation_history: Optional[History] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Run the streaming answer pipeline (see stream_answer and _answer_question)"""
+        direct = self._fast_path(question, filters)
+        if direct is not None:
+            yield {"type": "sources", "sources": direct["sources"]}
+            yield {"type": "token", "text": direct["answer"]}
+            yield {"type": "done", "answer": direct["answer"], "served_by": "fast_path"}
+            return
+        
+        scope, generation, cached = self._cache_lookup(question, max_results, filters, conversation_history)
+        if cached is not None:
+            yield {"type": "sources", "sources": cached["sources"]}
+            yield {"type": "token", "text": cached["answer"]}
+            yield {"type": "done", "answer": cached["answer"], "served_by": "cache"}
+            return
+        
+        search_results = self._retrieve(question, max_results, filters)
+        
+        if not search_results:
+            yield {"type": "sources", "sources": []}
+            yield {"type": "token", "text": NO_INFORMATION_ANSWER}
+            yield {"type": "done", "answer": NO_INFORMATION_ANSWER, "served_by": "no_results"}
+            return
+        
+        sources = self._prepare_sources(search_results)
+        yield {"type": "sources", "sources": sources}
+        
+        generated = self.model_manager.is_ready()
+        chunks = []
+        outcome = {"failed": False}
+        if deadline.allows(self.config["min_generation_s"]):
+            history = self._render_history(question, conversation_history)
+            context = self._prepare_context(
+                search_results, self._remembered(conversation_history), self._context_budget(question, history)
+            )
+            for text in self._generate_answer_stream(question, context, deadline, history, outcome):
+                chunks.append(text)
+                yield {"type": "token", "text": text}
+        else:
+            DEADLINE_EXCEEDED.labels("assistant_stream", "retrieval").inc()
+        
+        answer = "".join(chunks)
+        if not chunks:
+            # Nothing was sent yet, so any fallback answer can still be used
+            degraded = self._degraded_answer(question, None, search_results, scope, generation)
+            yield {"type": "token", "text": degraded["answer"]}
+            yield {"type": "done", "answer": degraded["answer"], "served_by": degraded["served_by"]}
+            return
+        
+        if outcome["failed"]:
+            # The text sent so far ends with the error message; never cache it
+            yield {"type": "done", "answer": answer, "served_by": "partial"}
+            return
+        
+        if generated and deadline.expired():
+            # What was sent stays; say that it is incomplete
+            DEADLINE_EXCEEDED.labels("assistant_stream", "generation").inc()
+            marked = partial_answer(answer, _question_language(question))
+            yield {"type": "token", "text": marked[len(answer.rstrip()):]}
+            yield {"type": "done", "answer": marked, "served_by": "partial"}
+            return
+        
+        if generated:
+            self._cache_store(question, answer, sources, scope, generation)
+        yield {"type": "done", "answer": answer, "served_by": "generated" if generated else "simulated"}
+    
+    def _answer_question(
+        self,
+        question: str,
+        max_results: int,
+        filters: Optional[Dict[str, Any]],
+        timer,
+        deadline: Deadline,
+        conversation_history: Optional[History] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the answer pipeline, timing every stage with the given timer.
+        The result's "served_by" names what produced the answer: "fast_path",
+        "cache", "generated", "partial" (generation cut short at the deadline),
+        "extractive" (excerpts of the retrieved articles), "simulated" (model
+        not ready; "extractive" without simulate_unready) or "no_results".
+        """
+        # Direct article lookups are answered with the article text
+        with timer.stage("fast_path"):
+            direct = self._fast_path(question, filters)
+        if direct is not None:
+            direct["served_by"] = "fast_path"
+            return direct
+        
+        # Rephrasings of a recently answered question skip the whole pipeline
+        with timer.stage("cache_lookup"):
+            scope, generation, cached = self._cache_lookup(question, max_results, filters, conversation_history)
+        if cached is not None:
+            cached["cached"] = True
+            cached["served_by"] = "cache"
+            return cached
         
         # Search the database for relevant information
-        search_results = self.db_manager.search_similar(
-            query=question,
-            n_results=max_results,
-            filters=filters
-        )
+        with timer.stage("retrieval"):
+            search_results = self._retrieve(question, max_results, filters)
         
         # If no results found, return a default response
         if not search_results:
             return {
-                "answer": "I don't have enough information to answer this question based on the laws in my database. Please consult a legal professional for advice on this matter.",
-                "sources": []
+                "answer": NO_INFORMATION_ANSWER,
+                "sources": [],
+                "cached": False,
+                "served_by": "no_results"
             }
         
-        # Prepare context for the model
-        context = self._prepare_context(search_results)
-        
-        # Generate the answer
-        answer = self._generate_answer(question, context)
+        # Generate the answer, unless retrieval used up the budget
+        answer, served_by, speculation = None, "extractive", None
+        if deadline.allows(self.config["min_generation_s"]):
+            # Prepare context for the model
+            with timer.stage("context"):
+                history = self._render_history(question, conversation_history)
+                context = self._prepare_context(
+                    search_results, self._remembered(conversation_history), self._context_budget(question, history)
+                )
+            
+            with timer.stage("generation"), collect_speculation() as speculation:
+                answer, served_by = self._generate_answer(question, context, deadline, history)
+        else:
+            DEADLINE_EXCEEDED.labels("assistant", "retrieval").inc()
         
         # Prepare sources for citation
-        sources = self._prepare_sources(search_results)
+        with timer.stage("sources"):
+            sources = self._prepare_sources(search_results)
         
-        return {
+        result = {
             "answer": answer,
-            "sources": sources
+            "sources": sources,
+            "cached": False,
+            "served_by": served_by
+        }
+        if served_by == "generated":
+            # Only model answers are worth caching (simulated ones are cheap)
+            self._cache_store(question, answer, sources, scope, generation)
+        elif served_by in ("partial", "extractive"):
+            with timer.stage("degrade"):
+                result.update(self._degraded_answer(question, answer, search_results, scope, generation))
+        
+        if speculation:
+            result["speculative"] = speculation[-1].as_dict()
+        return result
+    
+    def _retrieve(self, question: str, max_results: int, filters: Optional[Dict[str, Any]]) -> SearchResults:
+        """
+        Search the database; with a reranker, fetch rerank_candidates results
+        and keep the rerank_top_k the cross-encoder scores highest
+        (max_results in search order while it isn't loaded)
+        """
+        if self.reranker is None:
+            return self.db_manager.search_similar(
+                query=question,
+                n_results=max_results,
+                filters=filters,
+                columnar=True
+            )
+        
+        candidates = self.db_manager.search_similar(
+            query=question,
+            n_results=max(max_results, self.config["rerank_candidates"]),
+            filters=filters,
+            columnar=True
+        )
+        with current_timer().stage("retrieval.rerank"):
+            return self.reranker.rerank(
+                question,
+                candidates,
+                top_k=min(max_results, self.config["rerank_top_k"]),
+                fallback_k=max_results,
+                generation=self.db_manager.corpus_generation()
+            )
+    
+    def _degraded_answer(
+        self,
+        question: str,
+        partial: Optional[str],
+        search_results: SearchResults,
+        scope,
+        generation
+    ) -> Dict[str, Any]:
+        """
+        Pick the best answer available when no complete generated answer is:
+        the answer cut at the deadline if it is long enough, else a cached
+        answer to a similar question, else excerpts of the retrieved articles
+        
+        Args:
+            question: The user's question
+            partial: Text generated before the deadline (None if generation
+                didn't run or failed)
+            search_results: Retrieved articles
+            scope: Cache scope of the question (None without a cache or for follow-ups)
+            generation: Corpus generation for the cache
+            
+        Returns:
+            The answer and "served_by" (plus the cached answer's sources)
+        """
+        language = _question_language(question)
+        if partial and len(partial) >= self.config["partial_answer_chars"]:
+            return {"answer": partial_answer(partial, language), "served_by": "partial"}
+        
+        if self.answer_cache is not None and scope is not None:
+            cached = self.answer_cache.get(
+                question,
+                scope,
+                generation,
+                threshold=self.config["degraded_cache_threshold"] or self.config["answer_cache_threshold"]
+            )
+            if cached is not None:
+                return {"answer": cached["answer"], "sources": cached["sources"], "served_by": "cache"}
+        
+        return {
+            "answer": excerpt_answer(self._excerpt_articles(search_results), language),
+            "served_by": "extractive"
         }
     
-    def _prepare_context(self, search_results: List[Dict[str, Any]]) -> str:
+    def _excerpt_articles(self, search_results: SearchResults) -> List[Dict[str, Any]]:
+        """The best distinct articles of the search results, with their contents"""
+        selected, seen = [], set()
+        for i, article_number in enumerate(search_results.article_numbers):
+            if article_number not in seen and len(selected) < self.config["extractive_articles"]:
+                seen.add(article_number)
+                selected.append(i)
+        
+        search_results.load_contents(selected)
+        return [
+            {"number": search_results.article_numbers[i], "content": search_results.content(i) or ""}
+            for i in selected
+        ]
+    
+    def _cache_lookup(
+        self,
+        question: str,
+        max_results: int,
+        filters: Optional[Dict[str, Any]],
+        conversation_history: Optional[History] = None
+    ) -> tuple:
+        """
+        Look up a cached answer to a similar question
+        
+        Returns:
+            Tuple of the cache scope, the corpus generation and the cached
+            answer with its sources (None on a miss, without a cache and
+            for follow-up questions, whose answers depend on the conversation)
+        """
+        if self.answer_cache is None or conversation_history:
+            return None, None, None
+        
+        # Answers are only shared between questions in the same language
+        # with the same filters, and only until the corpus changes
+        language = _question_language(question)
+        scope = cache_scope(language, filters, max_results)
+        generation = self.db_manager.corpus_generation()
+        return scope, generation, self.answer_cache.get(question, scope, generation)
+    
+    def _fast_path(self, question: str, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Answer a question that only asks for the text of given articles
+        ("какво гласи чл. 70", "show me Article 155") by quoting them
+        
+        Returns:
+            The answer with its sources, or None if the question isn't a
+            direct lookup (or has filters) or the articles weren't found
+        """
+        if not self.config["fast_path"] or filters:
+            return None
+        
+        numbers = direct_lookup(question)
+        articles = self.db_manager.get_articles_by_number(numbers) if numbers else []
+        self.fast_path.record(bool(articles))
+        if not articles:
+            return None
+        
+        found = {article["number"] for article in articles}
+        missing = [number for number in numbers if f"Чл. {number}" not in found]
+        return {
+            "answer": extractive_answer(articles, missing, _question_language(question)),
+            "sources": [self._source(article["law_title"], article["number"], 1.0, article["content"]) for article in articles],
+            "cached": False,
+            "fast_path": True
+        }
+    
+    def _cache_store(
+        self,
+        question: str,
+        answer: str,
+        sources: List[Dict[str, Any]],
+        scope,
+        generation
+    ):
+        """Cache a generated answer (callers only pass complete generations)"""
+        if self.answer_cache is None or scope is None:
+            return
+        self.answer_cache.put(question, {"answer": answer, "sources": sources}, scope, generation)
+    
+    @traced("LegalAssistant.prepare_context")
+    def _prepare_context(
+        self,
+        search_results: Union[SearchResults, List[Dict[str, Any]]],
+        remembered: Optional[List[Dict[str, Any]]] = None,
+        budget: Optional[int] = None
+    ) -> str:
         """
         Prepare context from search results for the model
         
         Args:
             search_results: Search results from the database
+            remembered: Articles retrieved for earlier turns of the conversation
+                (dicts with number, title and content), added after the
+                search results while budget is left
+            budget: Token budget for the context (defaults to context_token_budget)
             
         Returns:
-            Formatted context string
+            Formatted context string ("" if the budget can't hold an article)
         """
-        context_parts = []
+        if not isinstance(search_results, SearchResults):
+            search_results = SearchResults.from_dicts(search_results)
+        
+        packer = self._context_packer()
+        if budget is not None and budget < packer.min_passage_tokens:
+            return ""
         
         # Track the article numbers we've seen to avoid duplicates
         seen_articles = set()
         
-        # Process standard search results
-        for i, result in enumerate(search_results):
-            content = result["content"]
-            metadata = result["metadata"]
-            article_number = metadata['article_number']
-            
+        # Pick the rows to include first so their contents load in one batch
+        selected = []
+        for i, article_number in enumerate(search_results.article_numbers):
             # Skip duplicates
             if article_number in seen_articles:
                 continue
-                
-            seen_articles.add(article_number)
-            
-            context_part = f"[Document {i+1}]\n"
-            context_part += f"Title: {metadata['law_title']}\n"
-            context_part += f"Article: {article_number}\n"
-            context_part += f"Content: {content}\n\n"
             
-            context_parts.append(context_part)
+            seen_articles.add(article_number)
+            selected.append(i)
+        
+        search_results.load_contents(selected)
+        
+        # Pack the best matches into the token budget
+        packed = packer.pack([
+            Passage(
+                header=(
+                    f"[Document {i+1}]\n"
+                    f"Title: {search_results.law_titles[i]}\n"
+                    f"Article: {search_results.article_numbers[i]}\n"
+                    f"Content: "
+                ),
+                text=search_results.content(i) or "",
+                score=float(search_results.similarities[i])
+            )
+            for i in selected
+        ], budget=budget)
+        
+        # Articles of earlier turns rank below this question's matches
+        remembered_passages = []
+        for article in remembered or []:
+            article_number = _law_number(article["number"])
+            if article_number in seen_articles:
+                continue
+            seen_articles.add(article_number)
+            remembered_passages.append(Passage(
+                header=(
+                    f"[Earlier Article]\n"
+                    f"Title: {article.get('title', '')}\n"
+                    f"Article: {article_number}\n"
+                    f"Content: "
+                ),
+                text=article.get("content") or ""
+            ))
+        packer.pack_more(packed, remembered_passages)
         
         # Try to add specific articles that are commonly needed but might not be found in search
         # This ensures important articles are always available when needed
+        # (only while there is budget left for them)
         key_article_data = self._get_key_articles()
+        timer = current_timer()
+        key_passages = []
         
         for article_num, query in key_article_data.items():
-            if article_num not in seen_articles:
+            if article_num not in seen_articles and packer.has_room(packed):
                 # Try to find this article directly
-                article_results = self.db_manager.search_similar(
-                    query=query,
-                    n_results=1
-                )
+                with timer.stage("context.key_article_search"):
+                    article_results = self.db_manager.search_similar(
+                        query=query,
+                        n_results=1,
+                        columnar=True
+                    )
                 
-                if article_results:
-                    result = article_results[0]
-                    metadata = result["metadata"]
-                    
-                    if metadata['article_number'] == article_num:
-                        seen_articles.add(article_num)
-                        
-                        context_part = f"[Key Article]\n"
-                        context_part += f"Title: {metadata['law_title']}\n"
-                        context_part += f"Article: {article_num}\n"
-                        context_part += f"Content: {result['content']}\n\n"
-                        
-                        context_parts.append(context_part)
+                # Only fetch the content when the hit is the article we want
+                if article_results and article_results.article_numbers[0] == article_num:
+                    seen_articles.add(article_num)
+                    key_passages.append(Passage(
+                        header=(
+                            f"[Key Article]\n"
+                            f"Title: {article_results.law_titles[0]}\n"
+                            f"Article: {article_num}\n"
+                            f"Content: "
+                        ),
+                        text=article_results.content(0) or ""
+                    ))
+        
+        packer.pack_more(packed, key_passages)
+        packer.record(packed)
         
+        context_parts = [f"{passage.header}{passage.text}\n\n" for passage in packed.passages]
         return "\n".join(context_parts)
         
+    def _context_packer(self) -> ContextPacker:
+        """Get the context packer, counting tokens with the model tokenizer once it is loaded"""
+        processor = self.processor
+        if self._packer is None or self._packer_processor is not processor:
+            self._packer = ContextPacker(
+                budget_tokens=self.config["context_token_budget"],
+                count_tokens=tokenizer_counter(processor) if processor is not None else None
+            )
+            self._packer_processor = processor
+        return self._packer
+    
     def _get_key_articles(self) -> Dict[str, str]:
         """
         Get key articles and search queries to find them
@@ -338,103 +801,204 @@ class LegalAssistant:
             "Чл. 155": "платен годишен отпуск",  # Annual paid leave
         }
     
-    def _generate_answer(self, question: str, context: str) -> str:
+    def _prompt_prefix(self, language: str) -> str:
+        """The fixed start of every prompt in a language (its key/value cache is reused)"""
+        return chat_prompt(self.processor, self.system_prompts[language], "")[0]
+    
+    def _build_prompt(self, question: str, context: str, history: str = "") -> Tuple[str, str]:
+        """
+        Build the prompt for the model in the question's language, with the
+        model's chat template applied
+        
+        Args:
+            question: The user's question
+            context: Context from the database ("" if nothing was found)
+            history: Rendered earlier turns of the conversation
+            
+        Returns:
+            Tuple of the fixed prefix (the system prompt) and the rest
+        """
+        language = _question_language(question)
+        return chat_prompt(
+            self.processor,
+            self.system_prompts[language],
+            user_prompt(question, context, history, language)
+        )
+    
+    def _render_history(self, question: str, conversation_history: Optional[History]) -> str:
+        """
+        Format the earlier turns of a conversation within history_token_budget
+        (and at most a quarter of max_prompt_tokens)
+        """
+        if not conversation_history:
+            return ""
+        budget = self.config["history_token_budget"]
+        if self.config["max_prompt_tokens"]:
+            budget = min(budget, self.config["max_prompt_tokens"] // 4)
+        return conversation_history.render(
+            budget,
+            _question_language(question),
+            self._context_packer().count_tokens
+        )
+    
+    @staticmethod
+    def _remembered(conversation_history: Optional[History]) -> List[Dict[str, Any]]:
+        """Articles retrieved for the earlier turns of a conversation"""
+        return conversation_history.articles if conversation_history else []
+    
+    def _context_budget(self, question: str, history: str) -> Optional[int]:
+        """
+        Tokens of context that keep the whole prompt (system prompt, history,
+        articles and question) within max_prompt_tokens
+        
+        Returns:
+            The budget (None without a cap: context_token_budget applies)
+        """
+        max_prompt_tokens = self.config["max_prompt_tokens"]
+        if not max_prompt_tokens:
+            return None
+        prefix, rest = self._build_prompt(question, "\n", history)
+        left = max_prompt_tokens - self._context_packer().count_tokens(prefix + rest)
+        budget = self.config["context_token_budget"]
+        return max(0, min(budget, left) if budget else left)
+    
+    @traced("LegalAssistant.generate_answer")
+    def _generate_answer(
+        self,
+        question: str,
+        context: str,
+        deadline: Optional[Deadline] = None,
+        history: str = ""
+    ) -> tuple:
         """
         Generate an answer using the Gemma 3 model
 
         Args:
             question: The user's question
             context: Context from the database
+            deadline: When to stop generating (None for no limit)
+            history: Rendered earlier turns of the conversation
             
         Returns:
-            Generated answer
+            Tuple of the answer and how it was produced: "generated",
+            "partial" (cut short at the deadline), "simulated" (model not
+            ready) or "extractive" (None answer: generation failed, timed out,
+            there was no time left to start it or the model isn't ready
+            without simulate_unready)
         """
-        # Build the prompt for the model
-        prompt = f"{self.system_prompt}\n\nContext information from Bulgarian laws:\n{context}\n\nUser question: {question}\n\nAnswer:"
+        deadline = deadline or Deadline(None)
+        prefix, rest = self._build_prompt(question, context, history)
+        timer = current_timer()
+        
+        # The model is loaded at startup; a request never waits for a load
+        if not self.model_manager.is_ready():
+            if not self.config["simulate_unready"]:
+                logger.warning(f"Model not ready ({self.model_manager.state}). Answering with article excerpts.")
+                return None, "extractive"
+            logger.warning(f"Model not ready ({self.model_manager.state}). Using simulated responses.")
+            with timer.stage("generate.simulate"):
+                return self._simulate_response(question, context), "simulated"
+        
+        if not deadline.allows(self.config["min_generation_s"]):
+            DEADLINE_EXCEEDED.labels("assistant", "context").inc()
+            return None, "extractive"
         
         try:
-            # Check if we can import the gemma module
-            # This is a placeholder - replace with actual Gemma 3 code when available
-            try:
-                # Try to import the transformers library with Gemma support
-                import torch
-                from transformers import pipeline, AutoProcessor, Gemma3ForConditionalGeneration
-                
-                # If we got here, transformers with Gemma3 support is available
-                logger.info("Transformers with Gemma3 support is available")
-                
-                if self.model is None:
-                    # Initialize the model
-                    logger.info(f"Loading Gemma3 model: {self.model_name}")
-                    
-                    # Check if we should use the pipeline API or direct model loading
-                    if hasattr(self, "use_pipeline") and self.use_pipeline:
-                        # Pipeline API approach
-                        self.model = pipeline(
-                            "text-generation", 
-                            model=self.model_name,
-                            device_map="auto",
-                            torch_dtype=torch.bfloat16
-                        )
-                        
-                        # Generate response using the pipeline with config
-                        response = self.model(
-                            prompt, 
-                            max_new_tokens=self.config["max_tokens"],
-                            do_sample=self.config["do_sample"],
-                            temperature=self.config["temperature"],
-                            top_p=self.config["top_p"]
-                        )[0]["generated_text"]
-                        
-                    else:
-                        # Direct model loading approach
-                        model = Gemma3ForConditionalGeneration.from_pretrained(
-                            self.model_name, 
-                            device_map="auto",
-                            torch_dtype=torch.bfloat16
-                        ).eval()
-                        
-                        processor = AutoProcessor.from_pretrained(self.model_name)
-                        
-                        # Store both the model and processor
-                        self.model = model
-                        self.processor = processor
-                        
-                        # Process the input
-                        inputs = self.processor(prompt, return_tensors="pt").to(self.model.device)
-                        
-                        # Generate response with config options
-                        outputs = self.model.generate(
-                            **inputs,
-                            max_new_tokens=self.config["max_tokens"],
-                            do_sample=self.config["do_sample"],
-                            temperature=self.config["temperature"],
-                            top_p=self.config["top_p"]
-                        )
-                        
-                        # Decode the response
-                        response = self.processor.decode(outputs[0], skip_special_tokens=True)
-                    
-                    # Extract just the answer part (after "Answer:")
-                    if "Answer:" in response:
-                        response = response.split("Answer:")[1].strip()
-                    
-                    return response
-                
-            except ImportError:
-                # Gemma module not available, use simulated response based on context
-                logger.warning("Gemma module not available. Using simulated responses.")
-                return self._simulate_response(question, context)
-                
+            with GENERATIONS_IN_FLIGHT.track_inprogress():
+                start = time.perf_counter()
+                response = self.model_manager.model.generate(
+                    prefix + rest,
+                    max_new_tokens=self.config["max_tokens"],
+                    do_sample=self.config["do_sample"],
+                    temperature=self.config["temperature"],
+                    top_p=self.config["top_p"],
+                    prefix=prefix,
+                    deadline=deadline.at
+                )
+            self._record_generation(response, time.perf_counter() - start)
+        except Exception as e:
+            # If something goes wrong (or the deadline passed while the request
+            # was queued), log the error and let the caller fall back
+            logger.error(f"Error generating response: {type(e).__name__}: {e}")
+            GENERATION_ERRORS.inc()
+            if deadline.expired():
+                DEADLINE_EXCEEDED.labels("assistant", "generation").inc()
+            return None, "extractive"
+        
+        # Generation that ends past the deadline was stopped by it
+        if deadline.expired():
+            DEADLINE_EXCEEDED.labels("assistant", "generation").inc()
+            logger.warning(f"Answer cut short after {deadline.elapsed():.1f}s (budget {deadline.budget_s}s)")
+            return response.strip(), "partial"
+        return response.strip(), "generated"
+    
+    def _generate_answer_stream(
+        self,
+        question: str,
+        context: str,
+        deadline: Optional[Deadline] = None,
+        history: str = "",
+        outcome: Optional[Dict[str, bool]] = None
+    ) -> Iterator[str]:
+        """
+        Generate an answer, yielding text chunks as they are produced.
+        Generation stops at the deadline; if it fails before yielding
+        anything, nothing is yielded, and if it fails later an error
+        message is yielded as the last chunk.
+        
+        Args:
+            question: The user's question
+            context: Context from the database
+            deadline: When to stop generating (None for no limit)
+            history: Rendered earlier turns of the conversation
+            outcome: Dict whose "failed" entry is set to True if generation
+                failed (the chunks are then not a complete answer)
+            
+        Yields:
+            Chunks of the answer
+        """
+        if not self.model_manager.is_ready():
+            if not self.config["simulate_unready"]:
+                # Nothing is yielded; the caller answers with article excerpts
+                logger.warning(f"Model not ready ({self.model_manager.state}). Answering with article excerpts.")
+                return
+            logger.warning(f"Model not ready ({self.model_manager.state}). Using simulated responses.")
+            # Stream the simulated answer word by word so clients behave the same
+            yield from re.findall(r"\S+\s*|\s+", self._simulate_response(question, context))
+            return
+        
+        prefix, rest = self._build_prompt(question, context, history)
+        chunks = []
+        try:
+            with GENERATIONS_IN_FLIGHT.track_inprogress():
+                start = time.perf_counter()
+                for text in self.model_manager.model.generate_stream(
+                    prefix + rest,
+                    max_new_tokens=self.config["max_tokens"],
+                    do_sample=self.config["do_sample"],
+                    temperature=self.config["temperature"],
+                    top_p=self.config["top_p"],
+                    prefix=prefix,
+                    deadline=deadline.at if deadline else None
+                ):
+                    chunks.append(text)
+                    yield text
+            self._record_generation("".join(chunks), time.perf_counter() - start)
         except Exception as e:
-            # If something goes wrong, log the error and return a fallback response
             logger.error(f"Error generating response: {e}")
-            return (
-                "I'm sorry, I encountered an issue processing your question. "
-                "Based on the legal information I have, I can tell you that the Bulgarian "
-                "Labor Code does address this topic, but I recommend consulting the specific "
-                "articles in the law or speaking with a legal professional for accurate guidance."
-            )
+            GENERATION_ERRORS.inc()
+            if outcome is not None:
+                outcome["failed"] = True
+            if chunks:
+                yield GENERATION_ERROR_ANSWER
+    
+    def _record_generation(self, text: str, seconds: float):
+        """Record the latency and speed of a finished generation"""
+        GENERATION_LATENCY.observe(seconds)
+        tokens = self._context_packer().count_tokens(text)
+        GENERATED_TOKENS.inc(tokens)
+        if seconds > 0:
+            TOKENS_PER_SECOND.observe(tokens / seconds)
     
     def _simulate_response(self, question: str, context: str) -> str:
         """
@@ -447,8 +1011,8 @@ class LegalAssistant:
         Returns:
             Simulated answer
         """
-        # Simple keyword matching to create an intelligent-seeming response
-        question_lower = question.lower()
+        # Keyword matching (one pass for all topics) to create an intelligent-seeming response
+        route = self.intent_router.route(question)
         
         # Extract key article numbers and detailed content from context
         articles = []
@@ -484,7 +1048,7 @@ class LegalAssistant:
         article_refs = ", ".join(top_articles)
         
         # Match questions to appropriate responses based on key topics
-        if any(term in question_lower for term in ["изпитателен срок", "изпитателния срок", "probation", "trial period", "test period"]):
+        if route.has("probation"):
             # Specific response for probation period questions
             # Search for articles about probation periods (Article 70 in Labor Code)
             probation_articles = []
@@ -527,7 +1091,7 @@ class LegalAssistant:
                            
                 return response
             
-        if any(term in question_lower for term in ["отпуск", "годишен отпуск", "leave", "vacation"]):
+        if route.has("leave"):
             return (
                 f"According to the Bulgarian Labor Code (see {article_refs}), employees are entitled to at least "
                 f"20 working days of paid annual leave. Workers under 18 years of age are entitled to at least "
@@ -538,9 +1102,9 @@ class LegalAssistant:
                 f"For your specific situation, you should consult with a qualified labor lawyer."
             )
             
-        elif any(term in question_lower for term in ["прекратяване", "договор", "termination", "contract", "уволнение"]):
+        elif route.has("termination"):
             # Check if this is about probation period termination or expiration
-            if any(term in question_lower for term in ["изпитателен срок", "изтече", "изтичане", "expire", "probation"]):
+            if route.has("probation", "expiry"):
                 # This is about what happens when probation period expires
                 # Return specific info from Article 71
                 probation_article_71 = """Чл. 71. (1) До изтичане на срока за изпитване страната, в чиято полза е уговорен, може да прекрати договора без предизвестие.
@@ -568,7 +1132,7 @@ class LegalAssistant:
                     f"For your specific situation, you should consult with a qualified labor lawyer."
                 )
             
-        elif any(term in question_lower for term in ["заплата", "възнаграждение", "salary", "compensation", "pay"]):
+        elif route.has("salary"):
             return (
                 f"According to the Bulgarian Labor Code (see {article_refs}), salaries must be paid at least once a month, "
                 f"and cannot be less than the national minimum wage. The Labor Code requires equal pay for equal work, "
@@ -578,7 +1142,7 @@ class LegalAssistant:
                 f"For your specific situation, you should consult with a qualified labor lawyer."
             )
             
-        elif any(term in question_lower for term in ["работно време", "working hours", "overtime"]):
+        elif route.has("working_time"):
             return (
                 f"According to the Bulgarian Labor Code (see {article_refs}), the standard workweek is 40 hours, typically "
                 f"distributed as 8 hours per day for a 5-day workweek. Overtime is permitted only in exceptional circumstances "
@@ -609,7 +1173,10 @@ class LegalAssistant:
             
             return detailed_response
     
-    def _prepare_sources(self, search_results: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    def _prepare_sources(
+        self,
+        search_results: Union[SearchResults, List[Dict[str, Any]]]
+    ) -> List[Dict[str, str]]:
         """
         Prepare source citations from search results
         
@@ -619,17 +1186,34 @@ class LegalAssistant:
         Returns:
             List of source dictionaries
         """
-        sources = []
+        if not isinstance(search_results, SearchResults):
+            search_results = SearchResults.from_dicts(search_results)
         
-        for result in search_results:
-            metadata = result["metadata"]
-            
-            source = {
-                "title": metadata["law_title"],
-                "article": metadata["article_number"],
-                "relevance": f"{result['similarity'] * 100:.1f}%"
-            }
-            
-            sources.append(source)
+        if not self.config["source_texts"]:
+            # Read the metadata columns directly, no content is needed here
+            return [
+                self._source(title, article_number, similarity)
+                for title, article_number, similarity in zip(
+                    search_results.law_titles,
+                    search_results.article_numbers,
+                    search_results.similarities
+                )
+            ]
         
-        return sources
\ No newline at end of file
+        # The contents were loaded for the prompt; the rest are fetched in one batch
+        search_results.load_contents()
+        return [
+            self._source(hit.law_title, hit.article_number, hit.similarity, hit.content)
+            for hit in search_results
+        ]
+    
+    def _source(self, title: str, article_number: str, similarity: float, content: Optional[str] = None) -> Dict[str, str]:
+        """A citation; with the source_texts option it carries the article text"""
+        source = {
+            "title": title,
+            "article": article_number,
+            "relevance": f"{similarity * 100:.1f}%"
+        }
+        if self.config["source_texts"] and content is not None:
+            source["content"] = content
+        return source
@@ -0,0 +1,312 @@
+"""
+Pooled keep-alive HTTP client for the remote generation backend.
+
+Opening a connection per request adds a TCP (and TLS) handshake to every
+generation. An HTTPConnectionPool keeps idle connections to one server and
+reuses them, limits the number of requests in flight, applies separate
+connect and read timeouts and retries requests that failed before the
+server answered (stale keep-alive connections, refused connections) or got
+a 502/503/504.
+"""
+
+import json
+import time
+import socket
+import logging
+import threading
+import http.client
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+from monitoring import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "legal_remote_requests_total",
+    "Requests to the remote generation server by outcome (ok, retry, error)",
+    ("pool", "outcome")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "legal_remote_request_seconds",
+    "Time from sending a request to the remote server to reading its response",
+    ("pool",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+
+# Errors that mean the request never reached a working server, so it is safe to retry
+_RETRYABLE_ERRORS = (
+    ConnectionError,  # refused, reset, broken pipe
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    socket.gaierror,
+)
+_RETRYABLE_STATUS = (502, 503, 504)
+
+
+class RemoteBackendError(Exception):
+    """The remote server could not be reached or answered with an error"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class HTTPConnectionPool:
+    """Keep-alive connections to one HTTP server, shared by all threads"""
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 8,
+        timeout: float = 120.0,
+        connect_timeout: float = 5.0,
+        retries: int = 2,
+        backoff_s: float = 0.2,
+        acquire_timeout: Optional[float] = None,
+        headers: Optional[Dict[str, str]] = None,
+        name: str = "remote"
+    ):
+        """
+        Initialize the pool (connections are opened on first use)
+
+        Args:
+            base_url: Server URL (http:// or https://, optionally with a path prefix)
+            max_connections: Maximum number of requests in flight (and open connections)
+            timeout: Seconds to wait for the server to send data once connected
+            connect_timeout: Seconds to wait for a connection
+            retries: How often a failed request is retried
+            backoff_s: Delay before the first retry (doubled for every further one)
+            acquire_timeout: Seconds to wait for a free connection (None waits forever)
+            headers: Headers sent with every request (e.g., Authorization)
+            name: Name used for metrics
+        """
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid server URL: {base_url!r}")
+
+        self.base_url = base_url
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path_prefix = parts.path.rstrip("/")
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.max_connections = max(1, int(max_connections))
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = max(0, int(retries))
+        self.backoff_s = backoff_s
+        self.acquire_timeout = acquire_timeout
+        self.headers = dict(headers or {})
+        self.name = name
+
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+        self.connections_opened = 0
+        self.requests = 0
+
+    def request_json(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a request and decode the JSON response
+
+        Args:
+            method: HTTP method
+            path: Path below the base URL (e.g., "/v1/completions")
+            payload: JSON body (None for no body)
+            timeout: Seconds to wait for the server to send data (default: the
+                pool's timeout)
+
+        Returns:
+            The decoded response body
+
+        Raises:
+            RemoteBackendError: If the server can't be reached or answers with an error
+        """
+        with self._slot():
+            start = time.perf_counter()
+            connection, response = self._send(method, path, payload, timeout)
+            try:
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                HTTP_REQUESTS.labels(self.name, "error").inc()
+                raise RemoteBackendError(f"Reading the response from {self.base_url}{path} failed: {e}") from e
+            self._release(connection, response)
+            HTTP_LATENCY.labels(self.name).observe(time.perf_counter() - start)
+
+        self._check_status(response, body)
+        HTTP_REQUESTS.labels(self.name, "ok").inc()
+        return json.loads(body) if body else {}
+
+    def stream_lines(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Iterator[str]:
+        """
+        Send a request and yield the response body line by line (e.g., server-sent
+        events). The connection is reused if the response is read to the end
+        and closed if the caller stops early.
+
+        Args:
+            method: HTTP method
+            path: Path below the base URL
+            payload: JSON body (None for no body)
+            timeout: Seconds to wait for the server to send data (default: the
+                pool's timeout)
+
+        Yields:
+            Decoded lines without line endings
+
+        Raises:
+            RemoteBackendError: If the server can't be reached or answers with an error
+        """
+        with self._slot():
+            start = time.perf_counter()
+            connection, response = self._send(method, path, payload, timeout)
+            if response.status >= 400:
+                body = response.read()
+                self._release(connection, response)
+                self._check_status(response, body)
+
+            finished = False
+            try:
+                for line in iter(response.readline, b""):
+                    yield line.decode("utf-8").rstrip("\r\n")
+                finished = True
+            except (OSError, http.client.HTTPException) as e:
+                HTTP_REQUESTS.labels(self.name, "error").inc()
+                raise RemoteBackendError(f"Reading the response from {self.base_url}{path} failed: {e}") from e
+            finally:
+                if finished:
+                    self._release(connection, response)
+                    HTTP_LATENCY.labels(self.name).observe(time.perf_counter() - start)
+                    HTTP_REQUESTS.labels(self.name, "ok").inc()
+                else:
+                    # Closing the connection also tells the server to stop generating
+                    connection.close()
+
+    def close(self):
+        """Close the idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of requests and of connections opened so far"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "idle_connections": len(self._idle),
+                "max_connections": self.max_connections,
+            }
+
+    @contextmanager
+    def _slot(self):
+        """Hold one of the max_connections request slots"""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            HTTP_REQUESTS.labels(self.name, "error").inc()
+            raise RemoteBackendError(f"No free connection to {self.base_url} within {self.acquire_timeout}s")
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]],
+        timeout: Optional[float] = None
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Send a request (with retries) and return its connection and response"""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Accept": "application/json", **self.headers}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+
+        attempt = 0
+        while True:
+            connection, reused = None, False
+            try:
+                reused, connection = self._acquire()
+                connection.sock.settimeout(self.timeout if timeout is None else timeout)
+                connection.request(method, self.path_prefix + path, body=body, headers=headers)
+                response = connection.getresponse()
+            except _RETRYABLE_ERRORS as e:
+                if connection is not None:
+                    connection.close()
+                if not reused and attempt >= self.retries:
+                    HTTP_REQUESTS.labels(self.name, "error").inc()
+                    raise RemoteBackendError(f"Request to {self.base_url}{path} failed: {e}") from e
+                error = f"{type(e).__name__}: {e}"
+            except OSError as e:
+                # Read timeouts aren't retried: the server may still be generating
+                if connection is not None:
+                    connection.close()
+                HTTP_REQUESTS.labels(self.name, "error").inc()
+                raise RemoteBackendError(f"Request to {self.base_url}{path} failed: {e}") from e
+            else:
+                if response.status not in _RETRYABLE_STATUS or attempt >= self.retries:
+                    with self._lock:
+                        self.requests += 1
+                    return connection, response
+                response.read()
+                self._release(connection, response)
+                error, reused = f"HTTP {response.status}", False
+
+            # A kept-alive connection the server had closed is retried at once
+            if reused:
+                continue
+            attempt += 1
+            delay = self.backoff_s * 2 ** (attempt - 1)
+            logger.warning(f"Retrying request to {self.base_url}{path} in {delay:.2f}s ({error})")
+            HTTP_REQUESTS.labels(self.name, "retry").inc()
+            time.sleep(delay)
+
+    def _acquire(self) -> Tuple[bool, http.client.HTTPConnection]:
+        """Get an idle connection (True) or open a new one (False)"""
+        with self._lock:
+            if self._idle:
+                return True, self._idle.pop()
+            self.connections_opened += 1
+
+        connection = self.connection_class(self.host, self.port, timeout=self.connect_timeout)
+        try:
+            connection.connect()
+        except OSError as e:
+            # Nothing was sent yet, so connect errors and timeouts can be retried
+            connection.close()
+            if isinstance(e, ConnectionError):
+                raise
+            raise ConnectionError(f"Could not connect to {self.base_url}: {e}") from e
+        connection.sock.settimeout(self.timeout)
+        return False, connection
+
+    def _release(self, connection: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        """Return a connection whose response was read to the end to the idle list"""
+        if response.will_close or not response.isclosed():
+            connection.close()
+            return
+        with self._lock:
+            self._idle.append(connection)
+
+    def _check_status(self, response: http.client.HTTPResponse, body: bytes):
+        if response.status >= 400:
+            HTTP_REQUESTS.labels(self.name, "error").inc()
+            raise RemoteBackendError(
+                f"{self.base_url} answered HTTP {response.status}: {body[:200].decode('utf-8', 'replace')}",
+                status=response.status
+            )
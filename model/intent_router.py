@@ -0,0 +1,182 @@
+"""
+Keyword routing of questions to topics and candidate articles.
+
+Topics and their terms live in data/intents.json, so topics can be added or
+extended without code changes. All terms are compiled into one Aho-Corasick
+automaton, which finds every term in a question in a single pass over its
+characters instead of one substring scan per term. Terms match anywhere in
+the normalized question (lowercase, punctuation as spaces), so a stem such
+as "отпуск" also matches "отпуска".
+"""
+
+import re
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTENTS = Path(__file__).resolve().parent.parent / "data" / "intents.json"
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase a text and turn every run of punctuation and whitespace into one space"""
+    return _NON_WORD_RE.sub(" ", text.lower()).strip()
+
+
+@dataclass(frozen=True)
+class Topic:
+    """A question topic: the terms that signal it and its candidate articles"""
+    name: str
+    terms: Tuple[str, ...]
+    articles: Tuple[str, ...] = ()
+
+
+@dataclass
+class Route:
+    """The topics found in a question (in the order of the intents file)"""
+    topics: List[str] = field(default_factory=list)
+    articles: List[str] = field(default_factory=list)
+    matches: Dict[str, List[str]] = field(default_factory=dict)
+
+    def has(self, *names: str) -> bool:
+        """Whether any of the given topics was found"""
+        return any(name in self.matches for name in names)
+
+
+class _Automaton:
+    """Aho-Corasick automaton over characters"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[int]] = [[]]
+        self.patterns: List[str] = []
+
+        for pattern in patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions[state][char] = next_state
+                self.transitions.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = next_state
+        self.outputs[state].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _link(self):
+        """Compute failure links breadth-first and merge the outputs along them"""
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.transitions[fallback].get(char, 0)
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def find(self, text: str) -> List[int]:
+        """Indices of the patterns that occur in the text (each once, in order of first occurrence)"""
+        found, seen = [], set()
+        transitions, fail, outputs = self.transitions, self.fail, self.outputs
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            for index in outputs[state]:
+                if index not in seen:
+                    seen.add(index)
+                    found.append(index)
+        return found
+
+
+class IntentRouter:
+    """Maps questions to topics and candidate article numbers in one pass"""
+
+    def __init__(self, topics: List[Topic]):
+        """
+        Compile the terms of all topics
+
+        Args:
+            topics: Topics in priority order
+        """
+        self.topics = list(topics)
+        self._by_name = {topic.name: topic for topic in self.topics}
+
+        # A term may signal several topics
+        self._term_topics: Dict[str, List[int]] = {}
+        for position, topic in enumerate(self.topics):
+            for term in topic.terms:
+                self._term_topics.setdefault(normalize(term), []).append(position)
+        self._automaton = _Automaton(term for term in self._term_topics if term)
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "IntentRouter":
+        """
+        Load the topics from an intents file
+
+        Args:
+            path: JSON file with a "topics" list of {name, terms, articles}
+                (default: data/intents.json)
+
+        Returns:
+            The router
+        """
+        path = path or DEFAULT_INTENTS
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        topics = [
+            Topic(
+                name=entry["name"],
+                terms=tuple(entry["terms"]),
+                articles=tuple(str(number) for number in entry.get("articles", []))
+            )
+            for entry in data["topics"]
+        ]
+        logger.info(f"Loaded {len(topics)} intent topics from {path}")
+        return cls(topics)
+
+    def topic(self, name: str) -> Topic:
+        """Get a topic by name"""
+        return self._by_name[name]
+
+    def route(self, question: str) -> Route:
+        """
+        Find the topics of a question
+
+        Args:
+            question: The user's question
+
+        Returns:
+            Route with the topics and their candidate articles, in priority
+            order, and the terms found per topic
+        """
+        matches: Dict[int, List[str]] = {}
+        for index in self._automaton.find(normalize(question)):
+            term = self._automaton.patterns[index]
+            for position in self._term_topics[term]:
+                matches.setdefault(position, []).append(term)
+
+        route = Route()
+        for position in sorted(matches):
+            topic = self.topics[position]
+            route.topics.append(topic.name)
+            route.matches[topic.name] = matches[position]
+            route.articles.extend(number for number in topic.articles if number not in route.articles)
+        return route
@@ -0,0 +1,196 @@
+"""
+Model lifecycle management for the legal assistant application.
+
+A ModelManager owns one loaded model for the whole process. It is loaded
+explicitly (at startup, optionally in a background thread), warmed up with a
+short generation and then reports itself ready. Request handlers only ever
+check readiness; they never trigger a load.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Callable
+
+from monitoring import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MODEL_LOADED = REGISTRY.gauge(
+    "legal_model_loaded",
+    "Whether the model is loaded (1) or not (0)"
+)
+
+# Lifecycle states
+UNLOADED = "unloaded"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelManager:
+    """
+    Loads, warms up and holds a model shared by everything in the process.
+    Use ModelManager.shared() to get the instance for a model.
+    """
+
+    _instances: Dict[str, "ModelManager"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None
+    ):
+        """
+        Initialize the manager (nothing is loaded yet)
+
+        Args:
+            name: Name identifying the model (e.g., its path and settings)
+            loader: Function loading and returning the model
+            warmup: Function running a short generation with the loaded model
+        """
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+
+        self.state = UNLOADED
+        self.model = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def shared(
+        cls,
+        name: str,
+        loader: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None
+    ) -> "ModelManager":
+        """
+        Get the process-wide manager for a model, creating it on first use
+
+        Args:
+            name: Name identifying the model; managers are shared by name
+            loader: Function loading the model (used by the first caller only)
+            warmup: Warmup function (used by the first caller only)
+
+        Returns:
+            The shared ModelManager
+        """
+        with cls._instances_lock:
+            manager = cls._instances.get(name)
+            if manager is None:
+                manager = cls(name, loader, warmup)
+                cls._instances[name] = manager
+            return manager
+
+    def load(self, retry: bool = False) -> bool:
+        """
+        Load and warm up the model, blocking until done.
+        Safe to call repeatedly and from several threads; only the first call loads.
+
+        Args:
+            retry: Try again if an earlier load failed
+
+        Returns:
+            True if the model is ready
+        """
+        with self._lock:
+            if self.state == READY or (self.state == FAILED and not retry):
+                return self.state == READY
+
+            logger.info(f"Loading model {self.name}")
+            self.state = LOADING
+            self.error = None
+            self._done.clear()
+            try:
+                start = time.perf_counter()
+                model = self.loader()
+                self.load_seconds = time.perf_counter() - start
+
+                if self.warmup is not None:
+                    self.state = WARMING
+                    start = time.perf_counter()
+                    self.warmup(model)
+                    self.warmup_seconds = time.perf_counter() - start
+
+                self.model = model
+                self.state = READY
+                MODEL_LOADED.set(1)
+                logger.info(
+                    f"Model {self.name} ready (load {self.load_seconds:.1f}s, "
+                    f"warmup {self.warmup_seconds or 0.0:.1f}s)"
+                )
+            except ImportError as e:
+                self.state = FAILED
+                self.error = f"Model dependencies not available: {e}"
+                logger.warning(self.error)
+            except Exception as e:
+                self.state = FAILED
+                self.error = str(e)
+                logger.error(f"Error loading model {self.name}: {e}")
+            finally:
+                if self.state != READY:
+                    MODEL_LOADED.set(0)
+                self._done.set()
+
+            return self.state == READY
+
+    def preload(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Start loading the model at process start
+
+        Args:
+            background: Load in a daemon thread instead of blocking
+
+        Returns:
+            The loading thread if loading in the background
+        """
+        if not background:
+            self.load()
+            return None
+
+        with self._lock:
+            if self._thread is None and self.state == UNLOADED:
+                self._thread = threading.Thread(
+                    target=self.load,
+                    name="model-preload",
+                    daemon=True
+                )
+                self._thread.start()
+            return self._thread
+
+    def is_ready(self) -> bool:
+        """Check whether the model is loaded and warmed up"""
+        return self.state == READY
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a load in progress to finish
+
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            True if the model is ready
+        """
+        self._done.wait(timeout)
+        return self.is_ready()
+
+    def status(self) -> Dict[str, Any]:
+        """Get the lifecycle state for readiness checks"""
+        return {
+            "model": self.name,
+            "state": self.state,
+            "ready": self.is_ready(),
+            "error": self.error,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+        }
@@ -0,0 +1,210 @@
+"""
+Reuse of the key/value cache of fixed prompt prefixes.
+
+Every prompt starts with the same long system prompt (one per language),
+which used to be encoded again for every request. A PrefixCache runs the
+model over each prefix once, keeps its past key values and starts every
+generation from a copy of them, so only the context and the question need
+prefill.
+"""
+
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+
+from monitoring import REGISTRY, current_timer
+
+logger = logging.getLogger(__name__)
+
+PREFIX_TOKENS = REGISTRY.counter(
+    "legal_prefix_cache_tokens_total",
+    "Prompt tokens served from a cached prefix (reused) or prefilled per request (prefilled)",
+    ("cache", "kind")
+)
+
+
+class _Prefix:
+    __slots__ = ("input_ids", "past_key_values")
+
+    def __init__(self, input_ids, past_key_values):
+        self.input_ids = input_ids
+        self.past_key_values = past_key_values
+
+
+class PrefixCache:
+    """
+    Past key values for fixed prompt prefixes, computed once per prefix and
+    copied for every generation (generation extends the cache in place).
+    Holds at most max_prefixes prefixes, least recently used evicted first.
+    """
+
+    def __init__(self, model, tokenizer, max_prefixes: int = 4, name: str = "prefix"):
+        """
+        Initialize the cache
+
+        Args:
+            model: Causal language model (Hugging Face transformers)
+            tokenizer: Its tokenizer (or a processor with a tokenizer attribute)
+            max_prefixes: Number of prefixes kept (e.g., one system prompt per language)
+            name: Name used for metrics
+        """
+        self.model = model
+        self.tokenizer = getattr(tokenizer, "tokenizer", tokenizer)
+        self.max_prefixes = max(1, int(max_prefixes))
+        self.name = name
+
+        self._prefixes: "OrderedDict[str, _Prefix]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+        self.prefilled_tokens = 0
+
+    def warm(self, prefix: str):
+        """Prefill a prefix ahead of the first request that uses it"""
+        self._get(prefix)
+
+    def prepare(self, prefix: str, suffix: str) -> Dict[str, Any]:
+        """
+        Build model.generate() inputs for prefix + suffix, starting from the
+        cached prefix
+
+        Args:
+            prefix: Fixed start of the prompt (e.g., the chat-formatted system prompt)
+            suffix: The rest of the prompt (context and question)
+
+        Returns:
+            Keyword arguments for model.generate(): input_ids, attention_mask
+            and a private copy of the prefix's past_key_values
+        """
+        import torch
+
+        entry = self._get(prefix)
+        suffix_ids = self.tokenizer(
+            suffix,
+            add_special_tokens=False,
+            return_tensors="pt"
+        )["input_ids"].to(entry.input_ids.device)
+
+        # The prefix keeps the exact token IDs its cache was computed for
+        input_ids = torch.cat([entry.input_ids, suffix_ids], dim=-1)
+
+        prefix_tokens = entry.input_ids.shape[-1]
+        suffix_tokens = suffix_ids.shape[-1]
+        with self._lock:
+            self.reused_tokens += prefix_tokens
+            self.prefilled_tokens += suffix_tokens
+        PREFIX_TOKENS.labels(self.name, "reused").inc(prefix_tokens)
+        PREFIX_TOKENS.labels(self.name, "prefilled").inc(suffix_tokens)
+
+        with current_timer().stage("generate.prefix_copy"):
+            past_key_values = copy.deepcopy(entry.past_key_values)
+
+        return {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            "past_key_values": past_key_values,
+        }
+
+    def generate(self, prefix: str, suffix: str, **generate_kwargs) -> str:
+        """
+        Generate a completion for prefix + suffix
+
+        Args:
+            prefix: Fixed start of the prompt
+            suffix: The rest of the prompt
+            generate_kwargs: Arguments for model.generate() (max_new_tokens, ...)
+
+        Returns:
+            The generated text (without the prompt)
+        """
+        import torch
+
+        inputs = self.prepare(prefix, suffix)
+        with torch.inference_mode():
+            outputs = self.model.generate(**inputs, **generate_kwargs)
+        new_tokens = outputs[0, inputs["input_ids"].shape[-1]:]
+        return self.tokenizer.decode(new_tokens, skip_special_tokens=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of prefixes and the prompt tokens reused so far"""
+        with self._lock:
+            total = self.reused_tokens + self.prefilled_tokens
+            return {
+                "prefixes": len(self._prefixes),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reused_tokens": self.reused_tokens,
+                "prefilled_tokens": self.prefilled_tokens,
+                "reused_fraction": round(self.reused_tokens / total, 4) if total else 0.0,
+            }
+
+    def _get(self, prefix: str) -> _Prefix:
+        """Get the cached prefix, prefilling it on first use"""
+        with self._lock:
+            entry = self._prefixes.get(prefix)
+            if entry is not None:
+                self._prefixes.move_to_end(prefix)
+                self.hits += 1
+                return entry
+
+            # Prefill under the lock so concurrent first requests compute it once
+            self.misses += 1
+            with current_timer().stage("generate.prefix_prefill"):
+                entry = self._prefill(prefix)
+            self._prefixes[prefix] = entry
+            if len(self._prefixes) > self.max_prefixes:
+                self._prefixes.popitem(last=False)
+            return entry
+
+    def _prefill(self, prefix: str) -> _Prefix:
+        import torch
+        from transformers import DynamicCache
+
+        # The prefix is the start of the prompt, so it gets the special tokens
+        # (unless a chat template already put them in the text)
+        has_bos = self.tokenizer.bos_token is not None and prefix.startswith(self.tokenizer.bos_token)
+        input_ids = self.tokenizer(
+            prefix,
+            add_special_tokens=not has_bos,
+            return_tensors="pt"
+        )["input_ids"].to(self.model.device)
+
+        with torch.inference_mode():
+            past_key_values = self.model(
+                input_ids=input_ids,
+                past_key_values=DynamicCache(),
+                use_cache=True
+            ).past_key_values
+
+        logger.info(f"Cached {input_ids.shape[-1]} prefix tokens ({self.name})")
+        return _Prefix(input_ids, past_key_values)
+
+
+def split_chat_template(tokenizer, system_prompt: str, user_prompt: str) -> Tuple[str, str]:
+    """
+    Apply the chat template and split the result into the fixed part
+    (everything up to the user message, i.e. the system prompt) and the rest
+
+    Args:
+        tokenizer: Tokenizer with a chat template
+        system_prompt: System message (fixed per language)
+        user_prompt: User message (context and question)
+
+    Returns:
+        Tuple of prefix and suffix; prefix + suffix is the full chat prompt
+    """
+    sentinel = "<<user message>>"
+    text = tokenizer.apply_chat_template(
+        [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": sentinel}
+        ],
+        tokenize=False,
+        add_generation_prompt=True
+    )
+    prefix, _, rest = text.rpartition(sentinel)
+    return prefix, user_prompt + rest
@@ -0,0 +1,117 @@
+"""
+Prompts of the legal assistant, one set per answer language.
+
+Answers use the sectioned format the web client parses ("СЕКЦИЯ 1:" to
+"СЕКЦИЯ 4:" for Bulgarian questions, "SECTION 1:" to "SECTION 4:" for
+English ones). The system prompt is the same for every question in a
+language, so the chat-formatted prompt is split after it: that prefix's
+key/value cache is computed once per language and reused.
+"""
+
+from typing import Tuple
+
+from .prefix_cache import split_chat_template
+
+SYSTEM_PROMPTS = {
+    "bg": (
+        "Ти си професионален асистент за българското трудово право, който може да задава въпроси и да обсъжда сценарии. "
+        "Използвай предоставената информация, за да отговориш на въпроса, но също така можеш да задаваш въпроси на потребителя "
+        "за да разбереш по-добре ситуацията и да дадеш по-точен съвет. "
+        "Ако въпросът е свързан с конкретна ситуация, попитай за детайли. "
+        "Обясни правни последици, възможни санкции и следващи стъпки в правния процес. "
+        "Отговори на български език."
+    ),
+    "en": (
+        "You are a professional assistant for Bulgarian labor law who can ask questions and discuss scenarios. "
+        "Use the provided information to answer the question, but you can also ask the user questions "
+        "to better understand their situation and provide more accurate advice. "
+        "If the question relates to a specific situation, ask for details. "
+        "Explain legal consequences, possible sanctions, and next steps in the legal process. "
+        "Answer in English."
+    ),
+}
+
+_ANSWER_FORMAT = {
+    "bg": (
+        "Структурирай отговора си В СЛЕДНИЯ ТОЧЕН ФОРМАТ с 4 ясно разделени секции (ЗАДЪЛЖИТЕЛНО използвай точно тези заглавия):\n\n"
+        "СЕКЦИЯ 1: Кратко изречение, което казва кои членове от Кодекса на труда са приложими, например: \"Намерих следните приложими членове от Кодекса на труда: Член 70, Член 71\".\n\n"
+        "СЕКЦИЯ 2: Обобщение на информацията от тези членове, което отговаря на въпроса на потребителя.\n\n"
+        "СЕКЦИЯ 3: Точният законов текст от приложимите членове, като използваш термина \"Член\" вместо \"Article\" и запази оригиналния текст без обобщения.\n\n"
+        "СЕКЦИЯ 4: Обяснение на последиците от неспазване на тези правни разпоредби, включително възможни глоби, санкции или съдебни производства. Също така, опиши опции за предотвратяване на проблеми и алтернативни подходи. Накрая, задай поне един въпрос към потребителя, за да разбереш повече за ситуацията.\n\n"
+        "ВАЖНО: Напиши целия отговор НА БЪЛГАРСКИ ЕЗИК и използвай ТОЧНО форматирането с СЕКЦИЯ 1:, СЕКЦИЯ 2:, СЕКЦИЯ 3:, СЕКЦИЯ 4: за разделяне на секциите."
+    ),
+    "en": (
+        "Structure your response in the following format with 4 clearly separated sections:\n\n"
+        "SECTION 1: A brief sentence stating which articles from the Labor Code are applicable, for example: \"I found the following applicable articles from the Labor Code: Article 70, Article 71\".\n\n"
+        "SECTION 2: A summary of the information from these articles that answers the user's question.\n\n"
+        "SECTION 3: The exact legal text from the applicable articles, using the original wording without summarization.\n\n"
+        "SECTION 4: An explanation of the consequences of not following these legal provisions, including possible fines, sanctions, or legal proceedings. Also, describe options for preventing problems and alternative approaches. Finally, ask at least one question to the user to better understand their situation."
+    ),
+}
+
+_CONTEXT_INTRO = {
+    "bg": "Използвай следната информация, за да отговориш на БЪЛГАРСКИ ЕЗИК:",
+    "en": "Use the following information to answer:",
+}
+
+_QUESTION_LABEL = {
+    "bg": "Въпрос на потребителя:",
+    "en": "User question:",
+}
+
+_NO_CONTEXT_INSTRUCTIONS = {
+    "bg": (
+        "Отговори, че не разполагаш с пълна информация по този въпрос и "
+        "посъветвай потребителя да се консултира с правен експерт. "
+        "Същевременно, попитай потребителя дали има конкретен аспект на трудовото законодателство, "
+        "който го интересува, за да можеш да му дадеш по-точни насоки."
+    ),
+    "en": (
+        "Answer that you don't have complete information on this topic and "
+        "advise the user to consult with a legal expert. "
+        "At the same time, ask the user if there's a specific aspect of labor law "
+        "they're interested in, so you can provide more precise guidance."
+    ),
+}
+
+
+def user_prompt(question: str, context: str, history: str, language: str) -> str:
+    """
+    Build the user message: the articles, the conversation history and the
+    question with the answer instructions
+
+    Args:
+        question: The user's question
+        context: Article context ("" if no articles were found)
+        history: Rendered earlier turns of the conversation ("" for none)
+        language: Answer language ("bg" or "en")
+
+    Returns:
+        The user message text
+    """
+    if history:
+        history = f"{history}\n\n"
+    question_part = f"{history}{_QUESTION_LABEL[language]} {question}\n\n"
+    if not context:
+        return f"{question_part}{_NO_CONTEXT_INSTRUCTIONS[language]}"
+    return f"{_CONTEXT_INTRO[language]}\n\n{context}\n\n{question_part}{_ANSWER_FORMAT[language]}"
+
+
+def chat_prompt(tokenizer, system_prompt: str, user_message: str) -> Tuple[str, str]:
+    """
+    Format a prompt for the model and split it after the system prompt
+
+    Args:
+        tokenizer: The model's tokenizer or processor (None while the model
+            isn't loaded or runs out of process)
+        system_prompt: System message (fixed per language)
+        user_message: User message (context and question)
+
+    Returns:
+        Tuple of prefix and rest; prefix + rest is the full prompt, with the
+        model's chat template applied when it has one
+    """
+    tokenizer = getattr(tokenizer, "tokenizer", tokenizer)
+    if getattr(tokenizer, "chat_template", None):
+        return split_chat_template(tokenizer, system_prompt, user_message)
+    return f"{system_prompt}\n\n", user_message
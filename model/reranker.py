@@ -0,0 +1,241 @@
+"""
+Second-stage reranking of search results with a cross-encoder.
+
+The vector search is cheap but coarse, so the assistant has to send five to
+eight articles to be sure the right one is among them, and every one of them
+is prefilled. With reranking, the search fetches a wider candidate set, a
+small cross-encoder reads the question together with each candidate and only
+the best two or three go into the prompt. The number of candidates scored
+per question is capped, pairs are scored in batches and scores are cached per
+(question, article), so repeated questions don't pay for the model again.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Sequence, Tuple
+
+import numpy as np
+
+from database import SearchResults
+from monitoring import REGISTRY
+from .model_manager import ModelManager
+
+logger = logging.getLogger(__name__)
+
+RERANK_LATENCY = REGISTRY.histogram(
+    "legal_rerank_seconds",
+    "Time spent reranking the candidates of one question",
+    ("reranker",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+RERANK_PAIRS = REGISTRY.counter(
+    "legal_rerank_pairs_total",
+    "(question, article) pairs to rerank by result (cached or scored)",
+    ("reranker", "result")
+)
+
+# Small multilingual cross-encoder (covers Bulgarian), fast enough on the CPU
+DEFAULT_RERANK_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+
+# Scores a batch of (question, passage) pairs; higher is more relevant
+PairScorer = Callable[[List[Tuple[str, str]]], Sequence[float]]
+
+
+def _load_cross_encoder(model_name: str, device: str, max_length: int):
+    """Load a sentence-transformers cross-encoder"""
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name, device=device, max_length=max_length)
+
+
+class CrossEncoderReranker:
+    """
+    Rescores the first-stage candidates of a question with a cross-encoder
+    and keeps the best ones
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_RERANK_MODEL,
+        max_candidates: int = 20,
+        batch_size: int = 16,
+        max_chars: int = 1500,
+        cache_size: int = 4096,
+        device: str = "cpu",
+        score_pairs: Optional[PairScorer] = None,
+        name: str = "reranker"
+    ):
+        """
+        Initialize the reranker (the model is loaded by preload())
+
+        Args:
+            model_name: Cross-encoder model name or path
+            max_candidates: Most candidates scored per question; the rest are dropped
+            batch_size: Pairs scored per forward pass
+            max_chars: Characters of each article given to the model
+            cache_size: (question, article) scores kept (least recently used are dropped)
+            device: Device for the model ("cpu" or "cuda")
+            score_pairs: Function scoring a batch of pairs, instead of the model
+            name: Name used for metrics
+        """
+        self.max_candidates = max(1, int(max_candidates))
+        self.batch_size = max(1, int(batch_size))
+        self.max_chars = max_chars
+        self.cache_size = cache_size
+        self.name = name
+
+        self._score_pairs = score_pairs
+        self.model_manager = None
+        if score_pairs is None:
+            self.model_manager = ModelManager.shared(
+                name=f"{model_name} (reranker, device={device})",
+                loader=lambda: _load_cross_encoder(model_name, device, 512),
+                warmup=lambda model: model.predict([("изпитателен срок", "Чл. 70. Изпитателен срок")])
+            )
+
+        self._scores: "OrderedDict[Tuple, float]" = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def preload(self, background: bool = False):
+        """
+        Load the cross-encoder at process start
+
+        Args:
+            background: Load in a background thread
+        """
+        if self.model_manager is not None:
+            self.model_manager.preload(background=background)
+
+    def is_ready(self) -> bool:
+        """Check whether candidates can be scored"""
+        return self.model_manager is None or self.model_manager.is_ready()
+
+    def rerank(
+        self,
+        query: str,
+        results: SearchResults,
+        top_k: int,
+        fallback_k: Optional[int] = None,
+        generation: Optional[str] = None
+    ) -> SearchResults:
+        """
+        Keep the top_k candidates the cross-encoder finds most relevant.
+        Their similarities are replaced by the cross-encoder scores.
+
+        Args:
+            query: The question
+            results: First-stage results, best first
+            top_k: Results to keep
+            fallback_k: Results kept in first-stage order when the model isn't
+                ready or fails (default: top_k)
+            generation: Corpus generation; cached scores of older ones are dropped
+
+        Returns:
+            The selected results, best first
+        """
+        if not results:
+            return results
+        fallback = results.take(range(min(len(results), fallback_k or top_k)))
+        if not self.is_ready():
+            return fallback
+
+        start = time.perf_counter()
+        candidates = list(range(min(len(results), self.max_candidates)))
+        try:
+            scores = self.score(query, results, candidates, generation)
+        except Exception as e:
+            logger.error(f"Reranking failed, keeping the search order: {e}")
+            return fallback
+
+        # Stable sort: ties keep the first-stage order
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        reranked = results.take([candidates[i] for i in order])
+        reranked.similarities = scores[order]
+
+        RERANK_LATENCY.labels(self.name).observe(time.perf_counter() - start)
+        return reranked
+
+    def score(
+        self,
+        query: str,
+        results: SearchResults,
+        indices: Sequence[int],
+        generation: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Score rows of a result set against a question, from the cache where possible
+
+        Args:
+            query: The question
+            results: The result set
+            indices: Rows to score
+            generation: Corpus generation the rows come from
+
+        Returns:
+            Scores of the rows, in the order given
+        """
+        normalized = " ".join(query.lower().split())
+        keys = [(normalized, results.ids[i]) for i in indices]
+        scores = np.zeros(len(keys), dtype=np.float64)
+
+        with self._lock:
+            if generation != self._generation:
+                self._scores.clear()
+                self._generation = generation
+            missing = []
+            for position, key in enumerate(keys):
+                cached = self._scores.get(key)
+                if cached is None:
+                    missing.append(position)
+                else:
+                    self._scores.move_to_end(key)
+                    scores[position] = cached
+
+        hits = len(keys) - len(missing)
+        self.hits += hits
+        self.misses += len(missing)
+        RERANK_PAIRS.labels(self.name, "cached").inc(hits)
+        RERANK_PAIRS.labels(self.name, "scored").inc(len(missing))
+        if not missing:
+            return scores
+
+        # Only the candidates that need scoring are fetched
+        results.load_contents([indices[position] for position in missing])
+        pairs = [(query, self._passage(results, indices[position])) for position in missing]
+        new_scores = []
+        for offset in range(0, len(pairs), self.batch_size):
+            new_scores.extend(float(s) for s in self._predict(pairs[offset:offset + self.batch_size]))
+
+        with self._lock:
+            for position, value in zip(missing, new_scores):
+                scores[position] = value
+                if generation == self._generation:
+                    self._scores[keys[position]] = value
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
+        return scores
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the score cache hit rate and size"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._scores),
+            "ready": self.is_ready(),
+        }
+
+    def _passage(self, results: SearchResults, index: int) -> str:
+        """The text of a candidate as the model reads it"""
+        content = results.content(index)[:self.max_chars]
+        return f"{results.article_numbers[index]}. {content}"
+
+    def _predict(self, pairs: List[Tuple[str, str]]) -> Sequence[float]:
+        if self._score_pairs is not None:
+            return self._score_pairs(pairs)
+        return self.model_manager.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
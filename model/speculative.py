@@ -0,0 +1,223 @@
+"""
+Speculative (assisted) decoding with a small draft model.
+
+Answers often quote article text verbatim, which a much smaller model
+predicts well. The draft model proposes a few tokens at a time and the main
+model verifies all of them in a single forward pass, keeping the longest
+prefix it agrees with plus one token of its own. The output is the one the
+main model would produce; only the number of its forward passes changes.
+
+Forward passes of both models are counted per request to report how many
+draft tokens were accepted and an estimate of the speedup.
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional, Tuple
+
+from monitoring import REGISTRY, current_span
+
+logger = logging.getLogger(__name__)
+
+ACCEPTANCE_RATE = REGISTRY.histogram(
+    "legal_speculative_acceptance_rate",
+    "Fraction of draft tokens accepted by the main model, per request",
+    ("backend",),
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+)
+SPEEDUP = REGISTRY.histogram(
+    "legal_speculative_speedup",
+    "Estimated speedup of speculative decoding over the main model alone, per request",
+    ("backend",),
+    buckets=(0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0, 4.0)
+)
+
+_reports: ContextVar[Optional[List["SpeculativeStats"]]] = ContextVar("speculative_reports", default=None)
+
+
+@dataclass
+class SpeculativeStats:
+    """Counts for one speculatively decoded request"""
+    tokens: int = 0            # tokens generated
+    draft_tokens: int = 0      # tokens proposed by the draft model
+    verify_steps: int = 0      # forward passes of the main model
+    elapsed_s: float = 0.0     # wall time of the generation
+    first_step_s: float = 0.0  # first main model pass (includes the prompt prefill)
+    verify_s: float = 0.0      # all main model passes
+
+    @property
+    def accepted_tokens(self) -> int:
+        """Draft tokens kept (every verification step adds one token of the main model)"""
+        return max(0, min(self.draft_tokens, self.tokens - self.verify_steps))
+
+    @property
+    def acceptance_rate(self) -> float:
+        return self.accepted_tokens / self.draft_tokens if self.draft_tokens else 0.0
+
+    @property
+    def baseline_s(self) -> float:
+        """
+        Estimated time of the main model alone: the prefill plus one pass per
+        token at the measured cost of a verification pass
+        """
+        if self.verify_steps <= 1 or self.tokens <= 1:
+            return self.elapsed_s
+        step_s = (self.verify_s - self.first_step_s) / (self.verify_steps - 1)
+        return self.first_step_s + (self.tokens - 1) * step_s
+
+    @property
+    def speedup(self) -> float:
+        return self.baseline_s / self.elapsed_s if self.elapsed_s > 0 else 1.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Counts and derived rates, rounded for reports"""
+        report = asdict(self)
+        report.update({
+            "elapsed_s": round(self.elapsed_s, 4),
+            "first_step_s": round(self.first_step_s, 4),
+            "verify_s": round(self.verify_s, 4),
+            "accepted_tokens": self.accepted_tokens,
+            "acceptance_rate": round(self.acceptance_rate, 4),
+            "speedup": round(self.speedup, 3),
+        })
+        return report
+
+
+@contextmanager
+def collect_speculation():
+    """
+    Collect the stats of speculatively decoded requests made inside the block
+    (in this thread or in threads bound with wrap_context)
+
+    Yields:
+        List that receives a SpeculativeStats per request
+    """
+    reports: List[SpeculativeStats] = []
+    token = _reports.set(reports)
+    try:
+        yield reports
+    finally:
+        _reports.reset(token)
+
+
+class SpeculativeDecoder:
+    """
+    A main model with a draft model for assisted generation (Hugging Face
+    transformers, assistant_model). Both models must share the tokenizer.
+    Assisted generation verifies one sequence at a time, so requests are not
+    batched.
+    """
+
+    def __init__(self, model, draft_model, draft_tokens: int = 5, name: str = "speculative"):
+        """
+        Initialize the decoder and count the forward passes of both models
+
+        Args:
+            model: Main causal language model
+            draft_model: Smaller model with the same tokenizer
+            draft_tokens: Tokens the draft model proposes per verification step
+                (adjusted by transformers as tokens are accepted or rejected)
+            name: Name used for metrics
+        """
+        self.model = model
+        self.draft_model = draft_model
+        self.draft_tokens = max(1, int(draft_tokens))
+        self.name = name
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.totals = SpeculativeStats()
+
+        # Passes run in the thread that called generate(), so they are
+        # counted for the request of that thread
+        for model_obj, kind in ((model, "main"), (draft_model, "draft")):
+            if hasattr(model_obj, "register_forward_pre_hook"):
+                model_obj.register_forward_pre_hook(lambda module, args, kind=kind: self._before(kind))
+                model_obj.register_forward_hook(lambda module, args, output, kind=kind: self._after(kind))
+
+    def generate(self, inputs: Dict[str, Any], **generate_kwargs) -> Tuple[Any, SpeculativeStats]:
+        """
+        Generate with the draft model proposing tokens
+
+        Args:
+            inputs: Tokenized prompt (input_ids, attention_mask) with a batch size of 1
+            generate_kwargs: Arguments for model.generate() (max_new_tokens, streamer, ...)
+
+        Returns:
+            Tuple of the generated token IDs (prompt included) and the stats of
+            this request
+        """
+        import torch
+
+        stats = SpeculativeStats()
+        self._local.stats = stats
+        self._local.started = None
+        start = time.perf_counter()
+        try:
+            with torch.inference_mode():
+                outputs = self.model.generate(
+                    **inputs,
+                    assistant_model=self.draft_model,
+                    num_assistant_tokens=self.draft_tokens,
+                    **generate_kwargs
+                )
+        finally:
+            self._local.stats = None
+        stats.elapsed_s = time.perf_counter() - start
+        stats.tokens = int(outputs.shape[-1] - inputs["input_ids"].shape[-1])
+
+        self.record(stats)
+        return outputs, stats
+
+    def record(self, stats: SpeculativeStats):
+        """Report the stats of a request (metrics, trace span, log and collect_speculation)"""
+        with self._lock:
+            self.requests += 1
+            for key in ("tokens", "draft_tokens", "verify_steps", "elapsed_s", "first_step_s", "verify_s"):
+                setattr(self.totals, key, getattr(self.totals, key) + getattr(stats, key))
+
+        ACCEPTANCE_RATE.labels(self.name).observe(stats.acceptance_rate)
+        SPEEDUP.labels(self.name).observe(stats.speedup)
+
+        active = current_span()
+        active.set_attribute("speculative.acceptance_rate", round(stats.acceptance_rate, 4))
+        active.set_attribute("speculative.speedup", round(stats.speedup, 3))
+
+        reports = _reports.get()
+        if reports is not None:
+            reports.append(stats)
+
+        logger.info(
+            f"Speculative decoding: {stats.accepted_tokens}/{stats.draft_tokens} draft tokens accepted "
+            f"({stats.acceptance_rate:.0%}), {stats.tokens} tokens in {stats.verify_steps} steps, "
+            f"~{stats.speedup:.2f}x ({self.name})"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the totals over all requests so far"""
+        with self._lock:
+            totals = self.totals.as_dict()
+            totals["requests"] = self.requests
+            return totals
+
+    def _before(self, kind: str):
+        if getattr(self._local, "stats", None) is not None and kind == "main":
+            self._local.started = time.perf_counter()
+
+    def _after(self, kind: str):
+        stats = getattr(self._local, "stats", None)
+        if stats is None:
+            return
+        if kind == "draft":
+            stats.draft_tokens += 1
+            return
+        step_s = time.perf_counter() - self._local.started
+        if stats.verify_steps == 0:
+            stats.first_step_s = step_s
+        stats.verify_steps += 1
+        stats.verify_s += step_s
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenAI-compatible completions server.
+
+Answers POST /v1/completions (optionally streamed as server-sent events)
+with a deterministic completion built from the prompt, without any model,
+so the remote generation backend can be tested and developed without an
+inference server. Keeps connections alive (HTTP/1.1), counts connections
+and requests, and can add per-token latency or fail requests with 503.
+
+Usage:
+    python -m model.standin_server --port 8001 --token-delay-ms 20
+"""
+
+import json
+import time
+import uuid
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional
+
+
+def standin_completion(prompt: str, max_tokens: int) -> List[str]:
+    """
+    Build the completion for a prompt: a fixed answer that quotes the end of
+    the prompt, one whitespace-separated word per token
+
+    Args:
+        prompt: Prompt text
+        max_tokens: Maximum number of tokens
+
+    Returns:
+        The completion's tokens (each with its leading space)
+    """
+    quoted = prompt.split()[-12:]
+    words = ["Stand-in", "answer", "to:"] + quoted
+    return [" " + word for word in words[:max(0, max_tokens)]]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass  # no access log on stderr
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": self.server.model, "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path != "/v1/completions":
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        with self.server.lock:
+            self.server.requests += 1
+            fail = self.server.fail_next > 0
+            if fail:
+                self.server.fail_next -= 1
+        if fail:
+            self._send_json(503, {"error": {"message": "Stand-in server is failing on purpose"}})
+            return
+
+        try:
+            request = json.loads(body)
+            prompt = request["prompt"]
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {"error": {"message": "Expected a JSON body with a prompt"}})
+            return
+
+        max_tokens = int(request.get("max_tokens", 16))
+        tokens = standin_completion(prompt, max_tokens)
+        finish_reason = "length" if len(tokens) >= max_tokens else "stop"
+        completion_id = f"cmpl-{uuid.uuid4().hex[:12]}"
+
+        if request.get("stream"):
+            self._stream(completion_id, tokens, finish_reason)
+            return
+
+        time.sleep(self.server.token_delay_s * len(tokens))
+        prompt_tokens = len(prompt.split())
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": request.get("model", self.server.model),
+            "choices": [{"index": 0, "text": "".join(tokens), "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens),
+            },
+        })
+
+    def _stream(self, completion_id: str, tokens: List[str], finish_reason: str):
+        """Send the tokens as server-sent events in a chunked response"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            for i, token in enumerate(tokens):
+                time.sleep(self.server.token_delay_s)
+                last = i == len(tokens) - 1
+                self._send_chunk(self._event({
+                    "id": completion_id,
+                    "object": "text_completion",
+                    "choices": [{"index": 0, "text": token, "finish_reason": finish_reason if last else None}],
+                }))
+            self._send_chunk(b"data: [DONE]\n\n")
+            self._send_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading; stop generating
+            self.close_connection = True
+
+    @staticmethod
+    def _event(data: Dict[str, Any]) -> bytes:
+        return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+    def _send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StandinServer(ThreadingHTTPServer):
+    """The stand-in server, runnable in a background thread (e.g., in tests)"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, model: str = "standin", token_delay_s: float = 0.0):
+        """
+        Initialize the server (port 0 picks a free port)
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on
+            model: Model name reported by the server
+            token_delay_s: Simulated generation time per token
+        """
+        super().__init__((host, port), _Handler)
+        self.model = model
+        self.token_delay_s = token_delay_s
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.fail_next = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandinServer":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="standin-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    """Run the stand-in server in the foreground"""
+    parser = argparse.ArgumentParser(description='Stand-in OpenAI-compatible completions server')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=8001,
+                        help='Port to listen on')
+    parser.add_argument('--model', type=str, default='standin',
+                        help='Model name reported by the server')
+    parser.add_argument('--token-delay-ms', type=float, default=0.0,
+                        help='Simulated generation time per token')
+    args = parser.parse_args()
+
+    server = StandinServer(args.host, args.port, model=args.model, token_delay_s=args.token_delay_ms / 1000)
+    print(f"Stand-in completions server on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Monitoring module for the legal assistant application.
+"""
+
+from .timing import (
+    StageTimer,
+    TimingRegistry,
+    timing_registry,
+    current_timer,
+    NULL_TIMER
+)
+from .metrics import (
+    MetricsRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    CONTENT_TYPE
+)
+from .tracing import (
+    Tracer,
+    Span,
+    JsonlExporter,
+    tracer,
+    configure_tracing,
+    span,
+    current_span,
+    traced,
+    wrap_context
+)
+
+__all__ = [
+    'StageTimer',
+    'TimingRegistry',
+    'timing_registry',
+    'current_timer',
+    'NULL_TIMER',
+    'MetricsRegistry',
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'REGISTRY',
+    'CONTENT_TYPE',
+    'Tracer',
+    'Span',
+    'JsonlExporter',
+    'tracer',
+    'configure_tracing',
+    'span',
+    'current_span',
+    'traced',
+    'wrap_context'
+]
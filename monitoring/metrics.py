@@ -0,0 +1,351 @@
+"""
+Prometheus-style metrics for the legal assistant application.
+
+Counters and histograms keep one cell per thread, so recording a value
+never takes a lock: a thread only ever writes its own cell and the cells
+are summed when the metrics are rendered. Cells of finished threads are
+folded into a shared base cell at render time, which keeps memory bounded
+under thread-per-request servers.
+"""
+
+import time
+import bisect
+import threading
+import weakref
+from typing import List, Dict, Tuple, Optional, Callable, Sequence
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _ShardedCells:
+    """Fixed-size vectors of floats, one per writing thread"""
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._base = [0.0] * size
+        self._cells: List[Tuple[weakref.ref, List[float]]] = []
+
+    def cell(self) -> List[float]:
+        """Get the calling thread's cell (created on first use)"""
+        cell = getattr(self._local, "cell", None)
+        if cell is None:
+            cell = [0.0] * self._size
+            with self._lock:
+                self._cells.append((weakref.ref(threading.current_thread()), cell))
+            self._local.cell = cell
+        return cell
+
+    def totals(self) -> List[float]:
+        """Sum all cells, folding the cells of finished threads into the base"""
+        with self._lock:
+            alive = []
+            for thread_ref, cell in self._cells:
+                thread = thread_ref()
+                if thread is None or not thread.is_alive():
+                    for i, value in enumerate(cell):
+                        self._base[i] += value
+                else:
+                    alive.append((thread_ref, cell))
+            self._cells = alive
+
+            totals = list(self._base)
+            for _, cell in alive:
+                for i, value in enumerate(cell):
+                    totals[i] += value
+            return totals
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base class handling names, help text and labelled children"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._children_lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Get the child metric for a combination of label values"""
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+        child = self._children.get(key)
+        if child is None:
+            with self._children_lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render the metric in the Prometheus text format"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("_cells",)
+
+    def __init__(self):
+        self._cells = _ShardedCells(1)
+
+    def inc(self, amount: float = 1.0):
+        self._cells.cell()[0] += amount
+
+    def value(self) -> float:
+        return self._cells.totals()[0]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value())}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_lock", "_function")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Compute the value with a callback at render time"""
+        self._function = function
+
+    def track_inprogress(self):
+        """Context manager incrementing the gauge while the block runs"""
+        return _InProgress(self)
+
+    def value(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._value
+
+
+class _InProgress:
+    __slots__ = ("_gauge",)
+
+    def __init__(self, gauge: _GaugeChild):
+        self._gauge = gauge
+
+    def __enter__(self):
+        self._gauge.inc()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._gauge.dec()
+        return False
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (updates are rare, so a plain lock is used)"""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._children[()].dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._children[()].set_function(function)
+
+    def track_inprogress(self):
+        return self._children[()].track_inprogress()
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value())}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_cells")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # One counter per bucket (the last one is +Inf), then sum and count
+        self._cells = _ShardedCells(len(buckets) + 3)
+
+    def observe(self, value: float):
+        cell = self._cells.cell()
+        cell[bisect.bisect_left(self._buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def time(self):
+        """Context manager observing the duration of the block in seconds"""
+        return _Timer(self)
+
+    def totals(self) -> List[float]:
+        return self._cells.totals()
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: _HistogramChild):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def time(self):
+        return self._children[()].time()
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            totals = child.totals()
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), totals[:-2]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(totals[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(totals[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge"""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram"""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,201 @@
+"""
+Per-stage timing instrumentation for the legal assistant application.
+
+A StageTimer collects the durations of the stages of one request. While it
+is active, code deeper in the call stack (e.g., the database manager) finds
+it through current_timer() and records its own stages into it. Every stage
+is also aggregated in the process-wide timing_registry.
+
+When timings are disabled current_timer() returns NULL_TIMER, whose stages
+are a shared no-op context manager, so the instrumentation costs one
+context variable lookup per stage.
+
+The aggregates are exported with the other metrics as
+legal_stage_seconds_total and legal_stage_calls_total (by stage), so mean
+stage times per interval can be read from /metrics. Work handed to another
+thread only records into the request's timer if it is bound with
+monitoring.wrap_context().
+"""
+
+import time
+import threading
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from .metrics import REGISTRY
+
+STAGE_SECONDS = REGISTRY.counter(
+    "legal_stage_seconds_total",
+    "Time spent in each timed pipeline stage",
+    ("stage",)
+)
+STAGE_CALLS = REGISTRY.counter(
+    "legal_stage_calls_total",
+    "Number of times each timed pipeline stage ran",
+    ("stage",)
+)
+
+
+class TimingRegistry:
+    """Process-wide aggregate of stage durations"""
+
+    def __init__(self, export: bool = False):
+        """
+        Initialize the registry
+
+        Args:
+            export: Also add every duration to the stage metrics on /metrics
+        """
+        self._lock = threading.Lock()
+        self._stats: Dict[str, list] = {}  # stage -> [count, total seconds, max seconds]
+        self.export = export
+
+    def record(self, stage: str, seconds: float):
+        """Add one duration for a stage"""
+        with self._lock:
+            stats = self._stats.get(stage)
+            if stats is None:
+                self._stats[stage] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+        if self.export:
+            STAGE_SECONDS.labels(stage).inc(seconds)
+            STAGE_CALLS.labels(stage).inc()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the aggregated timings
+
+        Returns:
+            Dictionary mapping stage names to count, total, mean and max (ms)
+        """
+        with self._lock:
+            items = [(stage, list(stats)) for stage, stats in self._stats.items()]
+
+        return {
+            stage: {
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / count, 3),
+                "max_ms": round(maximum * 1000, 3),
+            }
+            for stage, (count, total, maximum) in sorted(items)
+        }
+
+    def reset(self):
+        """Forget all recorded timings"""
+        with self._lock:
+            self._stats.clear()
+
+
+timing_registry = TimingRegistry(export=True)
+
+_current_timer: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class _Stage:
+    """Context manager timing one stage of a StageTimer"""
+
+    __slots__ = ("_timer", "_name", "_start")
+
+    def __init__(self, timer: "StageTimer", name: str):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._timer.add(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class StageTimer:
+    """
+    Collects stage durations for a single request.
+    Use it as a context manager to make it the current timer; the time
+    spent inside is recorded as the "total" stage.
+    """
+
+    def __init__(self, registry: Optional[TimingRegistry] = timing_registry):
+        """
+        Initialize the timer
+
+        Args:
+            registry: Registry receiving every stage duration (None to skip aggregation)
+        """
+        self.registry = registry
+        self._timings: Dict[str, float] = {}
+        self._start = None
+        self._token = None
+
+    def stage(self, name: str) -> _Stage:
+        """Time a stage; repeated stages are summed"""
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float):
+        """Record a duration for a stage"""
+        self._timings[name] = self._timings.get(name, 0.0) + seconds
+        if self.registry is not None:
+            self.registry.record(name, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Get the recorded stage durations in milliseconds"""
+        return {name: round(seconds * 1000, 3) for name, seconds in self._timings.items()}
+
+    def __enter__(self):
+        self._token = _current_timer.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.add("total", time.perf_counter() - self._start)
+        _current_timer.reset(self._token)
+        return False
+
+
+class _NullStage:
+    """No-op stage shared by all disabled timers"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class _NullTimer:
+    """Timer used when timings are disabled"""
+
+    __slots__ = ()
+
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def add(self, name: str, seconds: float):
+        pass
+
+    def as_dict(self) -> Dict[str, float]:
+        return {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+def current_timer():
+    """Get the active StageTimer, or NULL_TIMER when none is active"""
+    return _current_timer.get() or NULL_TIMER
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Summarize a JSONL trace file written by monitoring.tracing.
+
+Prints the slowest traces as trees of spans with their durations, to see
+where the time of tail-latency requests went.
+
+Usage:
+    python -m monitoring.trace_report traces.jsonl --slowest 5
+"""
+
+import json
+import argparse
+from typing import List, Dict, Any, Optional
+
+
+def load_traces(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Read a JSONL trace file, grouping the spans by trace ID"""
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                span_dict = json.loads(line)
+                traces.setdefault(span_dict["trace_id"], []).append(span_dict)
+    return traces
+
+
+def format_trace(spans: List[Dict[str, Any]]) -> str:
+    """Render one trace as an indented tree of spans with their durations"""
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    span_ids = {s["span_id"] for s in spans}
+    for s in sorted(spans, key=lambda s: s["start"]):
+        parent_id = s["parent_id"] if s["parent_id"] in span_ids else None
+        children.setdefault(parent_id, []).append(s)
+
+    lines = []
+
+    def add(s, depth):
+        error = f"  [{s['error']}]" if s.get("error") else ""
+        lines.append(f"{'  ' * depth}{s['name']:<{50 - 2 * depth}} {s['duration_ms']:>10.2f} ms  ({s['thread']}){error}")
+        for child in children.get(s["span_id"], []):
+            add(child, depth + 1)
+
+    for root in children.get(None, []):
+        add(root, 0)
+    return "\n".join(lines)
+
+
+def main():
+    """Print the slowest traces of a trace file"""
+    parser = argparse.ArgumentParser(description='Summarize a JSONL trace file')
+    parser.add_argument('path', help='Trace file written by the JSONL exporter')
+    parser.add_argument('--slowest', type=int, default=5, help='Number of traces to show')
+    args = parser.parse_args()
+
+    traces = load_traces(args.path)
+
+    def root_duration(spans):
+        roots = [s for s in spans if s["parent_id"] is None]
+        return max(s["duration_ms"] for s in (roots or spans))
+
+    ranked = sorted(traces.values(), key=root_duration, reverse=True)
+    print(f"{len(traces)} traces in {args.path}")
+    for spans in ranked[:args.slowest]:
+        print(f"\nTrace {spans[0]['trace_id']} ({root_duration(spans):.2f} ms)")
+        print(format_trace(spans))
+
+
+if __name__ == "__main__":
+    main()
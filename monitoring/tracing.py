@@ -0,0 +1,285 @@
+"""
+Lightweight request tracing for the legal assistant application.
+
+A trace is a tree of spans (timed, named operations) for one request. The
+current span lives in a context variable, so nested calls become child spans
+without passing anything around; wrap_context() carries the context into
+worker threads.
+
+Finished traces go to an exporter, by default one JSON object per span in a
+JSONL file. Tracing is configured from the environment:
+
+    LEGAL_TRACE_FILE         JSONL file to write spans to (tracing is off if unset)
+    LEGAL_TRACE_SAMPLE_RATE  Fraction of requests to trace (default 1.0)
+    LEGAL_TRACE_SLOW_MS      Also keep every trace slower than this, regardless
+                             of sampling, so tail latency is never sampled away
+
+Summarize a trace file with:
+
+    python -m monitoring.trace_report traces.jsonl --slowest 5
+"""
+
+import os
+import json
+import time
+import random
+import secrets
+import threading
+import functools
+import contextvars
+from typing import List, Dict, Any, Optional, Callable
+
+
+class _Trace:
+    """Spans of one trace, kept until the root span decides whether to export"""
+
+    __slots__ = ("trace_id", "spans", "sampled", "decided", "keep")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List["Span"] = []
+        self.sampled = sampled
+        self.decided = False
+        self.keep = False
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = (
+        "name", "span_id", "parent", "attributes", "status", "error",
+        "start_time", "duration", "thread", "_trace", "_tracer", "_start", "_token"
+    )
+
+    def __init__(self, tracer: "Tracer", trace: _Trace, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent = parent
+        self.attributes = attributes
+        self.status = "ok"
+        self.error = None
+        self.start_time = None
+        self.duration = None
+        self.thread = None
+        self._trace = trace
+        self._tracer = tracer
+        self._token = None
+
+    @property
+    def trace_id(self) -> str:
+        return self._trace.trace_id
+
+    def set_attribute(self, key: str, value: Any):
+        """Attach a value to the span"""
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the finished span"""
+        return {
+            "trace_id": self._trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3),
+            "thread": self.thread,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+    def __enter__(self):
+        self.start_time = time.time()
+        self.thread = threading.current_thread().name
+        self._token = _current_span.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.status = "error"
+            self.error = f"{exc_type.__name__}: {exc_value}"
+        self._tracer._finish(self)
+        return False
+
+
+class _NullSpan:
+    """Span used when the request is not traced"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Unsampled:
+    """Marks the context of a request that was not sampled, so its children are skipped"""
+
+    __slots__ = ("_token",)
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        self._token = _current_span.set(_UNSAMPLED)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current_span.reset(self._token)
+        return False
+
+
+_UNSAMPLED = _NullSpan()
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+
+
+class JsonlExporter:
+    """Appends finished spans to a JSONL file, one span per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        lines = "".join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n" for span in spans)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+
+class Tracer:
+    """Creates spans and hands finished traces to the exporter"""
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0, slow_ms: Optional[float] = None):
+        """
+        Initialize the tracer
+
+        Args:
+            exporter: Object with an export(spans) method (None disables tracing)
+            sample_rate: Fraction of root spans (requests) to trace
+            slow_ms: Keep traces slower than this even when not sampled
+        """
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Create a tracer configured from the LEGAL_TRACE_* environment variables"""
+        path = os.environ.get("LEGAL_TRACE_FILE")
+        slow_ms = os.environ.get("LEGAL_TRACE_SLOW_MS")
+        return cls(
+            exporter=JsonlExporter(path) if path else None,
+            sample_rate=float(os.environ.get("LEGAL_TRACE_SAMPLE_RATE", "1.0")),
+            slow_ms=float(slow_ms) if slow_ms else None
+        )
+
+    def span(self, name: str, **attributes):
+        """
+        Start a span as a child of the current one (or as a new trace)
+
+        Args:
+            name: Name of the operation
+            **attributes: Values to attach to the span
+
+        Returns:
+            Context manager yielding the span
+        """
+        if self.exporter is None:
+            return NULL_SPAN
+
+        parent = _current_span.get()
+        if parent is _UNSAMPLED:
+            return NULL_SPAN
+        if parent is not None:
+            return Span(self, parent._trace, name, parent, attributes)
+
+        # New trace: sample it, unless slow traces must be recorded anyway
+        sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        if not sampled and self.slow_ms is None:
+            return _Unsampled()
+        return Span(self, _Trace(sampled), name, None, attributes)
+
+    def _finish(self, span: Span):
+        trace = span._trace
+        exporter = self.exporter  # May have been switched off during the request
+        if span.parent is None:
+            trace.keep = trace.sampled or (self.slow_ms is not None and span.duration * 1000 >= self.slow_ms)
+            trace.decided = True
+            spans, trace.spans = trace.spans + [span], []
+            if trace.keep and exporter is not None:
+                exporter.export(spans)
+        elif trace.decided:
+            # A child outliving its root (e.g., in a background thread)
+            if trace.keep and exporter is not None:
+                exporter.export([span])
+        else:
+            trace.spans.append(span)
+
+
+tracer = Tracer.from_env()
+
+
+def configure_tracing(path: Optional[str] = None, sample_rate: float = 1.0, slow_ms: Optional[float] = None):
+    """
+    Reconfigure the global tracer
+
+    Args:
+        path: JSONL file to export spans to (None disables tracing)
+        sample_rate: Fraction of requests to trace
+        slow_ms: Keep traces slower than this even when not sampled
+    """
+    tracer.exporter = JsonlExporter(path) if path else None
+    tracer.sample_rate = sample_rate
+    tracer.slow_ms = slow_ms
+
+
+def span(name: str, **attributes):
+    """Start a span with the global tracer"""
+    return tracer.span(name, **attributes)
+
+
+def current_span():
+    """Get the active span (a no-op span when the request is not traced)"""
+    active = _current_span.get()
+    return active if isinstance(active, Span) else NULL_SPAN
+
+
+def traced(name: Optional[str] = None):
+    """Decorator running the function inside a span (named after it by default)"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def wrap_context(func: Callable) -> Callable:
+    """
+    Bind a callable to the current context so spans it creates in another
+    thread (e.g., an executor) become children of the current span
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Test script for the semantic answer cache.
+"""
+
+import time
+
+from model.answer_cache import SemanticAnswerCache, cache_scope
+from model.gemma_interface import LegalAssistant
+
+BG = cache_scope("bg")
+EN = cache_scope("en")
+
+
+def embedder(vectors):
+    """Embedding function returning fixed vectors, standing in for a sentence embedding model"""
+    return lambda question: vectors[question]
+
+
+def test_rephrasing_hits():
+    """With an embedding model a rephrased question in the same scope gets the cached answer"""
+    cache = SemanticAnswerCache(embedder({
+        "Колко дни е изпитателния срок?": [1.0, 0.0],
+        "Колко продължава пробният период?": [0.95, 0.31],
+        "Колко дни е платения годишен отпуск?": [0.0, 1.0],
+    }), threshold=0.85)
+    cache.put("Колко дни е изпитателния срок?", {"answer": "До 6 месеца.", "sources": [{"article": "Чл. 70"}]}, BG)
+
+    cached = cache.get("Колко продължава пробният период?", BG)
+    assert cached == {"answer": "До 6 месеца.", "sources": [{"article": "Чл. 70"}]}
+
+    # Callers get a copy, so changing it doesn't change the cache
+    cached["sources"].clear()
+    assert cache.get("Колко дни е изпитателния срок?", BG)["sources"]
+
+    assert cache.get("Колко дни е платения годишен отпуск?", BG) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert stats["hit_rate"] == round(2 / 3, 4)
+
+
+def test_same_question_without_embeddings():
+    """Without an embedding model only the same question hits, ignoring case, punctuation and spacing"""
+    cache = SemanticAnswerCache()
+    cache.put("Колко дни е платеният годишен отпуск?", {"answer": "20 работни дни."}, BG)
+
+    assert cache.get("колко дни е  платеният годишен отпуск", BG) == {"answer": "20 работни дни."}
+    assert cache.get("Колко дни е платеният отпуск?", BG) is None
+
+
+def test_different_meaning_never_hits():
+    """Near-identical questions with a different legal meaning don't share an answer"""
+    cache = SemanticAnswerCache()
+    pairs = [
+        ("Какви са задълженията на работодателя?", "Какви са задълженията на работника?"),
+        ("Може ли да работя, ако съм под 18 години?", "Може ли да работя, ако съм над 18 години?"),
+        ("Колко е срокът на предизвестието от работодателя?", "Колко е срокът на предизвестието от работника?"),
+        ("What are the duties of the employer?", "What are the duties of the employee?"),
+    ]
+    for cached_question, other_question in pairs:
+        cache.put(cached_question, {"answer": cached_question}, BG)
+        assert cache.get(other_question, BG) is None, other_question
+        assert cache.get(cached_question, BG) == {"answer": cached_question}
+
+
+def test_scope_must_match():
+    """Answers are not shared across languages, filters or negations"""
+    cache = SemanticAnswerCache()
+    question = "Може ли работодателят да ме уволни с предизвестие?"
+    cache.put(question, {"answer": "Да."}, BG)
+
+    assert cache.get(question, BG) is not None
+    assert cache.get(question, EN) is None
+    assert cache.get(question, cache_scope("bg", {"category": "labor"})) is None
+    assert cache.get("Може ли работодателят да ме уволни без предизвестие?", BG) is None
+
+    # Filters compare by value, not by key order
+    cache.put(question, {"answer": "Да."}, cache_scope("bg", {"a": 1, "b": 2}))
+    assert cache.get(question, cache_scope("bg", {"b": 2, "a": 1})) is not None
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are not returned"""
+    cache = SemanticAnswerCache(ttl_seconds=0.05)
+    cache.put("annual leave days", {"answer": "20"}, EN)
+    assert cache.get("annual leave days", EN) is not None
+
+    time.sleep(0.1)
+    assert cache.get("annual leave days", EN) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_bound():
+    """The least recently used entry is evicted when the cache is full"""
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.put("probation period", {"answer": "1"}, EN)
+    cache.put("annual leave", {"answer": "2"}, EN)
+    assert cache.get("probation period", EN) is not None  # Now most recently used
+
+    cache.put("salary payment", {"answer": "3"}, EN)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("annual leave", EN) is None
+    assert cache.get("probation period", EN) is not None
+    assert cache.get("salary payment", EN) is not None
+
+
+def test_generation_change_invalidates():
+    """A new corpus generation drops every cached answer"""
+    cache = SemanticAnswerCache()
+    cache.put("termination notice", {"answer": "30 days"}, EN, generation="a")
+    assert cache.get("termination notice", EN, generation="a") is not None
+
+    assert cache.get("termination notice", EN, generation="b") is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.get("termination notice", EN, generation="a") is None
+
+
+def test_corpus_generation_is_read_once_per_change():
+    """The generation is read from SQLite again only after a commit, from any instance"""
+    import tempfile
+    from pathlib import Path
+    from database import HybridDatabaseManager, LegalDocument, LegalArticle
+    from database import db_manager as db_module
+
+    def document(doc_id):
+        return LegalDocument(
+            id=doc_id, title="Кодекс на труда", document_type="code", source_url="",
+            articles=[LegalArticle(id=f"{doc_id}-1", law_id=doc_id, number="Чл. 1", content="текст")]
+        )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = dict(db_path=str(Path(tmp_dir) / "legal.sqlite"), vector_db_path=str(Path(tmp_dir) / "vectors"))
+        manager = HybridDatabaseManager(**paths)
+        manager.add_document(document("first"))
+
+        connects = []
+        connect = db_module.sqlite3.connect
+        db_module.sqlite3.connect = lambda *args, **kwargs: connects.append(args) or connect(*args, **kwargs)
+        try:
+            generation = manager.corpus_generation()
+            assert generation is not None
+            for _ in range(10):
+                assert manager.corpus_generation() == generation
+            assert len(connects) == 1
+        finally:
+            db_module.sqlite3.connect = connect
+
+        manager.add_document(document("second"))
+        second = manager.corpus_generation()
+        assert second != generation
+
+        # A commit by another instance (e.g., another process importing) is seen too
+        HybridDatabaseManager(**paths).add_document(document("third"))
+        assert manager.corpus_generation() not in (generation, second)
+
+
+class _FailingStreamModel:
+    """Streams a few chunks, then fails"""
+
+    def generate_stream(self, prompt, **kwargs):
+        yield "Изпитателният срок "
+        yield "е до "
+        raise RuntimeError("connection reset")
+
+
+class _Corpus:
+    def corpus_generation(self):
+        return "1"
+
+    def get_articles_by_number(self, numbers):
+        return []
+
+
+class _ReadyManager:
+    state = "ready"
+    model = _FailingStreamModel()
+
+    def is_ready(self):
+        return True
+
+
+def test_failed_stream_is_not_cached():
+    """A stream that fails after sending text is not cached, so the next asker gets a fresh answer"""
+    assistant = LegalAssistant(db_manager=_Corpus(), config={"preload_model": False, "latency_budget_s": 0})
+    assistant.model_manager = _ReadyManager()
+    assistant._retrieve = lambda question, max_results, filters: [{
+        "content": "Изпитателният срок не може да надвишава 6 месеца.",
+        "metadata": {"article_id": "a71", "law_id": "kt", "article_number": "Чл. 71", "law_title": "Кодекс на труда"},
+        "similarity": 0.9
+    }]
+    assistant._prepare_context = lambda search_results, remembered=None, budget=None: "[Document 1]"
+
+    question = "Колко е най-дългият изпитателен срок?"
+    events = list(assistant.stream_answer(question))
+    done = events[-1]
+    assert done["type"] == "done" and done["served_by"] == "partial"
+    assert done["answer"].startswith("Изпитателният срок е до ")
+
+    assert assistant.answer_cache.stats()["entries"] == 0
+    assert assistant._cache_lookup(question, 5, None)[2] is None
+
+
+if __name__ == "__main__":
+    test_rephrasing_hits()
+    test_same_question_without_embeddings()
+    test_different_meaning_never_hits()
+    test_scope_must_match()
+    test_ttl_expiry()
+    test_lru_bound()
+    test_generation_change_invalidates()
+    test_corpus_generation_is_read_once_per_change()
+    test_failed_stream_is_not_cached()
+    print("All answer cache tests passed.")
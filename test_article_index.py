@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the inverted index of the backend's JSON database.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "backend"))
+
+from article_index import ArticleIndex
+from db_manager import DBManager
+
+QUERIES = [
+    "Колко е изпитателният срок?",
+    "изпитателн срок договор",
+    "Какъв е размерът на платения годишен отпуск?",
+    "трудово възнаграждение изплаща пари",
+    "работникът служителят",
+    "задължения работодателя",
+    "договор договор договор",
+    "SALARY Трудовото",
+    "нещо съвсем различно",
+    "ок",
+]
+
+
+def article(number, title, content):
+    return {"number": number, "title": title, "content": content}
+
+
+def old_rank(articles, query, limit=2):
+    """The substring scan the index replaced"""
+    words = [word for word in query.lower().split() if len(word) > 3]
+    results = []
+    for item in articles:
+        text = f"{item['title']} {item['content']}".lower()
+        count = sum(1 for word in words if word in text)
+        if count > 0:
+            results.append((item, count))
+    results.sort(key=lambda x: x[1], reverse=True)
+    return [item for item, _ in results[:limit]]
+
+
+def sample_db(directory):
+    # A missing file is created with the sample articles
+    return DBManager(os.path.join(directory, "articles.json"))
+
+
+def test_rank_matches_substring_scan():
+    """The index ranks like the old scan: substrings, best first, ties in list order"""
+    with tempfile.TemporaryDirectory() as directory:
+        articles = sample_db(directory).articles
+    index = ArticleIndex(articles)
+
+    for query in QUERIES:
+        words = [word for word in query.lower().split() if len(word) > 3]
+        ranked = [articles[position] for position in index.rank(words, limit=2)]
+        assert ranked == old_rank(articles, query), query
+
+
+def test_substrings_and_ties():
+    """A word matches inside longer words; equal counts keep list order"""
+    articles = [
+        article("1", "Първи", "Изпитателният срок е кратък."),
+        article("2", "Втори", "Няма такъв."),
+        article("3", "Трети", "изпитателния срок"),
+        article("4", "Четвърти", "ИЗПИТАТЕЛН"),
+    ]
+    index = ArticleIndex(articles)
+
+    assert index.rank(["изпитателн"], limit=10) == [0, 2, 3]
+    assert index.rank(["изпитателн", "срок"], limit=10) == [0, 2, 3]
+    assert index.rank(["тател", "кратък."], limit=2) == [0, 2]
+    assert index.rank(["липсва"], limit=2) == []
+    assert index.count_matches(["срок", "срок"]).tolist() == [2, 0, 2, 0]
+
+    for query in ("изпитателн срок", "тател кратък.", "срок срок", "Първи втори трети"):
+        words = [word for word in query.lower().split() if len(word) > 3]
+        assert [articles[p] for p in index.rank(words, limit=2)] == old_rank(articles, query), query
+
+
+def test_trigram_candidates_and_size():
+    """Terms sharing a word's trigrams are checked; short words still match; the index grows linearly"""
+    long_word = "а" + "бв" * 500
+    articles = [
+        article("1", "", "ааба абаааб аб"),
+        article("2", "", long_word),
+    ]
+    index = ArticleIndex(articles)
+
+    # "абаааб" has both trigrams of "ааба" but doesn't contain it
+    assert [index.terms[t] for t in index.matching_terms("ааба")] == ["ааба"]
+    assert index.rank(["аб"], limit=10) == [0, 1]
+    assert index.rank(["вбвбвбв"], limit=10) == [1]
+
+    # A suffix list would hold about len(long_word)² / 2 characters; distinct trigrams are a handful
+    assert len(index._gram_terms) <= sum(len(term) for term in index.terms)
+    assert index.memory_usage()["grams"] < len(long_word) * 8
+    usage = index.memory_usage()
+    assert usage["total"] == sum(value for name, value in usage.items() if name != "total")
+
+
+def test_positions_in_list_order():
+    """Articles are found by number in list order, repeated numbers included"""
+    index = ArticleIndex([article("5", "", ""), article("3", "", ""), article("5", "", "")])
+    assert index.positions(["5", "3", "5"]) == [0, 1, 2]
+    assert index.positions(["5"]) == [0, 2]
+    assert index.positions(["9"]) == []
+
+
+def test_search_falls_back_to_article_125():
+    """A query matching nothing returns article 125"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = sample_db(directory)
+        assert [a["number"] for a in db.search_articles("нещо съвсем различно")] == ["125"]
+        assert [a["number"] for a in db.search_articles("чл 156")] == ["156"]
+
+        for query in ("Размерът платения", "възнаграждение пари"):
+            assert db._search_articles(query) == old_rank(db.articles, query), query
+
+
+if __name__ == "__main__":
+    test_rank_matches_substring_scan()
+    test_substrings_and_ties()
+    test_trigram_candidates_and_size()
+    test_positions_in_list_order()
+    test_search_falls_back_to_article_125()
+    print("All article index tests passed.")
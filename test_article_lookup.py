@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for the direct article lookup fast path.
+"""
+
+from model.article_lookup import (
+    FastPathStats, article_references, direct_lookup, extractive_answer
+)
+
+
+def test_article_references():
+    """Explicit references are found with their numbers, in order"""
+    assert article_references("какво гласи чл. 70") == ["70"]
+    assert article_references("Чл.70 и 71") == ["70", "71"]
+    assert article_references("членове 155а, 156 и 155а") == ["155а", "156"]
+    assert article_references("Show me Article 242") == ["242"]
+    assert article_references("Колко дни е изпитателния срок?") == []
+
+    # A letter suffix is part of the number, even when it is "и"
+    assert article_references("какво гласи чл. 107и") == ["107и"]
+    assert article_references("чл. 107а и 108") == ["107а", "108"]
+    assert article_references("членове 107и и 107к") == ["107и", "107к"]
+    assert article_references("Show me Article 5a") == ["5a"]
+    assert article_references("articles 5a and 6") == ["5a", "6"]
+
+
+def test_direct_lookup():
+    """Only questions asking for nothing but the article text take the fast path"""
+    assert direct_lookup("какво гласи чл. 70") == ["70"]
+    assert direct_lookup("Чл.70 и 71") == ["70", "71"]
+    assert direct_lookup("какво гласи чл. 107и") == ["107и"]
+    assert direct_lookup("What does Article 155 of the Labor Code say?") == ["155"]
+    assert direct_lookup("Какъв е изпитателният срок според чл. 70?") == []
+    assert direct_lookup("чл. 70, ал. 2") == []
+    assert direct_lookup("Какво гласи кодексът на труда?") == []
+
+
+def test_extractive_answer():
+    """The answer quotes every article found and names the missing ones"""
+    articles = [
+        {"number": "70", "content": "Трудовият договор може да се сключи със срок за изпитване. "},
+        {"number": "Чл. 71", "content": "Когато срокът за изпитване е уговорен..."},
+    ]
+    answer = extractive_answer(articles, missing=["999"])
+    assert "### Чл. 70:\nТрудовият договор може да се сключи със срок за изпитване.\n" in answer
+    assert "### Чл. 71:" in answer
+    assert "Не намерих Чл. 999" in answer
+    assert "не правен съвет" in answer
+
+    answer = extractive_answer(articles[:1], language="en")
+    assert answer.startswith("Text of Article 70")
+    assert "could not be found" not in answer
+    assert "not legal advice" in answer
+
+
+def test_fast_path_stats():
+    """The hit rate covers every question checked"""
+    stats = FastPathStats("test")
+    assert stats.stats()["hit_rate"] == 0.0
+    stats.record(True)
+    stats.record(False)
+    stats.record(False)
+    stats.record(True)
+    assert stats.stats() == {"checked": 4, "hits": 2, "misses": 2, "hit_rate": 0.5}
+
+
+if __name__ == "__main__":
+    test_article_references()
+    test_direct_lookup()
+    test_extractive_answer()
+    test_fast_path_stats()
+    print("All article lookup tests passed.")
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Test script for the ASGI app's admission control and error handling.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "backend"))
+
+from asgi_app import AdmissionControl, LegalASGIApp, Overloaded, REQUESTS
+
+
+def requester(body=None, disconnect=None):
+    """An ASGI receive() sending the body, then http.disconnect once the event is set"""
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": json.dumps(body).encode() if body else b"", "more_body": False}
+        await (disconnect or asyncio.Event()).wait()
+        return {"type": "http.disconnect"}
+
+    return receive
+
+
+async def request(app, method, path, body=None, disconnect=None):
+    """Call the app; returns the status, the headers and the body"""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": b""}
+    await app(scope, requester(body, disconnect), send)
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return messages[0]["status"], dict(messages[0]["headers"]), body
+
+
+def blocking_answer(release):
+    """An answer function that waits for the release event"""
+    def answer(query, conversation_id=None):
+        release.wait(5)
+        return {"answer": query, "served_by": "generated"}
+    return answer
+
+
+def test_queue_full_and_timeout():
+    """Past the wait queue a request gets 429; one that waits too long gets 503"""
+    async def run():
+        release = threading.Event()
+        app = LegalASGIApp(answer=blocking_answer(release), max_in_flight=1, max_queued=1,
+                           queue_timeout_s=0.2, name="test-overload")
+        first = asyncio.ensure_future(request(app, "POST", "/api/query", {"query": "първи"}))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(request(app, "POST", "/api/query", {"query": "втори"}))
+        await asyncio.sleep(0.05)
+
+        status, headers, body = await request(app, "POST", "/api/query", {"query": "трети"})
+        assert status == 429
+        assert int(headers[b"retry-after"]) >= 1
+        assert json.loads(body)["retry_after"] == int(headers[b"retry-after"])
+
+        status, headers, _ = await queued
+        assert status == 503 and int(headers[b"retry-after"]) >= 1
+
+        release.set()
+        status, _, body = await first
+        assert status == 200 and json.loads(body)["answer"] == "първи"
+        assert app.admission.stats()["in_flight"] == 0
+        app.pool.shutdown()
+
+    asyncio.run(run())
+
+
+def test_slots_handed_over_in_order():
+    """A freed slot goes to the longest waiting request"""
+    async def run():
+        admission = AdmissionControl(max_in_flight=1, max_queued=5, queue_timeout_s=5, name="test-fifo")
+        await admission.acquire()
+        order = []
+
+        async def wait(name):
+            await admission.acquire()
+            order.append(name)
+
+        waiters = []
+        for name in ("a", "b", "c"):
+            waiters.append(asyncio.ensure_future(wait(name)))
+            await asyncio.sleep(0)
+        assert admission.stats()["queued"] == 3
+
+        for _ in range(3):
+            admission.release()
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*waiters)
+        assert order == ["a", "b", "c"]
+        assert admission.in_flight == 1
+
+        admission.release()
+        assert admission.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_requests_release_their_slot():
+    """Cancelled waiters and callers never keep a slot"""
+    async def run():
+        admission = AdmissionControl(max_in_flight=1, max_queued=5, queue_timeout_s=5, name="test-cancel")
+        await admission.acquire()
+
+        # Cancelled while waiting
+        waiting = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert admission.stats()["queued"] == 0
+
+        # Cancelled right after the slot was handed over: it is passed on
+        # (or, where wait_for delivers the result anyway, the caller holds it)
+        handed = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        admission.release()
+        handed.cancel()
+        await asyncio.gather(handed, return_exceptions=True)
+        if not handed.cancelled():
+            admission.release()
+        assert admission.in_flight == 0
+
+        # A caller that stops waiting frees the slot when the function returns
+        release = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=1)
+        caller = asyncio.ensure_future(admission.submit(pool, release.wait, 5))
+        await asyncio.sleep(0.05)
+        assert admission.in_flight == 1
+        caller.cancel()
+        release.set()
+        await asyncio.sleep(0.1)
+        assert admission.in_flight == 0
+        pool.shutdown()
+
+        # Waiting too long is refused and leaves nothing behind
+        await admission.acquire()
+        admission.queue_timeout_s = 0.05
+        try:
+            await admission.acquire()
+        except Overloaded as e:
+            assert e.status == 503
+        else:
+            raise AssertionError("the wait didn't time out")
+        assert admission.stats()["queued"] == 0 and admission.in_flight == 1
+
+    asyncio.run(run())
+
+
+def test_unexpected_error_is_a_500():
+    """A failing handler still gets a JSON response and is counted as 500"""
+    def answer(query, conversation_id=None):
+        raise ValueError("boom")
+
+    async def run():
+        app = LegalASGIApp(answer=answer, max_in_flight=1, name="test-error")
+        status, headers, body = await request(app, "POST", "/api/query", {"query": "въпрос"})
+        assert status == 500 and headers[b"content-type"] == b"application/json"
+        assert json.loads(body) == {"error": "Internal server error"}
+        assert app.admission.in_flight == 0
+        app.pool.shutdown()
+
+    asyncio.run(run())
+    assert REQUESTS.labels("POST", "/api/query", 500).value() >= 1
+
+
+def test_disconnect_stops_the_stream():
+    """A client that goes away stops the generation and frees its slot"""
+    produced = []
+
+    def stream(query, conversation_id=None):
+        for i in range(1000):
+            produced.append(i)
+            yield {"type": "token", "text": f"{i} "}
+            time.sleep(0.01)
+        yield {"type": "done", "answer": "", "served_by": "generated"}
+
+    async def run():
+        app = LegalASGIApp(stream=stream, max_in_flight=1, name="test-disconnect")
+        disconnect = asyncio.Event()
+        streaming = asyncio.ensure_future(
+            request(app, "POST", "/api/query/stream", {"query": "въпрос"}, disconnect)
+        )
+        await asyncio.sleep(0.1)
+        disconnect.set()
+        status, _, _ = await asyncio.wait_for(streaming, 2)
+        assert status == 200
+        assert app.admission.in_flight == 0
+        app.pool.shutdown()
+
+    asyncio.run(run())
+    assert len(produced) < 1000
+
+
+class SlowBackend:
+    """Stands in for legal_query: every call takes a while and records its thread"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.threads = []
+
+    def _call(self, result):
+        self.threads.append(threading.get_ident())
+        time.sleep(self.delay)
+        return result
+
+    def preload_gemma(self, background=True):
+        return self._call(None)
+
+    def model_status(self):
+        return self._call({"ready": False, "state": "loading"})
+
+    def cache_stats(self):
+        return self._call({"hits": 0})
+
+    def fast_path_stats(self):
+        return self._call({"direct": 0})
+
+    def end_conversation(self, conversation_id):
+        return self._call(conversation_id == "known")
+
+
+def test_backend_calls_stay_off_the_loop():
+    """Startup and the status routes call the backend on worker threads; the loop keeps serving"""
+    async def lifespan(app):
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        await app({"type": "lifespan"}, receive, send)
+        return sent
+
+    async def run():
+        backend = SlowBackend()
+        app = LegalASGIApp(max_in_flight=1, name="test-offloop")
+        app._backend = backend
+        loop_thread = threading.get_ident()
+
+        assert await lifespan(app) == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+        app = LegalASGIApp(max_in_flight=1, name="test-offloop")
+        app._backend = backend
+        ready = asyncio.ensure_future(request(app, "GET", "/api/ready"))
+        await asyncio.sleep(0.02)
+        # The slow readiness check doesn't hold up other requests
+        started = time.monotonic()
+        status, _, body = await request(app, "GET", "/api/load")
+        assert status == 200 and time.monotonic() - started < backend.delay / 2
+        assert not ready.done()
+        assert (await ready)[0] == 503
+
+        assert (await request(app, "GET", "/api/cache"))[0] == 200
+        assert (await request(app, "GET", "/api/fast-path"))[0] == 200
+        assert (await request(app, "DELETE", "/api/conversation/known"))[0] == 200
+        assert (await request(app, "DELETE", "/api/conversation/other"))[0] == 404
+        assert len(backend.threads) == 6 and loop_thread not in backend.threads
+        app.pool.shutdown()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_queue_full_and_timeout()
+    test_slots_handed_over_in_order()
+    test_cancelled_requests_release_their_slot()
+    test_unexpected_error_is_a_500()
+    test_disconnect_stops_the_stream()
+    test_backend_calls_stay_off_the_loop()
+    print("All ASGI app tests passed.")
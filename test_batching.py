@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script for dynamic batching of generation requests.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from model.backends import TransformersBackend
+from model.batching import BatchScheduler
+
+
+class FakeProcessor:
+    """Encodes every prompt as one token per character; every new token decodes to an x"""
+
+    bos_token = None
+
+    def __call__(self, text, padding=True, add_special_tokens=True, return_tensors=None):
+        width = max(len(prompt) for prompt in text)
+        return FakeInputs(input_ids=np.ones((len(text), width), dtype=np.int64))
+
+    def batch_decode(self, rows, skip_special_tokens=True):
+        return ["x" * len(row) for row in rows]
+
+
+class FakeInputs(dict):
+    def to(self, device):
+        return self
+
+
+class FakeModel:
+    """Generates max_new_tokens tokens, tracking how many generate() calls overlap"""
+
+    device = "cpu"
+
+    class generation_config:
+        eos_token_id = 0
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.most_active = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, input_ids, max_new_tokens=1, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        new_tokens = np.full((input_ids.shape[0], max_new_tokens), 7, dtype=np.int64)
+        return np.concatenate([input_ids, new_tokens], axis=1)
+
+
+class FakeSpeculative:
+    """Stands in for SpeculativeDecoder on the fake model"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def generate(self, inputs, **generate_kwargs):
+        return self.model.generate(**inputs, max_new_tokens=generate_kwargs["max_new_tokens"]), {}
+
+
+def test_concurrent_requests_are_batched():
+    """Requests arriving within the window share a batch and get their own results"""
+    batches = []
+
+    def run_batch(key, prompts):
+        batches.append(list(prompts))
+        time.sleep(0.01)
+        return [prompt.upper() for prompt in prompts]
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=4, batch_window_ms=100, name="test")
+    try:
+        prompts = [f"prompt {i}" for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(scheduler.run, prompts))
+    finally:
+        scheduler.close()
+
+    assert results == [prompt.upper() for prompt in prompts]
+    assert all(len(batch) <= 4 for batch in batches)
+    assert len(batches) < len(prompts)
+    assert scheduler.stats()["requests"] == 8
+
+
+def test_keys_are_not_mixed():
+    """Only requests with the same key (generation settings) run together"""
+    seen = []
+    release = threading.Event()
+
+    def run_batch(key, items):
+        release.wait(1)
+        seen.append((key, list(items)))
+        return items
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=8, batch_window_ms=50, name="test-keys")
+    try:
+        futures = [scheduler.submit(i, key="a" if i % 2 else "b") for i in range(6)]
+        release.set()
+        assert [future.result(2) for future in futures] == list(range(6))
+    finally:
+        scheduler.close()
+
+    for key, items in seen:
+        assert all(("a" if i % 2 else "b") == key for i in items)
+
+
+def test_errors_reach_every_caller():
+    """A failing batch raises in every request of the batch"""
+    def run_batch(key, items):
+        raise ValueError("model failed")
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=2, batch_window_ms=50, name="test-errors")
+    try:
+        futures = [scheduler.submit(i) for i in range(2)]
+        for future in futures:
+            try:
+                future.result(2)
+                assert False, "The batch error should be raised"
+            except ValueError as e:
+                assert "model failed" in str(e)
+    finally:
+        scheduler.close()
+
+
+def test_one_generate_on_the_model_at_a_time():
+    """Batches wait for the model lock and speculative requests never overlap"""
+    model = FakeModel()
+    backend = TransformersBackend(model, FakeProcessor(), batch_window_ms=0, prefix_cache=False)
+    try:
+        # A batch waits while something else (e.g., a stream) holds the model
+        backend.model_lock.acquire()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(backend.generate, "prompt", max_new_tokens=3)
+            time.sleep(0.1)
+            assert not future.done() and model.calls == 0
+            backend.model_lock.release()
+            assert future.result(2) == "xxx"
+
+        # Speculative requests bypass the scheduler but still take turns
+        backend.speculative = FakeSpeculative(model)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda i: backend.generate("prompt", max_new_tokens=2), range(4)))
+        assert results == ["xx"] * 4
+        assert model.most_active == 1
+    finally:
+        backend.scheduler.close()
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_are_batched()
+    test_keys_are_not_mixed()
+    test_errors_reach_every_caller()
+    test_one_generate_on_the_model_at_a_time()
+    print("All batching tests passed.")
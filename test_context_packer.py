@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for token-budget context packing.
+"""
+
+from model.context_packer import ContextPacker, Passage, approximate_tokens
+
+
+def count_words(text):
+    """Deterministic token counter: one token per word"""
+    return len(text.split())
+
+
+def sentences(prefix, n, words_per_sentence=5):
+    """Text of n sentences of the given length"""
+    return " ".join(
+        " ".join([f"{prefix}{i}"] * (words_per_sentence - 1)) + " end." for i in range(n)
+    )
+
+
+def test_packs_highest_scores_first():
+    """Passages are packed by score until the budget is used up"""
+    packer = ContextPacker(budget_tokens=25, count_tokens=count_words, min_passage_tokens=5)
+    packed = packer.pack([
+        Passage(text=sentences("low", 2), score=0.2),
+        Passage(text=sentences("high", 2), score=0.9),
+        Passage(text=sentences("mid", 2), score=0.5),
+    ])
+
+    assert [p.text.split()[0] for p in packed.passages] == ["high0", "mid0", "low0"]
+    assert packed.tokens <= 25
+    assert packed.input_tokens == 30
+    assert packed.saved_tokens == packed.input_tokens - packed.tokens
+
+
+def test_truncates_at_sentence_boundary():
+    """The passage that doesn't fit keeps only whole sentences"""
+    packer = ContextPacker(budget_tokens=14, count_tokens=count_words, min_passage_tokens=5)
+    packed = packer.pack([Passage(header="Article 70:", text=sentences("s", 4), score=1.0)])
+
+    passage = packed.passages[0]
+    assert passage.truncated
+    assert passage.text.endswith("end.")
+    assert passage.text == sentences("s", 2)
+    assert packed.tokens == 12  # Header (2) + two sentences (10)
+    assert packed.truncated == 1
+
+
+def test_drops_passages_that_would_be_too_short():
+    """A passage that can't keep min_passage_tokens is left out"""
+    packer = ContextPacker(budget_tokens=12, count_tokens=count_words, min_passage_tokens=5)
+    packed = packer.pack([
+        Passage(text=sentences("a", 2), score=1.0),
+        Passage(text=sentences("b", 2), score=0.5),
+    ])
+
+    assert len(packed.passages) == 1
+    assert packed.dropped == 1
+    assert packed.report()["saved_tokens"] == 10
+
+
+def test_pack_more_uses_remaining_budget():
+    """Lower-priority passages only get what is left of the budget"""
+    packer = ContextPacker(budget_tokens=15, count_tokens=count_words, min_passage_tokens=5)
+    packed = packer.pack([Passage(text=sentences("a", 2))])
+    assert packer.has_room(packed)
+
+    packer.pack_more(packed, [Passage(text=sentences("key", 2))])
+    assert packed.tokens == 15
+    assert not packer.has_room(packed)
+
+    packer.pack_more(packed, [Passage(text=sentences("extra", 1))])
+    assert packed.dropped == 1
+    assert len(packed.passages) == 2
+
+
+def test_no_budget_packs_everything():
+    """A budget of 0 means no limit"""
+    packer = ContextPacker(budget_tokens=0, count_tokens=count_words)
+    texts = [sentences("x", 20), sentences("y", 20)]
+    packed = packer.pack([Passage(text=text) for text in texts])
+
+    assert [p.text for p in packed.passages] == texts
+    assert packed.saved_tokens == 0
+
+
+def test_approximate_tokens():
+    """The fallback estimate counts subword pieces and punctuation"""
+    assert approximate_tokens("") == 0
+    assert approximate_tokens("Чл. 70") == 3
+    assert approximate_tokens("изпитателен срок") == 3 + 1
+
+
+if __name__ == "__main__":
+    test_packs_highest_scores_first()
+    test_truncates_at_sentence_boundary()
+    test_drops_passages_that_would_be_too_short()
+    test_pack_more_uses_remaining_budget()
+    test_no_budget_packs_everything()
+    test_approximate_tokens()
+    print("All context packer tests passed.")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test script for the conversation store.
+"""
+
+import time
+
+from database import SearchResults
+from model.context_packer import approximate_tokens
+from model.conversation import ConversationStore, History, Turn, summarize_turn
+from model.gemma_interface import LegalAssistant
+
+
+def article(number):
+    return {"number": number, "title": f"Article {number}", "content": "..."}
+
+
+def test_recent_turns_and_summary():
+    """Turns beyond max_turns are folded into the summary once, oldest first"""
+    summarized = []
+
+    def summarize(turn):
+        summarized.append(turn.question)
+        return summarize_turn(turn)
+
+    store = ConversationStore(max_turns=2, summarize=summarize)
+    conversation_id = store.start()
+    assert store.start(conversation_id) == conversation_id
+    assert not store.history(conversation_id)
+
+    for i in range(4):
+        store.record(conversation_id, f"Въпрос {i}?", f"Отговор {i}. Още подробности.", [article(str(70 + i))])
+
+    history = store.history(conversation_id)
+    assert [turn.question for turn in history.turns] == ["Въпрос 2?", "Въпрос 3?"]
+    assert summarized == ["Въпрос 0?", "Въпрос 1?"]
+    assert history.summary == "- Въпрос 0? -> Отговор 0. (70)\n- Въпрос 1? -> Отговор 1. (71)"
+
+    # Reading the history doesn't summarize again
+    store.history(conversation_id)
+    assert len(summarized) == 2
+
+
+def test_summary_is_bounded():
+    """The oldest summary lines are dropped beyond summary_tokens"""
+    store = ConversationStore(max_turns=1, summary_tokens=40)
+    conversation_id = store.start()
+    for i in range(20):
+        store.record(conversation_id, f"Въпрос номер {i} за отпуска?", "Отговорът е дълъг. " * 10)
+
+    summary = store.history(conversation_id).summary
+    assert approximate_tokens(summary) <= 40
+    assert "Въпрос номер 18" in summary and "Въпрос номер 0 " not in summary
+
+
+def test_render_within_budget():
+    """Rendering keeps the newest turns first, then the summary, within the budget"""
+    history = History(
+        summary="- Колко е изпитателният срок? -> До 6 месеца. (70)",
+        turns=[Turn("Първи въпрос?", "Кратък отговор."), Turn("Втори въпрос?", "Дълъг отговор. " * 100)]
+    )
+
+    text = history.render(2000, "bg")
+    assert text.startswith("Предишен разговор:")
+    assert text.index("До 6 месеца") < text.index("Първи въпрос?") < text.index("Втори въпрос?")
+
+    for budget in (40, 120, 300):
+        text = history.render(budget, "en")
+        assert approximate_tokens(text) <= budget
+        assert "User: Втори въпрос?" in text
+        assert "Първи въпрос?" not in text
+
+    assert History().render(100) == ""
+    assert history.render(0) == ""
+
+
+def test_remembered_articles():
+    """Articles of earlier turns are remembered, most recent first and bounded"""
+    store = ConversationStore(max_articles=3)
+    conversation_id = store.start()
+    store.record(conversation_id, "Въпрос 1", "Отговор", [article("70"), article("71")])
+    store.record(conversation_id, "Въпрос 2", "Отговор", [article("155"), article("70")])
+
+    assert [a["number"] for a in store.articles(conversation_id)] == ["70", "155", "71"]
+    store.record(conversation_id, "Въпрос 3", "Отговор", [article("242")])
+    assert [a["number"] for a in store.articles(conversation_id)] == ["242", "70", "155"]
+    assert [a["number"] for a in store.history(conversation_id).articles] == ["242", "70", "155"]
+    assert store.articles("unknown") == []
+
+
+def test_expiry_and_limits():
+    """Idle conversations expire, the least recently used are dropped and unknown IDs start anew"""
+    store = ConversationStore(max_conversations=2, ttl_seconds=0.05)
+    first = store.start()
+    second = store.start()
+    store.start(first)
+    third = store.start()
+    assert store.stats()["conversations"] == 2
+    assert store.start(second) != second
+
+    time.sleep(0.06)
+    assert store.start(first) != first
+    assert store.start(third) != third
+
+    assert store.start("made-up") != "made-up"
+    assert not store.end("made-up")
+
+
+def test_follow_up_prompt():
+    """The assistant puts earlier turns after the articles and doesn't cache follow-ups"""
+    assistant = LegalAssistant(db_manager=None, config={"preload_model": False})
+    history = History("", [Turn("Колко е платеният отпуск?", "Поне 20 работни дни.", ("155",))])
+    question = "А при непълно работно време?"
+
+    prefix, prompt = assistant._build_prompt(question, "[Document 1]", assistant._render_history(question, history))
+    assert prefix == assistant._prompt_prefix("bg")
+    assert prompt.index("[Document 1]") < prompt.index("Поне 20 работни дни.") < prompt.index("Въпрос на потребителя:")
+    assert assistant._build_prompt(question, "[Document 1]", assistant._render_history(question, History())) == \
+        assistant._build_prompt(question, "[Document 1]")
+    assert assistant._cache_lookup(question, 5, None, history) == (None, None, None)
+
+
+class NoKeyArticles:
+    """A corpus whose key article searches find nothing"""
+
+    def search_similar(self, query, n_results=5, filters=None, columnar=False):
+        return SearchResults.from_dicts([])
+
+
+def hit(number, content):
+    return {
+        "content": content,
+        "metadata": {"article_id": number, "law_id": "kt", "article_number": f"Чл. {number}", "law_title": "Кодекс на труда"},
+        "similarity": 0.9
+    }
+
+
+def test_remembered_articles_follow_fresh_hits():
+    """A follow-up's context has this question's matches first, then the earlier turns' articles"""
+    assistant = LegalAssistant(db_manager=NoKeyArticles(), config={"preload_model": False})
+    fresh = [hit("155", "Платен годишен отпуск. " * 5)]
+    remembered = [
+        {"number": "70", "title": "Кодекс на труда", "content": "Изпитателен срок до 6 месеца."},
+        {"number": "155", "title": "Кодекс на труда", "content": "вече е в контекста"},
+    ]
+
+    context = assistant._prepare_context(fresh, remembered)
+    assert context.index("Чл. 155") < context.index("[Earlier Article]") < context.index("Изпитателен срок")
+    assert "вече е в контекста" not in context
+
+    # A small budget is spent on the fresh match
+    context = assistant._prepare_context(fresh, remembered, budget=70)
+    assert "Платен годишен отпуск" in context and "Изпитателен срок" not in context
+    assert assistant._prepare_context(fresh, remembered, budget=5) == ""
+
+
+def test_prompt_cap_covers_history_context_and_question():
+    """History, articles and question together stay within max_prompt_tokens"""
+    question = "А при непълно работно време?"
+    history = History(
+        "- Колко е платеният отпуск? -> Поне 20 работни дни. (155)",
+        [Turn("Колко е платеният отпуск?", "Поне 20 работни дни. " * 80, ("155",))],
+        [{"number": "70", "title": "Кодекс на труда", "content": "Изпитателен срок до 6 месеца. " * 50}]
+    )
+    fresh = [hit(str(number), f"Член {number}. " + "Текст на члена. " * 60) for number in (155, 156, 157)]
+
+    for max_prompt_tokens in (1000, 1600, 3000):
+        assistant = LegalAssistant(db_manager=NoKeyArticles(), config={
+            "preload_model": False, "max_prompt_tokens": max_prompt_tokens, "context_token_budget": 2000
+        })
+        rendered = assistant._render_history(question, history)
+        assert rendered and approximate_tokens(rendered) <= max_prompt_tokens // 4
+        context = assistant._prepare_context(
+            fresh, assistant._remembered(history), assistant._context_budget(question, rendered)
+        )
+        prefix, rest = assistant._build_prompt(question, context, rendered)
+        assert "Член 155" in context
+        assert approximate_tokens(prefix + rest) <= max_prompt_tokens
+    assert "[Earlier Article]" in context
+
+
+if __name__ == "__main__":
+    test_recent_turns_and_summary()
+    test_summary_is_bounded()
+    test_render_within_budget()
+    test_remembered_articles()
+    test_expiry_and_limits()
+    test_follow_up_prompt()
+    test_remembered_articles_follow_fresh_hits()
+    test_prompt_cap_covers_history_context_and_question()
+    print("All conversation tests passed.")
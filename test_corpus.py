@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for the array-backed corpus store and the JSON import that uses it.
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from database import CorpusStore, CorpusBuilder, HybridDatabaseManager
+
+LAWS = [
+    {
+        "title": "Кодекс на труда",
+        "url": "https://example.org/kt",
+        "scraped_date": "2024-01-01T00:00:00",
+        "articles": [
+            {"number": "Чл. 70", "content": "Изпитателният срок е до 6 месеца."},
+            {"number": "Чл. 155", "content": "Всеки работник има право на платен годишен отпуск."},
+        ]
+    },
+    {"title": "Грешен", "url": "https://example.org/error", "error": "404"},
+    {
+        "title": "Закон за здравословни и безопасни условия на труд",
+        "url": "https://example.org/zzbut",
+        "articles": [
+            {"number": "Чл. 70", "content": ""},
+        ]
+    },
+]
+
+
+def write_laws(tmp_dir):
+    path = Path(tmp_dir) / "laws.json"
+    path.write_text(json.dumps(LAWS, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_round_trip_and_interning():
+    """Texts read back unchanged; laws and numbers are stored once"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = CorpusStore.from_json(write_laws(tmp_dir))
+
+    assert len(store) == 3
+    assert [view.content for view in store] == [
+        "Изпитателният срок е до 6 месеца.",
+        "Всеки работник има право на платен годишен отпуск.",
+        "",
+    ]
+    assert bytes(store[1].content_bytes) == LAWS[0]["articles"][1]["content"].encode("utf-8")
+    assert store[-1].law_title == "Закон за здравословни и безопасни условия на труд"
+    assert store[0].article_id is None
+
+    assert store.number_table == ["Чл. 70", "Чл. 155"]
+    assert len(store.law_table) == 2
+    assert [view.law_id for view in store.find("Чл. 70")] == ["https://example.org/kt", "https://example.org/zzbut"]
+    assert store.find("Чл. 999") == []
+
+    usage = store.memory_usage()
+    assert usage["text"] == len(store.text)
+    assert usage["total"] == sum(value for name, value in usage.items() if name != "total")
+
+
+def test_scan_reuses_one_view():
+    """scan() moves a single view over the requested rows"""
+    builder = CorpusBuilder()
+    for i in range(5):
+        assert builder.add("law", "Закон", f"Чл. {i}", f"текст {i}") == i
+    assert builder.count == 5
+    store = builder.build()
+
+    views = []
+    numbers = []
+    for view in store.scan(1, 4):
+        views.append(view)
+        numbers.append(view.number)
+    assert numbers == ["Чл. 1", "Чл. 2", "Чл. 3"]
+    assert all(view is views[0] for view in views)
+
+    try:
+        store[5]
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("an out-of-range row was returned")
+
+
+def test_article_ids_for_all_or_none():
+    """A store either has SQL IDs for every article or for none"""
+    builder = CorpusBuilder()
+    builder.add("law", "Закон", "Чл. 1", "а", article_id="a1")
+    builder.add("law", "Закон", "Чл. 2", "б")
+    try:
+        builder.build()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("mixed article IDs were accepted")
+
+
+def test_import_and_reload_from_sqlite():
+    """The JSON import stores every law's articles; from_sqlite reads them back"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = HybridDatabaseManager(
+            db_path=str(Path(tmp_dir) / "legal.sqlite"),
+            vector_db_path=str(Path(tmp_dir) / "vectors")
+        )
+        manager.import_from_json(write_laws(tmp_dir))
+
+        store = CorpusStore.from_sqlite(manager.db_path)
+        assert len(store) == 3
+        assert [(view.law_title, view.number, view.content) for view in store] == [
+            (law["title"], article["number"], article["content"])
+            for law in LAWS if "error" not in law
+            for article in law["articles"]
+        ]
+        assert len({view.law_id for view in store}) == 2
+
+        article = manager.get_articles_by_number(["Чл. 155"])[0]
+        assert article["content"] == LAWS[0]["articles"][1]["content"]
+        assert store.find("Чл. 155")[0].article_id == article["id"]
+
+
+if __name__ == "__main__":
+    test_round_trip_and_interning()
+    test_scan_reuses_one_view()
+    test_article_ids_for_all_or_none()
+    test_import_and_reload_from_sqlite()
+    print("All corpus store tests passed.")
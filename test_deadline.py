@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test script for latency budgets and the answers served when they run out.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from model.answer_cache import SemanticAnswerCache
+from model.article_lookup import excerpt_answer
+from model.backends import RemoteCompletionsBackend, TransformersBackend
+from model.batching import BatchScheduler
+from model.deadline import Deadline, partial_answer, wait_timeout, STOP_GRACE_S
+from model.standin_server import StandinServer, standin_completion
+
+
+def test_deadline():
+    """A budget of 0 or None never runs out"""
+    unlimited = Deadline(0)
+    assert unlimited.at is None and unlimited.remaining() is None
+    assert not unlimited.expired() and unlimited.allows(1e9)
+    assert wait_timeout(None) is None
+
+    deadline = Deadline(0.05)
+    assert deadline.allows(0.01) and not deadline.allows(1.0)
+    time.sleep(0.06)
+    assert deadline.expired() and deadline.remaining() == 0.0
+    assert wait_timeout(deadline.at) == STOP_GRACE_S
+
+
+def test_remote_generation_stops_at_deadline():
+    """A slow completion is cut at the deadline and the text so far is returned"""
+    with StandinServer(token_delay_s=0.1) as server:
+        backend = RemoteCompletionsBackend.load("standin", base_url=server.url, load_tokenizer=False)
+        prompt = "Колко дни е изпитателния срок?"
+
+        start = time.monotonic()
+        text = backend.generate(prompt, max_new_tokens=50, deadline=start + 0.45)
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 1.0
+        assert text and "".join(standin_completion(prompt, 50)).startswith(text)
+        assert len(text) < len("".join(standin_completion(prompt, 50)))
+
+        # Without a deadline the whole completion arrives
+        assert backend.generate(prompt, max_new_tokens=3) == "".join(standin_completion(prompt, 3))
+        backend.close()
+
+
+def test_queued_request_gives_up():
+    """A request still waiting for its batch at the deadline is dropped"""
+    started = []
+
+    def run_batch(key, items):
+        started.extend(items)
+        time.sleep(0.3)
+        return items
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=1, batch_window_ms=0)
+    first = scheduler.submit("first")
+    time.sleep(0.05)
+    try:
+        scheduler.run("second", timeout=0.1)
+    except FutureTimeoutError:
+        pass
+    else:
+        raise AssertionError("The queued request didn't time out")
+
+    assert first.result() == "first"
+    scheduler.close()
+    assert started == ["first"]
+
+
+class SteppingProcessor:
+    """One token per prompt character; every new token (not padding) decodes to an x"""
+
+    bos_token = None
+
+    def __call__(self, text, padding=True, add_special_tokens=True, return_tensors=None):
+        width = max(len(prompt) for prompt in text)
+        return FakeInputs(input_ids=np.ones((len(text), width), dtype=np.int64))
+
+    def batch_decode(self, rows, skip_special_tokens=True):
+        return ["x" * int((np.asarray(row) == 7).sum()) for row in rows]
+
+
+class FakeInputs(dict):
+    def to(self, device):
+        return self
+
+
+class SteppingModel:
+    """Decodes one token at a time like model.generate(): stopped rows are padded, the rest go on"""
+
+    device = "cpu"
+    token_delay = 0.02
+
+    class generation_config:
+        eos_token_id = 0
+
+    def __init__(self):
+        self.prefills = 0
+
+    def generate(self, input_ids, max_new_tokens=1, stopping_criteria=(), **kwargs):
+        self.prefills += 1
+        finished = np.zeros(input_ids.shape[0], dtype=bool)
+        for _ in range(max_new_tokens):
+            time.sleep(self.token_delay)
+            input_ids = np.concatenate([input_ids, np.where(finished, 0, 7)[:, None]], axis=1)
+            for criteria in stopping_criteria:
+                finished |= criteria(input_ids, None)
+            if finished.all():
+                break
+        return input_ids
+
+
+def test_rows_stop_at_their_own_deadlines():
+    """A mixed-deadline batch is prefilled once; every request returns by its own deadline"""
+    model = SteppingModel()
+    backend = TransformersBackend(model, SteppingProcessor(), max_batch_size=2, batch_window_ms=50, prefix_cache=False)
+    results = {}
+
+    def request(name, seconds):
+        start = time.monotonic()
+        text = backend.generate("prompt", max_new_tokens=100, deadline=start + seconds)
+        results[name] = (text, time.monotonic() - start)
+
+    try:
+        early = threading.Thread(target=request, args=("early", 0.2))
+        late = threading.Thread(target=request, args=("late", 0.5))
+        early.start(), late.start()
+        early.join(), late.join()
+
+        early_text, early_elapsed = results["early"]
+        late_text, late_elapsed = results["late"]
+        assert model.prefills == 1
+        assert early_text and early_elapsed < 0.2 + 0.1
+        assert len(late_text) > len(early_text) and late_elapsed < 0.5 + 0.1
+        assert len(late_text) <= 100
+
+        # Different budgets share a batch too; each row gets its own length
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            texts = list(executor.map(lambda budget: backend.generate("prompt", max_new_tokens=budget), (3, 5)))
+        assert texts == ["xxx", "xxxxx"]
+        assert model.prefills == 2
+    finally:
+        backend.scheduler.close()
+
+
+def test_fallback_answers():
+    """Partial answers say they are incomplete; excerpts cut articles at sentences"""
+    assert partial_answer("Изпитателният срок е до 6 месеца", "bg").startswith("Изпитателният срок е до 6 месеца ...")
+    assert "incomplete" in partial_answer("The probation period", "en")
+
+    content = "Първото изречение. " * 200
+    answer = excerpt_answer([{"number": "Чл. 70", "content": content}], "bg", max_tokens=20)
+    assert "### Чл. 70:\nПървото изречение." in answer
+    assert "[...]" in answer and len(answer) < len(content)
+
+    answer = excerpt_answer([{"number": "155", "content": "Short article."}], "en")
+    assert "### Article 155:\nShort article.\n" in answer and "[...]" not in answer
+
+
+def test_cache_threshold_override():
+    """A lower threshold for one lookup finds looser matches"""
+    vectors = {
+        "Колко дни е изпитателния срок?": [1.0, 0.0],
+        "Колко дълъг е изпитателния срок по договор?": [0.8, 0.6],
+    }
+    cache = SemanticAnswerCache(vectors.get, threshold=0.99)
+    cache.put("Колко дни е изпитателния срок?", {"answer": "6 месеца"})
+
+    assert cache.get("Колко дълъг е изпитателния срок по договор?") is None
+    assert cache.get("Колко дълъг е изпитателния срок по договор?", threshold=0.3) == {"answer": "6 месеца"}
+
+
+if __name__ == "__main__":
+    test_deadline()
+    test_remote_generation_stops_at_deadline()
+    test_queued_request_gives_up()
+    test_rows_stop_at_their_own_deadlines()
+    test_fallback_answers()
+    test_cache_threshold_override()
+    print("All deadline tests passed.")
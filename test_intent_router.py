@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the intent router.
+"""
+
+import os
+import json
+import tempfile
+
+from model.intent_router import IntentRouter, Topic, normalize
+
+
+def test_default_topics():
+    """The shipped intents file routes the usual questions"""
+    router = IntentRouter.from_file()
+
+    route = router.route("Колко дни е изпитателния срок?")
+    assert route.topics == ["probation"]
+    assert route.articles == ["70", "71"]
+
+    assert router.route("How many days of annual leave am I entitled to?").has("leave")
+    assert router.route("What happens if my employer doesn't pay my salary on time?").topics == ["salary"]
+
+    # Several topics, in the order of the intents file
+    route = router.route("Какво става, когато изтече изпитателният срок по трудовия договор?")
+    assert route.topics == ["probation", "expiry", "termination"]
+    assert route.has("termination") and route.has("expiry", "leave")
+    assert route.articles[:2] == ["70", "71"]
+
+    assert router.route("Добър ден").topics == []
+
+
+def test_matches_like_substring_search():
+    """Every term found by a substring scan is found by the automaton, and nothing else"""
+    topics = [
+        Topic("a", ("he", "she", "his", "hers")),
+        Topic("b", ("отпуск", "годишен отпуск")),
+        Topic("c", ("работно време",)),
+    ]
+    router = IntentRouter(topics)
+
+    questions = [
+        "ushers",
+        "his hers",
+        "Годишният отпуск, годишен  отпуска?",
+        "работно-време",
+        "нищо",
+    ]
+    for question in questions:
+        text = normalize(question)
+        expected = {topic.name: sorted(term for term in topic.terms if term in text) for topic in topics}
+        expected = {name: terms for name, terms in expected.items() if terms}
+        route = router.route(question)
+        assert {name: sorted(terms) for name, terms in route.matches.items()} == expected, question
+
+
+def test_load_from_file():
+    """Topics can be added in a data file, without code changes"""
+    with tempfile.NamedTemporaryFile("w", suffix=".json", encoding="utf-8", delete=False) as f:
+        json.dump({"topics": [
+            {"name": "maternity", "terms": ["майчинство", "maternity"], "articles": [163, "164"]},
+            {"name": "leave", "terms": ["отпуск"]},
+        ]}, f, ensure_ascii=False)
+
+    try:
+        router = IntentRouter.from_file(f.name)
+    finally:
+        os.unlink(f.name)
+    route = router.route("Отпуск по майчинство")
+    assert route.topics == ["maternity", "leave"]
+    assert route.articles == ["163", "164"]
+    assert router.topic("leave").articles == ()
+
+
+if __name__ == "__main__":
+    test_default_topics()
+    test_matches_like_substring_search()
+    test_load_from_file()
+    print("All intent router tests passed.")
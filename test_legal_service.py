@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test script for the web backend's service over the corpus or the JSON articles.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "backend"))
+
+import legal_service
+from legal_service import LegalService, get_service
+
+# Never loaded: the model is not ready in every test
+MODEL_PATH = "no-such-model"
+
+
+class WordEmbeddings:
+    """Bag-of-words vectors: a stand-in sentence embedding model"""
+
+    def embed_query(self, text):
+        vector = [0.0] * 64
+        for word in text.lower().split():
+            vector[sum(map(ord, word.strip("?.,"))) % 64] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def build_corpus(tmp_dir, embeddings=None):
+    """A corpus with two articles of the Labor Code; returns its paths"""
+    from database import HybridDatabaseManager, LegalDocument, LegalArticle
+
+    db_path, vector_db_path = str(Path(tmp_dir) / "legal.sqlite"), str(Path(tmp_dir) / "vectors")
+    manager = HybridDatabaseManager(db_path=db_path, vector_db_path=vector_db_path, embeddings=embeddings)
+    manager.add_document(LegalDocument(
+        id="kt", title="Кодекс на труда", document_type="code", source_url="",
+        articles=[
+            LegalArticle(id="kt70", law_id="kt", number="Чл. 70", content="Изпитателният срок е до 6 месеца."),
+            LegalArticle(id="kt155", law_id="kt", number="Чл. 155", content="Всеки работник има право на платен годишен отпуск."),
+        ]
+    ))
+    return db_path, vector_db_path
+
+
+def searches():
+    """Number of searches recorded by the vector search histogram"""
+    from monitoring import REGISTRY
+
+    for line in REGISTRY.render().splitlines():
+        if line.startswith("legal_vector_search_seconds_count"):
+            return float(line.split()[-1])
+    return 0.0
+
+
+def check_not_simulated(service):
+    """While the model isn't ready, answers quote the articles instead of a canned text"""
+    result = service.answer("Колко е изпитателният срок на договора?")
+    assert result["served_by"] == "extractive"
+    assert "Изпитателният срок" in result["answer"]
+    assert result["articles"] and result["articles"][0]["number"] == "70"
+    assert not result["cached"]
+
+    events = list(service.stream("Колко е изпитателният срок на договора?"))
+    assert events[0]["type"] == "articles" and events[0]["articles"][0]["number"] == "70"
+    assert events[-1]["type"] == "done" and events[-1]["served_by"] == "extractive"
+    assert "".join(event["text"] for event in events if event["type"] == "token") == events[-1]["answer"]
+
+
+def test_json_service():
+    """The JSON articles go through the same pipeline: fast path and excerpts"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = LegalService.from_json(MODEL_PATH, str(Path(tmp_dir) / "articles.json"))
+        assert service.backend == "json"
+        check_not_simulated(service)
+
+        result = service.answer("Какво гласи чл. 155?")
+        assert result["served_by"] == "fast_path"
+        assert [article["number"] for article in result["articles"]] == ["155"]
+        assert result["articles"][0]["title"] == "Право на платен годишен отпуск"
+        assert result["sources"] == [
+            {"title": "Право на платен годишен отпуск", "article": "Чл. 155", "relevance": "100.0%"}
+        ]
+
+        # Search hits are scored by the share of the question's words they contain
+        hits = service.db_manager.search_similar("изпитателният срок договора", columnar=True)
+        assert hits.article_numbers[0] == "Чл. 70"
+        assert 0.0 < hits.similarities[0] < 1.0
+
+
+def test_hybrid_service_and_articles():
+    """The corpus backend answers the same way; cited articles come with the retrieved texts"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = LegalService.create(MODEL_PATH, *build_corpus(tmp_dir))
+        assert service.backend == "hybrid"
+        before = searches()
+        check_not_simulated(service)
+        # Every search is timed, with or without collect_timings
+        assert searches() >= before + 2
+
+        # The texts aren't read again: the sources carry what retrieval loaded
+        def no_lookup(numbers):
+            raise AssertionError("the cited articles were read again")
+
+        service.db_manager.get_articles_by_number = no_lookup
+        result = service.answer("Колко е изпитателният срок на договора?")
+        assert all(set(source) == {"title", "article", "relevance"} for source in result["sources"])
+        assert {"number": "70", "title": "Кодекс на труда", "content": "Изпитателният срок е до 6 месеца."} in result["articles"]
+        assert len(result["articles"]) == len({(s["article"], s["title"]) for s in result["sources"]})
+
+        sources = [
+            {"title": "Кодекс на труда", "article": "Чл. 155", "content": "Всеки работник има право на платен годишен отпуск."},
+            {"title": "Кодекс на труда", "article": "Чл. 70", "content": "Изпитателният срок е до 6 месеца."},
+            {"title": "Кодекс на труда", "article": "Чл. 155", "content": "Всеки работник има право на платен годишен отпуск."},
+            {"title": "Кодекс на труда", "article": "Чл. 999"},
+        ]
+        assert service.articles(sources) == [
+            {"number": "155", "title": "Кодекс на труда", "content": "Всеки работник има право на платен годишен отпуск."},
+            {"number": "70", "title": "Кодекс на труда", "content": "Изпитателният срок е до 6 месеца."},
+        ]
+        assert service.answer("Колко е изпитателният срок?", include_articles=False)["articles"] == []
+
+
+def test_quantize_from_environment():
+    """GEMMA_QUANTIZE picks the quantization (4bit by default)"""
+    saved = os.environ.pop("GEMMA_QUANTIZE", None)
+    try:
+        assert legal_service._assistant_config()["quantize"] == "4bit"
+        os.environ["GEMMA_QUANTIZE"] = "none"
+        assert legal_service._assistant_config()["quantize"] == "none"
+    finally:
+        os.environ.pop("GEMMA_QUANTIZE", None)
+        if saved is not None:
+            os.environ["GEMMA_QUANTIZE"] = saved
+
+
+def test_hybrid_service_embeds_questions():
+    """The corpus's sentence embeddings key the answer cache too"""
+    embeddings = WordEmbeddings()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = LegalService.create(MODEL_PATH, *build_corpus(tmp_dir, embeddings), embeddings=embeddings)
+        assert service.db_manager.embeddings is embeddings
+        assert service.assistant.answer_cache.embed == embeddings.embed_query
+        check_not_simulated(service)
+
+        # Without a sentence model only exact questions can hit
+        hashed = build_corpus(os.path.join(tmp_dir, "hash"))
+        assert LegalService.create(MODEL_PATH, *hashed).assistant.answer_cache.embed is None
+
+
+def test_get_service_backends():
+    """LEGAL_BACKEND picks the corpus, the JSON articles or the corpus if it exists"""
+    saved = {name: getattr(legal_service, name) for name in (
+        "LEGAL_BACKEND", "LEGAL_DB_PATH", "LEGAL_VECTOR_DB_PATH", "LEGAL_JSON_PATH", "_service"
+    )}
+
+    def service_for(backend, db_path, vector_db_path):
+        legal_service.LEGAL_BACKEND = backend
+        legal_service.LEGAL_DB_PATH = db_path
+        legal_service.LEGAL_VECTOR_DB_PATH = vector_db_path
+        legal_service._service = None
+        return get_service(MODEL_PATH)
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            legal_service.LEGAL_JSON_PATH = str(Path(tmp_dir) / "articles.json")
+            corpus = build_corpus(tmp_dir)
+            empty = (str(Path(tmp_dir) / "empty.sqlite"), str(Path(tmp_dir) / "empty_vectors"))
+
+            assert service_for("auto", *corpus).backend == "hybrid"
+            assert service_for("hybrid", *corpus).backend == "hybrid"
+            assert service_for("json", *corpus).backend == "json"
+            assert service_for("auto", *empty).backend == "json"
+            try:
+                service_for("hybrid", *empty)
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError("LEGAL_BACKEND=hybrid started without a corpus")
+
+            # Created once per process
+            service = service_for("json", *corpus)
+            assert get_service(MODEL_PATH) is service
+    finally:
+        for name, value in saved.items():
+            setattr(legal_service, name, value)
+
+
+if __name__ == "__main__":
+    test_json_service()
+    test_hybrid_service_and_articles()
+    test_quantize_from_environment()
+    test_hybrid_service_embeds_questions()
+    test_get_service_backends()
+    print("All legal service tests passed.")
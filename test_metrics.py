@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the Prometheus metrics collectors.
+"""
+
+import threading
+
+from monitoring import MetricsRegistry
+
+
+def test_counter_sums_all_threads():
+    """Increments from many threads (including finished ones) are all counted"""
+    registry = MetricsRegistry()
+    counter = registry.counter("test_requests_total", "Requests", ("route",))
+
+    def work():
+        for _ in range(1000):
+            counter.labels("/api/query").inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counter.labels("/api/query").inc()
+    assert counter.labels("/api/query").value() == 8001
+    assert 'test_requests_total{route="/api/query"} 8001' in registry.render()
+
+
+def test_histogram_exposition():
+    """Buckets are cumulative and end with +Inf, followed by sum and count"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_latency_seconds histogram" in lines
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{le="1"} 3' in lines
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "test_latency_seconds_sum 4.05" in lines
+    assert "test_latency_seconds_count 4" in lines
+
+
+def test_gauge_and_registry():
+    """Gauges track in-progress work and names are registered once"""
+    registry = MetricsRegistry()
+    gauge = registry.gauge("test_in_flight", "In flight")
+    assert registry.gauge("test_in_flight", "In flight") is gauge
+
+    with gauge.track_inprogress():
+        assert "test_in_flight 1" in registry.render()
+    assert "test_in_flight 0" in registry.render()
+
+    try:
+        registry.counter("test_in_flight", "Clash")
+        assert False, "Registering a name with another type should fail"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_counter_sums_all_threads()
+    test_histogram_exposition()
+    test_gauge_and_registry()
+    print("All metrics tests passed.")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for the model lifecycle manager.
+"""
+
+import threading
+
+from model.model_manager import ModelManager, UNLOADED, READY, FAILED
+
+
+class FakeModel:
+    def __init__(self):
+        self.warmed_up = False
+
+
+def test_load_once_with_warmup():
+    """Concurrent loads run the loader once and warm the model up before it is ready"""
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return FakeModel()
+
+    def warmup(model):
+        model.warmed_up = True
+
+    manager = ModelManager("fake", loader, warmup)
+    assert manager.state == UNLOADED and manager.model is None
+
+    thread = manager.preload(background=True)
+    assert manager.preload(background=True) is thread
+    assert not manager.is_ready()
+
+    waiter = threading.Thread(target=manager.load)
+    waiter.start()
+    release.set()
+    thread.join(5)
+    waiter.join(5)
+
+    assert manager.wait_until_ready(1)
+    assert manager.state == READY
+    assert manager.model.warmed_up
+    assert len(calls) == 1
+    assert manager.status()["load_seconds"] is not None
+
+
+def test_failed_load_is_not_retried_implicitly():
+    """A failed load is remembered; only an explicit retry loads again"""
+    attempts = []
+
+    def loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ImportError("No module named 'torch'")
+        return FakeModel()
+
+    manager = ModelManager("flaky", loader)
+    assert manager.load() is False
+    assert manager.state == FAILED and "torch" in manager.error
+    assert manager.load() is False
+    assert len(attempts) == 1
+
+    assert manager.load(retry=True) is True
+    assert manager.error is None
+
+
+def test_shared_instance_per_name():
+    """Assistants using the same model share one manager"""
+    first = ModelManager.shared("shared-test", FakeModel)
+    second = ModelManager.shared("shared-test", lambda: None)
+    assert first is second
+    assert ModelManager.shared("other-test", FakeModel) is not first
+
+
+if __name__ == "__main__":
+    test_load_once_with_warmup()
+    test_failed_load_is_not_retried_implicitly()
+    test_shared_instance_per_name()
+    print("All model manager tests passed.")
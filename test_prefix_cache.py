@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for splitting prompts into a reusable prefix and the rest.
+(Generation from a cached prefix needs a model; see benchmarks/prefix_cache.py.)
+"""
+
+from model.prefix_cache import split_chat_template
+from model.backends import TransformersBackend
+from model.gemma_interface import LegalAssistant
+from model.prompts import SYSTEM_PROMPTS
+
+
+class GemmaStyleTemplate:
+    """Applies a chat template shaped like Gemma's (system prompt merged into the user turn)"""
+
+    chat_template = "gemma"
+
+    def apply_chat_template(self, messages, tokenize=False, add_generation_prompt=False):
+        system = messages[0]["content"]
+        user = messages[1]["content"]
+        text = f"<bos><start_of_turn>user\n{system}\n\n{user}<end_of_turn>\n"
+        if add_generation_prompt:
+            text += "<start_of_turn>model\n"
+        return text
+
+
+def test_split_chat_template():
+    """The prefix holds the system prompt only; prefix + rest is the full chat prompt"""
+    template = GemmaStyleTemplate()
+    messages = [
+        {"role": "system", "content": "Ти си асистент."},
+        {"role": "user", "content": "Контекст...\n\nВъпрос: Колко е изпитателният срок?"},
+    ]
+
+    prefix, rest = split_chat_template(template, messages[0]["content"], messages[1]["content"])
+
+    assert prefix + rest == template.apply_chat_template(messages, add_generation_prompt=True)
+    assert prefix == "<bos><start_of_turn>user\nТи си асистент.\n\n"
+    assert rest.startswith("Контекст")
+
+    # Every question in the same language shares the prefix
+    other_prefix, _ = split_chat_template(template, messages[0]["content"], "Друг въпрос")
+    assert other_prefix == prefix
+
+
+def test_backend_splits_prompt_at_prefix():
+    """Only prompts that really start with the prefix use the prefix cache"""
+    backend = TransformersBackend(None, None, batch_window_ms=0)
+    try:
+        assert backend._split_prompt("SYSTEM\nquestion", "SYSTEM\n") == ("SYSTEM\n", "question")
+        assert backend._split_prompt("other prompt", "SYSTEM\n") == ("", "other prompt")
+        assert backend._split_prompt("SYSTEM\nquestion", None) == ("", "SYSTEM\nquestion")
+    finally:
+        backend.scheduler.close()
+
+    backend = TransformersBackend(None, None, batch_window_ms=0, prefix_cache=False)
+    try:
+        assert backend.prefix_cache is None
+        assert backend._split_prompt("SYSTEM\nquestion", "SYSTEM\n") == ("", "SYSTEM\nquestion")
+    finally:
+        backend.scheduler.close()
+
+
+class RecordingPrefixCache:
+    """Records the prefixes warmed and whether the model lock was held"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.warmed = []
+
+    def warm(self, prefix):
+        self.warmed.append((prefix, self.backend.model_lock.locked()))
+
+
+def test_warmup_prefills_every_language():
+    """Loading the model prefills the chat-formatted system prompt of each language"""
+    backend = TransformersBackend(None, GemmaStyleTemplate(), batch_window_ms=0)
+    try:
+        backend.prefix_cache = RecordingPrefixCache(backend)
+        backend.warmup = lambda: None  # No model to run a generation with
+
+        assistant = LegalAssistant(db_manager=None, config={"preload_model": False})
+        assistant._warm_up(backend)
+
+        assert backend.prefix_cache.warmed == [
+            (f"<bos><start_of_turn>user\n{SYSTEM_PROMPTS[language]}\n\n", True)
+            for language in assistant.system_prompts
+        ]
+        assert set(assistant.system_prompts) == {"bg", "en"}
+
+        # Requests of a language start from exactly the warmed prefix
+        prefix, _ = split_chat_template(backend.processor, SYSTEM_PROMPTS["bg"], "Въпрос на потребителя: ...")
+        assert prefix in [warmed for warmed, _ in backend.prefix_cache.warmed]
+    finally:
+        backend.scheduler.close()
+
+
+if __name__ == "__main__":
+    test_split_chat_template()
+    test_backend_splits_prompt_at_prefix()
+    test_warmup_prefills_every_language()
+    print("All prefix cache tests passed.")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-language prompts and their chat formatting.
+"""
+
+from database import SearchResults
+from model.gemma_interface import LegalAssistant
+from model.prompts import SYSTEM_PROMPTS, chat_prompt
+
+
+class GemmaStyleTokenizer:
+    """Gemma-like chat template (system prompt merged into the user turn); one token per word"""
+
+    chat_template = "gemma"
+
+    def apply_chat_template(self, messages, tokenize=False, add_generation_prompt=False):
+        text = f"<bos><start_of_turn>user\n{messages[0]['content']}\n\n{messages[1]['content']}<end_of_turn>\n"
+        if add_generation_prompt:
+            text += "<start_of_turn>model\n"
+        return text
+
+    def encode(self, text, add_special_tokens=False):
+        return text.split()
+
+
+class RecordingModel:
+    """A loaded model that records the prompts it is asked to complete"""
+
+    def __init__(self):
+        self.processor = GemmaStyleTokenizer()
+        self.calls = []
+
+    def generate(self, prompt, prefix=None, **kwargs):
+        self.calls.append((prompt, prefix))
+        return "СЕКЦИЯ 1: Намерих следните приложими членове от Кодекса на труда: Член 70"
+
+    def generate_stream(self, prompt, prefix=None, **kwargs):
+        self.calls.append((prompt, prefix))
+        yield "SECTION 1: I found Article 155"
+
+
+class ReadyManager:
+    state = "ready"
+
+    def __init__(self, model):
+        self.model = model
+
+    def is_ready(self):
+        return True
+
+
+class Corpus:
+    def corpus_generation(self):
+        return "1"
+
+    def get_articles_by_number(self, numbers):
+        return []
+
+    def search_similar(self, query, n_results=5, filters=None, columnar=False):
+        return SearchResults.from_dicts([])
+
+
+def make_assistant():
+    assistant = LegalAssistant(db_manager=Corpus(), config={"preload_model": False, "latency_budget_s": 0})
+    model = RecordingModel()
+    assistant.model_manager = ReadyManager(model)
+    assistant._retrieve = lambda question, max_results, filters: [{
+        "content": "Изпитателният срок е до 6 месеца.",
+        "metadata": {"article_id": "a70", "law_id": "kt", "article_number": "Чл. 70", "law_title": "Кодекс на труда"},
+        "similarity": 0.9
+    }]
+    return assistant, model
+
+
+def test_bulgarian_question_gets_bulgarian_sections():
+    """A Bulgarian question is sent in the chat template with the Bulgarian system prompt and sections"""
+    assistant, model = make_assistant()
+    result = assistant.answer_question("Колко е изпитателният срок?")
+    assert result["served_by"] == "generated"
+    assert result["answer"].startswith("СЕКЦИЯ 1:")
+
+    prompt, prefix = model.calls[0]
+    assert prefix == f"<bos><start_of_turn>user\n{SYSTEM_PROMPTS['bg']}\n\n"
+    assert prompt.startswith(prefix) and prompt.endswith("<start_of_turn>model\n")
+    for section in ("СЕКЦИЯ 1:", "СЕКЦИЯ 2:", "СЕКЦИЯ 3:", "СЕКЦИЯ 4:"):
+        assert section in prompt
+    assert "SECTION 1:" not in prompt
+    assert prompt.index("Изпитателният срок е до 6 месеца.") < prompt.index("Въпрос на потребителя: Колко е изпитателният срок?")
+
+
+def test_english_question_streams_with_english_sections():
+    """An English question gets the English prompt; every question in a language shares the prefix"""
+    assistant, model = make_assistant()
+    events = list(assistant.stream_answer("How long is the probation period?"))
+    assert events[-1]["type"] == "done"
+
+    prompt, prefix = model.calls[0]
+    assert prefix == assistant._prompt_prefix("en")
+    assert SYSTEM_PROMPTS["en"] in prefix and "SECTION 4:" in prompt and "СЕКЦИЯ" not in prompt
+    assert assistant._build_prompt("What about annual leave?", "[Document 1]")[0] == prefix
+
+
+def test_without_chat_template():
+    """Without a chat template (no tokenizer yet) the system prompt is still the prefix"""
+    prefix, rest = chat_prompt(None, SYSTEM_PROMPTS["bg"], "Въпрос на потребителя: ?")
+    assert prefix == f"{SYSTEM_PROMPTS['bg']}\n\n" and rest == "Въпрос на потребителя: ?"
+
+
+if __name__ == "__main__":
+    test_bulgarian_question_gets_bulgarian_sections()
+    test_english_question_streams_with_english_sections()
+    test_without_chat_template()
+    print("All prompt tests passed.")
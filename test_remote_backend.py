@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for the remote generation backend against the local stand-in server.
+"""
+
+import threading
+
+from model.backends import RemoteCompletionsBackend, load_backend
+from model.http_pool import RemoteBackendError
+from model.standin_server import StandinServer, standin_completion
+
+
+def make_backend(server, **options):
+    """A remote backend for the stand-in server (no tokenizer needed)"""
+    return RemoteCompletionsBackend.load(
+        "standin",
+        base_url=server.url,
+        load_tokenizer=False,
+        **{"retries": 2, **options}
+    )
+
+
+def test_generate_reuses_connections():
+    """Sequential requests share one keep-alive connection"""
+    with StandinServer() as server:
+        backend = make_backend(server)
+        prompt = "Колко дни е изпитателния срок?"
+
+        for _ in range(3):
+            text = backend.generate(prompt, max_new_tokens=8)
+            assert text == "".join(standin_completion(prompt, 8))
+
+        assert server.requests == 3
+        assert server.connections == 1
+        assert backend.describe()["connections_opened"] == 1
+        backend.close()
+
+
+def test_stream_matches_blocking_answer():
+    """Streamed chunks add up to the blocking answer; the connection is reused afterwards"""
+    with StandinServer() as server:
+        backend = make_backend(server)
+        prompt = "Question: paid annual leave\nAnswer:"
+
+        chunks = list(backend.generate_stream(prompt, max_new_tokens=6))
+        assert len(chunks) == 6
+        assert "".join(chunks) == backend.generate(prompt, max_new_tokens=6)
+        assert server.connections == 1
+
+        # Stopping early closes the connection instead of returning it
+        stream = backend.generate_stream(prompt, max_new_tokens=6)
+        next(stream)
+        stream.close()
+        backend.generate(prompt, max_new_tokens=2)
+        assert server.connections == 2
+        backend.close()
+
+
+def test_retries_unavailable_server():
+    """503 answers are retried until the retries run out"""
+    with StandinServer() as server:
+        backend = make_backend(server, retries=2)
+        backend.pool.backoff_s = 0.0
+
+        server.fail_next = 2
+        assert backend.generate("a b c", max_new_tokens=3) == " Stand-in answer to:"
+        assert server.requests == 3
+
+        server.fail_next = 3
+        try:
+            backend.generate("a b c", max_new_tokens=3)
+            assert False, "expected RemoteBackendError"
+        except RemoteBackendError as e:
+            assert e.status == 503
+        backend.close()
+
+
+def test_concurrent_requests_are_limited():
+    """No more connections than max_connections, whatever the concurrency"""
+    with StandinServer(token_delay_s=0.005) as server:
+        backend = make_backend(server, max_connections=2)
+        results = []
+
+        def ask(i):
+            results.append(backend.generate(f"question {i}", max_new_tokens=4))
+
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == 8
+        assert server.requests == 8
+        assert server.connections <= 2
+        backend.close()
+
+
+def test_unreachable_server():
+    """A server that isn't running is reported as a RemoteBackendError after the retries"""
+    server = StandinServer()
+    url = server.url
+    server.server_close()
+
+    backend = RemoteCompletionsBackend.load("standin", base_url=url, retries=1, load_tokenizer=False)
+    backend.pool.backoff_s = 0.0
+    try:
+        backend.generate("question", max_new_tokens=4)
+        assert False, "expected RemoteBackendError"
+    except RemoteBackendError:
+        pass
+
+
+def test_load_backend_selects_remote():
+    """The remote backend is selected by name and ignores local model options"""
+    with StandinServer() as server:
+        backend = load_backend(
+            "standin",
+            backend="remote",
+            base_url=server.url,
+            quantize="4bit",
+            max_batch_size=8,
+            load_tokenizer=False
+        )
+        assert isinstance(backend, RemoteCompletionsBackend)
+        assert backend.model is None
+        backend.warmup()
+        backend.close()
+
+
+if __name__ == "__main__":
+    test_generate_reuses_connections()
+    test_stream_matches_blocking_answer()
+    test_retries_unavailable_server()
+    test_concurrent_requests_are_limited()
+    test_unreachable_server()
+    test_load_backend_selects_remote()
+    print("All remote backend tests passed.")
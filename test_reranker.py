@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the cross-encoder reranker.
+"""
+
+from database import SearchResults
+from model.reranker import CrossEncoderReranker
+
+
+def make_results(count):
+    """Candidates "Чл. 0" ... with contents loaded on demand"""
+    loaded = []
+
+    def loader(results, indices):
+        loaded.append(list(indices))
+        return [f"текст {results.article_numbers[i]}" for i in indices]
+
+    results = SearchResults(
+        ids=[f"a{i}_embedding" for i in range(count)],
+        article_ids=[f"a{i}" for i in range(count)],
+        law_ids=["labor"] * count,
+        article_numbers=[f"Чл. {i}" for i in range(count)],
+        law_titles=["Кодекс на труда"] * count,
+        similarities=[0.9 - i * 0.01 for i in range(count)],
+        content_loader=loader
+    )
+    return results, loaded
+
+
+class Scorer:
+    """Scores a passage by its article number (higher number, higher score)"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, pairs):
+        self.batches.append(len(pairs))
+        return [float(passage.split(".")[1]) for _, passage in pairs]
+
+
+def test_rerank_keeps_best_candidates():
+    """The best-scored candidates are kept, best first, with their scores"""
+    scorer = Scorer()
+    reranker = CrossEncoderReranker(max_candidates=10, batch_size=4, score_pairs=scorer)
+    results, loaded = make_results(15)
+
+    reranked = reranker.rerank("изпитателен срок", results, top_k=3)
+    assert reranked.article_numbers == ["Чл. 9", "Чл. 8", "Чл. 7"]
+    assert list(reranked.similarities) == [9.0, 8.0, 7.0]
+
+    # Only the capped candidates are loaded and scored, in batches
+    assert loaded == [list(range(10))]
+    assert scorer.batches == [4, 4, 2]
+
+
+def test_scores_are_cached():
+    """Pairs scored before come from the cache, also for reworded whitespace and case"""
+    scorer = Scorer()
+    reranker = CrossEncoderReranker(max_candidates=5, score_pairs=scorer)
+
+    reranker.rerank("Изпитателен срок", make_results(5)[0], top_k=2, generation="g1")
+    reranker.rerank("изпитателен  срок", make_results(8)[0], top_k=2, generation="g1")
+    assert scorer.batches == [5]
+    assert reranker.stats()["hits"] == 5
+
+    # A new corpus generation drops the cached scores
+    reranker.rerank("изпитателен срок", make_results(5)[0], top_k=2, generation="g2")
+    assert scorer.batches == [5, 5]
+
+    small = CrossEncoderReranker(max_candidates=5, cache_size=3, score_pairs=scorer)
+    small.rerank("отпуск", make_results(5)[0], top_k=2)
+    assert small.stats()["entries"] == 3
+
+
+def test_fallback_keeps_search_order():
+    """Without a working scorer the first fallback_k results are kept as they are"""
+    def broken(pairs):
+        raise RuntimeError("model crashed")
+
+    reranker = CrossEncoderReranker(score_pairs=broken)
+    results, _ = make_results(8)
+    kept = reranker.rerank("заплата", results, top_k=3, fallback_k=5)
+    assert kept.article_numbers == ["Чл. 0", "Чл. 1", "Чл. 2", "Чл. 3", "Чл. 4"]
+    assert list(kept.similarities) == list(results.similarities[:5])
+
+    assert len(reranker.rerank("заплата", SearchResults.empty(), top_k=3)) == 0
+
+
+if __name__ == "__main__":
+    test_rerank_keeps_best_candidates()
+    test_scores_are_cached()
+    test_fallback_keeps_search_order()
+    print("All reranker tests passed.")
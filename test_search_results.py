@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar search results container.
+"""
+
+from database import SearchResults
+
+
+def make_results(loader_calls):
+    """Build a small result set whose contents are loaded on demand"""
+    contents = {
+        "a1_embedding": "Чл. 70. Изпитателен срок ...",
+        "a2_embedding": "Чл. 71. Прекратяване ...",
+        "a3_embedding": "Чл. 155. Платен годишен отпуск ...",
+    }
+
+    def loader(results, rows):
+        ids = [results.ids[i] for i in rows]
+        loader_calls.append(ids)
+        return [contents.get(embedding_id) for embedding_id in ids]
+
+    return SearchResults(
+        ids=["a1_embedding", "a2_embedding", "a3_embedding"],
+        article_ids=["a1", "a2", "a3"],
+        law_ids=["law", "law", "law"],
+        article_numbers=["Чл. 70", "Чл. 71", "Чл. 155"],
+        law_titles=["Кодекс на труда"] * 3,
+        similarities=[0.9, 0.8, 0.7],
+        content_loader=loader
+    )
+
+
+def test_contents_are_loaded_lazily_in_batches():
+    """Contents are only fetched when needed, one batch per call"""
+    calls = []
+    results = make_results(calls)
+
+    assert len(results) == 3
+    assert results[0].article_number == "Чл. 70"
+    assert calls == []
+
+    results.load_contents([0, 2])
+    assert calls == [["a1_embedding", "a3_embedding"]]
+
+    assert results[0].content.startswith("Чл. 70.")
+    assert calls == [["a1_embedding", "a3_embedding"]]
+
+
+def test_legacy_conversion_round_trip():
+    """to_dicts() matches the legacy search_similar format"""
+    results = make_results([])
+    legacy = results.to_dicts()
+
+    assert legacy[1] == {
+        "content": "Чл. 71. Прекратяване ...",
+        "metadata": {
+            "article_id": "a2",
+            "law_id": "law",
+            "article_number": "Чл. 71",
+            "law_title": "Кодекс на труда"
+        },
+        "similarity": 0.8
+    }
+
+    rebuilt = SearchResults.from_dicts(legacy)
+    assert rebuilt.article_numbers == results.article_numbers
+    assert rebuilt.to_dicts() == legacy
+
+
+def test_take_keeps_order_and_loaded_contents():
+    """take() selects rows in the requested order"""
+    calls = []
+    results = make_results(calls)
+    results.load_contents([2])
+
+    subset = results.take([2, 0])
+    assert subset.article_numbers == ["Чл. 155", "Чл. 70"]
+    assert list(subset.similarities) == [0.7, 0.9]
+
+    subset.load_contents()
+    assert calls == [["a3_embedding"], ["a1_embedding"]]
+    assert not results.take([])
+
+
+if __name__ == "__main__":
+    test_contents_are_loaded_lazily_in_batches()
+    test_legacy_conversion_round_trip()
+    test_take_keeps_order_and_loaded_contents()
+    print("All search result tests passed.")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the speculative decoding stats.
+(Generation with a draft model needs two models; see benchmarks/generation.py.)
+"""
+
+from model.speculative import SpeculativeStats, SpeculativeDecoder, collect_speculation
+
+
+def test_acceptance_and_speedup():
+    """Every verification step adds one token; the other tokens are accepted draft tokens"""
+    stats = SpeculativeStats(
+        tokens=40,
+        draft_tokens=40,
+        verify_steps=10,
+        elapsed_s=1.0,
+        first_step_s=0.2,
+        verify_s=0.65
+    )
+
+    assert stats.accepted_tokens == 30
+    assert stats.acceptance_rate == 0.75
+
+    # Main model alone: the prefill plus 39 passes of 0.05s each
+    assert abs(stats.baseline_s - 2.15) < 1e-9
+    assert abs(stats.speedup - 2.15) < 1e-9
+
+    report = stats.as_dict()
+    assert report["accepted_tokens"] == 30
+    assert report["acceptance_rate"] == 0.75
+    assert report["speedup"] == 2.15
+
+
+def test_no_draft_tokens():
+    """A request the draft model never ran for reports no acceptance and no speedup"""
+    stats = SpeculativeStats(tokens=1, verify_steps=1, elapsed_s=0.3, first_step_s=0.3, verify_s=0.3)
+    assert stats.acceptance_rate == 0.0
+    assert stats.speedup == 1.0
+
+
+def test_forward_passes_are_counted_per_request():
+    """Passes made outside a request are ignored; reports reach collect_speculation"""
+    decoder = SpeculativeDecoder(object(), object(), draft_tokens=4, name="test")
+
+    # No request running in this thread
+    decoder._after("draft")
+
+    stats = SpeculativeStats()
+    decoder._local.stats = stats
+    for _ in range(2):
+        decoder._before("main")
+        for _ in range(4):
+            decoder._before("draft")
+            decoder._after("draft")
+        decoder._after("main")
+    decoder._local.stats = None
+    stats.tokens = 7
+    stats.elapsed_s = 0.1
+
+    assert stats.draft_tokens == 8
+    assert stats.verify_steps == 2
+    assert stats.accepted_tokens == 5
+
+    with collect_speculation() as reports:
+        decoder.record(stats)
+    assert reports == [stats]
+
+    totals = decoder.stats()
+    assert totals["requests"] == 1
+    assert totals["draft_tokens"] == 8
+
+
+if __name__ == "__main__":
+    test_acceptance_and_speedup()
+    test_no_draft_tokens()
+    test_forward_passes_are_counted_per_request()
+    print("All speculative decoding tests passed.")
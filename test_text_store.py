@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script for the memory-mapped article text store.
+"""
+
+import tempfile
+from pathlib import Path
+
+from database import ArticleTextStore
+
+
+def test_append_and_read_back():
+    """Texts are readable by text ID and by article ID"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = ArticleTextStore(str(Path(tmp_dir) / "article_text"))
+        assert len(store) == 0
+        assert store.get(0) is None
+
+        ids = store.append_many([
+            ("a1", "Чл. 70. Изпитателен срок"),
+            ("a2", ""),
+            ("a3", "Чл. 155. Платен годишен отпуск"),
+        ])
+        assert ids == [0, 1, 2]
+
+        assert store.get(0) == "Чл. 70. Изпитателен срок"
+        assert store.get(1) == ""
+        assert store.get_by_article_id("a3") == "Чл. 155. Платен годишен отпуск"
+        assert bytes(store.get_bytes(2)) == "Чл. 155. Платен годишен отпуск".encode("utf-8")
+        assert "a2" in store and "a4" not in store
+
+
+def test_second_reader_sees_appends_after_refresh():
+    """Another store instance on the same files picks up new texts"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = str(Path(tmp_dir) / "article_text")
+        writer = ArticleTextStore(path)
+        writer.append("a1", "първи")
+
+        reader = ArticleTextStore(path)
+        assert reader.get(0) == "първи"
+
+        writer.append("a2", "втори")
+        assert reader.id_for("a2") is None
+
+        reader.refresh()
+        assert reader.get(1) == "втори"
+        assert reader.id_for("a2") == 1
+
+
+def test_unknown_id_refreshes_once():
+    """A text ID appended by another instance is read without a manual refresh"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = str(Path(tmp_dir) / "article_text")
+        reader = ArticleTextStore(path)
+        assert reader.get(0) is None
+
+        writer = ArticleTextStore(path)
+        writer.append_many([("a1", "първи"), ("a2", "втори")])
+
+        assert reader.get(1) == "втори"
+        assert reader.get(0) == "първи"
+        assert reader.get_by_article_id("a2") == "втори"
+        assert reader.get(2) is None and len(reader) == 2
+
+
+def test_append_again_keeps_ids_aligned():
+    """An article appended twice maps to its newest text and later IDs stay correct"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = str(Path(tmp_dir) / "article_text")
+        store = ArticleTextStore(path)
+        store.append_many([("a", "first"), ("b", "second")])
+
+        assert store.append("a", "first again") == 2
+        assert store.append("c", "third") == 3
+        assert store.get_by_article_id("a") == "first again"
+        assert store.get_by_article_id("b") == "second"
+        assert store.get_by_article_id("c") == "third"
+        assert store.get(0) == "first"
+
+        # A reader opening the files gets the same mapping
+        reader = ArticleTextStore(path)
+        assert reader.id_for("a") == 2
+        assert reader.id_for("c") == 3
+        assert reader.get_by_article_id("b") == "second"
+
+
+def test_rolled_back_document_is_not_stored():
+    """A document whose SQL insert fails leaves nothing in the text store"""
+    from database import HybridDatabaseManager, LegalDocument, LegalArticle
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = HybridDatabaseManager(
+            db_path=str(Path(tmp_dir) / "legal.sqlite"),
+            vector_db_path=str(Path(tmp_dir) / "vectors")
+        )
+        manager.add_document(LegalDocument(
+            id="law", title="Кодекс на труда", document_type="code", source_url="",
+            articles=[LegalArticle(id="a1", law_id="law", number="Чл. 1", content="първи")]
+        ))
+
+        # Same document ID again: the SQL insert fails and is rolled back
+        try:
+            manager.add_document(LegalDocument(
+                id="law", title="Кодекс на труда", document_type="code", source_url="",
+                articles=[LegalArticle(id="a2", law_id="law", number="Чл. 2", content="втори")]
+            ))
+        except Exception:
+            pass
+        else:
+            raise AssertionError("duplicate document was accepted")
+
+        assert len(manager.text_store) == 1
+        assert "a2" not in manager.text_store
+
+        manager.add_document(LegalDocument(
+            id="law2", title="Закон", document_type="law", source_url="",
+            articles=[LegalArticle(id="a3", law_id="law2", number="Чл. 1", content="трети")]
+        ))
+        assert manager.text_store.get_by_article_id("a3") == "трети"
+        results = manager.collection.get(ids=["a3_embedding"], include=["metadatas"])
+        assert results["metadatas"][0]["text_id"] == manager.text_store.id_for("a3")
+
+
+if __name__ == "__main__":
+    test_append_and_read_back()
+    test_second_reader_sees_appends_after_refresh()
+    test_unknown_id_refreshes_once()
+    test_append_again_keeps_ids_aligned()
+    test_rolled_back_document_is_not_stored()
+    print("All text store tests passed.")
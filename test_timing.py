@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-stage timing instrumentation.
+"""
+
+import time
+import threading
+
+from monitoring import StageTimer, TimingRegistry, NULL_TIMER, REGISTRY, current_timer, wrap_context, timing_registry
+from model.batching import BatchScheduler
+
+
+def test_nested_stages_and_current_timer():
+    """Nested and repeated stages are recorded separately; the timer is current only inside"""
+    registry = TimingRegistry()
+    assert current_timer() is NULL_TIMER
+
+    with StageTimer(registry) as timer:
+        assert current_timer() is timer
+        with timer.stage("retrieval"):
+            with current_timer().stage("retrieval.embed"):
+                time.sleep(0.01)
+            with current_timer().stage("retrieval.embed"):
+                time.sleep(0.01)
+
+    assert current_timer() is NULL_TIMER
+    timings = timer.as_dict()
+    assert set(timings) == {"retrieval", "retrieval.embed", "total"}
+    assert timings["retrieval.embed"] >= 20
+    assert timings["retrieval"] >= timings["retrieval.embed"]
+    assert timings["total"] >= timings["retrieval"]
+
+
+def test_registry_aggregates_requests():
+    """The registry counts every duration of a stage across requests"""
+    registry = TimingRegistry()
+    for seconds in (0.01, 0.03):
+        with StageTimer(registry) as timer:
+            timer.add("generate", seconds)
+
+    stats = registry.snapshot()["generate"]
+    assert stats["count"] == 2
+    assert stats["total_ms"] == 40.0
+    assert stats["mean_ms"] == 20.0
+    assert stats["max_ms"] == 30.0
+    assert registry.snapshot()["total"]["count"] == 2
+
+    registry.reset()
+    assert registry.snapshot() == {}
+
+
+def test_stage_metrics_are_exported():
+    """The process-wide registry adds its stages to /metrics"""
+    with StageTimer() as timer:
+        timer.add("test.exported", 0.5)
+
+    assert timing_registry.snapshot()["test.exported"]["count"] >= 1
+    rendered = REGISTRY.render()
+    assert 'legal_stage_seconds_total{stage="test.exported"}' in rendered
+    assert 'legal_stage_calls_total{stage="test.exported"}' in rendered
+
+
+def test_other_threads_need_wrap_context():
+    """A plain thread doesn't see the request's timer, one bound with wrap_context does"""
+    seen = {}
+
+    def work(name):
+        seen[name] = current_timer()
+        with current_timer().stage(f"thread.{name}"):
+            pass
+
+    with StageTimer(TimingRegistry()) as timer:
+        plain = threading.Thread(target=work, args=("plain",))
+        bound = threading.Thread(target=wrap_context(work), args=("bound",))
+        plain.start(), bound.start()
+        plain.join(), bound.join()
+
+    assert seen["plain"] is NULL_TIMER
+    assert seen["bound"] is timer
+    assert "thread.bound" in timer.as_dict()
+    assert "thread.plain" not in timer.as_dict()
+
+
+def test_batch_stages_go_to_the_request():
+    """Stages recorded by the batch worker thread land in the submitting request's timer"""
+    def run_batch(key, items):
+        with current_timer().stage("generate.batch"):
+            return [item * 2 for item in items]
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=1, batch_window_ms=0, name="timing-test")
+    try:
+        with StageTimer(TimingRegistry()) as timer:
+            assert scheduler.run(21, timeout=5) == 42
+    finally:
+        scheduler.close()
+
+    assert "generate.batch" in timer.as_dict()
+
+
+if __name__ == "__main__":
+    test_nested_stages_and_current_timer()
+    test_registry_aggregates_requests()
+    test_stage_metrics_are_exported()
+    test_other_threads_need_wrap_context()
+    test_batch_stages_go_to_the_request()
+    print("All timing tests passed.")
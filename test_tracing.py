@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for request tracing.
+"""
+
+import time
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from monitoring import Tracer, JsonlExporter
+from monitoring.trace_report import load_traces, format_trace
+import monitoring.tracing as tracing
+
+
+def _tracer(tmp_dir, **kwargs):
+    path = str(Path(tmp_dir) / "traces.jsonl")
+    return Tracer(JsonlExporter(path), **kwargs), path
+
+
+def test_nested_spans_form_one_trace():
+    """Child spans share the trace ID and point at their parent"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tracer, path = _tracer(tmp_dir)
+        with tracer.span("request", route="/api/query") as root:
+            with tracer.span("search"):
+                pass
+            with tracer.span("generate") as generate:
+                generate.set_attribute("tokens", 12)
+
+        traces = load_traces(path)
+        assert list(traces) == [root.trace_id]
+        spans = {s["name"]: s for s in traces[root.trace_id]}
+        assert spans["request"]["parent_id"] is None
+        assert spans["search"]["parent_id"] == spans["request"]["span_id"]
+        assert spans["generate"]["attributes"] == {"tokens": 12}
+        assert "generate" in format_trace(traces[root.trace_id])
+
+
+def test_context_propagates_to_worker_threads():
+    """Spans created through wrap_context in an executor join the request's trace"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tracer, path = _tracer(tmp_dir)
+        original = tracing.tracer
+        tracing.tracer = tracer
+        try:
+            def work(i):
+                with tracing.span("worker", index=i):
+                    pass
+
+            with tracer.span("request") as root:
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    list(executor.map(tracing.wrap_context(work), range(3)))
+        finally:
+            tracing.tracer = original
+
+        spans = load_traces(path)[root.trace_id]
+        workers = [s for s in spans if s["name"] == "worker"]
+        assert len(workers) == 3
+        assert all(s["parent_id"] == root.span_id for s in workers)
+
+
+def test_sampling_and_slow_traces():
+    """Unsampled requests are dropped unless they are slower than slow_ms"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tracer, path = _tracer(tmp_dir, sample_rate=0.0)
+        with tracer.span("request"):
+            with tracer.span("search"):
+                pass
+        assert not Path(path).exists()
+
+        tracer.slow_ms = 5
+        with tracer.span("fast"):
+            pass
+        with tracer.span("slow"):
+            with tracer.span("child"):
+                time.sleep(0.01)
+
+        names = sorted(s["name"] for spans in load_traces(path).values() for s in spans)
+        assert names == ["child", "slow"]
+
+
+if __name__ == "__main__":
+    test_nested_spans_form_one_trace()
+    test_context_propagates_to_worker_threads()
+    test_sampling_and_slow_traces()
+    print("All tracing tests passed.")